@@ -13,7 +13,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 # Import Base and all models
 from utils.database import Base
-from models import User  # noqa: F401 - Import needed for metadata
+from models import User, CrmEntityCache, CrmOAuthToken, CrmIndexSnapshot  # noqa: F401 - Import needed for metadata
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
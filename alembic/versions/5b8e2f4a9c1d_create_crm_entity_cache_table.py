@@ -0,0 +1,38 @@
+"""create_crm_entity_cache_table
+
+Revision ID: 5b8e2f4a9c1d
+Revises: c36d123f1f35
+Create Date: 2026-10-19 09:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2f4a9c1d'
+down_revision: Union[str, Sequence[str], None] = 'c36d123f1f35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create shared cache table for CRM entity details."""
+    op.create_table(
+        'crm_entity_cache',
+        sa.Column('crm', sa.String(50), primary_key=True),
+        sa.Column('entity_type', sa.String(50), primary_key=True),
+        sa.Column('entity_id', sa.String(255), primary_key=True),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+    
+    op.create_index('ix_crm_entity_cache_expires_at', 'crm_entity_cache', ['expires_at'])
+
+
+def downgrade() -> None:
+    """Drop crm_entity_cache table."""
+    op.drop_index('ix_crm_entity_cache_expires_at', table_name='crm_entity_cache')
+    op.drop_table('crm_entity_cache')
@@ -0,0 +1,33 @@
+"""create_crm_oauth_tokens_table
+
+Revision ID: 8d3a6c1e7f20
+Revises: 5b8e2f4a9c1d
+Create Date: 2026-10-19 14:03:27.418652
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3a6c1e7f20'
+down_revision: Union[str, Sequence[str], None] = '5b8e2f4a9c1d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create shared access token table for OAuth CRMs (Zoho)."""
+    op.create_table(
+        'crm_oauth_tokens',
+        sa.Column('key', sa.String(255), primary_key=True),
+        sa.Column('access_token', sa.Text(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+
+
+def downgrade() -> None:
+    """Drop crm_oauth_tokens table."""
+    op.drop_table('crm_oauth_tokens')
@@ -0,0 +1,33 @@
+"""create_crm_index_snapshots_table
+
+Revision ID: e41f9b27c5d3
+Revises: 8d3a6c1e7f20
+Create Date: 2026-10-19 16:41:08.227519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41f9b27c5d3'
+down_revision: Union[str, Sequence[str], None] = '8d3a6c1e7f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create persisted search index snapshots (Zoho lead index)."""
+    op.create_table(
+        'crm_index_snapshots',
+        sa.Column('key', sa.String(255), primary_key=True),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('record_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+    )
+
+
+def downgrade() -> None:
+    """Drop crm_index_snapshots table."""
+    op.drop_table('crm_index_snapshots')
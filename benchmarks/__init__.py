@@ -0,0 +1,4 @@
+"""
+Adizon - Benchmarks
+Offline-Benchmarks mit lokalen Stand-ins für LLM, CRM und Chat-APIs.
+"""
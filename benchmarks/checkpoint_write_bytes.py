@@ -0,0 +1,147 @@
+"""
+Benchmark: Checkpoint Write-Amplification
+Vergleicht die pro Turn geschriebenen Checkpoint-Bytes für die
+Persistence-Modi full / exit / latest (siehe utils/checkpointing.py).
+
+Läuft komplett offline:
+- Nodes werden durch Stubs ersetzt (kein LLM, kein CRM, keine DB)
+- InMemorySaver zählt die serialisierten Bytes, die der
+  AsyncPostgresSaver in checkpoints/checkpoint_blobs/checkpoint_writes
+  schreiben würde
+
+Usage:
+    python benchmarks/checkpoint_write_bytes.py [--turns 30]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CRM_SYSTEM", "MOCK")
+
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+
+import graph.builder as builder
+from utils.checkpointing import PERSISTENCE_MODES, get_invoke_kwargs
+from benchmarks.stubs.checkpoint_saver import ByteCountingSaver
+
+
+# === STUB NODES ===
+
+def stub_auth(state):
+    return {"user": {"id": "bench-user", "name": "Bench User", "is_approved": True}}
+
+
+def stub_router(state):
+    return {"session_state": "ACTIVE"}
+
+
+def stub_route_decision(state):
+    return "crm"
+
+
+def stub_crm(state):
+    """Simuliert einen ReAct-Durchlauf: Tool-Call, Tool-Result, Antwort"""
+    turn = len(state.get("messages", []))
+    action = {"entity_type": "task", "entity_id": f"task-{turn}", "action": "create"}
+    return {
+        "messages": [
+            AIMessage(content="", tool_calls=[{
+                "name": "create_task",
+                "args": {"title": f"Follow-up {turn}", "body": "Angebot nachfassen " * 5},
+                "id": f"call-{turn}",
+            }]),
+            ToolMessage(content=f"✅ Aufgabe 'Follow-up {turn}' erstellt (ID: task-{turn}).", tool_call_id=f"call-{turn}"),
+            AIMessage(content="Erledigt! Ich habe die Aufgabe angelegt und mit dem Kontakt verknüpft. " * 3),
+        ],
+        "undo_stack": {"push": [action]},
+        "last_action_context": action,
+    }
+
+
+def stub_chat(state):
+    return {"messages": [AIMessage(content="Hallo!")]}
+
+
+def stub_session_guard(state):
+    return {"session_state": "ACTIVE"}
+
+
+def build_stub_graph(checkpointer):
+    """Kompiliert den echten Graph-Aufbau mit Stub-Nodes"""
+    originals = {}
+    stubs = {
+        "auth_node": stub_auth,
+        "router_node": stub_router,
+        "route_decision": stub_route_decision,
+        "chat_node": stub_chat,
+        "crm_node": stub_crm,
+        "session_guard_node": stub_session_guard,
+    }
+    for name, stub in stubs.items():
+        originals[name] = getattr(builder, name)
+        setattr(builder, name, stub)
+    try:
+        return builder.build_graph(checkpointer=checkpointer)
+    finally:
+        for name, original in originals.items():
+            setattr(builder, name, original)
+
+
+# === BENCHMARK ===
+
+def run_mode(persistence_mode: str, turns: int) -> dict:
+    saver = ByteCountingSaver()
+    graph = build_stub_graph(saver)
+    invoke_kwargs = get_invoke_kwargs(graph, persistence_mode)
+    thread_id = "telegram:bench"
+    config = {"configurable": {"thread_id": thread_id}}
+
+    for i in range(turns):
+        graph.invoke(
+            {
+                "messages": [HumanMessage(content=f"Erstelle eine Aufgabe für Kunde {i}")],
+                "user_id": thread_id,
+                "platform": "telegram",
+                "chat_id": "bench",
+                "session_state": "IDLE",
+                "dialog_state": {},
+                "last_action_context": {},
+            },
+            config=config,
+            **invoke_kwargs,
+        )
+        if persistence_mode == "latest":
+            saver.prune(thread_id)
+
+    return {
+        "mode": persistence_mode,
+        "checkpoints_per_turn": saver.checkpoints_written / turns,
+        "bytes_per_turn": saver.bytes_written / turns,
+        "retained_bytes": saver.retained_bytes(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint Write-Amplification Benchmark")
+    parser.add_argument("--turns", type=int, default=30, help="Anzahl Turns pro Modus")
+    args = parser.parse_args()
+
+    print(f"\n📊 Checkpoint Write Benchmark ({args.turns} Turns pro Modus)\n")
+    results = [run_mode(mode, args.turns) for mode in PERSISTENCE_MODES]
+    baseline = results[0]["bytes_per_turn"]
+
+    print(f"\n{'Mode':<8} {'Ckpts/Turn':>11} {'KB/Turn':>10} {'vs full':>9} {'Retained KB':>12}")
+    print("-" * 54)
+    for r in results:
+        ratio = r["bytes_per_turn"] / baseline if baseline else 0
+        print(
+            f"{r['mode']:<8} {r['checkpoints_per_turn']:>11.1f} "
+            f"{r['bytes_per_turn'] / 1024:>10.1f} {ratio:>8.0%} "
+            f"{r['retained_bytes'] / 1024:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
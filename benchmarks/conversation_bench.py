@@ -0,0 +1,355 @@
+"""
+Benchmark: Offline Conversation Harness
+Treibt build_graph() mit geskripteten Multi-Turn-Konversationen aus
+benchmarks/scenarios/*.yaml - komplett ohne Live-Services:
+
+- Fake LLM (ChatOpenAI-kompatibel, deterministisch, konfigurierbare Latenz)
+- Fake Twenty / Fake Zoho (In-Memory REST Stand-ins)
+- SQLite statt Postgres für die User-DB (Auth-Node läuft unverändert)
+- ByteCountingSaver statt AsyncPostgresSaver
+
+Report pro Turn: LLM-Calls, Prompt-Tokens, Tool-Calls, CRM-Requests,
+Checkpoint-Bytes und Latenz (p50/p95).
+
+Regression-Gate:
+    python benchmarks/conversation_bench.py --json baseline.json
+    python benchmarks/conversation_bench.py --baseline baseline.json   # Exit 1 bei Regression
+
+Usage:
+    python benchmarks/conversation_bench.py [--crm twenty|zoho] [--llm-latency-ms 50]
+        [--crm-records 200] [--mode full|exit|latest] [--repeat 3]
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+import yaml
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.stubs import (
+    StubServer,
+    FakeLLM,
+    create_llm_app,
+    TwentyStore,
+    create_twenty_app,
+    ZohoStore,
+    create_zoho_app,
+    ByteCountingSaver,
+)
+
+SCENARIO_DIR = Path(__file__).resolve().parent / "scenarios"
+
+# Metriken, die für das Regression-Gate verglichen werden (Mittelwert pro Turn)
+DETERMINISTIC_METRICS = ("llm_calls", "prompt_tokens", "tool_calls", "crm_requests", "checkpoint_bytes")
+LATENCY_METRICS = ("latency_p50_ms", "latency_p95_ms")
+
+
+# === HELPERS ===
+
+def percentile(values: list[float], pct: float) -> float:
+    """Perzentil mit linearer Interpolation (pct in 0..100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def load_scenarios(pattern: str, crm: str) -> list[dict]:
+    """Lädt Szenarien (Dateien mit _ Prefix sind Fixtures)"""
+    scenarios = []
+    for path in sorted(glob.glob(pattern)):
+        if Path(path).name.startswith("_"):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            scenario = yaml.safe_load(f)
+        allowed = scenario.get("crm")
+        if allowed and crm not in allowed:
+            print(f"⏭️ Skip {scenario['name']} (nur für {allowed})")
+            continue
+        scenarios.append(scenario)
+    return scenarios
+
+
+def load_fixtures() -> dict:
+    path = SCENARIO_DIR / "_fixtures.yaml"
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def seed_crm(crm: str, store, fixtures: dict, scenarios: list[dict], synthetic: int):
+    """Seed CRM Stand-in mit gemeinsamen + Szenario-Fixtures + synthetischen Datensätzen"""
+    all_fixtures = [fixtures] + [s.get("fixtures", {}) for s in scenarios]
+    for fx in all_fixtures:
+        if crm == "twenty":
+            data = fx.get("twenty", {})
+            store.seed(people=data.get("people"), companies=data.get("companies"))
+        else:
+            store.seed(leads=fx.get("zoho", {}).get("leads"))
+    if synthetic:
+        if crm == "twenty":
+            store.seed_synthetic(n_people=synthetic, n_companies=max(1, synthetic // 10))
+        else:
+            store.seed_synthetic(n_leads=synthetic)
+
+
+def configure_environment(crm: str, llm_url: str, crm_url: str, db_path: str, mode: str):
+    """Setzt die Env-Variablen, BEVOR graph/tools importiert werden"""
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "CRM_SYSTEM": crm.upper(),
+        "BASIC_LLM_URL": f"{llm_url}/v1",
+        "BASIC_LLM_MODEL_NAME": "fake-llm",
+        "BASIC_LLM_KEY": "bench",
+        "TWENTY_API_URL": crm_url,
+        "TWENTY_API_KEY": "bench",
+        "ZOHO_CLIENT_ID": "bench",
+        "ZOHO_CLIENT_SECRET": "bench",
+        "ZOHO_REFRESH_TOKEN": "bench",
+        "ZOHO_API_URL": crm_url,
+        "ZOHO_ACCOUNTS_URL": crm_url,
+        "CHECKPOINT_MODE": mode,
+    })
+
+
+def init_user_db(user_ids: list[str]):
+    """Legt die Benchmark-User freigeschaltet in der User-DB an (idempotent)"""
+    from utils.database import Base, SessionLocal, engine
+    from models.user import User
+    from repositories.user_repository import UserRepository
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        repo = UserRepository(db)
+        for i, user_id in enumerate(sorted(set(user_ids))):
+            platform, platform_id = user_id.split(":", 1)
+            if repo.get_user_by_platform_id(platform, platform_id):
+                continue
+            user = User(
+                email=f"bench-{platform}-{platform_id}@adizon.test",
+                name=f"Bench User {i}",
+                is_approved=True,
+                crm_display_name=f"Bench {i}",
+                **{f"{platform}_id": platform_id},
+            )
+            db.add(user)
+        db.commit()
+    finally:
+        db.close()
+
+
+def initial_state_for(user_id: str, text: str) -> dict:
+    """Initial State wie in server.py webhook()"""
+    from langchain_core.messages import HumanMessage
+
+    return {
+        "messages": [HumanMessage(content=text)],
+        "user": None,
+        "user_id": user_id,
+        "platform": user_id.split(":", 1)[0],
+        "chat_id": user_id.split(":", 1)[-1],
+        "session_state": "IDLE",
+        "dialog_state": {},
+        "last_action_context": {},
+    }
+
+
+# === BENCHMARK ===
+
+async def run_scenario(graph, saver: ByteCountingSaver, llm: FakeLLM, store, scenario: dict,
+                       invoke_kwargs: dict, mode: str, thread_suffix: str = "") -> list[dict]:
+    """Spielt ein Szenario Turn für Turn ab und misst jeden Turn"""
+    user_id = scenario["user_id"]
+    config = {"configurable": {"thread_id": f"{user_id}{thread_suffix}"}}
+
+    llm.reset_script()
+    for turn in scenario["turns"]:
+        llm.register_turn(turn["user"], turn)
+
+    turns = []
+    for index, turn in enumerate(scenario["turns"]):
+        llm_before = llm.call_count()
+        crm_before = store.request_count()
+        bytes_before = saver.bytes_written
+
+        started = time.perf_counter()
+        error = None
+        try:
+            await graph.ainvoke(initial_state_for(user_id, turn["user"]), config=config, **invoke_kwargs)
+        except Exception as e:
+            error = str(e)
+            print(f"❌ {scenario['name']} Turn {index + 1}: {e}")
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        if mode == "latest":
+            saver.prune(config["configurable"]["thread_id"])
+
+        calls = llm.calls_since(llm_before)
+        turns.append({
+            "turn": index + 1,
+            "user": turn["user"],
+            "llm_calls": len(calls),
+            "llm_calls_by_kind": dict(Counter(c["kind"] for c in calls)),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "completion_tokens": sum(c["completion_tokens"] for c in calls),
+            "tool_calls": sum(c["tool_calls"] for c in calls),
+            "crm_requests": store.request_count() - crm_before,
+            "checkpoint_bytes": saver.bytes_written - bytes_before,
+            "latency_ms": latency_ms,
+            "error": error,
+        })
+    return turns
+
+
+def summarize(turns: list[dict]) -> dict:
+    """Mittelwerte pro Turn + Latenz-Perzentile"""
+    n = len(turns) or 1
+    summary = {"turns": len(turns), "errors": sum(1 for t in turns if t["error"])}
+    for metric in DETERMINISTIC_METRICS + ("completion_tokens",):
+        summary[metric] = sum(t[metric] for t in turns) / n
+    latencies = [t["latency_ms"] for t in turns]
+    summary["latency_p50_ms"] = percentile(latencies, 50)
+    summary["latency_p95_ms"] = percentile(latencies, 95)
+    return summary
+
+
+def print_report(results: dict):
+    header = f"{'Scenario':<24} {'Turns':>5} {'LLM':>5} {'PromptTok':>10} {'Tools':>6} {'CRM':>5} {'CkptKB':>7} {'p50ms':>7} {'p95ms':>7}"
+    print("\n📊 Conversation Benchmark (Mittelwerte pro Turn)\n")
+    print(header)
+    print("-" * len(header))
+    rows = list(results["scenarios"].items()) + [("OVERALL", {"summary": results["overall"]})]
+    for name, data in rows:
+        s = data["summary"]
+        print(
+            f"{name:<24} {s['turns']:>5} {s['llm_calls']:>5.1f} {s['prompt_tokens']:>10.0f} "
+            f"{s['tool_calls']:>6.1f} {s['crm_requests']:>5.1f} {s['checkpoint_bytes'] / 1024:>7.1f} "
+            f"{s['latency_p50_ms']:>7.0f} {s['latency_p95_ms']:>7.0f}"
+        )
+    if results["overall"]["errors"]:
+        print(f"\n⚠️ {results['overall']['errors']} Turns mit Fehlern")
+
+
+def compare_to_baseline(overall: dict, baseline: dict, tolerance: float, latency_tolerance: float) -> list[str]:
+    """Vergleicht mit einem früheren --json Report. Gibt Regressionen zurück."""
+    base = baseline.get("overall", {})
+    regressions = []
+    checks = [(m, tolerance) for m in DETERMINISTIC_METRICS] + [(m, latency_tolerance) for m in LATENCY_METRICS]
+    for metric, tol in checks:
+        old, new = base.get(metric), overall.get(metric)
+        if old is None or new is None:
+            continue
+        limit = old * (1 + tol)
+        status = "❌" if new > limit and new - old > 1e-9 else "✅"
+        print(f"   {status} {metric:<18} {old:>10.1f} -> {new:>10.1f} (max {limit:.1f})")
+        if status == "❌":
+            regressions.append(metric)
+    if overall.get("errors", 0) > base.get("errors", 0):
+        regressions.append("errors")
+    return regressions
+
+
+async def run_benchmark(args) -> dict:
+    llm = FakeLLM(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms, seed=args.seed)
+    if args.crm == "twenty":
+        store = TwentyStore(latency_ms=args.crm_latency_ms)
+        crm_app = create_twenty_app(store)
+    else:
+        store = ZohoStore(latency_ms=args.crm_latency_ms)
+        crm_app = create_zoho_app(store)
+
+    llm_server = StubServer(create_llm_app(llm)).start()
+    crm_server = StubServer(crm_app).start()
+    tmp_dir = tempfile.mkdtemp(prefix="adizon-bench-")
+
+    try:
+        configure_environment(args.crm, llm_server.base_url, crm_server.base_url,
+                              os.path.join(tmp_dir, "users.db"), args.mode)
+
+        scenarios = load_scenarios(args.scenarios, args.crm)
+        if not scenarios:
+            raise SystemExit("❌ Keine Szenarien gefunden")
+        seed_crm(args.crm, store, load_fixtures(), scenarios, args.crm_records)
+        init_user_db([s["user_id"] for s in scenarios])
+
+        # Erst jetzt importieren - Adapter/LLM lesen die Env beim Import
+        from graph.builder import build_graph
+        from utils.checkpointing import get_invoke_kwargs
+
+        results = {"config": vars(args).copy(), "scenarios": {}}
+        all_turns = []
+        for repetition in range(args.repeat):
+            saver = ByteCountingSaver()
+            graph = build_graph(checkpointer=saver)
+            invoke_kwargs = get_invoke_kwargs(graph, args.mode)
+
+            for scenario in scenarios:
+                print(f"\n▶️ {scenario['name']} (Run {repetition + 1}/{args.repeat})")
+                turns = await run_scenario(graph, saver, llm, store, scenario, invoke_kwargs,
+                                           args.mode, thread_suffix=f"#{repetition}")
+                entry = results["scenarios"].setdefault(scenario["name"], {"turns": []})
+                entry["turns"].extend(turns)
+                all_turns.extend(turns)
+
+        for entry in results["scenarios"].values():
+            entry["summary"] = summarize(entry["turns"])
+        results["overall"] = summarize(all_turns)
+        return results
+    finally:
+        llm_server.stop()
+        crm_server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adizon Offline Conversation Benchmark")
+    parser.add_argument("--scenarios", default=str(SCENARIO_DIR / "*.yaml"), help="Glob für Szenario-Dateien")
+    parser.add_argument("--crm", choices=["twenty", "zoho"], default="twenty")
+    parser.add_argument("--mode", choices=["full", "exit", "latest"], default="full", help="Checkpoint Persistence Mode")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--crm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--crm-records", type=int, default=200, help="Synthetische CRM-Datensätze")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Report als JSON speichern")
+    parser.add_argument("--baseline", help="JSON Report zum Vergleich (Regression-Gate)")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Erlaubte Verschlechterung deterministischer Metriken")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25, help="Erlaubte Verschlechterung der Latenz")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args))
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Report gespeichert: {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n🔍 Vergleich mit Baseline {args.baseline}:")
+        regressions = compare_to_baseline(results["overall"], baseline, args.tolerance, args.latency_tolerance)
+        if regressions:
+            print(f"\n❌ Regression: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ Keine Regression")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: Fuzzy-Ranking Schleife vs. vektorisiert
+Vergleicht die CPU-Zeit pro Suche für 1k / 10k / 100k Kandidaten:
+
+- loop:    _fuzzy_match pro Datensatz (Name + Email), wie vor tools/crm/fuzzy_rank.py
+- cdist:   CandidateColumns.scores (rapidfuzz.process.cdist), 1 Thread
+- cdist-N: wie cdist, mit FUZZY_WORKERS Threads
+
+Die Spalten werden einmal aufgebaut (wie im Index-Cache) und zählen nicht zur Suche.
+Läuft komplett offline (synthetische Kontakte).
+
+Usage:
+    python benchmarks/fuzzy_rank_bench.py [--sizes 1000,10000,100000] [--queries 5] [--workers -1]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.fuzzy_rank import CandidateColumns
+from tools.crm.twenty_adapter import TwentyCRM
+
+FIRST_NAMES = ["Thomas", "Anna", "Jürgen", "Lisa", "Max", "Sophie", "Lukas", "Marie", "Felix", "Laura"]
+LAST_NAMES = ["Braun", "Schmidt", "Müller", "Weber", "Fischer", "Wagner", "Becker", "Hoffmann", "Koch", "Richter"]
+QUERIES = ["Thomas Braun", "Tomas Brun", "schmidt", "lisa.weber", "Jürgen Müller 42", "koch"]
+
+
+def make_people(count: int, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    people = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        people.append({
+            "id": f"p-{i}",
+            "name": {"firstName": first, "lastName": f"{last} {i}"},
+            "emails": {"primaryEmail": f"{first}.{last}{i}@example.com".lower()},
+        })
+    return people
+
+
+def full_name(p: dict) -> str:
+    return f"{p['name']['firstName']} {p['name']['lastName']}"
+
+
+def loop_search(query: str, people: list[dict]) -> int:
+    """Alte Variante: drei Scorer pro Datensatz in Python"""
+    hits = 0
+    for p in people:
+        name_match, _ = TwentyCRM._fuzzy_match(None, query, full_name(p), threshold=70)
+        email_match, _ = TwentyCRM._fuzzy_match(None, query, p["emails"]["primaryEmail"], threshold=75)
+        hits += name_match or email_match
+    return hits
+
+
+def vector_search(query: str, columns: CandidateColumns) -> int:
+    name_scores = columns.scores(query, "name", score_cutoff=70)
+    email_scores = columns.scores(query, "email", score_cutoff=70)
+    return int(((name_scores >= 70) | (email_scores >= 75)).sum())
+
+
+def timed(func, queries: list[str]) -> tuple[float, list]:
+    started = time.perf_counter()
+    results = [func(q) for q in queries]
+    return (time.perf_counter() - started) * 1000 / len(queries), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzzy-Ranking Benchmark (Schleife vs. cdist)")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Kandidatenzahlen (kommagetrennt)")
+    parser.add_argument("--queries", type=int, default=len(QUERIES), help="Anzahl Suchbegriffe")
+    parser.add_argument("--workers", type=int, default=-1, help="Threads für cdist-N (-1 = alle Kerne)")
+    args = parser.parse_args()
+
+    queries = (QUERIES * args.queries)[:args.queries]
+    print(f"\n📊 Fuzzy-Ranking Benchmark ({len(queries)} Queries, ms pro Suche)\n")
+    print(f"{'Kandidaten':>10} {'loop':>10} {'cdist':>10} {'cdist-N':>10} {'Speedup':>9} {'Treffer':>8}")
+    print("-" * 62)
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        people = make_people(size)
+        columns = CandidateColumns(people, {"name": full_name, "email": lambda p: p["emails"]["primaryEmail"]})
+
+        loop_ms, loop_hits = timed(lambda q: loop_search(q, people), queries)
+
+        os.environ["FUZZY_WORKERS"], os.environ["FUZZY_PARALLEL_MIN"] = "1", "0"
+        single_ms, single_hits = timed(lambda q: vector_search(q, columns), queries)
+
+        os.environ["FUZZY_WORKERS"] = str(args.workers)
+        parallel_ms, _ = timed(lambda q: vector_search(q, columns), queries)
+
+        assert loop_hits == single_hits, "Vektorisierte Treffer weichen von der Schleife ab"
+        best = min(single_ms, parallel_ms)
+        print(f"{size:>10} {loop_ms:>10.2f} {single_ms:>10.2f} {parallel_ms:>10.2f} "
+              f"{loop_ms / best if best else 0:>8.1f}x {sum(loop_hits) // len(queries):>8}")
+
+
+if __name__ == "__main__":
+    main()
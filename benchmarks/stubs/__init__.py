@@ -0,0 +1,24 @@
+"""
+Lokale Stand-ins für LLM, CRM (Twenty/Zoho), Chat-APIs und Checkpointer.
+"""
+
+from .runner import StubServer, get_free_port
+from .fake_llm import FakeLLM, create_app as create_llm_app
+from .fake_twenty import TwentyStore, create_app as create_twenty_app
+from .fake_zoho import ZohoStore, create_app as create_zoho_app
+from .fake_chat import ChatStore, create_app as create_chat_app
+from .checkpoint_saver import ByteCountingSaver
+
+__all__ = [
+    "StubServer",
+    "get_free_port",
+    "FakeLLM",
+    "create_llm_app",
+    "TwentyStore",
+    "create_twenty_app",
+    "ZohoStore",
+    "create_zoho_app",
+    "ChatStore",
+    "create_chat_app",
+    "ByteCountingSaver",
+]
@@ -0,0 +1,61 @@
+"""
+ByteCountingSaver - InMemorySaver mit Byte-Zählung
+
+Zählt die serialisierten Bytes, die der AsyncPostgresSaver in
+checkpoints / checkpoint_blobs / checkpoint_writes schreiben würde.
+"""
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+class ByteCountingSaver(InMemorySaver):
+    """InMemorySaver, der geschriebene Bytes und Checkpoints mitzählt"""
+
+    def __init__(self):
+        super().__init__()
+        self.bytes_written = 0
+        self.checkpoints_written = 0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        result = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+
+        for k, v in new_versions.items():
+            self.bytes_written += len(self.blobs[(thread_id, checkpoint_ns, k, v)][1])
+        saved = self.storage[thread_id][checkpoint_ns][checkpoint["id"]]
+        self.bytes_written += len(saved[0][1]) + len(saved[1][1])
+        self.checkpoints_written += 1
+        return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        super().put_writes(config, writes, task_id, task_path)
+        for _, value in writes:
+            self.bytes_written += len(self.serde.dumps_typed(value)[1])
+
+    def retained_bytes(self) -> int:
+        """Aktuell gespeicherte Bytes (= Storage-Wachstum in Postgres)"""
+        total = sum(len(blob[1]) for blob in self.blobs.values())
+        for namespaces in self.storage.values():
+            for checkpoints in namespaces.values():
+                for saved_checkpoint, saved_metadata, _ in checkpoints.values():
+                    total += len(saved_checkpoint[1]) + len(saved_metadata[1])
+        for writes in self.writes.values():
+            total += sum(len(w[2][1]) for w in writes.values())
+        return total
+
+    def prune(self, thread_id: str, keep_latest: int = 1):
+        """In-Memory Pendant zu prune_thread_checkpoints() (latest-Modus)"""
+        for checkpoint_ns, checkpoints in self.storage[thread_id].items():
+            ordered = sorted(checkpoints.keys(), reverse=True)
+            for checkpoint_id in ordered[keep_latest:]:
+                del checkpoints[checkpoint_id]
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+
+            referenced = set()
+            for saved_checkpoint, _, _ in checkpoints.values():
+                versions = self.serde.loads_typed(saved_checkpoint)["channel_versions"]
+                referenced.update((k, v) for k, v in versions.items())
+            for key in list(self.blobs.keys()):
+                if key[0] == thread_id and key[1] == checkpoint_ns and (key[2], key[3]) not in referenced:
+                    del self.blobs[key]
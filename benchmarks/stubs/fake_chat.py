@@ -0,0 +1,118 @@
+"""
+Fake Chat APIs - lokale Stand-ins für Telegram Bot API, Slack Web API und Whisper
+
+    Telegram (TELEGRAM_API_URL=<base>):
+        POST /bot{token}/sendMessage
+        GET  /bot{token}/getFile?file_id=...
+        GET  /file/bot{token}/{file_path}
+    Slack (SLACK_API_URL=<base>/api):
+        POST /api/chat.postMessage
+        GET  /api/users.info
+        GET  /files/{file_id}                (url_private im Event)
+    Whisper (WHISPER_API_URL=<base>/whisper):
+        POST /whisper                         -> {"text": ...}
+
+Audio-"Dateien" enthalten das Transkript zwischen Markern, der Fake-Whisper
+liest es aus dem Multipart-Body zurück - so bleiben Voice-Nachrichten
+deterministisch (und es wird kein python-multipart benötigt).
+"""
+
+import re
+import time
+import asyncio
+import threading
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+TRANSCRIPT_PATTERN = re.compile(rb"<<TRANSCRIPT>>(.*?)<<END>>", re.DOTALL)
+
+
+class ChatStore:
+    """Gesendete Nachrichten, Voice-Dateien und Latenzen"""
+
+    def __init__(self, latency_ms: float = 0.0, whisper_latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.whisper_latency_ms = whisper_latency_ms
+        self.sent: list[dict] = []
+        self.files: dict[str, bytes] = {}
+        self.transcriptions = 0
+        self._lock = threading.Lock()
+
+    def add_voice_file(self, file_id: str, transcript: str):
+        self.files[file_id] = b"<<TRANSCRIPT>>" + transcript.encode("utf-8") + b"<<END>>"
+
+    def record(self, platform: str, chat_id: str, text: str):
+        with self._lock:
+            self.sent.append({"platform": platform, "chat_id": str(chat_id), "text": text, "t": time.monotonic()})
+
+    def sent_count(self) -> int:
+        return len(self.sent)
+
+
+def create_app(store: ChatStore) -> FastAPI:
+    """FastAPI App für Telegram/Slack/Whisper Stand-ins"""
+    app = FastAPI(title="Fake Chat APIs")
+
+    async def _delay(ms: float):
+        if ms:
+            await asyncio.sleep(ms / 1000)
+
+    # === TELEGRAM ===
+
+    @app.post("/bot{token}/sendMessage")
+    async def telegram_send(token: str, request: Request):
+        body = await request.json()
+        await _delay(store.latency_ms)
+        store.record("telegram", body.get("chat_id"), body.get("text", ""))
+        return {"ok": True, "result": {"message_id": store.sent_count()}}
+
+    @app.get("/bot{token}/getFile")
+    async def telegram_get_file(token: str, file_id: str):
+        await _delay(store.latency_ms)
+        if file_id not in store.files:
+            return {"ok": False, "description": "Bad Request: invalid file_id"}
+        return {"ok": True, "result": {"file_id": file_id, "file_path": f"voice/{file_id}.oga"}}
+
+    @app.get("/file/bot{token}/voice/{filename}")
+    async def telegram_download(token: str, filename: str):
+        await _delay(store.latency_ms)
+        content = store.files.get(filename.rsplit(".", 1)[0])
+        if content is None:
+            return Response(status_code=404)
+        return Response(content=content, media_type="audio/ogg")
+
+    # === SLACK ===
+
+    @app.post("/api/chat.postMessage")
+    async def slack_post_message(request: Request):
+        body = await request.json()
+        await _delay(store.latency_ms)
+        store.record("slack", body.get("channel"), body.get("text", ""))
+        return {"ok": True, "channel": body.get("channel"), "ts": f"{time.time():.6f}"}
+
+    @app.get("/api/users.info")
+    async def slack_users_info(user: str):
+        await _delay(store.latency_ms)
+        return {"ok": True, "user": {"id": user, "real_name": f"Load User {user}", "name": user}}
+
+    @app.get("/files/{file_id}")
+    async def slack_download(file_id: str):
+        await _delay(store.latency_ms)
+        content = store.files.get(file_id)
+        if content is None:
+            return Response(status_code=404)
+        return Response(content=content, media_type="audio/mpeg")
+
+    # === WHISPER ===
+
+    @app.post("/whisper")
+    async def whisper(request: Request):
+        await _delay(store.whisper_latency_ms)
+        match = TRANSCRIPT_PATTERN.search(await request.body())
+        if not match:
+            return JSONResponse(status_code=400, content={"error": "no audio"})
+        store.transcriptions += 1
+        return {"text": match.group(1).decode("utf-8", errors="ignore"), "language": "de"}
+
+    return app
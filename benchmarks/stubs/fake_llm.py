@@ -0,0 +1,206 @@
+"""
+Fake LLM - deterministischer ChatOpenAI-kompatibler Server
+
+Implementiert POST /v1/chat/completions (OpenAI Format, inkl. Tool-Calls).
+Die Antwort hängt von der Rolle des Aufrufs ab, die anhand des
+System-Prompts (prompts/*.yaml) bzw. der mitgeschickten Tools erkannt wird:
+
+- intent:        Intent Classifier      -> "CRM" / "CHAT"
+- session_guard: Session-Manager        -> "ACTIVE" / "IDLE"
+- crm:           Request mit `tools`    -> Tool-Calls laut Skript, dann Antwort
+- chat:          alles andere           -> Text-Antwort
+
+Skript pro User-Nachricht (aus den YAML-Szenarien):
+
+    {"intent": "CRM", "tool_calls": [{"name": "search_contacts", "args": {...}}],
+     "reply": "...", "session": "IDLE"}
+
+Ohne Skript greifen einfache Heuristiken (Begrüßung -> CHAT, sonst CRM
+mit search_contacts), damit der Server auch für Lasttests taugt.
+"""
+
+import json
+import time
+import random
+import asyncio
+import threading
+from typing import Optional
+
+from fastapi import FastAPI, Request
+
+INTENT_MARKER = "Intent Classifier"
+SESSION_GUARD_MARKER = "Session-Manager"
+GREETINGS = ("hallo", "hi", "moin", "servus", "guten morgen", "wie geht")
+
+
+def estimate_tokens(text: str) -> int:
+    """Grobe Token-Schätzung (~4 Zeichen pro Token), deterministisch"""
+    return (len(text) + 3) // 4
+
+
+class FakeLLM:
+    """Zustand des Fake-LLM: Skript, Latenz und Call-Log"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, seed: int = 42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.script: dict[str, dict] = {}
+        self.calls: list[dict] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._call_counter = 0
+
+    # === SKRIPT ===
+
+    def register_turn(self, user_text: str, turn: dict):
+        """Hinterlegt das erwartete Verhalten für eine User-Nachricht"""
+        self.script[user_text.strip()] = turn
+
+    def reset_script(self):
+        self.script.clear()
+
+    # === CALL-LOG ===
+
+    def call_count(self) -> int:
+        return len(self.calls)
+
+    def calls_since(self, index: int) -> list[dict]:
+        with self._lock:
+            return list(self.calls[index:])
+
+    # === ANTWORT-LOGIK ===
+
+    def _find_turn(self, user_text: str, system_prompt: str) -> dict:
+        turn = self.script.get(user_text.strip())
+        if turn is not None:
+            return turn
+        # Session Guard: User-Nachricht steckt im System-Prompt
+        for text, candidate in self.script.items():
+            if text and text in system_prompt:
+                return candidate
+        return {}
+
+    def _classify(self, messages: list[dict], tools: Optional[list]) -> str:
+        system_prompt = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+        if INTENT_MARKER in system_prompt:
+            return "intent"
+        if SESSION_GUARD_MARKER in system_prompt:
+            return "session_guard"
+        if tools:
+            return "crm"
+        return "chat"
+
+    def respond(self, body: dict) -> tuple[dict, str]:
+        """Erzeugt die OpenAI-Response für einen Request-Body"""
+        messages = body.get("messages", [])
+        tools = body.get("tools")
+        kind = self._classify(messages, tools)
+
+        system_prompt = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+        last_user_index = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+        user_text = messages[last_user_index].get("content") or "" if last_user_index >= 0 else ""
+        if isinstance(user_text, list):
+            user_text = " ".join(part.get("text", "") for part in user_text if isinstance(part, dict))
+        turn = self._find_turn(user_text, system_prompt)
+
+        content = ""
+        tool_calls = []
+
+        if kind == "intent":
+            default = "CHAT" if user_text.lower().startswith(GREETINGS) else "CRM"
+            content = turn.get("intent", default)
+        elif kind == "session_guard":
+            content = turn.get("session", "IDLE")
+        elif kind == "crm":
+            # Anzahl bereits erledigter Tool-Runden in diesem Turn
+            rounds_done = sum(
+                1 for m in messages[last_user_index + 1:]
+                if m.get("role") == "assistant" and m.get("tool_calls")
+            )
+            planned = turn.get("tool_calls")
+            if planned is None:
+                planned = [{"name": "search_contacts", "args": {"query": user_text[:50]}}]
+            if rounds_done < len(planned):
+                round_calls = planned[rounds_done]
+                if isinstance(round_calls, dict):
+                    round_calls = [round_calls]
+                tool_calls = [self._tool_call(call) for call in round_calls]
+            else:
+                content = turn.get("reply", "Erledigt! ✅")
+        else:
+            content = turn.get("reply", "Hallo! 👋 Wie kann ich helfen?")
+
+        prompt_text = "".join(
+            (m.get("content") or "") if isinstance(m.get("content"), str) else json.dumps(m.get("content"))
+            for m in messages
+        )
+        prompt_text += "".join(json.dumps(m.get("tool_calls")) for m in messages if m.get("tool_calls"))
+        if tools:
+            prompt_text += json.dumps(tools)
+        prompt_tokens = estimate_tokens(prompt_text)
+        completion_tokens = estimate_tokens(content + json.dumps([c["function"] for c in tool_calls]))
+
+        message = {"role": "assistant", "content": content or None}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+
+        response = {
+            "id": f"chatcmpl-fake-{self._call_counter}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+        with self._lock:
+            self.calls.append({
+                "kind": kind,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "tool_calls": len(tool_calls),
+            })
+        return response, kind
+
+    def _tool_call(self, call: dict) -> dict:
+        with self._lock:
+            self._call_counter += 1
+            call_id = f"call_{self._call_counter}"
+        return {
+            "id": call_id,
+            "type": "function",
+            "function": {"name": call["name"], "arguments": json.dumps(call.get("args", {}), ensure_ascii=False)},
+        }
+
+    def delay_seconds(self) -> float:
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+
+def create_app(llm: FakeLLM) -> FastAPI:
+    """FastAPI App für den Fake-LLM"""
+    app = FastAPI(title="Fake LLM")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        delay = llm.delay_seconds()
+        if delay:
+            await asyncio.sleep(delay)
+        response, _ = llm.respond(body)
+        return response
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake", "object": "model"}]}
+
+    return app
@@ -0,0 +1,311 @@
+"""
+Fake Twenty CRM - lokaler Stand-in für die Twenty REST API (/rest/...)
+
+In-Memory Store für people, companies, tasks, notes, taskTargets, noteTargets.
+Antwortformate wie Twenty:
+
+    GET    /rest/people            -> {"data": {"people": [...]}, "pageInfo": {...}, "totalCount": N}
+                                      (limit, starting_after, filter=field[op]:value / and(...) / or(...), depth)
+    GET    /rest/people/{id}       -> {"data": {"person": {...}}}
+    POST   /rest/people            -> {"data": {"createPerson": {...}}}
+    POST   /rest/batch/people      -> {"data": {"createPeople": [...]}}   (Liste von Records)
+    PATCH  /rest/people/{id}       -> {"data": {"updatePerson": {...}}}
+    DELETE /rest/people/{id}       -> {"data": {"deletePerson": {"id": ...}}}
+    POST   /graphql                -> {"data": {"<alias>": {"id": ...}}}
+                                      (nur create-Mutations der Form alias: createTask(data: $var) { id })
+
+Optional mit künstlicher Latenz und Request-Zähler pro Endpoint.
+"""
+
+import re
+import uuid
+import random
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Plural (REST-Pfad) -> Singular (Response-Key)
+OBJECTS = {
+    "people": "person",
+    "companies": "company",
+    "tasks": "task",
+    "notes": "note",
+    "taskTargets": "taskTarget",
+    "noteTargets": "noteTarget",
+}
+
+# GraphQL Typ (createTask, createTaskTarget, ...) -> REST-Objekt
+GRAPHQL_TYPES = {
+    "Person": "people",
+    "Company": "companies",
+    "Task": "tasks",
+    "Note": "notes",
+    "TaskTarget": "taskTargets",
+    "NoteTarget": "noteTargets",
+}
+
+_MUTATION = re.compile(r'(\w+):\s*create(\w+)\(data:\s*\$(\w+)\)')
+
+FIRST_NAMES = ["Thomas", "Anna", "Michael", "Julia", "Stefan", "Laura", "Markus", "Sabine", "Jan", "Katrin"]
+LAST_NAMES = ["Braun", "Müller", "Schmidt", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz", "Hoffmann"]
+COMPANY_WORDS = ["Voltage", "Solar", "Nord", "Alpen", "Stahl", "Digital", "Logistik", "Energie", "Bau", "Media"]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class TwentyStore:
+    """In-Memory Datenbestand + Request-Statistik"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.records: dict[str, dict[str, dict]] = {name: {} for name in OBJECTS}
+        self.requests = Counter()
+        self._lock = threading.Lock()
+
+    # === SEED ===
+
+    def add(self, object_name: str, record: dict) -> dict:
+        record = dict(record)
+        record.setdefault("id", str(uuid.uuid4()))
+        record.setdefault("createdAt", _now())
+        record["updatedAt"] = _now()
+        with self._lock:
+            self.records[object_name][record["id"]] = record
+        return record
+
+    def seed(self, people: list[dict] = None, companies: list[dict] = None):
+        """Seed aus Szenario-Fixtures (companies per Name verknüpfbar)"""
+        company_ids = {}
+        for company in companies or []:
+            created = self.add("companies", company)
+            company_ids[created["name"]] = created["id"]
+        for person in people or []:
+            person = dict(person)
+            company_name = person.pop("company", None)
+            if company_name and company_name in company_ids:
+                person["companyId"] = company_ids[company_name]
+            self.add("people", person)
+
+    def seed_synthetic(self, n_people: int, n_companies: int, seed: int = 7):
+        """Erzeugt synthetische Datensätze (deterministisch)"""
+        rng = random.Random(seed)
+        company_ids = []
+        for i in range(n_companies):
+            name = f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_WORDS)} GmbH {i}"
+            company_ids.append(self.add("companies", {"name": name})["id"])
+        for i in range(n_people):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            self.add("people", {
+                "name": {"firstName": first, "lastName": f"{last}{i}"},
+                "emails": {"primaryEmail": f"{first.lower()}.{last.lower()}{i}@example.com", "additionalEmails": []},
+                "jobTitle": rng.choice(["CEO", "CTO", "Einkauf", "Vertrieb", ""]),
+                "companyId": rng.choice(company_ids) if company_ids else None,
+            })
+
+    # === STATS ===
+
+    def request_count(self) -> int:
+        return sum(self.requests.values())
+
+
+def _capitalize(name: str) -> str:
+    return name[0].upper() + name[1:]
+
+
+# === FILTER (Teilmenge der Twenty REST Filter-Syntax) ===
+
+_LEAF = re.compile(r'^([\w.]+)\[(\w+)\]:(.*)$', re.DOTALL)
+
+
+def _split_top_level(text: str) -> list[str]:
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char in "([":
+            depth += 1
+        elif not quoted and char in ")]":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _unquote(value: str):
+    value = value.strip()
+    if value.startswith('"') and value.endswith('"'):
+        return value[1:-1]
+    if value == "NULL":
+        return None
+    return value
+
+
+def _field(record: dict, path: str):
+    value = record
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def _like(pattern: str, value, case_insensitive: bool) -> bool:
+    if value is None:
+        return False
+    regex = "^" + ".*".join(re.escape(p) for p in pattern.split("%")) + "$"
+    return re.match(regex, str(value), re.IGNORECASE if case_insensitive else 0) is not None
+
+
+def _matches(record: dict, expression: str) -> bool:
+    expression = expression.strip()
+    for op, combine in (("and(", all), ("or(", any)):
+        if expression.startswith(op) and expression.endswith(")"):
+            return combine(_matches(record, part) for part in _split_top_level(expression[len(op):-1]))
+    if expression.startswith("not(") and expression.endswith(")"):
+        return not _matches(record, expression[4:-1])
+
+    match = _LEAF.match(expression)
+    if not match:
+        return True
+    path, op, raw = match.groups()
+    value = _field(record, path)
+    if op == "in":
+        return value in [_unquote(v) for v in _split_top_level(raw.strip()[1:-1])]
+    if op == "is":
+        return (value is None) == (raw.strip() == "NULL")
+    expected = _unquote(raw)
+    if op == "eq":
+        return value == expected
+    if op == "neq":
+        return value != expected
+    if op in ("like", "ilike"):
+        return _like(expected, value, op == "ilike")
+    if value is None:
+        return False
+    return {"gt": value > expected, "gte": value >= expected, "lt": value < expected, "lte": value <= expected}.get(op, True)
+
+
+def apply_filter(items: list[dict], expression: str) -> list[dict]:
+    """Filtert Records wie Twenty (Top-Level Komma = AND)"""
+    if not expression:
+        return items
+    parts = _split_top_level(expression)
+    return [item for item in items if all(_matches(item, part) for part in parts)]
+
+
+def create_app(store: TwentyStore) -> FastAPI:
+    """FastAPI App für den Twenty Stand-in"""
+    app = FastAPI(title="Fake Twenty CRM")
+
+    async def _tick(method: str, object_name: str, has_id: bool):
+        store.requests[f"{method} {object_name}{'/{id}' if has_id else ''}"] += 1
+        if store.latency_ms:
+            await asyncio.sleep(store.latency_ms / 1000)
+
+    def _not_found(object_name: str, record_id: str):
+        return JSONResponse(status_code=404, content={
+            "statusCode": 404, "error": "NotFound", "messages": [f"{OBJECTS[object_name]} {record_id} not found"],
+        })
+
+    def _with_relations(object_name: str, record: dict, depth: int) -> dict:
+        """depth >= 1: person.company wird eingebettet (wie Twenty)"""
+        if depth < 1 or object_name != "people" or not record.get("companyId"):
+            return record
+        return {**record, "company": store.records["companies"].get(record["companyId"])}
+
+    @app.post("/graphql")
+    async def graphql(request: Request):
+        """Create-Mutations der Reihe nach ausführen (wie Twenty innerhalb eines Dokuments)"""
+        body = await request.json()
+        await _tick("POST", "graphql", False)
+        variables = body.get("variables") or {}
+        data, errors = {}, []
+        for alias, type_name, variable in _MUTATION.findall(body.get("query", "")):
+            values = variables.get(variable)
+            if type_name not in GRAPHQL_TYPES or not isinstance(values, dict):
+                data[alias] = None
+                errors.append({"message": f"Unsupported mutation create{type_name}", "path": [alias]})
+                continue
+            data[alias] = {"id": store.add(GRAPHQL_TYPES[type_name], values)["id"]}
+        return {"data": data, **({"errors": errors} if errors else {})}
+
+    @app.get("/rest/{object_name}")
+    async def list_records(object_name: str, limit: int = 60, starting_after: str = None, filter: str = None, depth: int = 0):
+        if object_name not in OBJECTS:
+            return JSONResponse(status_code=404, content={"error": "Unknown object"})
+        await _tick("GET", object_name, False)
+        items = apply_filter(list(store.records[object_name].values()), filter)
+        total = len(items)
+        if starting_after:
+            ids = [item["id"] for item in items]
+            items = items[ids.index(starting_after) + 1:] if starting_after in ids else []
+        page = items[:limit]
+        return {
+            "data": {object_name: [_with_relations(object_name, r, depth) for r in page]},
+            "pageInfo": {
+                "hasNextPage": len(items) > limit,
+                "startCursor": page[0]["id"] if page else None,
+                "endCursor": page[-1]["id"] if page else None,
+            },
+            "totalCount": total,
+        }
+
+    @app.get("/rest/{object_name}/{record_id}")
+    async def get_record(object_name: str, record_id: str, depth: int = 0):
+        if object_name not in OBJECTS:
+            return JSONResponse(status_code=404, content={"error": "Unknown object"})
+        await _tick("GET", object_name, True)
+        record = store.records[object_name].get(record_id)
+        if not record:
+            return _not_found(object_name, record_id)
+        return {"data": {OBJECTS[object_name]: _with_relations(object_name, record, depth)}}
+
+    @app.post("/rest/{object_name}")
+    async def create_record(object_name: str, request: Request):
+        if object_name not in OBJECTS:
+            return JSONResponse(status_code=404, content={"error": "Unknown object"})
+        await _tick("POST", object_name, False)
+        record = store.add(object_name, await request.json())
+        return JSONResponse(status_code=201, content={
+            "data": {f"create{_capitalize(OBJECTS[object_name])}": record}
+        })
+
+    @app.post("/rest/batch/{object_name}")
+    async def create_records(object_name: str, request: Request):
+        if object_name not in OBJECTS:
+            return JSONResponse(status_code=404, content={"error": "Unknown object"})
+        await _tick("POST", f"batch/{object_name}", False)
+        records = [store.add(object_name, values) for values in await request.json()]
+        return JSONResponse(status_code=201, content={"data": {f"create{_capitalize(object_name)}": records}})
+
+    @app.patch("/rest/{object_name}/{record_id}")
+    async def update_record(object_name: str, record_id: str, request: Request):
+        if object_name not in OBJECTS:
+            return JSONResponse(status_code=404, content={"error": "Unknown object"})
+        await _tick("PATCH", object_name, True)
+        record = store.records[object_name].get(record_id)
+        if not record:
+            return _not_found(object_name, record_id)
+        record.update(await request.json())
+        record["updatedAt"] = _now()
+        return {"data": {f"update{_capitalize(OBJECTS[object_name])}": record}}
+
+    @app.delete("/rest/{object_name}/{record_id}")
+    async def delete_record(object_name: str, record_id: str):
+        if object_name not in OBJECTS:
+            return JSONResponse(status_code=404, content={"error": "Unknown object"})
+        await _tick("DELETE", object_name, True)
+        if store.records[object_name].pop(record_id, None) is None:
+            return _not_found(object_name, record_id)
+        return {"data": {f"delete{_capitalize(OBJECTS[object_name])}": {"id": record_id}}}
+
+    return app
@@ -0,0 +1,194 @@
+"""
+Fake Zoho CRM - lokaler Stand-in für Zoho OAuth + CRM API v8
+
+    POST   /oauth/v2/token                -> {"access_token": ..., "expires_in": 3600}
+    GET    /crm/v8/{Module}               -> {"data": [...], "info": {"more_records": bool, ...}}
+    GET    /crm/v8/{Module}/search        -> email= (exakt) bzw. word= (Teilstring), 204 ohne Treffer
+    POST   /crm/v8/coql                   -> select ... where Feld like '%x%' / Feld in ('a', ...) (or-verknüpft) limit n
+    GET    /crm/v8/{Module}/{id}          -> {"data": [{...}]}
+    POST   /crm/v8/{Module}               -> {"data": [{"code": "SUCCESS", "details": {"id": ...}}]}
+    PUT    /crm/v8/{Module}/{id}          -> {"data": [{"code": "SUCCESS", ...}]}
+    DELETE /crm/v8/{Module}?ids=1,2       -> {"data": [{"code": "SUCCESS" | "INVALID_DATA", ...}]}
+    DELETE /crm/v8/{Module}/{id}
+
+IDs sind 19-stellige Zahlen (wie bei Zoho).
+"""
+
+import re
+import random
+import asyncio
+import threading
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from .fake_twenty import FIRST_NAMES, LAST_NAMES, COMPANY_WORDS
+
+MODULES = ("Leads", "Contacts", "Accounts", "Deals", "Tasks", "Notes")
+
+
+class ZohoStore:
+    """In-Memory Datenbestand + Request-Statistik"""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.records: dict[str, dict[str, dict]] = {name: {} for name in MODULES}
+        self.requests = Counter()
+        self.token_requests = 0
+        self._next_id = 5725767000000000000
+        self._lock = threading.Lock()
+
+    def add(self, module: str, record: dict) -> dict:
+        record = dict(record)
+        with self._lock:
+            self._next_id += 1
+            record.setdefault("id", str(self._next_id))
+            self.records[module][record["id"]] = record
+        return record
+
+    def seed(self, leads: list[dict] = None):
+        for lead in leads or []:
+            self.add("Leads", lead)
+
+    def seed_synthetic(self, n_leads: int, seed: int = 7):
+        rng = random.Random(seed)
+        for i in range(n_leads):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            self.add("Leads", {
+                "First_Name": first,
+                "Last_Name": f"{last}{i}",
+                "Email": f"{first.lower()}.{last.lower()}{i}@example.com",
+                "Company": f"{rng.choice(COMPANY_WORDS)} GmbH {i % 50}",
+            })
+
+    def request_count(self) -> int:
+        return sum(self.requests.values())
+
+
+def _success(record_id: str, action: str = "record added") -> dict:
+    return {"code": "SUCCESS", "details": {"id": record_id}, "message": action, "status": "success"}
+
+
+def create_app(store: ZohoStore) -> FastAPI:
+    """FastAPI App für den Zoho Stand-in (Accounts + CRM unter einem Host)"""
+    app = FastAPI(title="Fake Zoho CRM")
+
+    async def _tick(method: str, module: str, has_id: bool):
+        store.requests[f"{method} {module}{'/{id}' if has_id else ''}"] += 1
+        if store.latency_ms:
+            await asyncio.sleep(store.latency_ms / 1000)
+
+    def _unknown():
+        return JSONResponse(status_code=400, content={"code": "INVALID_MODULE", "status": "error"})
+
+    @app.post("/oauth/v2/token")
+    async def token():
+        store.token_requests += 1
+        return {"access_token": f"fake-token-{store.token_requests}", "expires_in": 3600, "token_type": "Bearer"}
+
+    @app.get("/crm/v8/{module}")
+    async def list_records(module: str, page: int = 1, per_page: int = 200):
+        if module not in MODULES:
+            return _unknown()
+        await _tick("GET", module, False)
+        items = list(store.records[module].values())
+        start = (page - 1) * per_page
+        chunk = items[start:start + per_page]
+        if not chunk:
+            return Response(status_code=204)
+        return {
+            "data": chunk,
+            "info": {"page": page, "per_page": per_page, "count": len(chunk), "more_records": start + per_page < len(items)},
+        }
+
+    @app.post("/crm/v8/coql")
+    async def coql(request: Request):
+        await _tick("POST", "coql", False)
+        query = (await request.json()).get("select_query", "")
+        module = re.search(r"from\s+(\w+)", query, re.I)
+        if not module or module.group(1) not in MODULES:
+            return JSONResponse(status_code=400, content={"code": "SYNTAX_ERROR", "status": "error"})
+        likes = re.findall(r"(\w+)\s+like\s+'%([^']*)%'", query, re.I)
+        ins = [(field, {v.lower() for v in re.findall(r"'([^']*)'", values)})
+               for field, values in re.findall(r"(\w+)\s+in\s*\(([^)]*)\)", query, re.I)]
+        limit = re.search(r"limit\s+(\d+)", query, re.I)
+        matches = [r for r in store.records[module.group(1)].values()
+                   if any(term.lower() in str(r.get(field) or "").lower() for field, term in likes)
+                   or any(str(r.get(field) or "").lower() in values for field, values in ins)]
+        matches = matches[:int(limit.group(1)) if limit else 200]
+        if not matches:
+            return Response(status_code=204)
+        return {"data": matches, "info": {"count": len(matches), "more_records": False}}
+
+    @app.get("/crm/v8/{module}/search")
+    async def search_records(module: str, email: str = "", word: str = ""):
+        if module not in MODULES:
+            return _unknown()
+        await _tick("GET", f"{module}/search", False)
+        records = store.records[module].values()
+        if email:
+            matches = [r for r in records if (r.get("Email") or "").lower() == email.lower()]
+        else:
+            words = word.lower().split()
+            matches = [r for r in records if words and all(
+                any(w in str(v or "").lower() for v in r.values()) for w in words)]
+        if not matches:
+            return Response(status_code=204)
+        return {"data": matches[:200], "info": {"count": len(matches[:200]), "more_records": len(matches) > 200}}
+
+    @app.get("/crm/v8/{module}/{record_id}")
+    async def get_record(module: str, record_id: str):
+        if module not in MODULES:
+            return _unknown()
+        await _tick("GET", module, True)
+        record = store.records[module].get(record_id)
+        if not record:
+            return Response(status_code=204)
+        return {"data": [record]}
+
+    @app.post("/crm/v8/{module}")
+    async def create_records(module: str, request: Request):
+        if module not in MODULES:
+            return _unknown()
+        await _tick("POST", module, False)
+        body = await request.json()
+        results = [_success(store.add(module, record)["id"]) for record in body.get("data", [])]
+        return JSONResponse(status_code=201, content={"data": results})
+
+    @app.put("/crm/v8/{module}/{record_id}")
+    async def update_record(module: str, record_id: str, request: Request):
+        if module not in MODULES:
+            return _unknown()
+        await _tick("PUT", module, True)
+        record = store.records[module].get(record_id)
+        if not record:
+            return {"data": [{"code": "INVALID_DATA", "details": {"id": record_id}, "status": "error"}]}
+        body = await request.json()
+        for update in body.get("data", []):
+            record.update(update)
+        return {"data": [_success(record_id, "record updated")]}
+
+    @app.delete("/crm/v8/{module}")
+    async def delete_records(module: str, ids: str = ""):
+        if module not in MODULES:
+            return _unknown()
+        await _tick("DELETE", module, False)
+        results = []
+        for record_id in filter(None, ids.split(",")):
+            if store.records[module].pop(record_id, None) is not None:
+                results.append(_success(record_id, "record deleted"))
+            else:
+                results.append({"code": "INVALID_DATA", "details": {"id": record_id}, "status": "error"})
+        return {"data": results}
+
+    @app.delete("/crm/v8/{module}/{record_id}")
+    async def delete_record(module: str, record_id: str):
+        if module not in MODULES:
+            return _unknown()
+        await _tick("DELETE", module, True)
+        if store.records[module].pop(record_id, None) is None:
+            return JSONResponse(status_code=404, content={"code": "INVALID_DATA", "status": "error"})
+        return {"data": [_success(record_id, "record deleted")]}
+
+    return app
@@ -0,0 +1,40 @@
+"""
+Startet Stub-Services (FastAPI Apps) in einem Hintergrund-Thread via uvicorn.
+"""
+
+import socket
+import threading
+import time
+
+import uvicorn
+
+
+def get_free_port() -> int:
+    """Freien TCP-Port auf localhost finden"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class StubServer:
+    """uvicorn-Server in einem Daemon-Thread (start/stop)"""
+
+    def __init__(self, app, port: int = None):
+        self.port = port or get_free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", access_log=False)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self, timeout: float = 10.0) -> "StubServer":
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Stub server on port {self.port} did not start")
+            time.sleep(0.02)
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
@@ -0,0 +1,386 @@
+"""
+Benchmark: Webhook Load Generator & Replay
+Schickt synthetische oder aufgezeichnete Telegram/Slack Webhooks an
+POST /webhook/{platform} und misst Durchsatz, Latenz-Perzentile und Fehlerraten.
+
+Standardmäßig läuft die echte FastAPI App (server.app) im Prozess, verdrahtet mit
+lokalen Stand-ins (siehe benchmarks/stubs/):
+
+- Fake LLM (konfigurierbare Latenz), Fake Twenty/Zoho
+- Fake Telegram Bot API / Slack Web API / Whisper (Voice-Nachrichten)
+- SQLite User-DB (ohne --database-url läuft der Server ohne Checkpointer)
+
+Mit --target wird stattdessen ein bereits laufender Server beschossen; die
+Stand-ins werden trotzdem gestartet und die passenden Env-Variablen ausgegeben.
+
+Usage:
+    python benchmarks/webhook_load.py --rate 5 --duration 30 --users 20 --voice-ratio 0.2
+    python benchmarks/webhook_load.py --requests 200 --slack-ratio 0.5 --record load.jsonl
+    python benchmarks/webhook_load.py --replay load.jsonl --json report.json
+
+Replay-Format (JSONL, eine Zeile pro Webhook):
+    {"at": 0.25, "platform": "telegram", "payload": {...}, "transcript": "..."}
+    (at = Sekunden-Offset, transcript nur bei Voice-Nachrichten)
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.stubs import (
+    StubServer,
+    FakeLLM,
+    create_llm_app,
+    TwentyStore,
+    create_twenty_app,
+    ZohoStore,
+    create_zoho_app,
+    ChatStore,
+    create_chat_app,
+)
+from benchmarks.conversation_bench import (
+    SCENARIO_DIR,
+    percentile,
+    load_scenarios,
+    load_fixtures,
+    seed_crm,
+    configure_environment,
+    init_user_db,
+)
+
+ERROR_REPLY_PREFIX = "❌ Es ist ein Fehler aufgetreten"
+SMALLTALK = ["Hallo Adizon!", "Moin, wie geht's?", "Hi, was kannst du alles?"]
+
+
+# === WORKLOAD ===
+
+def telegram_payload(user_index: int, text: str = None, voice_file_id: str = None) -> dict:
+    user_id = 900000 + user_index
+    message = {
+        "message_id": random.randint(1, 10**9),
+        "from": {"id": user_id, "first_name": "Load", "last_name": f"User{user_index}"},
+        "chat": {"id": user_id, "type": "private"},
+        "date": int(time.time()),
+    }
+    if voice_file_id:
+        message["voice"] = {"file_id": voice_file_id, "duration": 4, "mime_type": "audio/ogg"}
+    else:
+        message["text"] = text
+    return {"update_id": random.randint(1, 10**9), "message": message}
+
+
+def slack_payload(user_index: int, chat_base_url: str, text: str = None, voice_file_id: str = None) -> dict:
+    event = {
+        "type": "message",
+        "user": f"ULOAD{user_index:04d}",
+        "channel": f"DLOAD{user_index:04d}",
+        "text": text or "",
+        "ts": f"{time.time():.6f}",
+    }
+    if voice_file_id:
+        event["files"] = [{
+            "id": voice_file_id,
+            "mimetype": "audio/mpeg",
+            "size": 2048,
+            "url_private": f"{chat_base_url}/files/{voice_file_id}",
+        }]
+    return {"type": "event_callback", "event_id": f"Ev{random.randint(1, 10**9)}", "event": event}
+
+
+def platform_user_id(platform: str, payload: dict) -> str:
+    """user_id im Format des Servers (telegram:123 / slack:U123)"""
+    if platform == "telegram":
+        return f"telegram:{payload['message']['from']['id']}"
+    return f"slack:{payload['event']['user']}"
+
+
+def generate_workload(args, texts: list[str], chat_base_url: str) -> list[dict]:
+    """Poisson-Ankünfte mit --rate über --duration (oder --requests Stück)"""
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    workload = []
+    at = 0.0
+    total = args.requests or int(args.rate * args.duration)
+
+    for i in range(total):
+        at += rng.expovariate(args.rate)
+        platform = "slack" if rng.random() < args.slack_ratio else "telegram"
+        user_index = rng.randrange(args.users)
+        text = rng.choice(texts)
+        is_voice = rng.random() < args.voice_ratio
+        file_id = f"voice{i:06d}" if is_voice else None
+
+        if platform == "telegram":
+            payload = telegram_payload(user_index, None if is_voice else text, file_id)
+        else:
+            payload = slack_payload(user_index, chat_base_url, None if is_voice else text, file_id)
+
+        entry = {"at": round(at, 4), "platform": platform, "payload": payload}
+        if is_voice:
+            entry["transcript"] = text
+        workload.append(entry)
+    return workload
+
+
+def load_replay(path: str, args) -> list[dict]:
+    """Lädt aufgezeichnete Webhooks; fehlende Offsets werden per --rate verteilt"""
+    rng = random.Random(args.seed)
+    workload = []
+    at = 0.0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "at" not in entry:
+                at += rng.expovariate(args.rate)
+                entry["at"] = at
+            workload.append(entry)
+    return sorted(workload, key=lambda e: e["at"])
+
+
+# === LOAD RUN ===
+
+async def fire(client: httpx.AsyncClient, target: str, entry: dict, results: list, in_flight: list):
+    """Schickt einen Webhook und misst die Antwortzeit"""
+    in_flight[0] += 1
+    in_flight[1] = max(in_flight[1], in_flight[0])
+    started = time.perf_counter()
+    result = {"platform": entry["platform"], "voice": "transcript" in entry, "status": None, "error": None}
+    try:
+        response = await client.post(f"{target}/webhook/{entry['platform']}", json=entry["payload"])
+        result["status"] = response.status_code
+        if response.status_code >= 400:
+            result["error"] = f"HTTP {response.status_code}"
+    except httpx.TimeoutException:
+        result["error"] = "timeout"
+    except Exception as e:
+        result["error"] = type(e).__name__
+    result["latency_ms"] = (time.perf_counter() - started) * 1000
+    in_flight[0] -= 1
+    results.append(result)
+
+
+async def run_load(target: str, workload: list[dict], timeout: float, max_connections: int) -> tuple[list, float, int]:
+    results: list[dict] = []
+    in_flight = [0, 0]  # aktuell, maximum
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        tasks = []
+        for entry in workload:
+            delay = entry["at"] - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(fire(client, target, entry, results, in_flight)))
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - started
+
+    return results, wall, in_flight[1]
+
+
+# === REPORT ===
+
+def latency_stats(results: list[dict]) -> dict:
+    latencies = [r["latency_ms"] for r in results if not r["error"]]
+    return {
+        "count": len(results),
+        "errors": sum(1 for r in results if r["error"]),
+        "p50_ms": percentile(latencies, 50),
+        "p90_ms": percentile(latencies, 90),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies, default=0.0),
+    }
+
+
+def build_report(results: list[dict], wall: float, max_in_flight: int, chat: ChatStore,
+                 llm: FakeLLM, crm_store, workload: list[dict]) -> dict:
+    completed = [r for r in results if not r["error"]]
+    error_replies = sum(1 for m in chat.sent if m["text"].startswith(ERROR_REPLY_PREFIX))
+    groups = {
+        "overall": results,
+        "telegram": [r for r in results if r["platform"] == "telegram"],
+        "slack": [r for r in results if r["platform"] == "slack"],
+        "text": [r for r in results if not r["voice"]],
+        "voice": [r for r in results if r["voice"]],
+    }
+    return {
+        "requests": len(results),
+        "duration_s": wall,
+        "offered_rate_rps": len(workload) / workload[-1]["at"] if workload and workload[-1]["at"] else 0.0,
+        "throughput_rps": len(completed) / wall if wall else 0.0,
+        "error_rate": (len(results) - len(completed)) / len(results) if results else 0.0,
+        "errors_by_type": dict(Counter(r["error"] for r in results if r["error"])),
+        "max_in_flight": max_in_flight,
+        "replies_sent": chat.sent_count(),
+        "error_replies": error_replies,
+        "error_reply_rate": error_replies / len(results) if results else 0.0,
+        "no_reply": max(0, len(results) - chat.sent_count()),
+        "transcriptions": chat.transcriptions,
+        "llm_calls": llm.call_count(),
+        "crm_requests": crm_store.request_count(),
+        "latency": {name: latency_stats(group) for name, group in groups.items() if group},
+    }
+
+
+def print_report(report: dict):
+    print("\n📊 Webhook Load Report\n")
+    print(f"   Requests:        {report['requests']} in {report['duration_s']:.1f}s "
+          f"(angeboten {report['offered_rate_rps']:.2f}/s)")
+    print(f"   Throughput:      {report['throughput_rps']:.2f} req/s, max in-flight {report['max_in_flight']}")
+    print(f"   HTTP-Fehler:     {report['error_rate']:.1%} {report['errors_by_type'] or ''}")
+    print(f"   Fehler-Replies:  {report['error_reply_rate']:.1%} ({report['error_replies']}), "
+          f"ohne Antwort: {report['no_reply']}")
+    print(f"   Backend-Calls:   {report['llm_calls']} LLM, {report['crm_requests']} CRM, "
+          f"{report['transcriptions']} Whisper\n")
+
+    header = f"   {'Gruppe':<10} {'n':>6} {'err':>5} {'p50ms':>8} {'p90ms':>8} {'p95ms':>8} {'p99ms':>8} {'maxms':>8}"
+    print(header)
+    print("   " + "-" * (len(header) - 3))
+    for name, s in report["latency"].items():
+        print(f"   {name:<10} {s['count']:>6} {s['errors']:>5} {s['p50_ms']:>8.0f} {s['p90_ms']:>8.0f} "
+              f"{s['p95_ms']:>8.0f} {s['p99_ms']:>8.0f} {s['max_ms']:>8.0f}")
+
+
+# === MAIN ===
+
+async def main_async(args) -> dict:
+    llm = FakeLLM(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms, seed=args.seed)
+    if args.crm == "twenty":
+        crm_store = TwentyStore(latency_ms=args.crm_latency_ms)
+        crm_app = create_twenty_app(crm_store)
+    else:
+        crm_store = ZohoStore(latency_ms=args.crm_latency_ms)
+        crm_app = create_zoho_app(crm_store)
+    chat = ChatStore(latency_ms=args.chat_latency_ms, whisper_latency_ms=args.whisper_latency_ms)
+
+    llm_server = StubServer(create_llm_app(llm)).start()
+    crm_server = StubServer(crm_app).start()
+    chat_server = StubServer(create_chat_app(chat)).start()
+    app_server = None
+    tmp_dir = tempfile.mkdtemp(prefix="adizon-load-")
+
+    try:
+        configure_environment(args.crm, llm_server.base_url, crm_server.base_url,
+                              os.path.join(tmp_dir, "users.db"), args.mode)
+        os.environ.update({
+            "TELEGRAM_BOT_TOKEN": "load-test",
+            "TELEGRAM_API_URL": chat_server.base_url,
+            "SLACK_BOT_TOKEN": "xoxb-load-test",
+            "SLACK_API_URL": f"{chat_server.base_url}/api",
+            "WHISPER_API_URL": f"{chat_server.base_url}/whisper",
+            "WHISPER_RETRY_COUNT": "1",
+        })
+        if args.database_url:
+            os.environ["DATABASE_URL"] = args.database_url
+
+        # Szenario-Texte als Corpus + Skripte für den Fake LLM
+        scenarios = load_scenarios(str(SCENARIO_DIR / "*.yaml"), args.crm)
+        seed_crm(args.crm, crm_store, load_fixtures(), scenarios, args.crm_records)
+        texts = list(SMALLTALK)
+        for scenario in scenarios:
+            for turn in scenario["turns"]:
+                llm.register_turn(turn["user"], turn)
+                texts.append(turn["user"])
+
+        if args.replay:
+            workload = load_replay(args.replay, args)
+        else:
+            workload = generate_workload(args, texts, chat_server.base_url)
+        if not workload:
+            raise SystemExit("❌ Leerer Workload")
+
+        for entry in workload:
+            if "transcript" not in entry:
+                continue
+            if entry["platform"] == "telegram":
+                file_id = entry["payload"]["message"]["voice"]["file_id"]
+            else:
+                # Aufgezeichnete url_private zeigt auf den Stand-in eines früheren Laufs
+                file_info = entry["payload"]["event"]["files"][0]
+                file_id = file_info["id"]
+                file_info["url_private"] = f"{chat_server.base_url}/files/{file_id}"
+            chat.add_voice_file(file_id, entry["transcript"])
+
+        if args.record:
+            with open(args.record, "w", encoding="utf-8") as f:
+                for entry in workload:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            print(f"💾 Workload aufgezeichnet: {args.record}")
+
+        if args.target:
+            target = args.target.rstrip("/")
+            print("\nℹ️ Externer Server - diese Env-Variablen dort setzen:")
+            for key in ("BASIC_LLM_URL", "TWENTY_API_URL", "ZOHO_API_URL", "TELEGRAM_API_URL",
+                        "SLACK_API_URL", "WHISPER_API_URL"):
+                print(f"   {key}={os.environ[key]}")
+            print("   (User müssen freigeschaltet in dessen DB existieren)\n")
+        else:
+            init_user_db([platform_user_id(e["platform"], e["payload"]) for e in workload])
+            import server
+            app_server = StubServer(server.app).start(timeout=60)
+            target = app_server.base_url
+
+        print(f"🚀 {len(workload)} Webhooks -> {target}/webhook/{{platform}}")
+        results, wall, max_in_flight = await run_load(target, workload, args.timeout, args.max_connections)
+
+        # Kurz warten, falls letzte Replies noch unterwegs sind
+        await asyncio.sleep(0.2)
+        return build_report(results, wall, max_in_flight, chat, llm, crm_store, workload)
+    finally:
+        for stub in (app_server, chat_server, crm_server, llm_server):
+            if stub:
+                stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adizon Webhook Load Generator")
+    parser.add_argument("--target", help="Externer Server (Default: server.app im Prozess)")
+    parser.add_argument("--rate", type=float, default=2.0, help="Ankunftsrate (Webhooks/s, Poisson)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Dauer in Sekunden")
+    parser.add_argument("--requests", type=int, help="Feste Anzahl Webhooks (statt rate*duration)")
+    parser.add_argument("--users", type=int, default=10, help="Anzahl unterschiedlicher User")
+    parser.add_argument("--slack-ratio", type=float, default=0.0, help="Anteil Slack-Webhooks (0..1)")
+    parser.add_argument("--voice-ratio", type=float, default=0.0, help="Anteil Voice-Nachrichten (0..1)")
+    parser.add_argument("--replay", help="JSONL-Datei mit aufgezeichneten Webhooks")
+    parser.add_argument("--record", help="Generierten Workload als JSONL speichern")
+    parser.add_argument("--crm", choices=["twenty", "zoho"], default="twenty")
+    parser.add_argument("--crm-records", type=int, default=500)
+    parser.add_argument("--mode", choices=["full", "exit", "latest"], default="full", help="CHECKPOINT_MODE")
+    parser.add_argument("--database-url", help="Postgres für User-DB + Checkpoints (Default: SQLite, ohne Checkpointer)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--crm-latency-ms", type=float, default=30.0)
+    parser.add_argument("--chat-latency-ms", type=float, default=20.0)
+    parser.add_argument("--whisper-latency-ms", type=float, default=800.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="HTTP Timeout pro Webhook")
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Report als JSON speichern")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Report gespeichert: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
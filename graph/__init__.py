@@ -3,12 +3,12 @@ Adizon LangGraph Workflow
 Modular Graph-based Agent Architecture
 """
 
-from .state import AdizonState, LastActionContext
+from .state import AdizonState, LastActionContext, UNDO_STACK_LIMIT
 from .builder import build_graph
 
 __all__ = [
     "AdizonState",
     "LastActionContext", 
+    "UNDO_STACK_LIMIT",
     "build_graph",
 ]
-
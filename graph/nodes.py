@@ -14,7 +14,7 @@ from utils.database import SessionLocal
 from utils.agent_config import load_agent_config
 from repositories.user_repository import UserRepository
 from services.registration_service import RegistrationService
-from .state import AdizonState
+from .state import AdizonState, undo_delta
 
 
 # === HELPER: LLM Factory ===
@@ -240,12 +240,17 @@ def chat_node(state: AdizonState) -> dict:
 
 # === NODE 4: CRM Node (ReAct) ===
 
-def crm_node(state: AdizonState) -> dict:
+async def crm_node(state: AdizonState) -> dict:
     """
     CRM Agent mit ReAct-Pattern und Tool-Calling.
     Nutzt dynamisch geladene CRM-Tools.
+    
+    Async: Tools mit nativer Coroutine (z.B. Twenty) laufen auf dem Event Loop,
+    reine Sync-Tools führt LangGraph im Thread-Pool aus.
     """
     from tools.crm import get_crm_tools_for_user
+    from tools.crm.rate_limit import set_rate_limit_user, reset_rate_limit_user
+    from tools.crm.resolve_cache import use_session_memo, reset_session_memo
     from langgraph.prebuilt import create_react_agent
     
     user = state.get("user")
@@ -265,88 +270,46 @@ def crm_node(state: AdizonState) -> dict:
         current_date=current_date
     )
     
-    # Tools laden (mit State-Aware Wrapper)
-    base_tools = get_crm_tools_for_user(user_id, user)
+    # Undo-Stack aus dem State (Tools pushen/poppen direkt auf diese Liste)
+    undo_before = list(state.get("undo_stack") or [])
+    undo_stack = list(undo_before)
     
-    # Wrapper für Undo-Context (schreibt in State)
-    tools_with_state = _wrap_tools_for_state(base_tools, state)
+    # Tools laden (schreiben Undo-Aktionen in den Stack)
+    tools = get_crm_tools_for_user(user_id, user, undo_stack=undo_stack)
     
     # ReAct Agent erstellen
     # Note: In langgraph-prebuilt >= 0.5.x wurde 'state_modifier' durch 'prompt' ersetzt
     react_agent = create_react_agent(
         model=llm,
-        tools=tools_with_state,
+        tools=tools,
         prompt=system_prompt
     )
     
-    # Agent ausführen
-    result = react_agent.invoke({
-        "messages": state["messages"]
-    })
+    # Name -> ID Memo des Threads (Tools ergänzen es in-place, siehe resolve_cache.py)
+    resolved_targets = dict(state.get("resolved_targets") or {})
     
-    print(f"🔧 CRM: Agent completed with {len(result.get('messages', []))} messages")
+    # Agent ausführen (CRM-Requests werden pro User fair gequeued, siehe rate_limit.py)
+    rate_user = set_rate_limit_user(user_id)
+    memo_token = use_session_memo(resolved_targets)
+    try:
+        result = await react_agent.ainvoke({
+            "messages": state["messages"]
+        })
+    finally:
+        reset_session_memo(memo_token)
+        reset_rate_limit_user(rate_user)
     
-    # Last Action Context extrahieren (falls Tool ausgeführt wurde)
-    last_action = _extract_last_action_from_messages(result.get("messages", []))
+    print(f"🔧 CRM: Agent completed with {len(result.get('messages', []))} messages")
     
+    # Nur das Delta zurück in den State: ein parallel committeter Import-Push bleibt erhalten
     return {
         "messages": result.get("messages", []),
-        "last_action_context": last_action or state.get("last_action_context", {}),
+        "undo_stack": undo_delta(undo_before, undo_stack),
+        "last_action_context": undo_stack[-1] if undo_stack else {},
+        "resolved_targets": resolved_targets,
     }
 
 
-def _wrap_tools_for_state(tools: list, state: AdizonState) -> list:
-    """
-    Wrapper um Tools, die den last_action_context tracken.
-    
-    Note: In LangGraph wird der State automatisch persistiert,
-    daher können wir die Tool-Outputs parsen und den Context extrahieren.
-    """
-    # Für jetzt geben wir die Tools unverändert zurück
-    # Der last_action_context wird aus den Tool-Messages extrahiert
-    return tools
-
-
-def _extract_last_action_from_messages(messages: list) -> dict:
-    """
-    Extrahiert last_action_context aus Tool-Messages.
-    
-    Parst Tool-Outputs auf ID-Patterns wie "(ID: abc-123)".
-    """
-    import re
-    
-    for msg in reversed(messages):
-        if hasattr(msg, "content") and msg.content:
-            content = msg.content
-            
-            # Pattern für erstellte Entities
-            # z.B. "✅ Kontakt erstellt: Max Mustermann (ID: abc-123-def)"
-            if "✅" in content and "(ID:" in content:
-                # ID extrahieren
-                id_match = re.search(r"\(ID:\s*([a-f0-9\-]+|\d+)\)", content)
-                if id_match:
-                    entity_id = id_match.group(1)
-                    
-                    # Entity Type bestimmen
-                    entity_type = "unknown"
-                    if "Kontakt" in content or "Lead" in content or "Person" in content:
-                        entity_type = "person"
-                    elif "Task" in content or "Aufgabe" in content:
-                        entity_type = "task"
-                    elif "Notiz" in content or "Note" in content:
-                        entity_type = "note"
-                    elif "Firma" in content or "Company" in content:
-                        entity_type = "company"
-                    
-                    return {
-                        "entity_type": entity_type,
-                        "entity_id": entity_id,
-                        "action": "create"
-                    }
-    
-    return {}
-
-
 # === NODE 5: Session Guard ===
 
 def session_guard_node(state: AdizonState) -> dict:
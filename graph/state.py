@@ -3,23 +3,120 @@ Adizon - LangGraph State Definition
 Single Source of Truth für den gesamten Workflow
 """
 
-from typing import TypedDict, Literal, Optional, Annotated, Any
+import os
+from typing import TypedDict, Literal, Optional, Annotated, Any, Union
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 
 
+# Maximale Tiefe des Undo-Stacks pro Thread (ältere Aktionen fallen raus)
+UNDO_STACK_LIMIT = int(os.getenv("UNDO_STACK_LIMIT", "10"))
+
+# Maximale Anzahl gemerkter Name -> ID Auflösungen pro Thread
+RESOLVE_MEMO_LIMIT = int(os.getenv("RESOLVE_MEMO_LIMIT", "50"))
+
+
 class LastActionContext(TypedDict, total=False):
     """
-    Kontext der letzten CRM-Aktion für Undo-Funktionalität.
+    Kontext einer CRM-Aktion für Undo-Funktionalität.
     
     Attributes:
-        entity_type: Art des Eintrags ("lead", "person", "task", "note")
-        entity_id: CRM ID für Undo-Löschung
+        entity_type: Art des Eintrags ("lead", "person", "company", "task", "note")
+        entity_id: CRM ID für Undo-Löschung bzw. -Wiederherstellung
+        entity_ids: Alle CRM IDs bei Bulk-Creates (entity_id = erste davon)
         action: Ausgeführte Aktion ("create", "update", "delete")
+        previous_values: CRM-Feldwerte vor dem Update (nur bei action="update")
     """
     entity_type: str
     entity_id: str
+    entity_ids: list[str]
     action: str
+    previous_values: dict
+
+
+class UndoDelta(TypedDict, total=False):
+    """
+    Änderung am Undo-Stack statt kompletter Liste.
+    
+    Writes laufen parallel (Chat-Turn, Datei-Import im Hintergrund) - wer den ganzen
+    Stack zurückschreibt, überschreibt die Einträge des anderen. Deltas werden vom
+    Reducer auf den aktuellen Stand angewendet.
+    
+    Attributes:
+        pop: Verbrauchte Aktionen (z.B. durch Undo), werden per Gleichheit entfernt
+        push: Anzuhängende Aktionen (neueste zuletzt)
+    """
+    pop: list[LastActionContext]
+    push: list[LastActionContext]
+
+
+def undo_delta(before: list[LastActionContext], after: list[LastActionContext]) -> UndoDelta:
+    """
+    Delta zwischen Stack vor und nach einem Turn.
+    
+    Tools poppen nur von oben und hängen oben an - alles ab dem ersten Unterschied
+    wurde verbraucht (pop) bzw. neu angelegt (push).
+    """
+    common = 0
+    while common < min(len(before), len(after)) and before[common] == after[common]:
+        common += 1
+    return {"pop": list(before[common:]), "push": list(after[common:])}
+
+
+def bounded_undo_stack(
+    current: Optional[list[LastActionContext]],
+    update: Optional[Union[list[LastActionContext], UndoDelta]],
+) -> list[LastActionContext]:
+    """
+    Reducer für den Undo-Stack.
+    
+    Ein UndoDelta entfernt die verbrauchten Aktionen aus dem aktuellen Stack und
+    hängt die neuen an - parallel angehängte Einträge (z.B. Import) bleiben erhalten.
+    Eine Liste ersetzt den Stack komplett. Gekappt wird auf UNDO_STACK_LIMIT (neueste zuletzt).
+    """
+    if update is None:
+        return list(current or [])
+    if isinstance(update, dict):
+        stack = list(current or [])
+        for action in update.get("pop") or []:
+            # Jüngstes passendes Vorkommen entfernen (Stack-Reihenfolge)
+            for i in range(len(stack) - 1, -1, -1):
+                if stack[i] == action:
+                    del stack[i]
+                    break
+        return (stack + list(update.get("push") or []))[-UNDO_STACK_LIMIT:]
+    return list(update)[-UNDO_STACK_LIMIT:]
+
+
+class ResolvedTarget(TypedDict, total=False):
+    """
+    Gemerkte Auflösung Name/E-Mail -> CRM ID (siehe tools/crm/resolve_cache.py).
+    
+    Attributes:
+        entity_type: "person", "company" oder "lead"
+        entity_id: Aufgelöste CRM ID
+        score: Fuzzy-Score der Auflösung (100 = exakt)
+        at: Unix-Zeit der Auflösung
+    """
+    entity_type: str
+    entity_id: str
+    score: float
+    at: float
+
+
+def bounded_resolve_memo(
+    current: Optional[dict[str, ResolvedTarget]],
+    update: Optional[dict[str, ResolvedTarget]],
+) -> dict[str, ResolvedTarget]:
+    """
+    Reducer für das Resolve-Memo.
+    
+    Der CRM-Node gibt immer das komplette Memo zurück (neueste Einträge zuletzt),
+    der Reducer ersetzt es und behält die letzten RESOLVE_MEMO_LIMIT Einträge.
+    """
+    if update is None:
+        return dict(current or {})
+    return dict(list(update.items())[-RESOLVE_MEMO_LIMIT:])
 
 
 class AdizonState(TypedDict):
@@ -34,7 +131,9 @@ class AdizonState(TypedDict):
         chat_id: Platform-spezifische Chat-ID für Antworten
         session_state: "ACTIVE" (Sticky CRM) oder "IDLE" (Router entscheidet)
         dialog_state: Zusätzlicher Kontext für Tools
-        last_action_context: Letzte CRM-Aktion für Undo
+        last_action_context: Letzte CRM-Aktion (= oberster Eintrag im Undo-Stack)
+        undo_stack: Begrenzter Stack der letzten CRM-Aktionen (neueste zuletzt)
+        resolved_targets: Gemerkte Name -> ID Auflösungen dieses Threads
     """
     # Conversation
     messages: Annotated[list[BaseMessage], add_messages]
@@ -51,4 +150,11 @@ class AdizonState(TypedDict):
     # Tool Context
     dialog_state: dict
     last_action_context: LastActionContext
-
+    
+    # Undo (wird per Checkpointer pro Thread persistiert -> worker-übergreifend)
+    # Nicht im Initial-State des Webhooks setzen, sonst wird der Stack überschrieben!
+    undo_stack: Annotated[list[LastActionContext], bounded_undo_stack]
+    
+    # Resolve-Memo (pro Thread persistiert, Key "person:thomas braun")
+    # Wie undo_stack nicht im Initial-State setzen!
+    resolved_targets: Annotated[dict[str, ResolvedTarget], bounded_resolve_memo]
@@ -3,6 +3,8 @@ Adizon - Database Models
 """
 
 from .user import User, UserRole
+from .crm_entity_cache import CrmEntityCache
+from .crm_oauth_token import CrmOAuthToken
+from .crm_index_snapshot import CrmIndexSnapshot
 
-__all__ = ["User", "UserRole"]
-
+__all__ = ["User", "UserRole", "CrmEntityCache", "CrmOAuthToken", "CrmIndexSnapshot"]
@@ -0,0 +1,35 @@
+"""
+Adizon - CRM Entity Cache Model
+Geteilter Cache-Tier für CRM-Entity-Details (mehrere Worker, siehe tools/crm/entity_cache.py)
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, String, Text, DateTime
+from utils.database import Base
+
+
+class CrmEntityCache(Base):
+    """
+    Gecachte Rohdaten einer CRM-Entity.
+    
+    Attributes:
+        crm: CRM-Name ("twenty", "zoho")
+        entity_type: "person", "company", "lead", ...
+        entity_id: ID im CRM
+        payload: Entity als JSON-String
+        expires_at: Ablaufzeit (UTC), danach zählt der Eintrag als Miss
+        created_at: Zeitpunkt des Schreibens
+    """
+    
+    __tablename__ = "crm_entity_cache"
+    
+    crm = Column(String(50), primary_key=True)
+    entity_type = Column(String(50), primary_key=True)
+    entity_id = Column(String(255), primary_key=True)
+    
+    payload = Column(Text, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<CrmEntityCache({self.crm}/{self.entity_type}/{self.entity_id}, expires={self.expires_at})>"
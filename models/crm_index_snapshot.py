@@ -0,0 +1,31 @@
+"""
+Adizon - CRM Index Snapshot Model
+Persistierter Such-Index eines CRMs (schneller Restart, siehe tools/crm/zoho_index.py)
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, String, Text, Integer, DateTime
+from utils.database import Base
+
+
+class CrmIndexSnapshot(Base):
+    """
+    Letzter Stand eines lokalen CRM-Index.
+    
+    Attributes:
+        key: Index-Schlüssel (z.B. "zoho:<api_url>:lead")
+        payload: Kompakte Records + Sync-Wasserstände als JSON-String
+        record_count: Anzahl Records (für Monitoring ohne JSON-Parsing)
+        updated_at: Zeitpunkt des letzten Speicherns
+    """
+    
+    __tablename__ = "crm_index_snapshots"
+    
+    key = Column(String(255), primary_key=True)
+    
+    payload = Column(Text, nullable=False)
+    record_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<CrmIndexSnapshot({self.key}, records={self.record_count})>"
@@ -0,0 +1,31 @@
+"""
+Adizon - CRM OAuth Token Model
+Geteilter Access Token für OAuth-CRMs (mehrere Worker, siehe tools/crm/zoho_token.py)
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, String, Text, DateTime
+from utils.database import Base
+
+
+class CrmOAuthToken(Base):
+    """
+    Zuletzt ausgestellter Access Token eines CRM-Clients.
+    
+    Attributes:
+        key: Client-Schlüssel (z.B. "zoho:<accounts_url>:<client_id>")
+        access_token: Access Token (kurzlebig, der Refresh Token bleibt in der .env)
+        expires_at: Ablaufzeit laut CRM (UTC)
+        updated_at: Zeitpunkt des letzten Refreshs
+    """
+    
+    __tablename__ = "crm_oauth_tokens"
+    
+    key = Column(String(255), primary_key=True)
+    
+    access_token = Column(Text, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<CrmOAuthToken({self.key}, expires={self.expires_at})>"
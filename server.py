@@ -4,6 +4,7 @@ FastAPI Entrypoint mit PostgreSQL Checkpointing
 """
 
 import os
+import json
 import asyncio
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
@@ -22,6 +23,13 @@ from graph.state import AdizonState
 from tools.chat import get_chat_adapter, StandardMessage
 from api.users import router as users_router
 from utils.database import DATABASE_URL
+from utils.checkpointing import (
+    get_persistence_mode,
+    get_invoke_kwargs,
+    get_pg_conninfo,
+    prune_thread_checkpoints,
+)
+from utils.checkpoint_retention import RetentionPolicy, run_retention_loop
 
 # === CONSTANTS ===
 KILLSWITCH_COMMAND = "RESTART"
@@ -36,6 +44,13 @@ pool: AsyncConnectionPool = None
 checkpointer: AsyncPostgresSaver = None
 graph = None
 
+# Checkpoint Persistence (full | exit | latest) + passende ainvoke-kwargs
+persistence_mode: str = "full"
+_invoke_kwargs: dict = {}
+
+# Background Task für Checkpoint Retention
+_retention_task: asyncio.Task = None
+
 # In-memory Session Timestamps (user_id -> last_activity)
 # Für Session-Timeout Tracking
 _session_timestamps: dict[str, datetime] = {}
@@ -116,19 +131,14 @@ async def lifespan(app: FastAPI):
     Startup/Shutdown Lifecycle.
     Initialisiert PostgreSQL Connection Pool und Checkpointer.
     """
-    global pool, checkpointer, graph
+    global pool, checkpointer, graph, persistence_mode, _invoke_kwargs, _retention_task
     
     print("🚀 Starting Adizon Server...")
     
     # PostgreSQL Pool für Checkpointing
     # Konvertiere SQLAlchemy URL zu nativem psycopg/libpq Format
     # SQLAlchemy: postgresql+psycopg://... -> libpq: postgresql://...
-    pg_url = DATABASE_URL
-    if "+psycopg" in pg_url:
-        pg_url = pg_url.replace("+psycopg", "")
-    # Manche Tools erwarten postgres:// statt postgresql://
-    if pg_url.startswith("postgresql://"):
-        pg_url = pg_url.replace("postgresql://", "postgres://", 1)
+    pg_url = get_pg_conninfo(DATABASE_URL)
     
     print(f"📦 Connecting to PostgreSQL for checkpointing...")
     
@@ -156,9 +166,21 @@ async def lifespan(app: FastAPI):
         print(f"⚠️ Checkpointer setup failed: {e}")
         print("🔄 Running without persistence")
         checkpointer = None
+        # Pool schließen - sonst warten clear_user_session() & Co. auf den Pool-Timeout
+        if pool:
+            await pool.close()
+            pool = None
     
     # Graph kompilieren (mit Checkpointer falls verfügbar)
+    persistence_mode = get_persistence_mode()
     graph = build_graph(checkpointer=checkpointer)
+    _invoke_kwargs = get_invoke_kwargs(graph, persistence_mode) if checkpointer else {}
+    if checkpointer:
+        print(f"💾 Checkpoint-Modus: {persistence_mode}")
+    
+    # Checkpoint Retention (abgelaufene Threads + alte Versionen aufräumen)
+    if pool and checkpointer:
+        _retention_task = asyncio.create_task(run_retention_loop(pool, RetentionPolicy.from_env()))
     
     print("✅ Adizon Server ready!")
     print(f"📡 Webhook endpoint: POST /webhook/{{platform}}")
@@ -168,6 +190,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🛑 Shutting down Adizon Server...")
+    if _retention_task:
+        _retention_task.cancel()
     if pool:
         await pool.close()
     print("👋 Goodbye!")
@@ -195,6 +219,56 @@ app.add_middleware(
 app.include_router(users_router)
 
 
+# === DATEI-IMPORT (CSV/XLSX Anhänge, ohne LLM) ===
+
+def is_approved_user(platform: str, user_id: str) -> bool:
+    """Freigeschalteter + aktiver User (gleiche Prüfung wie auth_node)"""
+    from utils.database import SessionLocal
+    from repositories.user_repository import UserRepository
+
+    platform_user_id = user_id.split(":", 1)[-1] if ":" in user_id else user_id
+    db = SessionLocal()
+    try:
+        user = UserRepository(db).get_user_by_platform_id(platform, platform_user_id)
+        return bool(user and user.is_approved and user.is_active)
+    finally:
+        db.close()
+
+
+async def run_contact_import(adapter, msg: StandardMessage) -> None:
+    """
+    Hintergrund-Task: Import der Datei, danach Undo-Aktion + Zusammenfassung in den Checkpoint,
+    damit "rückgängig" im nächsten Turn den ganzen Import löscht.
+    """
+    from langchain_core.messages import AIMessage
+    from tools.crm import adapter as crm_adapter, crm_system
+    from services.contact_import import ContactImportService
+
+    entity_type = "lead" if crm_system == "ZOHO" else "person"
+    service = ContactImportService(adapter, crm_adapter, entity_type)
+    result = await service.run(msg.chat_id, msg.attachment, user_id=msg.user_id)
+
+    if not result.created or not graph:
+        return
+    action = {
+        "entity_type": entity_type,
+        "entity_id": result.created[0],
+        "entity_ids": list(result.created),
+        "action": "create",
+    }
+    config = {"configurable": {"thread_id": msg.user_id}}
+    try:
+        # Anhängen über den Reducer statt Stack lesen + ersetzen (parallele Turns gehen sonst verloren)
+        await graph.aupdate_state(config, {
+            "undo_stack": {"push": [action]},
+            "last_action_context": action,
+            "messages": [AIMessage(content=result.summary)],
+        }, as_node="session_guard")
+        print(f"💾 Undo action saved: import {entity_type} -> {len(result.created)} Einträge")
+    except Exception as e:
+        print(f"⚠️ Import-Undo konnte nicht gespeichert werden: {e}")
+
+
 # === WEBHOOK ENDPOINT ===
 
 @app.post("/webhook/{platform}")
@@ -250,7 +324,24 @@ async def webhook(platform: str, request: Request, background_tasks: BackgroundT
         print(f"⚠️ Webhook parse error: {e}")
         # Bei Parse-Fehlern still beenden (z.B. Bot-Messages)
         return {"ok": True}
-    
+
+    # === DATEI-IMPORT (CSV/XLSX) ===
+    # Läuft im Hintergrund, Webhook antwortet sofort (Slack-Retry nach 3s)
+    if msg.attachment:
+        from services.contact_import import ImportConfig, import_format
+
+        if ImportConfig.from_env().enabled and import_format(msg.attachment):
+            from tools.crm import adapter as crm_adapter
+
+            if await asyncio.to_thread(is_approved_user, platform, msg.user_id):
+                if crm_adapter is None:
+                    await adapter.send_message(msg.chat_id, "⚠️ Datei-Import ist nur mit verbundenem CRM möglich (CRM_SYSTEM).")
+                    return {"ok": True}
+                print(f"📎 Incoming [{platform}]: {msg.user_name}: Datei {msg.attachment.file_name}")
+                update_session_timestamp(msg.user_id)
+                background_tasks.add_task(run_contact_import, adapter, msg)
+                return {"ok": True}
+
     # Audio-Messages ignorieren (TODO: Whisper Integration)
     if not msg.text or msg.text.strip() == "":
         return {"ok": True}
@@ -273,6 +364,7 @@ async def webhook(platform: str, request: Request, background_tasks: BackgroundT
     update_session_timestamp(msg.user_id)
 
     # Initial State
+    # Note: undo_stack wird bewusst NICHT gesetzt - er kommt aus dem Checkpoint
     initial_state: AdizonState = {
         "messages": [HumanMessage(content=msg.text)],
         "user": None,
@@ -294,7 +386,8 @@ async def webhook(platform: str, request: Request, background_tasks: BackgroundT
     # Graph ausführen
     try:
         # Graph wurde bereits mit Checkpointer kompiliert (falls verfügbar)
-        result = await graph.ainvoke(initial_state, config=config)
+        # Im exit/latest Modus nur EIN Checkpoint am Ende des Turns
+        result = await graph.ainvoke(initial_state, config=config, **_invoke_kwargs)
         
         # Response aus letzter AI-Message
         response_text = ""
@@ -310,6 +403,10 @@ async def webhook(platform: str, request: Request, background_tasks: BackgroundT
             await adapter.send_message(msg.chat_id, response_text)
             print(f"📤 Response sent: {response_text[:50]}...")
         
+        # latest-only: Ältere Checkpoints des Threads entfernen
+        if persistence_mode == "latest" and pool and checkpointer:
+            await prune_thread_checkpoints(pool, msg.user_id)
+        
     except Exception as e:
         print(f"❌ Graph execution error: {e}")
         import traceback
@@ -332,10 +429,75 @@ async def health():
     return {
         "status": "healthy",
         "checkpointer": "postgres" if checkpointer else "memory",
+        "checkpoint_mode": persistence_mode,
         "graph": "ready" if graph else "not_initialized"
     }
 
 
+@app.get("/metrics/crm")
+async def crm_metrics():
+    """HTTP Timing-Metriken des CRM Adapters (pro Endpoint), Hit-Rate des Entity-Caches, Rate-Budget, Circuit, Resolve-Memo"""
+    from tools.crm import adapter as crm_adapter
+
+    if crm_adapter is None:
+        return {"crm": None, "endpoints": {}}
+    metrics = {
+        "crm": type(crm_adapter).__name__,
+        "endpoints": crm_adapter.get_http_metrics() if hasattr(crm_adapter, "get_http_metrics") else {},
+    }
+    if hasattr(crm_adapter, "get_cache_metrics"):
+        metrics["cache"] = crm_adapter.get_cache_metrics()
+    if hasattr(crm_adapter, "get_rate_limit_metrics"):
+        metrics["rate_limit"] = crm_adapter.get_rate_limit_metrics()
+    if hasattr(crm_adapter, "get_circuit_metrics"):
+        metrics["circuit"] = crm_adapter.get_circuit_metrics()
+    if hasattr(crm_adapter, "get_resolve_metrics"):
+        metrics["resolve"] = crm_adapter.get_resolve_metrics()
+    if hasattr(crm_adapter, "get_index_metrics"):
+        metrics["index"] = crm_adapter.get_index_metrics()
+    if hasattr(crm_adapter, "get_token_metrics"):
+        metrics["token"] = crm_adapter.get_token_metrics()
+    return metrics
+
+
+# === CRM EVENTS (Webhooks des CRM -> lokaler Index/Cache) ===
+
+@app.post("/crm-events/twenty")
+async def twenty_crm_events(request: Request):
+    """
+    Twenty Webhook (record created/updated/deleted).
+    
+    Hält Kontakt-Index und Entity-Cache des Adapters aktuell, ohne Polling.
+    Signatur: X-Twenty-Webhook-Signature / X-Twenty-Webhook-Timestamp (TWENTY_WEBHOOK_SECRET).
+    
+    Returns:
+        {"ok": True, "applied": bool, "resync": bool, ...}
+    """
+    from tools.crm import adapter as crm_adapter
+    from tools.crm.twenty_webhook import verify_signature, SIGNATURE_HEADER, TIMESTAMP_HEADER
+    
+    secret = os.getenv("TWENTY_WEBHOOK_SECRET", "").strip()
+    if not secret:
+        raise HTTPException(status_code=503, detail="TWENTY_WEBHOOK_SECRET not configured")
+    
+    body = await request.body()
+    tolerance = float(os.getenv("TWENTY_WEBHOOK_TOLERANCE_SECONDS", "300"))
+    if not verify_signature(secret, body, request.headers.get(TIMESTAMP_HEADER),
+                            request.headers.get(SIGNATURE_HEADER), tolerance_seconds=tolerance):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    
+    if crm_adapter is None or not hasattr(crm_adapter, "aapply_webhook_event"):
+        return {"ok": True, "applied": False, "resync": False}
+    
+    result = await crm_adapter.aapply_webhook_event(payload)
+    return {"ok": True, **result}
+
+
 @app.get("/")
 async def root():
     """Root Endpoint"""
@@ -346,7 +508,9 @@ async def root():
         "endpoints": {
             "webhook": "POST /webhook/{platform}",
             "users": "GET/POST /api/users",
-            "health": "GET /health"
+            "health": "GET /health",
+            "crm_metrics": "GET /metrics/crm",
+            "crm_events": "POST /crm-events/twenty"
         }
     }
 
@@ -0,0 +1,374 @@
+"""
+Adizon - Kontakt-Import aus Datei-Anhängen (CSV/XLSX via Telegram/Slack)
+
+Bulk-Datenerfassung ohne LLM: Schickt ein User eine Tabelle, startet der Webhook
+den Import im Hintergrund, statt die Nachricht durch den Graph zu schicken.
+
+Pipeline (Batch für Batch, die Datei liegt nie komplett im Speicher):
+    Download (gestreamt in /tmp) -> Zeilen lesen (csv / openpyxl read_only)
+    -> Spalten-Mapping (bulk_contacts.COLUMN_ALIASES + FieldMappingLoader)
+    -> validate_field pro Batch -> adapter.(a)bulk_create_contacts
+    -> Fortschritt in den Chat, Zusammenfassung am Ende
+
+Konfiguration via ENV:
+    CRM_IMPORT_ENABLED         Datei-Import aktiv (Default: true)
+    CRM_IMPORT_BATCH_SIZE      Zeilen pro Batch / CRM-Aufruf (Default: 100)
+    CRM_IMPORT_MAX_ROWS        Max. Datenzeilen pro Datei (Default: 5000)
+    CRM_IMPORT_MAX_MB          Max. Dateigröße (Default: 10)
+    CRM_IMPORT_PROGRESS_ROWS   Fortschrittsmeldung alle N Zeilen (Default: 500)
+"""
+
+import os
+import csv
+import codecs
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, date
+from typing import Iterator, Optional
+
+from tools.chat.interface import Attachment, ChatAdapter, ChatAdapterError
+from tools.crm.bulk_contacts import (
+    CONTACT_FIELDS, COLUMN_ALIASES, DETAIL_LIMIT, column_key, split_name, email_key, outcome, format_bulk_result,
+)
+from tools.crm.rate_limit import set_rate_limit_user, reset_rate_limit_user
+
+# Dateiendung / MIME-Type -> Leser
+IMPORT_EXTENSIONS = {".csv": "csv", ".tsv": "csv", ".xlsx": "xlsx"}
+IMPORT_MIME_TYPES = {
+    "text/csv": "csv",
+    "text/comma-separated-values": "csv",
+    "text/tab-separated-values": "csv",
+    "application/csv": "csv",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+}
+
+# Kopfzeile wird in den ersten N Zeilen gesucht (Titelzeilen in Excel-Listen)
+HEADER_SEARCH_ROWS = 10
+
+
+@dataclass
+class ImportConfig:
+    """Einstellungen des Datei-Imports"""
+    enabled: bool = True
+    batch_size: int = 100
+    max_rows: int = 5000
+    max_bytes: int = 10 * 1024 * 1024
+    progress_rows: int = 500
+
+    @classmethod
+    def from_env(cls, prefix: str = "CRM_IMPORT") -> "ImportConfig":
+        """Liest {prefix}_*"""
+        defaults = cls()
+
+        def number(name, default):
+            try:
+                return max(1, int(os.getenv(f"{prefix}_{name}", default)))
+            except ValueError:
+                print(f"⚠️ Ungültiger Wert für {prefix}_{name}, nutze Default {default}")
+                return default
+
+        return cls(
+            enabled=os.getenv(f"{prefix}_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off"),
+            batch_size=number("BATCH_SIZE", defaults.batch_size),
+            max_rows=number("MAX_ROWS", defaults.max_rows),
+            max_bytes=number("MAX_MB", defaults.max_bytes // (1024 * 1024)) * 1024 * 1024,
+            progress_rows=number("PROGRESS_ROWS", defaults.progress_rows),
+        )
+
+
+@dataclass
+class ImportResult:
+    """Ergebnis eines Datei-Imports (für Undo und Verlauf)"""
+    file_name: str
+    rows: int = 0
+    outcomes: list = field(default_factory=list)
+    created: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+    truncated: bool = False
+    error: Optional[str] = None
+    summary: str = ""
+
+
+def import_format(attachment: Attachment) -> Optional[str]:
+    """"csv" | "xlsx" für importierbare Anhänge, sonst None"""
+    ext = os.path.splitext(attachment.file_name or "")[1].lower()
+    mime_type = (attachment.mime_type or "").split(";")[0].strip().lower()
+    return IMPORT_EXTENSIONS.get(ext) or IMPORT_MIME_TYPES.get(mime_type)
+
+
+# === ZEILEN LESEN (gestreamt) ===
+
+def _csv_encoding(path: str) -> str:
+    """UTF-8 (mit/ohne BOM), sonst Windows-1252 (Excel-Export)"""
+    with open(path, "rb") as f:
+        head = f.read(64 * 1024)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp1252"
+
+
+def iter_csv_rows(path: str) -> Iterator[list[str]]:
+    """CSV-Zeilen als Listen (Trennzeichen , ; Tab automatisch)"""
+    with open(path, newline="", encoding=_csv_encoding(path), errors="replace") as f:
+        sample = f.read(8192)
+        f.seek(0)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t").delimiter
+        except csv.Error:
+            # z.B. Titelzeile über der Kopfzeile: häufigstes Trennzeichen
+            delimiter = max(",;\t", key=sample.count)
+        yield from csv.reader(f, delimiter=delimiter)
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # Telefonnummern/PLZ als Zahl formatiert
+    return str(value).strip()
+
+
+def iter_xlsx_rows(path: str) -> Iterator[list[str]]:
+    """Zeilen des ersten Arbeitsblatts (openpyxl read_only: Zeile für Zeile aus dem ZIP)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("XLSX-Import benötigt das Paket openpyxl (oder Datei als CSV senden)")
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f"XLSX-Datei konnte nicht gelesen werden: {e}")
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield [_cell_text(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def iter_rows(path: str, file_format: str) -> Iterator[list[str]]:
+    return iter_xlsx_rows(path) if file_format == "xlsx" else iter_csv_rows(path)
+
+
+# === SPALTEN-MAPPING + VALIDIERUNG ===
+
+def column_aliases(field_mapper=None, entity_type: str = "person") -> dict[str, str]:
+    """
+    Spaltenschlüssel -> generisches Feld.
+
+    Reihenfolge: Feldnamen des Mappings (generisch + CRM, z.B. "mobile", "Designation"),
+    dann die Kontakt-Aliase (Vorname, Firma, ...), dann Beschreibungen aus dem Mapping.
+    """
+    allowed = field_mapper.get_allowed_fields(entity_type) if field_mapper else {}
+    aliases = {}
+    for generic, config in allowed.items():
+        for name in (generic, config.get("crm_field")):
+            aliases.setdefault(column_key(name), generic)
+    for alias, generic in COLUMN_ALIASES.items():
+        aliases.setdefault(alias, generic)
+    for generic, config in allowed.items():
+        aliases.setdefault(column_key(config.get("description")), generic)
+    aliases.pop("", None)
+    return aliases
+
+
+def map_columns(header: list[str], aliases: dict[str, str]) -> dict[int, str]:
+    """Spaltenindex -> generisches Feld (jedes Feld nur einmal, erste Spalte gewinnt)"""
+    mapping = {}
+    for index, column in enumerate(header):
+        generic = aliases.get(column_key(column))
+        if generic and generic not in mapping.values():
+            mapping[index] = generic
+    return mapping
+
+
+def row_contact(cells: list[str], mapping: dict[int, str], row: int) -> dict:
+    """Zeile -> Kontakt (generische Felder, Zusatzfelder unter "fields", Dateizeile unter "row")"""
+    raw = {generic: cells[index].strip() for index, generic in mapping.items() if index < len(cells) and cells[index]}
+    contact = {name: raw.get(name, "") for name in CONTACT_FIELDS}
+    if raw.get("name") and not (contact["first_name"] or contact["last_name"]):
+        contact["first_name"], contact["last_name"] = split_name(raw["name"])
+    contact["fields"] = {k: v for k, v in raw.items() if k not in CONTACT_FIELDS and k != "name"}
+    contact["row"] = row
+    return contact
+
+
+def validate_batch(contacts: list[dict], field_mapper, entity_type: str) -> list[str]:
+    """
+    validate_field für die Zusatzfelder eines Batches.
+    Auto-Fix wird übernommen, ungültige Werte werden verworfen (Kontakt wird trotzdem angelegt).
+
+    Returns:
+        Warnungen ("Zeile 7: 'birthday' muss im Format YYYY-MM-DD sein")
+    """
+    warnings = []
+    for contact in contacts:
+        for name, value in list(contact["fields"].items()):
+            is_valid, fixed, error = field_mapper.validate_field(entity_type, name, value)
+            if is_valid:
+                contact["fields"][name] = fixed
+            else:
+                del contact["fields"][name]
+                warnings.append(f"Zeile {contact['row']}: {error}")
+    return warnings
+
+
+# === SERVICE ===
+
+class ContactImportService:
+    """Importiert Kontakte aus einem Datei-Anhang direkt ins CRM (ohne LLM)"""
+
+    def __init__(self, chat_adapter: ChatAdapter, crm_adapter, entity_type: str, config: ImportConfig = None):
+        """
+        Args:
+            chat_adapter: Adapter der Plattform (Download + Fortschrittsmeldungen)
+            crm_adapter: TwentyCRM / ZohoCRM (bulk_create_contacts)
+            entity_type: "person" (Twenty) oder "lead" (Zoho) - für Mapping/Validierung
+        """
+        self.chat = chat_adapter
+        self.crm = crm_adapter
+        self.entity_type = entity_type
+        self.config = config or ImportConfig.from_env()
+        self.field_mapper = getattr(crm_adapter, "field_mapper", None)
+        self.label = "Leads" if entity_type == "lead" else "Kontakte"
+
+    async def run(self, chat_id: str, attachment: Attachment, user_id: Optional[str] = None) -> ImportResult:
+        """
+        Führt den Import aus und meldet Fortschritt + Ergebnis in den Chat.
+
+        Fehler (Download, Format, fehlende Spalten) landen in result.error und als
+        Nachricht im Chat - der Webhook-Request ist zu diesem Zeitpunkt längst beantwortet.
+        """
+        result = ImportResult(file_name=attachment.file_name)
+        file_format = import_format(attachment)
+        path, rows = None, None
+        rate_user = set_rate_limit_user(user_id)
+
+        print(f"📥 Datei-Import gestartet: {attachment.file_name} ({attachment.size} Bytes)")
+        await self._notify(chat_id, f"📥 Import von {attachment.file_name} gestartet ...")
+        try:
+            if not file_format:
+                raise ValueError("Nur CSV- und XLSX-Dateien können importiert werden")
+            path = await self.chat.download_attachment(attachment, self.config.max_bytes)
+            rows = iter_rows(path, file_format)
+            mapping = await asyncio.to_thread(self._read_header, rows)
+            columns = ", ".join(sorted(set(mapping.values())))
+            await self._notify(chat_id, f"📋 Erkannte Spalten: {columns}")
+            await self._import_rows(chat_id, rows, mapping, result)
+        except (ValueError, ChatAdapterError) as e:
+            result.error = str(e)
+        except Exception as e:
+            print(f"❌ Datei-Import fehlgeschlagen: {e}")
+            result.error = "Unerwarteter Fehler beim Import"
+        finally:
+            reset_rate_limit_user(rate_user)
+            if rows is not None:
+                rows.close()
+            if path and os.path.exists(path):
+                os.remove(path)
+
+        result.summary = self._summary(result)
+        print(f"✅ Datei-Import beendet: {attachment.file_name}, {result.rows} Zeilen, {len(result.created)} erstellt")
+        await self._notify(chat_id, result.summary)
+        return result
+
+    def _read_header(self, rows: Iterator[list[str]]) -> dict[int, str]:
+        """Sucht die Kopfzeile (erste Zeile mit erkannten Spalten) und merkt sich deren Zeilennummer"""
+        aliases = column_aliases(self.field_mapper, self.entity_type)
+        for line, cells in enumerate(rows, start=1):
+            mapping = map_columns(cells, aliases)
+            if mapping:
+                if not {"last_name", "name"} & set(mapping.values()):
+                    raise ValueError("Keine Spalte für Nachname oder Name gefunden")
+                self._header_line = line
+                return mapping
+            if line >= HEADER_SEARCH_ROWS:
+                break
+        raise ValueError("Keine Kopfzeile erkannt (z.B. Vorname;Nachname;Firma;E-Mail)")
+
+    def _next_batch(self, rows: Iterator[list[str]], mapping: dict[int, str], result: ImportResult) -> list[dict]:
+        """Liest die nächsten batch_size Datenzeilen (leere Zeilen werden übersprungen)"""
+        batch = []
+        for cells in rows:
+            self._header_line += 1
+            if not any(cell.strip() for cell in cells):
+                continue
+            if result.rows >= self.config.max_rows:
+                result.truncated = True
+                break
+            result.rows += 1
+            batch.append(row_contact(cells, mapping, self._header_line))
+            if len(batch) >= self.config.batch_size:
+                break
+        return batch
+
+    async def _import_rows(self, chat_id: str, rows: Iterator[list[str]], mapping: dict[int, str], result: ImportResult):
+        seen = {}  # email_key -> Zeile (Duplikate über Batch-Grenzen)
+        reported = 0
+        while True:
+            batch = await asyncio.to_thread(self._next_batch, rows, mapping, result)
+            if not batch:
+                break
+
+            pending = []
+            for contact in batch:
+                key = email_key(contact["email"])
+                if key and key in seen:
+                    result.outcomes.append(outcome(contact, "duplicate", message=f"doppelt in der Datei (Zeile {seen[key]})"))
+                    continue
+                if key:
+                    seen[key] = contact["row"]
+                pending.append(contact)
+
+            if self.field_mapper:
+                result.warnings.extend(validate_batch(pending, self.field_mapper, self.entity_type))
+            await self._create(pending, result)
+
+            if result.rows - reported >= self.config.progress_rows:
+                reported = result.rows
+                await self._notify(chat_id, f"⏳ {result.rows} Zeilen verarbeitet: {self._counts(result)}")
+            if result.truncated:
+                break
+
+    async def _create(self, contacts: list[dict], result: ImportResult):
+        """Ein Batch -> ein bulk_create_contacts Aufruf (Async-Variante falls vorhanden)"""
+        if not contacts:
+            return
+        try:
+            bulk = getattr(self.crm, "abulk_create_contacts", None)
+            if asyncio.iscoroutinefunction(bulk):
+                await bulk(contacts, created=result.created, outcomes=result.outcomes)
+            else:
+                await asyncio.to_thread(self.crm.bulk_create_contacts, contacts, result.created, result.outcomes)
+        except Exception as e:
+            print(f"❌ Batch-Import fehlgeschlagen: {e}")
+            result.outcomes.extend(outcome(contact, "failed", message=str(e)) for contact in contacts)
+
+    @staticmethod
+    def _counts(result: ImportResult) -> str:
+        count = {status: sum(1 for o in result.outcomes if o["status"] == status) for status in ("created", "duplicate", "failed")}
+        return f"{count['created']} erstellt, {count['duplicate']} Duplikate, {count['failed']} Fehler"
+
+    def _summary(self, result: ImportResult) -> str:
+        if result.error and not result.outcomes:
+            return f"❌ Import von {result.file_name} fehlgeschlagen: {result.error}"
+
+        lines = [f"📄 {result.file_name}", format_bulk_result(result.outcomes, label=self.label)]
+        if result.warnings:
+            lines.append(f"Ignorierte Feldwerte ({len(result.warnings)}):")
+            lines.extend(f"  • {warning}" for warning in result.warnings[:DETAIL_LIMIT])
+        if result.truncated:
+            lines.append(f"⚠️ Nur die ersten {self.config.max_rows} Zeilen importiert (CRM_IMPORT_MAX_ROWS)")
+        if result.error:
+            lines.append(f"❌ Abgebrochen: {result.error}")
+        if result.created:
+            lines.append("↩️ \"rückgängig\" löscht alle importierten Einträge wieder.")
+        return "\n".join(lines)
+
+    async def _notify(self, chat_id: str, text: str):
+        await self.chat.send_message(chat_id, self.chat.format_response(text))
@@ -0,0 +1,129 @@
+"""
+Test: Offline Benchmark Harness (benchmarks/)
+Kritisch für: Aussagekraft des Performance-Regression-Gates
+
+Tests:
+- Fake LLM erkennt Intent / Session Guard / CRM / Chat Aufrufe
+- Fake LLM spielt geskriptete Tool-Calls rundenweise ab
+- Perzentil-Berechnung
+- Baseline-Vergleich meldet Regressionen
+- Webhook-Load: Workload-Generator (Plattform/Voice-Mix) und User-IDs
+"""
+
+import pytest
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs.fake_llm import FakeLLM
+from benchmarks.conversation_bench import percentile, compare_to_baseline
+from benchmarks.webhook_load import generate_workload, platform_user_id
+
+TOOLS = [{"type": "function", "function": {"name": "search_contacts", "parameters": {}}}]
+
+
+def _body(system, user, extra=None, tools=None):
+    messages = [{"role": "system", "content": system}, {"role": "user", "content": user}] + (extra or [])
+    body = {"model": "fake", "messages": messages}
+    if tools:
+        body["tools"] = tools
+    return body
+
+
+class TestFakeLLM:
+    """Tests für den deterministischen Fake-LLM"""
+
+    def test_intent_and_session_guard(self):
+        """Test: Rollen werden über den System-Prompt erkannt"""
+        llm = FakeLLM()
+        llm.register_turn("Wie geht's?", {"intent": "CHAT", "session": "ACTIVE"})
+
+        intent, kind = llm.respond(_body("Du bist ein strikter Intent Classifier", "Wie geht's?"))
+        guard, guard_kind = llm.respond(_body('Du bist der Session-Manager. User sagte: "Wie geht\'s?"', "Entscheide"))
+
+        assert kind == "intent"
+        assert intent["choices"][0]["message"]["content"] == "CHAT"
+        assert guard_kind == "session_guard"
+        assert guard["choices"][0]["message"]["content"] == "ACTIVE"
+
+    def test_scripted_tool_rounds(self):
+        """Test: Erst Tool-Call laut Skript, nach Tool-Result die Antwort"""
+        llm = FakeLLM()
+        llm.register_turn("Suche Braun", {
+            "tool_calls": [{"name": "search_contacts", "args": {"query": "Braun"}}],
+            "reply": "Gefunden.",
+        })
+
+        first, kind = llm.respond(_body("CRM Agent", "Suche Braun", tools=TOOLS))
+        call = first["choices"][0]["message"]["tool_calls"][0]
+        tool_round = [
+            {"role": "assistant", "content": None, "tool_calls": [call]},
+            {"role": "tool", "tool_call_id": call["id"], "content": "✅ Thomas Braun"},
+        ]
+        second, _ = llm.respond(_body("CRM Agent", "Suche Braun", extra=tool_round, tools=TOOLS))
+
+        assert kind == "crm"
+        assert json.loads(call["function"]["arguments"]) == {"query": "Braun"}
+        assert second["choices"][0]["message"]["content"] == "Gefunden."
+        assert [c["tool_calls"] for c in llm.calls] == [1, 0]
+        assert llm.calls[1]["prompt_tokens"] > llm.calls[0]["prompt_tokens"]
+
+
+class TestReportHelpers:
+    """Tests für Auswertung und Regression-Gate"""
+
+    def test_percentile(self):
+        """Test: Lineare Interpolation"""
+        values = [10, 20, 30, 40, 50]
+        assert percentile(values, 50) == 30
+        assert percentile(values, 95) == pytest.approx(48)
+        assert percentile([], 95) == 0.0
+
+    def test_baseline_detects_regression(self):
+        """Test: Mehr Prompt-Tokens als erlaubt -> Regression"""
+        baseline = {"overall": {"llm_calls": 4.0, "prompt_tokens": 1000.0, "latency_p95_ms": 500.0, "errors": 0}}
+        current = {"llm_calls": 4.0, "prompt_tokens": 1200.0, "latency_p95_ms": 520.0, "errors": 0}
+
+        regressions = compare_to_baseline(current, baseline, tolerance=0.05, latency_tolerance=0.25)
+
+        assert regressions == ["prompt_tokens"]
+
+
+class TestWebhookWorkload:
+    """Tests für den Webhook Load Generator"""
+
+    def _args(self, **overrides):
+        defaults = dict(seed=1, rate=10.0, duration=1.0, requests=200, users=5, slack_ratio=0.5, voice_ratio=0.25)
+        defaults.update(overrides)
+        return type("Args", (), defaults)
+
+    def test_workload_mix_and_arrivals(self):
+        """Test: Ankünfte monoton, Plattform- und Voice-Anteil grob wie konfiguriert"""
+        workload = generate_workload(self._args(), ["Suche Braun"], "http://chat")
+
+        offsets = [e["at"] for e in workload]
+        slack = [e for e in workload if e["platform"] == "slack"]
+        voice = [e for e in workload if "transcript" in e]
+
+        assert len(workload) == 200
+        assert offsets == sorted(offsets)
+        assert 60 < len(slack) < 140
+        assert 25 < len(voice) < 80
+        assert all(e["payload"]["event"]["files"][0]["url_private"].startswith("http://chat/files/")
+                   for e in voice if e["platform"] == "slack")
+
+    def test_platform_user_ids(self):
+        """Test: User-IDs im Server-Format, deterministisch pro Seed"""
+        first = generate_workload(self._args(requests=20), ["Hallo"], "http://chat")
+        second = generate_workload(self._args(requests=20), ["Hallo"], "http://chat")
+
+        ids = {platform_user_id(e["platform"], e["payload"]) for e in first}
+
+        assert all(i.startswith(("telegram:9000", "slack:ULOAD")) for i in ids)
+        assert [e["at"] for e in first] == [e["at"] for e in second]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,227 @@
+"""
+Test: Bulk-Import von Kontakten (Tool bulk_create_contacts)
+Kritisch für: Messe-Listen / CSV ohne einen LLM-Schritt und Request pro Kontakt
+
+Tests:
+- parse_contacts: CSV (Semikolon, deutsche Spalten, "Name"-Spalte), JSON, Fehler
+- prepare_contacts: Pflichtfelder, ungültige E-Mail, Duplikate innerhalb der Liste
+- Zoho: 100 Leads pro Insert, Ergebnis pro Datensatz (SUCCESS / DUPLICATE_DATA / Fehler)
+- Zoho: Duplikat-Check gegen Leads + Kontakte per COQL "Email in (...)" vor dem Insert
+- Twenty: batch/people, Fallback auf Einzel-Creates wenn der Batch scheitert
+- Tool-Wrapper: ganzer Import = eine Undo-Aktion, Undo löscht alle IDs
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools.crm as crm_tools
+from tools.crm.bulk_contacts import parse_contacts, prepare_contacts, format_bulk_result
+
+CSV = (
+    "Vorname;Nachname;Firma;E-Mail;Telefon\n"
+    "Anna;Schmidt;Sonnenstrom;anna@example.com;+49 30 1\n"
+    "Thomas;Braun;Voltage;tb@voltage.de;\n"
+)
+
+
+def _contacts(n):
+    return [{"first_name": f"Max{i}", "last_name": "Muster", "company": "Expoya", "email": f"max{i}@expoya.com"}
+            for i in range(n)]
+
+
+def _zoho():
+    env = {'ZOHO_CLIENT_ID': 'a', 'ZOHO_CLIENT_SECRET': 'b', 'ZOHO_REFRESH_TOKEN': 'c',
+           'ZOHO_RESOLVE_MEMO_ENABLED': 'false', 'ZOHO_INDEX_ENABLED': 'false'}
+    with patch.dict(os.environ, env), \
+            patch('tools.crm.zoho_adapter.load_field_mapping', return_value=Mock()), \
+            patch('tools.crm.zoho_adapter.ZohoCRM._refresh_access_token'):
+        from tools.crm.zoho_adapter import ZohoCRM
+        return ZohoCRM()
+
+
+@pytest.fixture
+def twenty():
+    env = {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'test_key', 'TWENTY_INDEX_ENABLED': 'false'}
+    with patch.dict(os.environ, env), \
+            patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+        from tools.crm.twenty_adapter import TwentyCRM
+        yield TwentyCRM()
+
+
+class TestParse:
+    """Tests für parse_contacts / prepare_contacts / format_bulk_result"""
+
+    def test_csv_german_columns(self):
+        """Test: Semikolon-CSV mit deutschen Spaltennamen -> generische Felder"""
+        contacts = parse_contacts(CSV)
+
+        assert contacts[0] == {"first_name": "Anna", "last_name": "Schmidt", "company": "Sonnenstrom",
+                               "email": "anna@example.com", "phone": "+49 30 1"}
+        assert contacts[1]["phone"] == ""
+
+    def test_json_and_name_column(self):
+        """Test: JSON-Liste, Spalte "Name" wird in Vor-/Nachname geteilt"""
+        contacts = parse_contacts('[{"Name": "Anna Maria Schmidt", "Email": "anna@example.com"}]')
+
+        assert contacts[0]["first_name"] == "Anna Maria" and contacts[0]["last_name"] == "Schmidt"
+
+    def test_invalid_input(self):
+        """Test: Kein erkennbares Format / zu viele Zeilen -> ValueError"""
+        with pytest.raises(ValueError):
+            parse_contacts("foo bar baz")
+        with patch.dict(os.environ, {"CRM_BULK_MAX_RECORDS": "1"}), pytest.raises(ValueError):
+            parse_contacts(_contacts(2))
+
+    def test_prepare_and_format(self):
+        """Test: Nachname fehlt, ungültige E-Mail, doppelt in der Liste -> mit Zeilennummer"""
+        contacts = _contacts(2) + [{"first_name": "X", "last_name": "", "email": "x@y.de"},
+                                   {"last_name": "Y", "email": "kaputt"},
+                                   {"last_name": "Muster", "email": "MAX0@expoya.com"}]
+        valid, outcomes = prepare_contacts(contacts)
+
+        assert [c["row"] for c in valid] == [1, 2]
+        result = format_bulk_result(outcomes)
+        assert result.startswith("❌ Import Kontakte: 0 erstellt, 1 Duplikate übersprungen, 2 Fehler")
+        assert "Zeile 3: X - Nachname fehlt" in result
+        assert "Zeile 5: Muster <MAX0@expoya.com> - doppelt in der Liste (Zeile 1)" in result
+
+
+class TestZohoBulk:
+    """Tests für ZohoCRM.bulk_create_contacts"""
+
+    def test_chunks_of_100(self):
+        """Test: 250 Leads -> 1 COQL-Check pro Modul und Chunk + 3 Inserts, IDs für Undo"""
+        zoho = _zoho()
+        inserts = []
+
+        def routes(method, endpoint, params=None, data=None, multi_status=False):
+            if endpoint == "coql":
+                return {}
+            inserts.append(data["data"])
+            assert multi_status
+            return {"data": [{"code": "SUCCESS", "details": {"id": f"{len(inserts)}{i:03d}"}}
+                             for i in range(len(data["data"]))]}
+
+        created = []
+        with patch.object(zoho, '_request', side_effect=routes) as mock_request:
+            result = zoho.bulk_create_contacts(_contacts(250), created=created)
+
+        assert [len(chunk) for chunk in inserts] == [100, 100, 50]
+        assert sum(1 for c in mock_request.call_args_list if c.args[1] == "coql") == 10
+        assert inserts[0][0]["Lead_Source"] == "AI Assistant" and "Phone" not in inserts[0][0]
+        assert len(created) == 250 and created[0] == "1000"
+        assert result.startswith("✅ Import Leads: 250 erstellt, 0 Duplikate übersprungen, 0 Fehler")
+        assert "… und 230 weitere" in result
+
+    def test_per_record_codes(self):
+        """Test: Multi-Status -> SUCCESS / DUPLICATE_DATA / INVALID_DATA pro Zeile"""
+        zoho = _zoho()
+        response = {"data": [
+            {"code": "SUCCESS", "details": {"id": "111"}},
+            {"code": "DUPLICATE_DATA", "details": {"duplicate_record": {"id": "222"}}},
+            {"code": "INVALID_DATA", "message": "invalid data", "details": {"api_name": "Email"}},
+        ]}
+
+        def routes(method, endpoint, params=None, data=None, multi_status=False):
+            return {} if endpoint == "coql" else response
+
+        created = []
+        with patch.object(zoho, '_request', side_effect=routes):
+            result = zoho.bulk_create_contacts(_contacts(3), created=created)
+
+        assert created == ["111"]
+        assert result.startswith("⚠️ Import Leads: 1 erstellt, 1 Duplikate übersprungen, 1 Fehler")
+        assert "(vorhanden: 222)" in result
+        assert "Zeile 3: Max2 Muster - invalid data" in result
+
+    def test_existing_lead_or_contact_skipped(self):
+        """Test: E-Mail schon als Kontakt vorhanden -> kein Insert für diese Zeile"""
+        zoho = _zoho()
+
+        def routes(method, endpoint, params=None, data=None, multi_status=False):
+            if endpoint == "coql":
+                if "from Contacts" in data["select_query"]:
+                    assert "Email in ('max0@expoya.com', 'max1@expoya.com')" in data["select_query"]
+                    return {"data": [{"id": "999", "Email": "Max1@Expoya.com"}]}
+                return {}
+            return {"data": [{"code": "SUCCESS", "details": {"id": "111"}}]}
+
+        with patch.object(zoho, '_request', side_effect=routes) as mock_request:
+            result = zoho.bulk_create_contacts(_contacts(2))
+
+        insert = mock_request.call_args_list[-1]
+        assert [r["Email"] for r in insert.kwargs["data"]["data"]] == ["max0@expoya.com"]
+        assert "existiert bereits (Kontakt) (vorhanden: 999)" in result
+
+
+class TestTwentyBulk:
+    """Tests für TwentyCRM.bulk_create_contacts"""
+
+    def test_batch_request(self, twenty):
+        """Test: Duplikat-Check per [in]-Filter, dann ein batch/people für alle"""
+        def routes(method, endpoint, params=None, data=None, envelope=False):
+            if method == "GET":
+                assert params["filter"].startswith('emails.primaryEmail[in]:["max0@expoya.com",')
+                return {"people": [{"id": "p-old", "emails": {"primaryEmail": "max2@expoya.com"}}]}
+            return {"createPeople": [{"id": f"p-{i}", **record} for i, record in enumerate(data)]}
+
+        created = []
+        with patch.object(twenty, '_request', side_effect=routes) as mock_request:
+            result = twenty.bulk_create_contacts(_contacts(3), created=created)
+
+        assert [(c.args[0], c.args[1]) for c in mock_request.call_args_list] == [("GET", "people"), ("POST", "batch/people")]
+        assert created == ["p-0", "p-1"]
+        assert "2 erstellt, 1 Duplikate übersprungen" in result and "(vorhanden: p-old)" in result
+
+    def test_failed_batch_falls_back(self, twenty):
+        """Test: Batch abgelehnt -> Einzel-Creates, Fehler pro Zeile"""
+        def routes(method, endpoint, params=None, data=None, envelope=False):
+            if method == "GET" or endpoint == "batch/people":
+                return None if endpoint == "batch/people" else {"people": []}
+            if data["emails"]["primaryEmail"] == "max1@expoya.com":
+                return None
+            return {"createPerson": {"id": "p-ok", **data}}
+
+        created = []
+        with patch.object(twenty, '_request', side_effect=routes):
+            result = twenty.bulk_create_contacts(_contacts(2), created=created)
+
+        assert created == ["p-ok"]
+        assert "Zeile 2: Max1 Muster - API Error" in result
+
+
+class TestBulkTool:
+    """Tests für das Tool bulk_create_contacts (Undo)"""
+
+    def test_single_undo_action(self):
+        """Test: Import -> eine Undo-Aktion mit allen IDs, Undo löscht per delete_items"""
+        adapter = Mock(spec=["delete_item", "delete_items"])
+        adapter.delete_items = Mock(return_value="✅ 2 Einträge erfolgreich rückgängig gemacht.")
+
+        def fake_bulk(contacts, created=None):
+            created.extend(["p-1", "p-2"])
+            return "✅ Import Kontakte: 2 erstellt"
+
+        stack = []
+        with patch.object(crm_tools, "adapter", adapter), \
+                patch.object(crm_tools, "bulk_create_func", fake_bulk):
+            tools = crm_tools.get_crm_tools_for_user("telegram:1", undo_stack=stack)
+            bulk = next(t for t in tools if t.name == "bulk_create_contacts")
+            undo = next(t for t in tools if t.name == "undo_last_action")
+
+            assert "❌" in bulk.func("kein CSV")
+            bulk.func(CSV)
+            assert stack[0]["entity_ids"] == ["p-1", "p-2"]
+
+            result = undo.func()
+
+        adapter.delete_items.assert_called_once_with("person", ["p-1", "p-2"], failed=[])
+        assert "✅" in result and stack == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,149 @@
+"""
+Test: Checkpoint Retention (utils/checkpoint_retention.py)
+Kritisch für: Storage-Wachstum, Index-Bloat, Lock-Dauer
+
+Tests:
+- Policy wird aus Environment gelesen
+- Abgelaufene Threads werden in Batches gelöscht (mit Pause dazwischen)
+- Alte Versionen werden gelöscht, verwaiste Writes/Blobs aufgeräumt
+- Dry-Run zählt nur
+- Fehler landen im Report statt den Server zu crashen
+"""
+
+import pytest
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import checkpoint_retention as retention
+from utils.checkpoint_retention import RetentionPolicy, run_retention
+
+
+def _cursor(rows=None, rowcount=0):
+    cur = MagicMock()
+    cur.fetchall = AsyncMock(return_value=rows or [])
+    cur.fetchone = AsyncMock(return_value=(rows or [(0,)])[0])
+    cur.rowcount = rowcount
+    return cur
+
+
+class FakePool:
+    """Minimaler AsyncConnectionPool: liefert Cursor je nach SQL"""
+
+    def __init__(self, responder):
+        self.statements = []
+        self.responder = responder
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = MagicMock()
+
+        async def execute(sql, params=None):
+            self.statements.append((sql, params))
+            return self.responder(sql, params)
+
+        conn.execute = execute
+        yield conn
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture(autouse=True)
+def no_sleep():
+    with patch.object(retention.asyncio, "sleep", new=AsyncMock()) as sleep:
+        yield sleep
+
+
+class TestRetentionPolicy:
+    """Tests für die Konfiguration"""
+
+    def test_from_env(self):
+        """Test: CHECKPOINT_* Variablen werden gelesen"""
+        env = {"CHECKPOINT_MAX_AGE_DAYS": "7", "CHECKPOINT_MAX_VERSIONS": "0", "CHECKPOINT_RETENTION_BATCH_SIZE": "50"}
+        with patch.dict(os.environ, env):
+            policy = RetentionPolicy.from_env()
+
+        assert policy.max_age_days == 7
+        assert policy.max_versions == 0
+        assert policy.batch_size == 50
+
+
+class TestRunRetention:
+    """Tests für den Retention-Lauf"""
+
+    def test_stale_threads_deleted_in_batches(self, no_sleep):
+        """Test: Zwei volle Batches + ein Rest, Pause zwischen vollen Batches"""
+        batches = iter([[("t1",), ("t2",)], [("t3",), ("t4",)], [("t5",)]])
+
+        def responder(sql, params):
+            if "GROUP BY thread_id" in sql:
+                return _cursor(rows=next(batches))
+            if sql.startswith("DELETE FROM checkpoints "):
+                return _cursor(rowcount=len(params[0]) * 3)
+            return _cursor()
+
+        pool = FakePool(responder)
+        policy = RetentionPolicy(max_age_days=30, max_versions=0, batch_size=2)
+
+        report = _run(run_retention(pool, policy))
+
+        assert report.threads_deleted == 5
+        assert report.checkpoints_deleted == 15
+        assert report.batches == 3
+        assert no_sleep.await_count == 2
+        deleted_writes = [p[0] for s, p in pool.statements if s.startswith("DELETE FROM checkpoint_writes")]
+        assert deleted_writes == [["t1", "t2"], ["t3", "t4"], ["t5"]]
+
+    def test_excess_versions_prune_orphans(self):
+        """Test: Alte Versionen löschen -> Writes/Blobs der betroffenen Threads aufräumen"""
+        def responder(sql, params):
+            if "WITH doomed" in sql:
+                return _cursor(rows=[("t1",), ("t1",), ("t2",)], rowcount=3)
+            return _cursor()
+
+        pool = FakePool(responder)
+        policy = RetentionPolicy(max_age_days=0, max_versions=5, batch_size=100)
+
+        report = _run(run_retention(pool, policy))
+
+        assert report.checkpoints_deleted == 3
+        prune = [(s, p) for s, p in pool.statements if "NOT EXISTS" in s]
+        assert len(prune) == 2
+        assert sorted(prune[0][1][0]) == ["t1", "t2"]
+
+    def test_dry_run_only_counts(self):
+        """Test: Dry-Run führt keine DELETEs aus"""
+        def responder(sql, params):
+            if "count(*)" in sql and "HAVING" in sql:
+                return _cursor(rows=[(4,)])
+            if "count(*)" in sql:
+                return _cursor(rows=[(42,)])
+            return _cursor()
+
+        pool = FakePool(responder)
+
+        report = _run(run_retention(pool, RetentionPolicy(), dry_run=True))
+
+        assert report.dry_run
+        assert report.threads_deleted == 4
+        assert report.checkpoints_deleted == 42
+        assert not any("DELETE" in s for s, _ in pool.statements)
+
+    def test_errors_are_reported(self):
+        """Test: DB-Fehler -> Report mit Fehler, keine Exception"""
+        def responder(sql, params):
+            raise RuntimeError("connection lost")
+
+        report = _run(run_retention(FakePool(responder), RetentionPolicy()))
+
+        assert report.errors == ["connection lost"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,96 @@
+"""
+Test: Checkpoint Persistence Modes (utils/checkpointing.py)
+Kritisch für: Postgres Write-I/O, Storage-Wachstum
+
+Tests:
+- CHECKPOINT_MODE wird gelesen, ungültige Werte fallen auf "full" zurück
+- exit/latest schreiben nur EINEN Checkpoint pro Turn
+- full schreibt weiterhin einen Checkpoint pro Node
+"""
+
+import pytest
+from typing import TypedDict
+from unittest.mock import patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.memory import InMemorySaver
+
+from utils.checkpointing import get_persistence_mode, get_invoke_kwargs
+
+
+class _State(TypedDict):
+    counter: int
+
+
+def _build_three_node_graph(checkpointer):
+    graph = StateGraph(_State)
+    for name in ("a", "b", "c"):
+        graph.add_node(name, lambda state: {"counter": state["counter"] + 1})
+    graph.add_edge(START, "a")
+    graph.add_edge("a", "b")
+    graph.add_edge("b", "c")
+    graph.add_edge("c", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def _count_checkpoints(saver, thread_id):
+    return len(list(saver.list({"configurable": {"thread_id": thread_id}})))
+
+
+class TestPersistenceMode:
+    """Tests für die Modus-Konfiguration"""
+
+    def test_default_is_full(self):
+        """Test: Ohne Env Variable -> full"""
+        with patch.dict(os.environ, {}, clear=True):
+            assert get_persistence_mode() == "full"
+
+    def test_reads_env(self):
+        """Test: CHECKPOINT_MODE wird case-insensitive gelesen"""
+        with patch.dict(os.environ, {"CHECKPOINT_MODE": " Latest "}):
+            assert get_persistence_mode() == "latest"
+
+    def test_invalid_falls_back_to_full(self):
+        """Test: Ungültiger Wert -> full"""
+        with patch.dict(os.environ, {"CHECKPOINT_MODE": "shallow"}):
+            assert get_persistence_mode() == "full"
+
+
+class TestInvokeKwargs:
+    """Tests für die Anzahl geschriebener Checkpoints pro Turn"""
+
+    def test_full_mode_has_no_kwargs(self):
+        """Test: full -> LangGraph Default"""
+        graph = _build_three_node_graph(InMemorySaver())
+        assert get_invoke_kwargs(graph, "full") == {}
+
+    def test_full_mode_writes_checkpoint_per_node(self):
+        """Test: full schreibt Input + 3 Nodes + Start-Checkpoint"""
+        saver = InMemorySaver()
+        graph = _build_three_node_graph(saver)
+        config = {"configurable": {"thread_id": "t-full"}}
+
+        graph.invoke({"counter": 0}, config=config, **get_invoke_kwargs(graph, "full"))
+
+        assert _count_checkpoints(saver, "t-full") > 1
+
+    @pytest.mark.parametrize("mode", ["exit", "latest"])
+    def test_exit_modes_write_single_checkpoint(self, mode):
+        """Test: exit/latest schreiben nur den finalen Checkpoint"""
+        saver = InMemorySaver()
+        graph = _build_three_node_graph(saver)
+        config = {"configurable": {"thread_id": f"t-{mode}"}}
+
+        result = graph.invoke({"counter": 0}, config=config, **get_invoke_kwargs(graph, mode))
+
+        assert result["counter"] == 3
+        assert _count_checkpoints(saver, f"t-{mode}") == 1
+        assert graph.get_state(config).values["counter"] == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
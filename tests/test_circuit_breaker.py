@@ -0,0 +1,201 @@
+"""
+Test: Circuit Breaker für CRM APIs (tools/crm/circuit_breaker.py)
+Kritisch für: Schnelle Fehlermeldung statt Timeout-Kaskaden bei CRM-Ausfall
+
+Tests:
+- closed -> open nach failure_threshold Fehlern, danach Fast-Fail ohne Request
+- 4xx zählt nicht als Ausfall
+- half_open: Health-Probe ok -> closed, Probe fehlgeschlagen -> wieder open
+- half_open ohne Probe: ein Test-Request, weitere abgelehnt
+- CrmHttpClient: Verbindungsfehler öffnen den Circuit, Retries scheitern sofort
+- Tools: offener Circuit -> "CRM nicht erreichbar" in Millisekunden, Ablehnung mitten im Call
+"""
+
+import pytest
+import asyncio
+import time
+import sys
+import os
+from unittest.mock import Mock, patch
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.circuit_breaker import (
+    CircuitBreaker, BreakerConfig, CrmUnavailable, CLOSED, OPEN, HALF_OPEN, guard, aguard,
+)
+from tools.crm.http_client import CrmHttpClient, HttpClientConfig
+
+
+def _breaker(probe=None, threshold=2, recovery=30.0, **kwargs):
+    return CircuitBreaker("Test", BreakerConfig(failure_threshold=threshold, recovery_seconds=recovery, **kwargs), probe=probe)
+
+
+def _expire(breaker):
+    """Recovery-Zeit abgelaufen"""
+    breaker._opened_at -= breaker.config.recovery_seconds + 1
+
+
+class TestStates:
+    """Tests für closed/open/half_open"""
+
+    def test_opens_after_threshold(self):
+        """Test: 2 Fehler in Folge -> open, danach CrmUnavailable ohne Versuch"""
+        breaker = _breaker()
+        breaker.record_failure("ConnectError")
+        assert breaker.state == CLOSED
+        breaker.record_status(503)
+
+        assert breaker.state == OPEN
+        assert breaker.rejecting()
+        with pytest.raises(CrmUnavailable, match="CRM nicht erreichbar"):
+            breaker.before_call()
+        metrics = breaker.get_metrics()
+        assert (metrics["opened"], metrics["rejected"], metrics["last_error"]) == (1, 1, "HTTP 503")
+
+    def test_client_errors_reset(self):
+        """Test: 4xx/429 heißt 'CRM antwortet' -> Zähler zurück"""
+        breaker = _breaker()
+        breaker.record_failure()
+        breaker.record_status(404)
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+    def test_probe_closes(self):
+        """Test: Nach recovery_seconds -> Health-Probe ok -> closed, Request geht raus"""
+        probe = Mock(return_value=True)
+        breaker = _breaker(probe=probe)
+        breaker.record_failure()
+        breaker.record_failure()
+        _expire(breaker)
+
+        breaker.before_call()
+
+        assert breaker.state == CLOSED
+        probe.assert_called_once()
+
+    def test_failed_probe_reopens(self):
+        """Test: Probe-Fehler -> wieder open mit neuer Wartezeit"""
+        breaker = _breaker(probe=Mock(side_effect=requests.exceptions.ConnectionError()))
+        breaker.record_failure()
+        breaker.record_failure()
+        _expire(breaker)
+
+        with pytest.raises(CrmUnavailable):
+            breaker.before_call()
+        assert breaker.state == OPEN
+        assert breaker.retry_in() > 29
+        assert breaker.get_metrics()["probe_failures"] == 1
+
+    def test_half_open_single_trial_without_probe(self):
+        """Test: Ohne Probe darf genau ein Test-Request raus"""
+        breaker = _breaker(probe=Mock(return_value=True), probe_enabled=False)
+        breaker.record_failure()
+        breaker.record_failure()
+        _expire(breaker)
+
+        breaker.before_call()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CrmUnavailable):
+            breaker.before_call()
+
+        breaker.record_status(200)
+        assert breaker.state == CLOSED
+
+
+class TestHttpClient:
+    """Tests für den Breaker im gepoolten HTTP-Client"""
+
+    def test_connection_errors_fail_fast(self):
+        """Test: Offener Circuit beendet auch die Retry-Schleife sofort"""
+        breaker = _breaker(threshold=2)
+        client = CrmHttpClient("https://crm.example.com/rest", config=HttpClientConfig(retries=5, backoff_seconds=0),
+                               breaker=breaker)
+        session = Mock()
+        session.request.side_effect = requests.exceptions.ConnectionError("down")
+
+        with patch.object(client, '_get_session', return_value=session):
+            with pytest.raises(CrmUnavailable):
+                client.request("GET", "people")
+            started = time.perf_counter()
+            with pytest.raises(CrmUnavailable):
+                client.request("GET", "people")
+
+        assert session.request.call_count == 2
+        assert time.perf_counter() - started < 0.05
+
+    def test_twenty_shares_breaker(self):
+        """Test: REST + GraphQL hängen am selben Breaker, Metriken am Adapter"""
+        with patch.dict(os.environ, {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'k'}):
+            with patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+                from tools.crm.twenty_adapter import TwentyCRM
+                adapter = TwentyCRM()
+
+        assert adapter.http.breaker is adapter.graphql_http.breaker is adapter.circuit_breaker
+        assert adapter.get_circuit_metrics()["state"] == CLOSED
+
+
+class TestTools:
+    """Tests für das 'CRM nicht erreichbar'-Ergebnis"""
+
+    def test_open_circuit_short_circuits_tool(self):
+        """Test: Tool wird gar nicht aufgerufen, Ergebnis sofort"""
+        breaker = _breaker()
+        breaker.record_failure()
+        breaker.record_failure()
+        tool = Mock(return_value="✅")
+
+        started = time.perf_counter()
+        result = guard(breaker, tool)("Thomas")
+
+        assert result.startswith("⛔ CRM nicht erreichbar (Test)")
+        assert "nichts geändert" in result
+        tool.assert_not_called()
+        assert time.perf_counter() - started < 0.01
+
+    def test_rejection_during_call(self):
+        """Test: Circuit öffnet mitten im Tool-Call -> Ergebnis ersetzt (async + Kind-Tasks)"""
+        breaker = _breaker(threshold=1)
+
+        async def search(query):
+            async def page():
+                breaker.record_failure()
+                try:
+                    await breaker.abefore_call()
+                except CrmUnavailable:
+                    return None
+            await asyncio.gather(page())
+            return "🔍 Keine Treffer"
+
+        result = asyncio.run(aguard(breaker, search)("Thomas"))
+
+        assert result.startswith("⛔ CRM nicht erreichbar")
+
+    def test_tool_factory_wraps_tools(self):
+        """Test: get_crm_tools_for_user nutzt den Breaker des Adapters"""
+        import tools.crm as crm_tools
+
+        breaker = _breaker()
+        adapter = Mock(spec=["circuit_breaker"])
+        adapter.circuit_breaker = breaker
+        calls = []
+
+        def search(query: str) -> str:
+            """Sucht Kontakte"""
+            calls.append(query)
+            return "🔍"
+
+        breaker.record_failure()
+        breaker.record_failure()
+
+        with patch.object(crm_tools, "adapter", adapter), patch.object(crm_tools, "search_func", search):
+            tools = crm_tools.get_crm_tools_for_user("telegram:1")
+            result = next(t for t in tools if t.name == "search_contacts").invoke({"query": "Thomas"})
+
+        assert "CRM nicht erreichbar" in result
+        assert calls == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,230 @@
+"""
+Test: Kontakt-Import aus Datei-Anhängen (services/contact_import.py)
+Kritisch für: Messe-Listen als CSV/XLSX direkt aus Telegram/Slack ins CRM, ohne LLM
+
+Tests:
+- import_format: Endung / MIME-Type -> csv | xlsx
+- CSV: Windows-1252 + Semikolon, XLSX via openpyxl (Zahlen/Datum als Text)
+- Spalten-Mapping: Feldnamen des Mappings vor Aliasen (Zoho "Mobile" -> Zusatzfeld)
+- validate_batch: Auto-Fix übernehmen, ungültige Werte verwerfen + Warnung
+- ContactImportService: Batches, Fortschritt, Duplikate über Batch-Grenzen, max_rows, Fehler
+- Chat-Adapter: Telegram-Dokument / Slack-Datei -> StandardMessage.attachment
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from datetime import datetime
+from unittest.mock import Mock, AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.chat.interface import Attachment
+from services.contact_import import (
+    ContactImportService, ImportConfig, import_format, iter_rows, column_aliases, map_columns, row_contact,
+    validate_batch,
+)
+
+ALLOWED = {
+    "mobile": {"crm_field": "Mobile", "type": "string", "description": "Mobilnummer"},
+    "birthday": {"crm_field": "Date_of_Birth", "type": "date", "description": "Geburtstag"},
+}
+
+
+def _field_mapper():
+    mapper = Mock()
+    mapper.get_allowed_fields.return_value = ALLOWED
+
+    def validate(entity, name, value):
+        if name == "birthday" and value != "1990-05-01":
+            return False, None, "'birthday' muss im Format YYYY-MM-DD sein"
+        return True, value.replace(" ", ""), None
+    mapper.validate_field.side_effect = validate
+    return mapper
+
+
+def _csv(tmp_path, rows: int, extra: str = "") -> str:
+    lines = ["Kontaktliste Messe", "Vorname;Nachname;Firma;E-Mail"]
+    lines += [f"Max{i};Müller;Expoya;max{i}@expoya.com" for i in range(rows)]
+    path = tmp_path / "liste.csv"
+    path.write_bytes(("\n".join(lines) + extra).encode("cp1252"))
+    return str(path)
+
+
+class FakeChat:
+    """Chat-Adapter: Download = vorbereitete Datei, Nachrichten werden gesammelt"""
+
+    def __init__(self, path):
+        self.path = path
+        self.messages = []
+
+    async def download_attachment(self, attachment, max_bytes):
+        return self.path
+
+    async def send_message(self, chat_id, text):
+        self.messages.append(text)
+        return True
+
+    def format_response(self, text):
+        return text
+
+
+class FakeCRM:
+    """Adapter mit bulk_create_contacts wie Zoho/Twenty (IDs in created, Ergebnisse in outcomes)"""
+
+    field_mapper = None
+
+    def __init__(self):
+        self.batches = []
+
+    def bulk_create_contacts(self, contacts, created=None, outcomes=None):
+        self.batches.append(contacts)
+        for contact in contacts:
+            record_id = f"id-{contact['row']}"
+            created.append(record_id)
+            outcomes.append({"row": contact["row"], "name": contact["last_name"], "email": contact["email"],
+                             "status": "created", "id": record_id, "message": ""})
+        return "ok"
+
+
+def _attachment(name="liste.csv"):
+    return Attachment(file_id="f-1", file_name=name, mime_type="", size=100)
+
+
+class TestReaders:
+    """Tests für Format-Erkennung und Zeilen-Leser"""
+
+    def test_import_format(self):
+        """Test: Endung oder MIME-Type entscheidet, andere Dateien -> None"""
+        assert import_format(_attachment("Liste.CSV")) == "csv"
+        assert import_format(Attachment("f", "export", "text/csv; charset=utf-8")) == "csv"
+        assert import_format(_attachment("messe.xlsx")) == "xlsx"
+        assert import_format(_attachment("foto.jpg")) is None
+
+    def test_csv_cp1252_semicolon(self, tmp_path):
+        """Test: Excel-Export (Windows-1252, Semikolon) -> Umlaute korrekt"""
+        rows = list(iter_rows(_csv(tmp_path, 1), "csv"))
+
+        assert rows[1] == ["Vorname", "Nachname", "Firma", "E-Mail"]
+        assert rows[2] == ["Max0", "Müller", "Expoya", "max0@expoya.com"]
+
+    def test_xlsx(self, tmp_path):
+        """Test: Erstes Arbeitsblatt, Zahlen ohne .0, Datum als ISO, leere Zellen als """""
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        workbook.active.append(["Name", "Telefon", "Geburtstag", "Firma"])
+        workbook.active.append(["Anna Schmidt", 4930123.0, datetime(1990, 5, 1), None])
+        path = str(tmp_path / "messe.xlsx")
+        workbook.save(path)
+
+        rows = list(iter_rows(path, "xlsx"))
+
+        assert rows[1] == ["Anna Schmidt", "4930123", "1990-05-01", ""]
+
+
+class TestMapping:
+    """Tests für Spalten-Mapping und Validierung"""
+
+    def test_field_mapping_before_aliases(self):
+        """Test: "Mobile" ist ein Zoho-Feld -> Zusatzfeld statt phone, Beschreibung als Alias"""
+        aliases = column_aliases(_field_mapper(), "lead")
+        mapping = map_columns(["Name", "E-Mail", "Mobile", "Geburtstag", "Notiz"], aliases)
+
+        assert mapping == {0: "name", 1: "email", 2: "mobile", 3: "birthday"}
+        contact = row_contact(["Anna Maria Schmidt", "anna@example.com", "+49 170 1", "", "x"], mapping, row=7)
+        assert contact["first_name"] == "Anna Maria" and contact["last_name"] == "Schmidt"
+        assert contact["fields"] == {"mobile": "+49 170 1"} and contact["row"] == 7
+
+    def test_validate_batch(self):
+        """Test: Auto-Fix übernommen, ungültiges Datum verworfen, Kontakt bleibt"""
+        contacts = [{"row": 3, "fields": {"mobile": "+49 170 1", "birthday": "01.05.90"}}]
+
+        warnings = validate_batch(contacts, _field_mapper(), "lead")
+
+        assert contacts[0]["fields"] == {"mobile": "+491701"}
+        assert warnings == ["Zeile 3: 'birthday' muss im Format YYYY-MM-DD sein"]
+
+
+class TestImportService:
+    """Tests für ContactImportService.run"""
+
+    def _run(self, path, crm=None, **config):
+        chat, crm = FakeChat(path), crm or FakeCRM()
+        service = ContactImportService(chat, crm, "person", ImportConfig(**config))
+        result = asyncio.run(service.run("chat-1", _attachment(), user_id="telegram:1"))
+        return result, chat, crm
+
+    def test_batches_progress_and_ids(self, tmp_path):
+        """Test: 25 Zeilen, Batch 10 -> 3 CRM-Aufrufe, Fortschritt alle 10 Zeilen, Zeilennummern der Datei"""
+        path = _csv(tmp_path, 25)
+        result, chat, crm = self._run(path, batch_size=10, progress_rows=10)
+
+        assert [len(batch) for batch in crm.batches] == [10, 10, 5]
+        assert crm.batches[0][0]["row"] == 3 and crm.batches[0][0]["last_name"] == "Müller"
+        assert len(result.created) == 25 and result.rows == 25
+        assert "⏳ 20 Zeilen verarbeitet: 20 erstellt, 0 Duplikate, 0 Fehler" in chat.messages
+        assert chat.messages[-1] == result.summary and "25 erstellt" in result.summary
+        assert not os.path.exists(path)
+
+    def test_duplicates_across_batches_and_max_rows(self, tmp_path):
+        """Test: E-Mail aus Batch 1 in Batch 2 -> Duplikat, max_rows kappt den Rest"""
+        path = _csv(tmp_path, 3, extra="\n;;;\nMax;Doppelt;Expoya;MAX0@expoya.com\nZu;Viel;X;zv@x.de")
+        result, chat, crm = self._run(path, batch_size=3, max_rows=4)
+
+        assert [len(batch) for batch in crm.batches] == [3]
+        assert "Zeile 7: Max Doppelt <MAX0@expoya.com> - doppelt in der Datei (Zeile 3)" in result.summary
+        assert result.truncated and "Nur die ersten 4 Zeilen" in result.summary
+
+    def test_missing_columns_and_crm_error(self, tmp_path):
+        """Test: Keine Nachname-Spalte -> Fehlermeldung, CRM-Fehler -> Batch als failed"""
+        path = tmp_path / "x.csv"
+        path.write_text("Firma;E-Mail\nExpoya;a@b.de\n")
+        result, chat, _ = self._run(str(path))
+        assert chat.messages[-1].startswith("❌ Import von liste.csv fehlgeschlagen: Keine Spalte für Nachname")
+
+        crm = FakeCRM()
+        crm.bulk_create_contacts = Mock(side_effect=RuntimeError("API down"))
+        result, _, _ = self._run(_csv(tmp_path, 2), crm=crm)
+        assert [o["status"] for o in result.outcomes] == ["failed", "failed"]
+        assert "API down" in result.summary
+
+
+class TestChatAttachments:
+    """Tests für Anhänge in Telegram/Slack-Webhooks"""
+
+    def test_telegram_document(self):
+        """Test: message.document -> Attachment, Caption als Text"""
+        from tools.chat.telegram_adapter import TelegramAdapter
+
+        with patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "test_token"}):
+            adapter = TelegramAdapter()
+        webhook = {"message": {"chat": {"id": 1}, "from": {"id": 2, "first_name": "Max"},
+                               "document": {"file_id": "doc-1", "file_name": "messe.csv",
+                                            "mime_type": "text/csv", "file_size": 512}}}
+
+        msg = asyncio.run(adapter.parse_incoming(webhook))
+
+        assert msg.attachment == Attachment("doc-1", "messe.csv", "text/csv", 512)
+        assert import_format(msg.attachment) == "csv"
+
+    def test_slack_file(self):
+        """Test: Nicht-Audio-Datei -> Attachment mit url_private_download"""
+        from tools.chat.slack_adapter import SlackAdapter
+
+        with patch.dict(os.environ, {"SLACK_BOT_TOKEN": "xoxb-test", "SLACK_SIGNING_SECRET": "s"}):
+            adapter = SlackAdapter()
+        webhook = {"type": "event_callback", "event": {"type": "message", "user": "U1", "channel": "C1", "text": "",
+                             "files": [{"name": "messe.xlsx", "size": 2048, "url_private_download": "https://files/x",
+                                        "mimetype": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}]}}
+
+        with patch.object(adapter, "_get_user_name", AsyncMock(return_value="Max")):
+            msg = asyncio.run(adapter.parse_incoming(webhook))
+
+        assert msg.attachment.file_id == "https://files/x"
+        assert import_format(msg.attachment) == "xlsx"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,289 @@
+"""
+Test: Lokaler Kontakt-Index (tools/crm/contact_index.py + TwentyCRM)
+Kritisch für: Latenz von search_contacts / Resolve (kein Voll-Scan pro Tool-Call)
+
+Tests:
+- normalize_key: Akzente, Groß/Klein, Leerzeichen
+- Upsert / Remove / Lookup inkl. Key-Wechsel
+- Sync-Modus: full -> None -> delta -> full
+- Bootstrap über mehrere Seiten (starting_after / pageInfo)
+- Delta-Sync mit updatedAt[gte] Filter
+- Write-Through bei Create / Delete
+- Exakter Lookup ohne weiteren API-Call
+- Ohne Index: Streaming-Scan über alle Seiten, Abbruch bei exaktem Treffer
+- Suche ohne Index findet Treffer jenseits der ersten Seite
+- Async: Endpoints werden rundenweise parallel gescannt
+- Serverseitiger Vorfilter (ilike / eq / companyId[in]), breiter Scan nur ohne Treffer
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+from unittest.mock import Mock, AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.contact_index import ContactIndex, IndexConfig, normalize_key
+from tools.crm.twenty_adapter import _prefilter
+from benchmarks.stubs.fake_twenty import apply_filter
+
+PERSON_A = "10000000-0000-4000-8000-000000000001"
+PERSON_B = "10000000-0000-4000-8000-000000000002"
+PERSON_C = "10000000-0000-4000-8000-000000000003"
+
+
+def _person(person_id, first, last, email, updated="2025-01-01T00:00:00Z"):
+    return {"id": person_id, "name": {"firstName": first, "lastName": last},
+            "emails": {"primaryEmail": email}, "companyId": None, "updatedAt": updated}
+
+
+def _keys(record):
+    name = record["name"]
+    return [normalize_key(f"{name['firstName']} {name['lastName']}"), normalize_key(record["emails"]["primaryEmail"])]
+
+
+class FakeTwenty:
+    """Mini-Router für _request mit Cursor-Pagination und Twenty-Filtern"""
+
+    def __init__(self, people, companies=()):
+        self.people = list(people)
+        self.companies = list(companies)
+        self.calls = []
+
+    def __call__(self, method, endpoint, params=None, data=None, envelope=False):
+        self.calls.append((method, endpoint, dict(params or {})))
+        if method == "POST" and endpoint == "people":
+            return {"createPerson": {"id": PERSON_C, "updatedAt": "2025-03-01T00:00:00Z", **data}}
+        if method == "DELETE":
+            return {}
+        items = self.people if endpoint == "people" else self.companies
+        params = params or {}
+        items = apply_filter(items, params.get("filter"))
+        if params.get("starting_after"):
+            ids = [i["id"] for i in items]
+            items = items[ids.index(params["starting_after"]) + 1:]
+        limit = params.get("limit", 60)
+        page = items[:limit]
+        body = {
+            "data": {endpoint: page},
+            "pageInfo": {"hasNextPage": len(items) > limit, "endCursor": page[-1]["id"] if page else None},
+        }
+        return body if envelope else body["data"]
+
+
+@pytest.fixture
+def adapter():
+    env = {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'test_key', 'TWENTY_INDEX_PAGE_SIZE': '1'}
+    with patch.dict(os.environ, env):
+        with patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+            from tools.crm.twenty_adapter import TwentyCRM
+            yield TwentyCRM()
+
+
+class TestContactIndex:
+    """Tests für die Index-Datenstruktur"""
+
+    def test_normalize_key(self):
+        """Test: Akzente, Case und Leerzeichen werden normalisiert"""
+        assert normalize_key("  Jürgen   MÜLLER ") == "jurgen muller"
+        assert normalize_key(None) == ""
+
+    def test_upsert_lookup_remove(self):
+        """Test: Keys folgen Änderungen, Remove entfernt alle Keys"""
+        index = ContactIndex({"person": _keys})
+        index.upsert("person", _person(PERSON_A, "Thomas", "Braun", "thomas@voltage.de"))
+        index.upsert("person", _person(PERSON_A, "Thomas", "Braun", "t.braun@voltage.de", "2025-02-01T00:00:00Z"))
+
+        assert index.lookup("person", "THOMAS braun")[0]["id"] == PERSON_A
+        assert index.lookup("person", "thomas@voltage.de") == []
+        assert index.high_water("person") == "2025-02-01T00:00:00Z"
+
+        index.remove("person", PERSON_A)
+        assert index.lookup("person", "Thomas Braun") == []
+        assert index.records("person") == []
+
+    def test_sync_mode_transitions(self):
+        """Test: Bootstrap -> frisch -> Delta fällig -> Full-Resync fällig"""
+        index = ContactIndex({"person": _keys}, IndexConfig(refresh_seconds=30, full_resync_seconds=3600))
+        assert index.sync_mode("person") == "full"
+
+        index.load_full("person", [])
+        with patch('tools.crm.contact_index.time.monotonic', return_value=0.0):
+            index.mark_syncing("person", "full")
+        assert index.sync_mode("person", now=10) is None
+        assert index.sync_mode("person", now=60) == "delta"
+        assert index.sync_mode("person", now=4000) == "full"
+
+        index.invalidate("person")
+        assert index.sync_mode("person", now=10) == "full"
+
+
+class TestTwentyIndex:
+    """Tests für Sync und Nutzung im Twenty Adapter"""
+
+    def test_bootstrap_paginates(self, adapter):
+        """Test: Bootstrap lädt alle Seiten über starting_after"""
+        fake = FakeTwenty([_person(PERSON_A, "Thomas", "Braun", "thomas@voltage.de"),
+                           _person(PERSON_B, "Anna", "Schmidt", "anna@example.com")])
+
+        with patch.object(adapter, '_request', side_effect=fake):
+            result = adapter.search_contacts("Schmidt")
+
+        assert "Anna Schmidt" in result
+        people_calls = [c[2] for c in fake.calls if c[1] == "people"]
+        assert people_calls == [{"limit": 1}, {"limit": 1, "starting_after": PERSON_A}]
+        assert adapter.index.stats()["person"]["records"] == 2
+
+    def test_delta_sync_uses_updated_at(self, adapter):
+        """Test: Nach Ablauf des Refresh-Intervalls nur updatedAt >= High-Water laden"""
+        fake = FakeTwenty([_person(PERSON_A, "Thomas", "Braun", "thomas@voltage.de")])
+        with patch.object(adapter, '_request', side_effect=fake):
+            adapter._resolve_target_id("Thomas Braun")
+
+            fake.people.append(_person(PERSON_B, "Anna", "Schmidt", "anna@example.com", "2025-02-01T00:00:00Z"))
+            adapter.index.config.refresh_seconds = 0
+            fake.calls.clear()
+            resolved = adapter._resolve_target_id("anna@example.com")
+
+        assert resolved == PERSON_B
+        assert fake.calls[0][2]["filter"] == 'updatedAt[gte]:"2025-01-01T00:00:00Z"'
+
+    def test_exact_lookup_skips_api(self, adapter):
+        """Test: Exakter Treffer aus frischem Index -> kein weiterer Request"""
+        fake = FakeTwenty([_person(PERSON_A, "Thomas", "Braun", "thomas@voltage.de")])
+        with patch.object(adapter, '_request', side_effect=fake):
+            adapter._resolve_target_id("Thomas Braun")
+            fake.calls.clear()
+            resolved = adapter._resolve_target_id("thomas braun")
+
+        assert resolved == PERSON_A
+        assert fake.calls == []
+
+    def test_write_through_create_and_delete(self, adapter):
+        """Test: Eigene Creates/Deletes landen ohne Sync im Index"""
+        fake = FakeTwenty([])
+        with patch.object(adapter, '_request', side_effect=fake):
+            adapter.search_contacts("irgendwer")
+            adapter.create_contact("Lisa", "Weber", "", "lisa@example.com")
+            assert adapter.index.lookup("person", "lisa@example.com")[0]["id"] == PERSON_C
+
+        with patch('requests.Session.request', return_value=Mock(status_code=204)):
+            adapter.delete_item("person", PERSON_C)
+
+        assert adapter.index.lookup("person", "Lisa Weber") == []
+
+
+
+class TestPagedScan:
+    """Tests für den Streaming-Scan ohne Index (Cursor-Pagination)"""
+
+    @pytest.fixture
+    def scan_adapter(self, adapter):
+        adapter.index.config.enabled = False
+        adapter.prefilter_enabled = False
+        adapter.scan_page_size = 1
+        return adapter
+
+    def test_resolve_stops_at_exact_match(self, scan_adapter):
+        """Test: Exakter Treffer auf Seite 1 -> keine weiteren Seiten"""
+        fake = FakeTwenty([_person(PERSON_A, "Thomas", "Braun", "thomas@voltage.de"),
+                           _person(PERSON_B, "Anna", "Schmidt", "anna@example.com")])
+
+        with patch.object(scan_adapter, '_request', side_effect=fake):
+            resolved = scan_adapter._resolve_target_id("Thomas Braun")
+
+        assert resolved == PERSON_A
+        assert fake.calls == [("GET", "people", {"limit": 1})]
+        assert scan_adapter.index.stats()["person"]["records"] == 0
+
+    def test_resolve_scans_all_pages(self, scan_adapter):
+        """Test: Treffer auf der letzten Seite wird gefunden (nicht nur erste Seite)"""
+        fake = FakeTwenty([_person(PERSON_A, "Thomas", "Braun", "thomas@voltage.de"),
+                           _person(PERSON_B, "Anna", "Schmidt", "anna@example.com")])
+
+        with patch.object(scan_adapter, '_request', side_effect=fake):
+            resolved = scan_adapter._resolve_target_id("anna@example.com")
+
+        assert resolved == PERSON_B
+        assert [c[2].get("starting_after") for c in fake.calls] == [None, PERSON_A]
+
+    def test_async_scans_endpoints_in_parallel(self, scan_adapter):
+        """Test: asearch_contacts scannt companies + people in derselben Runde"""
+        fake = FakeTwenty([_person(PERSON_A, "Thomas", "Braun", "thomas@voltage.de")])
+        in_flight, peak = 0, 0
+
+        async def arequest(method, endpoint, params=None, data=None, envelope=False):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return fake(method, endpoint, params, data, envelope)
+
+        scan_adapter.index.config.enabled = True
+        scan_adapter.index.config.page_size = 1
+        with patch.object(scan_adapter, '_arequest', AsyncMock(side_effect=arequest)):
+            result = asyncio.run(scan_adapter.asearch_contacts("Braun"))
+
+        assert "Thomas Braun" in result
+        assert peak == 2
+
+
+
+class TestPrefilter:
+    """Tests für serverseitige Vorfilter vor dem Fuzzy-Scoring"""
+
+    @pytest.fixture
+    def scan_adapter(self, adapter):
+        adapter.index.config.enabled = False
+        return adapter
+
+    def test_prefilter_expressions(self):
+        """Test: Filter aus Query-Tokens, Sonderzeichen werden entfernt"""
+        assert _prefilter("person", "anna@example.com") == 'emails.primaryEmail[eq]:"anna@example.com"'
+        assert _prefilter("company", 'Volt"age') == 'name[ilike]:"%Voltage%"'
+        assert _prefilter("person", "Thomas B") == 'or(name.firstName[ilike]:"%Thomas%",name.lastName[ilike]:"%Thomas%")'
+        assert _prefilter("person", "x") is None
+
+    def test_resolve_uses_prefilter(self, scan_adapter):
+        """Test: Treffer über den Vorfilter -> kein breiter Scan"""
+        fake = FakeTwenty([_person(PERSON_A, "Thomas", "Braun", "thomas@voltage.de"),
+                           _person(PERSON_B, "Anna", "Schmidt", "anna@example.com")])
+
+        with patch.object(scan_adapter, '_request', side_effect=fake):
+            resolved = scan_adapter._resolve_target_id("anna@example.com")
+
+        assert resolved == PERSON_B
+        assert len(fake.calls) == 1
+        assert fake.calls[0][2]["filter"] == 'emails.primaryEmail[eq]:"anna@example.com"'
+
+    def test_typo_falls_back_to_wide_scan(self, scan_adapter):
+        """Test: Vorfilter findet nichts (Tippfehler) -> breiter Scan mit Fuzzy"""
+        fake = FakeTwenty([_person(PERSON_A, "Thomas", "Braun", "thomas@voltage.de")])
+
+        with patch.object(scan_adapter, '_request', side_effect=fake):
+            resolved = scan_adapter._resolve_target_id("Tomas Brown")
+
+        assert resolved == PERSON_A
+        assert "filter" in fake.calls[0][2]
+        assert "filter" not in fake.calls[-1][2]
+
+    def test_search_prefilter_includes_colleagues(self, scan_adapter):
+        """Test: Firmen-Treffer -> Kollegen über companyId[in] im Personen-Filter"""
+        company_id = "20000000-0000-4000-8000-000000000001"
+        colleague = dict(_person(PERSON_B, "Anna", "Schmidt", "anna@example.com"), companyId=company_id)
+        fake = FakeTwenty([_person(PERSON_A, "Thomas", "Braun", "thomas@example.com"), colleague],
+                          companies=[{"id": company_id, "name": "Voltage Solutions"}])
+
+        with patch.object(scan_adapter, '_request', side_effect=fake):
+            result = scan_adapter.search_contacts("Voltage")
+
+        assert "FIRMA: Voltage Solutions" in result
+        assert "MITARBEITER bei Voltage Solutions: Anna Schmidt" in result
+        assert "Thomas Braun" not in result
+        assert all("filter" in params for _, _, params in fake.calls)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -158,7 +158,7 @@ try:
     
     with patch.object(adapter, '_request') as mock_request:
         # Simuliere Search-Results
-        def side_effect(method, endpoint, params=None, data=None):
+        def side_effect(method, endpoint, params=None, data=None, **kwargs):
             if endpoint == "companies":
                 return {'companies': []}
             elif endpoint == "people":
@@ -202,8 +202,8 @@ print("-" * 70)
 try:
     adapter = TwentyCRM()
     
-    # Mock requests.delete
-    with patch('requests.delete') as mock_delete:
+    # Mock HTTP DELETE (gepoolte Session)
+    with patch('requests.Session.request') as mock_delete:
         # Simuliere erfolgreiche Löschung
         mock_response = Mock()
         mock_response.status_code = 200
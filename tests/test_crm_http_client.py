@@ -0,0 +1,196 @@
+"""
+Test: Pooled CRM HTTP Client (tools/crm/http_client.py)
+Kritisch für: Latenz jedes CRM Tool-Calls (Keep-Alive statt Handshake pro Request)
+
+Tests:
+- Session wird wiederverwendet, nach Idle-Timeout neu aufgebaut
+- Retries bei 5xx / Verbindungsfehlern (nur idempotente Methoden)
+- POST wird bei 5xx nicht wiederholt
+- Async (httpx): gleiche Retry-Policy, Client pro Event Loop, close() schließt alle
+- Metriken pro Endpoint (IDs normalisiert)
+- Twenty delete_item läuft über den Pool (mit Timeout)
+"""
+
+import pytest
+import asyncio
+import threading
+import time
+import sys
+import os
+from unittest.mock import Mock, patch
+
+import httpx
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.http_client import CrmHttpClient, HttpClientConfig, endpoint_key
+
+UUID = "10000000-0000-4000-8000-000000000048"
+
+
+def _response(status=200):
+    response = Mock(status_code=status)
+    response.json.return_value = {"data": {}}
+    return response
+
+
+def _client(**overrides):
+    config = HttpClientConfig(retries=2, backoff_seconds=0, **overrides)
+    return CrmHttpClient("https://crm.example.com/rest", headers={"Authorization": "Bearer x"}, config=config)
+
+
+class TestSessionPooling:
+    """Tests für Session-Wiederverwendung"""
+
+    @patch('requests.Session.request')
+    def test_session_reused(self, mock_request):
+        """Test: Mehrere Requests teilen sich eine Session"""
+        mock_request.return_value = _response()
+        client = _client()
+
+        client.request("GET", "people")
+        client.request("GET", f"people/{UUID}")
+
+        assert client.sessions_created == 1
+        assert mock_request.call_args.kwargs["timeout"] == 10.0
+        assert mock_request.call_args.args[1] == f"https://crm.example.com/rest/people/{UUID}"
+
+    @patch('requests.Session.request')
+    def test_idle_recycles_pool(self, mock_request):
+        """Test: Nach Idle-Timeout wird die Session neu aufgebaut"""
+        mock_request.return_value = _response()
+        client = _client(keepalive_idle_seconds=30)
+
+        with patch('tools.crm.http_client.time.monotonic', side_effect=[100.0, 110.0, 200.0]):
+            client.request("GET", "people")
+            client.request("GET", "people")
+            client.request("GET", "people")
+
+        assert client.sessions_created == 2
+
+
+class TestRetries:
+    """Tests für Retry-Policy"""
+
+    @patch('requests.Session.request')
+    def test_retry_on_503_get(self, mock_request):
+        """Test: GET wird bei 503 wiederholt"""
+        mock_request.side_effect = [_response(503), _response(200)]
+        client = _client()
+
+        response = client.request("GET", "people")
+
+        assert response.status_code == 200
+        assert mock_request.call_count == 2
+        assert client.get_metrics()["GET people"]["retries"] == 1
+
+    @patch('requests.Session.request')
+    def test_post_not_retried_on_5xx(self, mock_request):
+        """Test: POST bei 5xx nicht wiederholen (Duplikat-Gefahr)"""
+        mock_request.return_value = _response(502)
+        client = _client()
+
+        response = client.request("POST", "tasks", json={"title": "x"})
+
+        assert response.status_code == 502
+        assert mock_request.call_count == 1
+
+    @patch('requests.Session.request')
+    def test_connection_error_exhausts_retries(self, mock_request):
+        """Test: Verbindungsfehler -> Retries, danach Exception"""
+        mock_request.side_effect = requests.exceptions.ConnectionError("reset")
+        client = _client()
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.request("DELETE", f"notes/{UUID}")
+
+        assert mock_request.call_count == 3
+        assert client.get_metrics()["DELETE notes/{id}"]["errors"] == 3
+
+    @patch('httpx.AsyncClient.request')
+    def test_async_retry_on_503(self, mock_request):
+        """Test: arequest wiederholt GET bei 503, Metriken geteilt mit Sync"""
+        mock_request.side_effect = [httpx.Response(503), httpx.Response(200, json={"data": {}})]
+        client = _client()
+
+        response = asyncio.run(client.arequest("GET", f"people/{UUID}"))
+
+        assert response.status_code == 200
+        assert mock_request.call_count == 2
+        stats = client.get_metrics()["GET people/{id}"]
+        assert (stats["count"], stats["errors"], stats["retries"]) == (2, 1, 1)
+
+    def test_async_client_per_loop_closed_on_close(self):
+        """Test: Loop-Wechsel ersetzt keinen Client, close() schließt jeden auf seinem Loop"""
+        client = _client()
+        background = asyncio.new_event_loop()
+        thread = threading.Thread(target=background.run_forever, daemon=True)
+        thread.start()
+        local = asyncio.new_event_loop()
+
+        async def get():
+            return client._get_async_client()
+
+        try:
+            first = asyncio.run_coroutine_threadsafe(get(), background).result(timeout=5)
+            second = local.run_until_complete(get())
+            assert first is not second
+            assert local.run_until_complete(get()) is second
+            assert client.sessions_created == 2
+
+            client.close()
+
+            deadline = time.monotonic() + 5
+            while not first.is_closed and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert first.is_closed and second.is_closed
+            assert local.run_until_complete(get()) not in (first, second)
+        finally:
+            background.call_soon_threadsafe(background.stop)
+            thread.join(timeout=5)
+            background.close()
+            local.close()
+
+
+class TestMetrics:
+    """Tests für Endpoint-Metriken"""
+
+    def test_endpoint_key_normalizes_ids(self):
+        """Test: UUIDs und numerische IDs werden zu {id}"""
+        assert endpoint_key("get", f"people/{UUID}") == "GET people/{id}"
+        assert endpoint_key("PUT", "Leads/5725767000000000001") == "PUT Leads/{id}"
+        assert endpoint_key("POST", "taskTargets") == "POST taskTargets"
+
+    def test_config_from_env(self):
+        """Test: ENV-Konfiguration mit Prefix, ungültige Werte -> Default"""
+        with patch.dict(os.environ, {"TWENTY_HTTP_POOL_SIZE": "25", "TWENTY_HTTP_RETRIES": "abc"}):
+            config = HttpClientConfig.from_env("TWENTY")
+
+        assert config.pool_size == 25
+        assert config.retries == 2
+
+
+class TestTwentyIntegration:
+    """Tests für TwentyCRM mit gepooltem Client"""
+
+    @patch('requests.Session.request')
+    @patch('tools.crm.twenty_adapter.load_field_mapping')
+    def test_delete_item_uses_pool_with_timeout(self, mock_load_mapping, mock_request):
+        """Test: delete_item geht über die Session und hat einen Timeout"""
+        mock_load_mapping.return_value = Mock()
+        mock_request.return_value = _response(204)
+
+        with patch.dict(os.environ, {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'test_key'}):
+            from tools.crm.twenty_adapter import TwentyCRM
+            adapter = TwentyCRM()
+            result = adapter.delete_item("note", UUID)
+
+        assert "✅" in result
+        assert mock_request.call_args.args[0] == "DELETE"
+        assert mock_request.call_args.kwargs["timeout"] > 0
+        assert "DELETE notes/{id}" in adapter.get_http_metrics()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
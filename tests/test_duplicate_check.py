@@ -0,0 +1,211 @@
+"""
+Test: Duplikat-Erkennung vor create_contact (tools/crm/duplicate_check.py)
+Kritisch für: Keine doppelten Kontakte/Leads durch blindes Anlegen
+
+Tests:
+- Kölner Phonetik, normalisierte E-Mail, Firmen-Tokens ohne Rechtsform
+- find_duplicates: E-Mail exakt, phonetischer Name + Firma, andere Firma kein Duplikat
+- Performance: < 1 ms pro Prüfung bei 100.000 Datensätzen (Blocking-Keys im Index)
+- Twenty: Kandidaten statt POST, force=True legt an, Firmenname über den Company-Index
+- Zoho: Prüfung gegen den Lead-Index, E-Mail auch gegen Kontakte (COQL, Fallback ohne Index)
+- Tool create_contact: force wird durchgereicht, Duplikat-Antwort landet nicht im Undo-Stack
+"""
+
+import time
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools.crm as crm_tools
+from tools.crm.contact_index import ContactIndex
+from tools.crm.duplicate_check import (
+    DuplicateConfig, cologne_phonetic, normalize_email, company_tokens, duplicate_keys, find_duplicates,
+)
+
+
+def _keys(record: dict) -> list[str]:
+    return duplicate_keys(record["first_name"], record["last_name"], record["email"])
+
+
+def _index(records: list[dict]) -> ContactIndex:
+    index = ContactIndex({"person": _keys}, name="Test")
+    index.load_full("person", records)
+    return index
+
+
+def _record(i, first, last, email="", company=""):
+    return {"id": str(i), "first_name": first, "last_name": last, "email": email, "company": company}
+
+
+RECORDS = [
+    _record(1, "Thomas", "Braun", "tb@voltage.de", "Voltage Energy GmbH"),
+    _record(2, "Anna", "Meier", "anna.meier@gmail.com", "Sonnenstrom AG"),
+    _record(3, "Anna", "Schmidt", "anna@windkraft.de", "Windkraft"),
+]
+
+
+def _check(contact, index=None):
+    return find_duplicates(index or _index(RECORDS), "person", contact, lambda r: r)
+
+
+class TestKeys:
+    """Tests für die Normalisierung"""
+
+    def test_cologne_phonetic(self):
+        """Test: Schreibvarianten -> gleicher Code"""
+        assert cologne_phonetic("Müller") == cologne_phonetic("Mueller") == "657"
+        assert cologne_phonetic("Meier") == cologne_phonetic("Mayer") == cologne_phonetic("Maier") == "67"
+        assert cologne_phonetic("Schmidt") == cologne_phonetic("Schmitt") == "862"
+        assert cologne_phonetic("Christian") == cologne_phonetic("Kristian")
+        assert cologne_phonetic("") == ""
+
+    def test_email_and_company(self):
+        """Test: +Tag / Gmail-Punkte ignoriert, Rechtsformen ignoriert"""
+        assert normalize_email(" Anna.Meier+crm@GMail.com ") == "annameier@gmail.com"
+        assert normalize_email("a.b@firma.de") == "a.b@firma.de"
+        assert company_tokens("Voltage Energy GmbH & Co. KG") == {"voltage", "energy"}
+
+
+class TestFindDuplicates:
+    """Tests für find_duplicates"""
+
+    def test_email_exact(self):
+        """Test: Gleiche normalisierte E-Mail -> Score 100, auch bei anderem Namen"""
+        candidates = _check({"first_name": "A.", "last_name": "M.", "email": "annameier+messe@gmail.com"})
+
+        assert candidates[0]["id"] == "2" and candidates[0]["score"] == 100
+        assert candidates[0]["reasons"] == ["gleiche E-Mail"]
+
+    def test_phonetic_name_and_company(self):
+        """Test: Tippfehler im Namen + gleiche Firma -> Kandidat; andere Firma -> keiner"""
+        candidates = _check({"first_name": "Tomas", "last_name": "Braun", "email": "", "company": "Voltage"})
+        assert [c["id"] for c in candidates] == ["1"]
+        assert "gleiche Firma" in candidates[0]["reasons"]
+
+        assert _check({"first_name": "Anna", "last_name": "Mayer", "email": "", "company": ""})[0]["id"] == "2"
+        assert _check({"first_name": "Thomas", "last_name": "Braun", "email": "", "company": "Sonnenstrom"}) == []
+        assert _check({"first_name": "Tina", "last_name": "Braun", "email": "t@x.de", "company": "Voltage"}) == []
+
+    def test_sub_millisecond_at_100k(self):
+        """Test: 100.000 Datensätze, Prüfung über Blocking-Keys < 1 ms"""
+        firsts = ["Anna", "Thomas", "Lena", "Max", "Julia", "Paul", "Sophie", "Lukas"]
+        lasts = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner", "Becker", "Schulz", "Hoffmann"]
+        syllables = ["", "ka", "ber", "lin", "dorf", "mann", "ha", "ger", "stein", "bach"]
+
+        def last_name(i):
+            # 10.000 verschiedene Nachnamen ("Schmidtkaber", ...), Vorname zyklisch
+            return lasts[i % 10] + syllables[i // 10 % 10] + syllables[i // 100 % 10] + syllables[i // 1000 % 10]
+
+        records = [_record(i, firsts[i % 8], last_name(i), f"p{i}@firma{i % 500}.de", f"Firma {i % 500}")
+                   for i in range(100_000)]
+        index = _index(records)
+        contacts = [{"first_name": "Tomas", "last_name": last_name(n * 37 + 1), "email": f"new{n}@x.de",
+                     "company": f"Firma {n}"} for n in range(200)]
+
+        started = time.perf_counter()
+        results = [find_duplicates(index, "person", c, lambda r: r, DuplicateConfig()) for c in contacts]
+        per_check = (time.perf_counter() - started) / len(contacts)
+
+        assert any(results)
+        assert per_check < 0.001, f"{per_check * 1000:.3f} ms pro Prüfung"
+
+
+class TestAdapters:
+    """Tests für die Prüfung in create_contact"""
+
+    @pytest.fixture
+    def twenty(self):
+        env = {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'test_key'}
+        with patch.dict(os.environ, env), \
+                patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+            from tools.crm.twenty_adapter import TwentyCRM
+            adapter = TwentyCRM()
+        adapter.index.load_full("company", [{"id": "c-1", "name": "Voltage GmbH"}])
+        adapter.index.load_full("person", [{"id": "p-1", "name": {"firstName": "Thomas", "lastName": "Braun"},
+                                            "emails": {"primaryEmail": "tb@voltage.de"}, "companyId": "c-1"}])
+        return adapter
+
+    def test_twenty_candidates_instead_of_create(self, twenty):
+        """Test: Ähnlicher Name + gleiche Firma (über companyId) -> kein POST, Kandidat mit ID"""
+        with patch.object(twenty, '_request') as mock_request:
+            result = twenty.create_contact("Tomas", "Braun", "Voltage", "thomas@voltage-energy.de")
+
+        mock_request.assert_not_called()
+        assert result.startswith("⚠️ Mögliche Duplikate für Tomas Braun")
+        assert "Thomas Braun <tb@voltage.de> @ Voltage GmbH - ID p-1" in result
+
+    def test_twenty_force_creates(self, twenty):
+        """Test: force=True -> Create ohne Prüfung, neuer Datensatz im Index"""
+        with patch.object(twenty, '_request', return_value={"createPerson": {"id": "p-2"}}):
+            result = twenty.create_contact("Tomas", "Braun", "Voltage", "thomas@voltage-energy.de", force=True)
+
+        assert "(ID: p-2)" in result
+
+    @pytest.fixture
+    def zoho(self):
+        env = {'ZOHO_CLIENT_ID': 'a', 'ZOHO_CLIENT_SECRET': 'b', 'ZOHO_REFRESH_TOKEN': 'c',
+               'ZOHO_INDEX_ENABLED': 'true', 'ZOHO_RESOLVE_MEMO_ENABLED': 'false'}
+        with patch.dict(os.environ, env), \
+                patch('tools.crm.zoho_adapter.load_field_mapping', return_value=Mock()), \
+                patch('tools.crm.zoho_adapter.ZohoCRM._refresh_access_token'):
+            from tools.crm.zoho_adapter import ZohoCRM
+            return ZohoCRM()
+
+    def test_zoho_lead_index(self, zoho):
+        """Test: Zoho prüft gegen den Lead-Index (gleiche E-Mail), Kontakte per COQL"""
+        zoho.lead_index.load_full("lead", [{"id": "111", "First_Name": "Anna", "Last_Name": "Schmidt",
+                                            "Email": "anna@example.com", "Company": "Sonnenstrom"}])
+
+        with patch.object(zoho, '_request', return_value={"data": []}) as mock_request:
+            result = zoho.create_contact("Anna", "Schmidt-Meyer", "Sonnenstrom", "Anna@Example.com")
+
+        assert [c.args[:2] for c in mock_request.call_args_list] == [("POST", "coql")]
+        assert "from Contacts" in mock_request.call_args.kwargs["data"]["select_query"]
+        assert "Lead wurde NICHT angelegt" in result and "ID 111" in result
+
+    def test_zoho_contact_email_without_index(self, zoho):
+        """Test: Index noch nicht geladen -> E-Mail-Lookup per COQL statt blind anlegen, Treffer als Kontakt"""
+        def coql(method, endpoint, data=None, **kwargs):
+            found = "from Contacts" in data["select_query"]
+            return {"data": [{"id": "222", "Email": "anna@example.com"}] if found else []}
+
+        with patch.object(zoho, '_lead_index_ready', return_value=False), \
+                patch.object(zoho, '_request', side_effect=coql) as mock_request:
+            result = zoho.create_contact("Anna", "Schmidt", "Sonnenstrom", "anna@example.com")
+
+        assert {c.args[1] for c in mock_request.call_args_list} == {"coql"}
+        assert "Lead wurde NICHT angelegt" in result
+        assert "Kontakt <anna@example.com> - ID 222, Score 100 (gleiche E-Mail)" in result
+
+
+class TestTool:
+    """Tests für das Tool create_contact"""
+
+    def test_force_and_no_undo_for_candidates(self):
+        """Test: Duplikat-Antwort -> kein Undo-Eintrag; force=True wird an den Adapter gereicht"""
+        calls = []
+
+        def fake_create(first_name, last_name, company, email, phone=None, force=False):
+            calls.append(force)
+            if not force:
+                return "⚠️ Mögliche Duplikate für Max Muster - Kontakt wurde NICHT angelegt:\n  • Max Muster - ID p-1, Score 100"
+            return "✅ Kontakt erstellt: Max Muster (ID: abc-222)"
+
+        stack = []
+        with patch.object(crm_tools, "create_contact_func", fake_create):
+            tools = crm_tools.get_crm_tools_for_user("telegram:1", undo_stack=stack)
+            create = next(t for t in tools if t.name == "create_contact")
+
+            create.func("Max", "Muster", "Expoya", "max@expoya.com")
+            assert stack == []
+            create.func("Max", "Muster", "Expoya", "max@expoya.com", force=True)
+
+        assert calls == [False, True]
+        assert [a["entity_id"] for a in stack] == ["abc-222"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,211 @@
+"""
+Test: Read-Through Entity-Cache (tools/crm/entity_cache.py)
+Kritisch für: Wiederholte Detail-Abrufe innerhalb einer Session ohne HTTP-Roundtrip
+
+Tests:
+- TTL-Ablauf, LRU-Verdrängung, Hit-Rate Metriken
+- Geteilter Postgres-Tier (hier SQLite): Worker B sieht Einträge von Worker A
+- Fehler im Shared Store -> Miss statt Exception
+- Twenty: Wiederholte Details gratis, Invalidierung durch Update/Delete/Create
+- Twenty async: gleicher Cache über aget/aset
+- Zoho: get_lead_details Read-Through + Invalidierung durch Update
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+from unittest.mock import Mock, AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.entity_cache import EntityCache, CacheConfig, PostgresEntityStore
+
+PERSON_ID = "10000000-0000-4000-8000-000000000001"
+COMPANY_ID = "20000000-0000-4000-8000-000000000001"
+PERSON = {"person": {"id": PERSON_ID, "name": {"firstName": "Thomas", "lastName": "Braun"},
+                     "emails": {"primaryEmail": "thomas@voltage.de"}, "company": {"id": COMPANY_ID, "name": "Voltage"}}}
+
+
+@pytest.fixture
+def twenty():
+    with patch.dict(os.environ, {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'test_key'}):
+        with patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+            from tools.crm.twenty_adapter import TwentyCRM
+            adapter = TwentyCRM()
+    adapter.field_mapper = Mock()
+    adapter.field_mapper.is_field_allowed.return_value = True
+    adapter.field_mapper.validate_field.side_effect = lambda entity, field, value: (True, value, None)
+    adapter.field_mapper.get_crm_field_name.side_effect = lambda entity, field: field
+    adapter.field_mapper.get_endpoint.return_value = "people"
+    return adapter
+
+
+def _twenty_routes(method, endpoint, params=None, data=None, envelope=False):
+    if method == "GET" and endpoint == f"people/{PERSON_ID}":
+        return PERSON
+    if method == "PATCH":
+        return {"updatePerson": {"id": PERSON_ID, **data}}
+    return None
+
+
+def _detail_calls(mock_request):
+    return [c for c in mock_request.call_args_list if c.args[:2] == ("GET", f"people/{PERSON_ID}")]
+
+
+class TestEntityCache:
+    """Tests für LRU, TTL und Metriken"""
+
+    def test_ttl_expiry(self):
+        """Test: Eintrag ist nach TTL ein Miss"""
+        cache = EntityCache("twenty", CacheConfig(ttl_seconds=10))
+
+        with patch('tools.crm.entity_cache.time.monotonic', return_value=100.0):
+            cache.set("person", "p1", {"id": "p1"})
+            assert cache.get("person", "p1") == {"id": "p1"}
+        with patch('tools.crm.entity_cache.time.monotonic', return_value=111.0):
+            assert cache.get("person", "p1") is None
+
+    def test_lru_eviction_and_metrics(self):
+        """Test: Ältester ungenutzter Eintrag fliegt raus, Hit-Rate stimmt"""
+        cache = EntityCache("twenty", CacheConfig(max_entries=2))
+        cache.set("person", "p1", {"id": "p1"})
+        cache.set("person", "p2", {"id": "p2"})
+        cache.get("person", "p1")          # p1 zuletzt genutzt
+        cache.set("company", "c1", {"id": "c1"})
+
+        assert cache.get("person", "p2") is None
+        assert cache.get("person", "p1") is not None
+
+        metrics = cache.get_metrics()
+        assert metrics["size"] == 2
+        assert metrics["evictions"] == 1
+        assert (metrics["hits"], metrics["misses"], metrics["hit_rate"]) == (2, 1, pytest.approx(0.6667))
+
+    def test_disabled(self):
+        """Test: CACHE_ENABLED=false -> nie ein Hit"""
+        with patch.dict(os.environ, {'TWENTY_CACHE_ENABLED': 'false'}):
+            cache = EntityCache("twenty", CacheConfig.from_env("TWENTY"))
+        cache.set("person", "p1", {"id": "p1"})
+        assert cache.get("person", "p1") is None
+
+
+class TestSharedStore:
+    """Tests für den geteilten Tier (Schema aus models.CrmEntityCache, SQLite statt Postgres)"""
+
+    @pytest.fixture
+    def store(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from models.crm_entity_cache import CrmEntityCache
+
+        engine = create_engine("sqlite://")
+        CrmEntityCache.__table__.create(engine)
+        return PostgresEntityStore(session_factory=sessionmaker(bind=engine))
+
+    def test_workers_share_entries(self, store):
+        """Test: Worker B bekommt den Eintrag von Worker A, Invalidierung gilt für beide"""
+        worker_a = EntityCache("twenty", CacheConfig(backend="postgres"), shared=store)
+        worker_b = EntityCache("twenty", CacheConfig(backend="postgres"), shared=store)
+
+        worker_a.set("person", "p1", {"id": "p1", "name": "Thomas"})
+        assert worker_b.get("person", "p1") == {"id": "p1", "name": "Thomas"}
+        assert worker_b.get_metrics()["shared_hits"] == 1
+
+        worker_a.invalidate("person", "p1")
+        worker_b.clear()
+        assert worker_b.get("person", "p1") is None
+
+    def test_store_errors_are_misses(self):
+        """Test: Kaputter Shared Store -> Miss, keine Exception"""
+        broken = Mock(get=Mock(side_effect=RuntimeError("db down")), set=Mock(side_effect=RuntimeError("db down")))
+        cache = EntityCache("twenty", CacheConfig(backend="postgres"), shared=broken)
+
+        cache.set("person", "p1", {"id": "p1"})
+        cache.clear()
+        assert cache.get("person", "p1") is None
+
+
+class TestTwentyIntegration:
+    """Tests für Read-Through + Invalidierung im Twenty Adapter"""
+
+    def test_repeat_details_are_free(self, twenty):
+        """Test: Zweiter Detail-Abruf ohne HTTP-Request, gleiche Ausgabe"""
+        with patch.object(twenty, '_request', side_effect=_twenty_routes) as mock_request:
+            first = twenty.get_person_details(PERSON_ID)
+            second = twenty.get_person_details(PERSON_ID)
+
+        assert first == second
+        assert "Voltage" in first
+        assert len(_detail_calls(mock_request)) == 1
+        assert twenty.get_cache_metrics()["hits"] == 1
+
+    def test_update_invalidates(self, twenty):
+        """Test: update_entity -> nächster Detail-Abruf geht wieder ans CRM"""
+        with patch.object(twenty, '_request', side_effect=_twenty_routes) as mock_request:
+            twenty.get_person_details(PERSON_ID)
+            result = twenty.update_entity(PERSON_ID, "person", {"jobTitle": "CEO"})
+            twenty.get_person_details(PERSON_ID)
+
+        assert "✅" in result
+        assert len(_detail_calls(mock_request)) == 2
+
+    def test_delete_and_note_invalidate(self, twenty):
+        """Test: delete_item und create_note (Link auf die Person) invalidieren"""
+        twenty.entity_cache.set("person", PERSON_ID, PERSON)
+        graphql = {"data": {"record": {"id": "n-1"}, "t0": {"id": "nt-1"}}}
+        with patch.object(twenty, '_graphql', return_value=graphql):
+            twenty.create_note("Call", "Rückruf", PERSON_ID)
+        assert twenty.entity_cache.get("person", PERSON_ID) is None
+
+        twenty.entity_cache.set("person", PERSON_ID, PERSON)
+        with patch.object(twenty.http, 'request', return_value=Mock(status_code=204)):
+            twenty.delete_item("person", PERSON_ID)
+        assert twenty.entity_cache.get("person", PERSON_ID) is None
+
+    def test_async_read_through(self, twenty):
+        """Test: aget_person_details nutzt denselben Cache"""
+        arequest = AsyncMock(side_effect=_twenty_routes)
+        with patch.object(twenty, '_arequest', arequest):
+            first = asyncio.run(twenty.aget_person_details(PERSON_ID))
+            second = asyncio.run(twenty.aget_person_details(PERSON_ID))
+
+        assert first == second
+        assert arequest.await_count == 1
+
+
+class TestZohoIntegration:
+    """Tests für get_lead_details im Zoho Adapter"""
+
+    def test_lead_details_cached_until_update(self):
+        """Test: Lead-Details aus dem Cache, Update invalidiert"""
+        env = {'ZOHO_CLIENT_ID': 'a', 'ZOHO_CLIENT_SECRET': 'b', 'ZOHO_REFRESH_TOKEN': 'c'}
+        with patch.dict(os.environ, env), \
+                patch('tools.crm.zoho_adapter.load_field_mapping', return_value=Mock()), \
+                patch('tools.crm.zoho_adapter.ZohoCRM._refresh_access_token'):
+            from tools.crm.zoho_adapter import ZohoCRM
+            zoho = ZohoCRM()
+        zoho.field_mapper = Mock()
+        zoho.field_mapper.is_field_allowed.return_value = True
+        zoho.field_mapper.validate_field.side_effect = lambda entity, field, value: (True, value, None)
+        zoho.field_mapper.get_crm_field_name.side_effect = lambda entity, field: field
+
+        lead = {"data": [{"id": "3652397000000624001", "First_Name": "Anna", "Last_Name": "Schmidt"}]}
+
+        def routes(method, endpoint, params=None, data=None):
+            return lead if method == "GET" else {"data": [{"code": "SUCCESS"}]}
+
+        with patch.object(zoho, '_request', side_effect=routes) as mock_request:
+            zoho.get_lead_details("3652397000000624001")
+            zoho.get_lead_details("3652397000000624001")
+            assert mock_request.call_count == 1
+
+            zoho.update_entity("3652397000000624001", "lead", {"Phone": "123"})
+            zoho.get_lead_details("3652397000000624001")
+
+        gets = [c for c in mock_request.call_args_list if c.args == ("GET", "Leads/3652397000000624001")]
+        assert len(gets) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
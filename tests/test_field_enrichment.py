@@ -218,7 +218,7 @@ class TestFieldValidation:
 class TestTwentyAdapterIntegration:
     """Tests für Twenty Adapter update_entity() mit Mocks"""
     
-    @patch('tools.crm.twenty_adapter.requests.request')
+    @patch('requests.Session.request')
     def test_update_entity_person(self, mock_request):
         """Test: Person Update mit Field Enrichment"""
         from tools.crm.twenty_adapter import TwentyCRM
@@ -243,7 +243,7 @@ class TestTwentyAdapterIntegration:
         assert "CEO" in result
         assert "linkedin" in result
     
-    @patch('tools.crm.twenty_adapter.requests.request')
+    @patch('requests.Session.request')
     def test_update_entity_company(self, mock_request):
         """Test: Company Update mit Field Enrichment"""
         from tools.crm.twenty_adapter import TwentyCRM
@@ -266,7 +266,7 @@ class TestTwentyAdapterIntegration:
         assert "website" in result
         assert "size" in result
     
-    @patch('tools.crm.twenty_adapter.requests.request')
+    @patch('requests.Session.request')
     def test_update_entity_with_invalid_fields(self, mock_request):
         """Test: Ungültige Felder werden gefiltert"""
         from tools.crm.twenty_adapter import TwentyCRM
@@ -292,7 +292,7 @@ class TestTwentyAdapterIntegration:
         # Sollte warnen über übersprungene Felder
         assert "⚠️" in result or "Übersprungen" in result
     
-    @patch('tools.crm.twenty_adapter.requests.request')
+    @patch('requests.Session.request')
     def test_update_entity_target_not_found(self, mock_request):
         """Test: Target nicht gefunden"""
         from tools.crm.twenty_adapter import TwentyCRM
@@ -310,7 +310,7 @@ class TestTwentyAdapterIntegration:
         assert "❌" in result
         assert "nicht gefunden" in result.lower()
     
-    @patch('tools.crm.twenty_adapter.requests.request')
+    @patch('requests.Session.request')
     def test_resolve_target_company(self, mock_request):
         """Test: _resolve_target_id für Companies"""
         from tools.crm.twenty_adapter import TwentyCRM
@@ -0,0 +1,103 @@
+"""
+Test: Vektorisiertes Fuzzy-Ranking (tools/crm/fuzzy_rank.py)
+Kritisch für: CPU-Zeit von search_contacts / Resolve bei großen Workspaces
+
+Tests:
+- Scores identisch zu _fuzzy_match (inkl. Substring = 100, leere Strings = 0)
+- score_cutoff setzt schwache Scores auf 0
+- top_k: absteigend, stabile Reihenfolge bei Gleichstand
+- Index-Spalten werden gecacht und nach Änderungen neu gebaut
+- Zoho search_leads: gleiche Treffer/Sortierung über cdist
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.fuzzy_rank import CandidateColumns, score_column, preprocess
+from tools.crm.contact_index import ContactIndex, normalize_key
+
+NAMES = ["Thomas Braun", "Braun Thomas", "Anna Schmidt", "Jürgen Müller", "", "Voltage Solutions GmbH", "Tom"]
+
+
+@pytest.fixture
+def twenty():
+    with patch.dict(os.environ, {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'test_key'}):
+        with patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+            from tools.crm.twenty_adapter import TwentyCRM
+            yield TwentyCRM()
+
+
+class TestScoring:
+    """Tests für die Score-Semantik"""
+
+    @pytest.mark.parametrize("query", ["Thomas", "braun thomas", "Tomas Brun", "GMBH", "xyz", "  Müller "])
+    def test_matches_fuzzy_match(self, twenty, query):
+        """Test: cdist-Scores == _fuzzy_match pro Paar"""
+        columns = CandidateColumns(NAMES, {"name": lambda n: n})
+        scores = columns.scores(query, "name")
+
+        expected = [twenty._fuzzy_match(query, name)[1] for name in NAMES]
+        assert list(scores) == pytest.approx(expected)
+
+    def test_score_cutoff(self):
+        """Test: Scores unter dem Cutoff werden 0, Treffer bleiben erhalten"""
+        scores = score_column("Thomas Braun", [preprocess(n) for n in NAMES], score_cutoff=70)
+
+        assert scores[0] == 100.0
+        assert scores[2] == 0.0
+        assert score_column("", ["thomas"]).tolist() == [0.0]
+
+    def test_top_k_stable(self):
+        """Test: Beste k absteigend, Gleichstand in Original-Reihenfolge"""
+        records = [{"id": i, "name": n} for i, n in enumerate(NAMES)]
+        columns = CandidateColumns(records, {"name": lambda r: r["name"]})
+
+        top = columns.top_k("thomas braun", "name", k=2, score_cutoff=70)
+
+        assert [(r["id"], score) for r, score in top] == [(0, 100.0), (1, 100.0)]
+
+
+class TestIntegration:
+    """Tests für Index-Cache und Adapter"""
+
+    def test_index_columns_cached_until_change(self):
+        """Test: Spalten werden einmal gebaut und nach Upsert neu berechnet"""
+        index = ContactIndex({"company": lambda r: [normalize_key(r["name"])]})
+        index.upsert("company", {"id": "c1", "name": "Voltage Solutions"})
+        build = Mock(side_effect=lambda records: CandidateColumns(records, {"name": lambda r: r["name"]}))
+
+        first = index.columns("company", build)
+        assert index.columns("company", build) is first
+
+        index.upsert("company", {"id": "c2", "name": "Sonnenstrom AG"})
+        assert len(index.columns("company", build)) == 2
+        assert build.call_count == 2
+
+    def test_zoho_search_leads_ranked(self):
+        """Test: Zoho search_leads filtert und sortiert über die Score-Arrays"""
+        env = {'ZOHO_CLIENT_ID': 'a', 'ZOHO_CLIENT_SECRET': 'b', 'ZOHO_REFRESH_TOKEN': 'c'}
+        with patch.dict(os.environ, env), \
+                patch('tools.crm.zoho_adapter.load_field_mapping', return_value=Mock()), \
+                patch('tools.crm.zoho_adapter.ZohoCRM._refresh_access_token'):
+            from tools.crm.zoho_adapter import ZohoCRM
+            zoho = ZohoCRM()
+
+        leads = [
+            {"id": "1", "First_Name": "Anna", "Last_Name": "Schmidt", "Email": "anna@example.com", "Company": "Sonnenstrom"},
+            {"id": "2", "First_Name": "Thomas", "Last_Name": "Brown", "Email": "tb@voltage.de", "Company": "Voltage"},
+            {"id": "3", "First_Name": "Thomas", "Last_Name": "Braun", "Email": None, "Company": None},
+        ]
+        with patch.object(zoho, '_request', return_value={"data": leads}):
+            result = zoho.search_leads("Thomas Braun")
+
+        lines = result.splitlines()[1:]
+        assert [line.rsplit("(ID: ", 1)[1].rstrip(")") for line in lines] == ["3", "2"]
+        assert "[Match:" in lines[1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -203,7 +203,7 @@ def test_resolve_target_id_no_match(mock_request):
 def test_search_contacts_fuzzy_person(mock_request):
     """Fuzzy-Search sollte Personen mit Tippfehlern finden"""
     
-    def mock_response(method, endpoint, params=None, data=None):
+    def mock_response(method, endpoint, params=None, data=None, **kwargs):
         if endpoint == "companies":
             return {'companies': []}
         elif endpoint == "people":
@@ -234,7 +234,7 @@ def test_search_contacts_fuzzy_person(mock_request):
 def test_search_contacts_sorted_by_score(mock_request):
     """Results sollten nach Score sortiert sein (beste zuerst)"""
     
-    def mock_response(method, endpoint, params=None, data=None):
+    def mock_response(method, endpoint, params=None, data=None, **kwargs):
         if endpoint == "companies":
             return {'companies': []}
         elif endpoint == "people":
@@ -273,7 +273,7 @@ def test_search_contacts_sorted_by_score(mock_request):
 def test_search_contacts_company_fuzzy(mock_request):
     """Fuzzy-Search sollte auch Firmen mit Tippfehlern finden"""
     
-    def mock_response(method, endpoint, params=None, data=None):
+    def mock_response(method, endpoint, params=None, data=None, **kwargs):
         if endpoint == "companies":
             return {
                 'companies': [
@@ -0,0 +1,203 @@
+"""
+Test: Rate Governor für CRM APIs (tools/crm/rate_limit.py)
+Kritisch für: Bulk-Operationen und parallele User ohne 429-Fehler
+
+Tests:
+- Token Bucket: Burst sofort, danach im Takt der Quote
+- Retry-After / X-RateLimit-Reset Parsing (Sekunden, Unix-Zeit in ms, HTTP-Datum)
+- 429 -> Pause + Wiederholung (auch POST), Restbudget 0 -> Pause bis Reset
+- Faire Queue: Wartende Requests reihum pro User
+- Max. Wartezeit überschritten -> RateLimitExceeded
+- CrmHttpClient + Zoho _request laufen durch den Governor, Twenty REST/GraphQL teilen ein Budget
+"""
+
+import pytest
+import asyncio
+import time
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.rate_limit import (
+    RateGovernor, RateLimitConfig, RateLimitExceeded, governed, set_rate_limit_user, reset_rate_limit_user,
+    _seconds_until,
+)
+from tools.crm.http_client import CrmHttpClient
+
+
+def _response(status=200, headers=None):
+    response = Mock(status_code=status)
+    response.headers = headers or {}
+    return response
+
+
+def _governor(per_minute=600, burst=2, **kwargs):
+    return RateGovernor("test", RateLimitConfig(per_minute=per_minute, burst=burst, **kwargs))
+
+
+class TestTokenBucket:
+    """Tests für Burst + Takt"""
+
+    def test_burst_then_paced(self):
+        """Test: 2 Requests sofort, der dritte wartet ~1/rate"""
+        governor = _governor(per_minute=600, burst=2)  # 10/s
+
+        started = time.monotonic()
+        governor.acquire()
+        governor.acquire()
+        burst = time.monotonic() - started
+        governor.acquire()
+        total = time.monotonic() - started
+
+        assert burst < 0.05
+        assert total >= 0.08
+        metrics = governor.get_metrics()
+        assert (metrics["granted"], metrics["queued"]) == (3, 1)
+
+    def test_disabled_never_waits(self):
+        """Test: RATE_LIMIT_ENABLED=false -> kein Bucket"""
+        with patch.dict(os.environ, {'TWENTY_RATE_LIMIT_ENABLED': 'false'}):
+            governor = RateGovernor("test", RateLimitConfig.from_env("TWENTY"))
+        governor.pause(60)
+        governor.acquire()
+        assert governor.get_metrics()["granted"] == 0
+
+
+class TestServerFeedback:
+    """Tests für Retry-After / X-RateLimit-* Header"""
+
+    @pytest.mark.parametrize("value,expected", [
+        ("3", 3.0),
+        ("1700000005000", 5.0),                      # Zoho: Unix-Zeit in ms
+        ("1700000010", 10.0),                        # Unix-Zeit in s
+        ("Tue, 14 Nov 2023 22:13:40 GMT", 20.0),     # HTTP-Datum
+        ("garbage", None),
+    ])
+    def test_seconds_until(self, value, expected):
+        """Test: Alle Reset-Formate -> Sekunden ab jetzt"""
+        result = _seconds_until(value, now=1_700_000_000.0)
+        assert result == (pytest.approx(expected) if expected is not None else None)
+
+    def test_429_is_retried_after_pause(self):
+        """Test: 429 mit Retry-After -> Pause, POST wird wiederholt"""
+        governor = _governor()
+        send = Mock(side_effect=[_response(429, {"Retry-After": "0.1"}), _response(201)])
+
+        started = time.monotonic()
+        response = governed(governor, send)
+
+        assert response.status_code == 201
+        assert send.call_count == 2
+        assert time.monotonic() - started >= 0.09
+        assert governor.get_metrics()["throttled"] == 1
+
+    def test_429_gives_up_after_retries(self):
+        """Test: Nach rate_limit_retries wird die 429-Response zurückgegeben"""
+        governor = _governor(retries=1)
+        send = Mock(return_value=_response(429, {"Retry-After": "0"}))
+
+        assert governed(governor, send).status_code == 429
+        assert send.call_count == 2
+
+    def test_exhausted_budget_pauses(self):
+        """Test: X-RateLimit-Remaining 0 -> kein Request bis zum Reset"""
+        governor = _governor(burst=10)
+        governor.observe(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Limit": "100", "X-RateLimit-Reset": "0.1"})
+
+        metrics = governor.get_metrics()
+        assert metrics["paused_seconds"] > 0
+        assert (metrics["server_remaining"], metrics["server_limit"]) == ("0", "100")
+
+        started = time.monotonic()
+        governor.acquire()
+        assert time.monotonic() - started >= 0.09
+
+    def test_mock_headers_ignored(self):
+        """Test: Responses ohne Header-Mapping (z.B. Mocks) werden ignoriert"""
+        assert _governor().observe(Mock(), Mock()) is None
+
+
+class TestFairQueue:
+    """Tests für die Reihenfolge unter Last"""
+
+    def test_round_robin_between_users(self):
+        """Test: User A mit 3 wartenden Requests blockiert User B nicht"""
+        governor = _governor(per_minute=1200, burst=1)  # 20/s
+        order = []
+
+        async def call(user):
+            token = set_rate_limit_user(user)
+            try:
+                await governor.aacquire()
+            finally:
+                reset_rate_limit_user(token)
+            order.append(user)
+
+        async def main():
+            await governor.aacquire()  # Bucket leer
+            await asyncio.gather(call("a"), call("a"), call("a"), call("b"))
+
+        asyncio.run(main())
+
+        assert order == ["a", "b", "a", "a"]
+
+    def test_max_wait_exceeded(self):
+        """Test: Kein Budget innerhalb max_wait -> RateLimitExceeded, Queue aufgeräumt"""
+        governor = _governor(max_wait_seconds=0.05)
+        governor.pause(10)
+
+        with pytest.raises(RateLimitExceeded):
+            governor.acquire()
+        metrics = governor.get_metrics()
+        assert (metrics["timeouts"], metrics["waiting"]) == (1, 0)
+
+
+class TestIntegration:
+    """Tests für Transport-Hooks in den Adaptern"""
+
+    def test_http_client_retries_429(self):
+        """Test: CrmHttpClient wiederholt 429 (auch POST), 5xx-Policy unverändert"""
+        governor = _governor()
+        client = CrmHttpClient("https://crm.example.com/rest", governor=governor)
+        session = Mock()
+        session.request.side_effect = [_response(429, {"Retry-After": "0"}), _response(201)]
+
+        with patch.object(client, '_get_session', return_value=session):
+            response = client.request("POST", "tasks", json={})
+
+        assert response.status_code == 201
+        assert session.request.call_count == 2
+        assert governor.get_metrics()["throttled"] == 1
+
+    def test_twenty_shares_budget(self):
+        """Test: REST und GraphQL nutzen denselben Governor, Metriken am Adapter"""
+        with patch.dict(os.environ, {'TWENTY_API_URL': 'ratelimit.example.com', 'TWENTY_API_KEY': 'k'}):
+            with patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+                from tools.crm.twenty_adapter import TwentyCRM
+                adapter = TwentyCRM()
+
+        assert adapter.http.governor is adapter.graphql_http.governor is adapter.rate_governor
+        assert adapter.get_rate_limit_metrics()["per_minute"] == 100
+
+    def test_zoho_request_retries_429(self):
+        """Test: Zoho _request pausiert bei 429 und liefert dann die Daten"""
+        env = {'ZOHO_CLIENT_ID': 'a', 'ZOHO_CLIENT_SECRET': 'b', 'ZOHO_REFRESH_TOKEN': 'c'}
+        with patch.dict(os.environ, env), \
+                patch('tools.crm.zoho_adapter.load_field_mapping', return_value=Mock()), \
+                patch('tools.crm.zoho_adapter.ZohoCRM._refresh_access_token'):
+            from tools.crm.zoho_adapter import ZohoCRM
+            zoho = ZohoCRM()
+        zoho.access_token, zoho.token_expires_at = "token", time.time() + 3600
+
+        ok = _response(200)
+        ok.json.return_value = {"data": [{"id": "1"}]}
+        throttled = _response(429, {"Retry-After": "0"})
+        with patch('tools.crm.zoho_adapter.requests.request', side_effect=[throttled, ok]) as mock_request:
+            assert zoho._request("GET", "Leads") == {"data": [{"id": "1"}]}
+        assert mock_request.call_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
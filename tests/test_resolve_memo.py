@@ -0,0 +1,187 @@
+"""
+Test: Name -> ID Memo (tools/crm/resolve_cache.py)
+Kritisch für: Mehrstufige Sessions ("Notiz an Thomas, dann Task an Thomas") ohne erneuten Scan
+
+Tests:
+- Key-Normalisierung, mehrdeutige Suchtreffer werden nicht gemerkt
+- Adapter-Memo: TTL-Ablauf
+- Session-Memo: Neuer Prozess/Worker löst aus dem Graph-State auf
+- Delete entfernt die ID aus allen Memos (auch aus fremden Session-Memos)
+- Twenty: Zweiter Resolve ohne Scan, search_contacts-Treffer ersetzen den Resolve
+- Zoho: Zweiter Resolve ohne Leads-Download
+- State-Reducer kappt auf RESOLVE_MEMO_LIMIT
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.resolve_cache import ResolveCache, ResolveConfig, memo_key, use_session_memo, reset_session_memo
+
+PERSON_ID = "10000000-0000-4000-8000-000000000001"
+OTHER_ID = "10000000-0000-4000-8000-000000000002"
+PEOPLE = [
+    {"id": PERSON_ID, "name": {"firstName": "Thomas", "lastName": "Braun"},
+     "emails": {"primaryEmail": "thomas@voltage.de"}, "companyId": None},
+    {"id": OTHER_ID, "name": {"firstName": "Anna", "lastName": "Schmidt"},
+     "emails": {"primaryEmail": "anna@example.com"}, "companyId": None},
+]
+
+
+@pytest.fixture
+def session():
+    memo = {}
+    token = use_session_memo(memo)
+    yield memo
+    reset_session_memo(token)
+
+
+@pytest.fixture
+def twenty():
+    env = {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'test_key',
+           'TWENTY_INDEX_ENABLED': 'false', 'TWENTY_PREFILTER_ENABLED': 'false'}
+    with patch.dict(os.environ, env):
+        with patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+            from tools.crm.twenty_adapter import TwentyCRM
+            yield TwentyCRM()
+
+
+def _twenty_routes(method, endpoint, params=None, data=None, envelope=False):
+    if method == "GET" and endpoint == "people":
+        return {"data": {"people": PEOPLE}, "pageInfo": {"hasNextPage": False}}
+    if method == "GET" and endpoint == "companies":
+        return {"data": {"companies": []}, "pageInfo": {"hasNextPage": False}}
+    return None
+
+
+def _scans(mock_request, endpoint="people"):
+    return [c for c in mock_request.call_args_list if c.args[:2] == ("GET", endpoint)]
+
+
+class TestResolveCache:
+    """Tests für Session- und Adapter-Memo"""
+
+    def test_key_normalization(self):
+        """Test: Groß-/Kleinschreibung und Leerzeichen egal"""
+        assert memo_key("person", "  Thomas   BRAUN ") == memo_key("person", "thomas braun") == "person:thomas braun"
+
+    def test_ambiguous_hits_skipped(self, session):
+        """Test: Zwei 'Thomas Braun' -> Name wird nicht gemerkt, E-Mails schon"""
+        cache = ResolveCache("twenty")
+        cache.remember_hits("person", [("Thomas Braun", PERSON_ID), ("Thomas Braun", OTHER_ID),
+                                       ("thomas@voltage.de", PERSON_ID)])
+
+        assert cache.lookup("person", "Thomas Braun") is None
+        assert cache.lookup("person", "thomas@voltage.de") == PERSON_ID
+
+    def test_adapter_ttl(self):
+        """Test: Ohne Session-Memo gilt die Adapter-TTL"""
+        cache = ResolveCache("twenty", ResolveConfig(ttl_seconds=10))
+        with patch('tools.crm.resolve_cache.time.monotonic', return_value=100.0):
+            cache.remember("person", "Thomas Braun", PERSON_ID)
+            assert cache.lookup("person", "Thomas Braun") == PERSON_ID
+        with patch('tools.crm.resolve_cache.time.monotonic', return_value=111.0):
+            assert cache.lookup("person", "Thomas Braun") is None
+
+    def test_session_memo_survives_process(self, session):
+        """Test: Neuer Worker (leeres Adapter-Memo) löst aus dem Graph-State auf"""
+        ResolveCache("twenty").remember("person", "Thomas Braun", PERSON_ID, 92.0)
+        assert session["person:thomas braun"]["entity_id"] == PERSON_ID
+
+        fresh = ResolveCache("twenty")
+        assert fresh.lookup("person", "thomas braun") == PERSON_ID
+        assert fresh.get_metrics()["session_hits"] == 1
+
+    def test_delete_forgets_everywhere(self, session):
+        """Test: forget_id räumt beide Memos, fremde Session-Memos ignorieren die ID"""
+        cache = ResolveCache("twenty")
+        cache.remember("person", "Thomas Braun", PERSON_ID)
+        other_session = dict(session)
+
+        cache.forget_id(PERSON_ID)
+
+        assert session == {}
+        token = use_session_memo(other_session)
+        try:
+            assert cache.lookup("person", "Thomas Braun") is None
+        finally:
+            reset_session_memo(token)
+
+
+class TestTwenty:
+    """Tests für _resolve_target_id im Twenty Adapter"""
+
+    def test_second_resolve_without_scan(self, twenty, session):
+        """Test: 'Notiz an Thomas, dann Task an Thomas' -> ein Scan"""
+        graphql = {"data": {"record": {"id": "x"}, "t0": {"id": "y"}}}
+        with patch.object(twenty, '_request', side_effect=_twenty_routes) as mock_request, \
+                patch.object(twenty, '_graphql', return_value=graphql):
+            twenty.create_note("Call", "Rückruf", "Thomas Braun")
+            twenty.create_task("Angebot", target_id="thomas braun")
+
+        assert len(_scans(mock_request)) == 1
+        assert session["person:thomas braun"]["entity_id"] == PERSON_ID
+
+    def test_search_hits_reused(self, twenty, session):
+        """Test: Nach search_contacts braucht der Resolve keinen Scan mehr"""
+        with patch.object(twenty, '_request', side_effect=_twenty_routes) as mock_request:
+            twenty.search_contacts("Thomas")
+            scans = len(_scans(mock_request))
+            assert twenty._resolve_target_id("Thomas Braun") == PERSON_ID
+            assert twenty._resolve_target_id("thomas@voltage.de") == PERSON_ID
+
+        assert len(_scans(mock_request)) == scans
+
+    def test_delete_invalidates(self, twenty, session):
+        """Test: Nach delete_item wird wieder gescannt"""
+        with patch.object(twenty, '_request', side_effect=_twenty_routes) as mock_request:
+            twenty._resolve_target_id("Thomas Braun")
+            with patch.object(twenty.http, 'request', return_value=Mock(status_code=204)):
+                twenty.delete_item("person", PERSON_ID)
+            twenty._resolve_target_id("Thomas Braun")
+
+        assert len(_scans(mock_request)) == 2
+
+
+class TestZoho:
+    """Tests für _resolve_target_id im Zoho Adapter"""
+
+    def test_second_resolve_without_download(self, session):
+        """Test: Gleicher Name -> ein Leads-Download"""
+        env = {'ZOHO_CLIENT_ID': 'a', 'ZOHO_CLIENT_SECRET': 'b', 'ZOHO_REFRESH_TOKEN': 'c'}
+        with patch.dict(os.environ, env), \
+                patch('tools.crm.zoho_adapter.load_field_mapping', return_value=Mock()), \
+                patch('tools.crm.zoho_adapter.ZohoCRM._refresh_access_token'):
+            from tools.crm.zoho_adapter import ZohoCRM
+            zoho = ZohoCRM()
+
+        leads = {"data": [{"id": "3652397000000624001", "First_Name": "Anna", "Last_Name": "Schmidt",
+                           "Email": "anna@example.com", "Company": "Voltage"}]}
+        with patch.object(zoho, '_request', return_value=leads) as mock_request:
+            assert zoho._resolve_target_id("Anna Schmidt") == "3652397000000624001"
+            assert zoho._resolve_target_id("anna schmidt") == "3652397000000624001"
+
+        assert mock_request.call_count == 1
+        assert session["lead:anna schmidt"]["score"] == 100.0
+
+
+class TestState:
+    """Tests für den Reducer im Graph-State"""
+
+    def test_reducer_keeps_newest(self):
+        """Test: Neueste Einträge bleiben, ohne Update bleibt der Stand"""
+        from graph.state import bounded_resolve_memo, RESOLVE_MEMO_LIMIT
+
+        memo = {f"person:{i}": {"entity_id": str(i)} for i in range(RESOLVE_MEMO_LIMIT + 5)}
+        capped = bounded_resolve_memo({}, memo)
+
+        assert len(capped) == RESOLVE_MEMO_LIMIT
+        assert list(capped)[-1] == f"person:{RESOLVE_MEMO_LIMIT + 4}"
+        assert bounded_resolve_memo(capped, None) == capped
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
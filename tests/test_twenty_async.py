@@ -0,0 +1,166 @@
+"""
+Test: Native Async TwentyCRM (httpx) + Async CRM Tools
+Kritisch für: Skalierung der Tool-Calls über den Event Loop statt Thread-Pool
+
+Tests:
+- Async- und Sync-Variante liefern identische Ergebnisse (Sync = Shim über die a*-Methode)
+- Sync-Shim nutzt nur den requests-Pool, auch aus einem laufenden Event Loop
+- create_task: Resolve -> Create + Link in einem GraphQL-Request über httpx
+- Transportfehler landen im Error-Handling der Async-Methode
+- Tool Factory hängt coroutine= an, Undo-Stack funktioniert async
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+from unittest.mock import Mock, AsyncMock, patch
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PERSON_ID = "10000000-0000-4000-8000-000000000001"
+TASK_ID = "30000000-0000-4000-8000-000000000001"
+
+PEOPLE = {"data": {"people": [
+    {"id": PERSON_ID, "name": {"firstName": "Thomas", "lastName": "Braun"},
+     "emails": {"primaryEmail": "thomas@voltage.de"}, "companyId": None},
+]}}
+COMPANIES = {"data": {"companies": [{"id": "20000000-0000-4000-8000-000000000001", "name": "Voltage Solutions"}]}}
+
+
+def _routes(method, path, **kwargs):
+    """Mini-Router für Fake Twenty Responses"""
+    if method == "GET" and path == "people":
+        body = PEOPLE
+    elif method == "GET" and path == "companies":
+        body = COMPANIES
+    elif method == "POST" and path == "tasks":
+        body = {"data": {"createTask": {"id": TASK_ID}}}
+    elif method == "POST" and path == "taskTargets":
+        body = {"data": {"createTaskTarget": {"id": "t-1"}}}
+    else:
+        return httpx.Response(404, json={"error": "not found"})
+    return httpx.Response(200, json=body)
+
+
+def _graphql(method, path, json=None, **kwargs):
+    """Fake Twenty GraphQL: jede Mutation liefert die ID aus den Variablen"""
+    data = {alias: {"id": values.get("id", "t-1")} for alias, values in
+            zip(["record"] + [f"t{i}" for i in range(len(json["variables"]) - 1)], json["variables"].values())}
+    return httpx.Response(200, json={"data": data})
+
+
+@pytest.fixture
+def adapter():
+    with patch.dict(os.environ, {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'test_key'}):
+        with patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+            from tools.crm.twenty_adapter import TwentyCRM
+            yield TwentyCRM()
+
+
+class TestAsyncAdapter:
+    """Tests für die a*-Methoden des Twenty Adapters"""
+
+    def test_async_matches_sync(self, adapter):
+        """Test: asearch_contacts == search_contacts bei gleichen Daten"""
+        def sync_request(method, url, **kwargs):
+            response = _routes(method, url.rsplit("/rest/", 1)[1])
+            mock = Mock(status_code=response.status_code)
+            mock.json.return_value = response.json()
+            return mock
+
+        with patch('requests.Session.request', side_effect=sync_request):
+            sync_result = adapter.search_contacts("Braun")
+
+        adapter.http.arequest = AsyncMock(side_effect=lambda m, p, **kw: _routes(m, p))
+        async_result = asyncio.run(adapter.asearch_contacts("Braun"))
+
+        assert "Thomas Braun" in async_result
+        assert async_result == sync_result
+
+    def test_sync_shim_uses_requests_only(self, adapter):
+        """Test: Sync-Methode läuft über _request (kein httpx), auch innerhalb eines laufenden Event Loops"""
+        adapter.http.arequest = AsyncMock(side_effect=AssertionError("httpx im Sync-Shim"))
+
+        async def caller():
+            return adapter.search_contacts("Braun")
+
+        with patch.object(adapter, '_request', side_effect=lambda m, p, **kw: _routes(m, p).json()["data"]) as mock_request:
+            result = asyncio.run(caller())
+
+        assert "Thomas Braun" in result
+        assert {c.args[1] for c in mock_request.call_args_list} == {"people", "companies"}
+        adapter.http.arequest.assert_not_called()
+
+    def test_acreate_task_resolves_and_links(self, adapter):
+        """Test: Resolve (GET people) -> Task + taskTarget in EINEM GraphQL-Request"""
+        adapter.http.arequest = AsyncMock(side_effect=lambda m, p, **kw: _routes(m, p))
+        adapter.graphql_http.arequest = AsyncMock(side_effect=_graphql)
+
+        result = asyncio.run(adapter.acreate_task("Angebot nachfassen", target_id="Thomas Braun"))
+
+        calls = [(c.args[0], c.args[1]) for c in adapter.http.arequest.call_args_list]
+        assert calls == [("GET", "people")]
+        adapter.graphql_http.arequest.assert_awaited_once()
+        variables = adapter.graphql_http.arequest.call_args.kwargs["json"]["variables"]
+        task_id = variables["record"]["id"]
+        assert variables["t0"] == {"taskId": task_id, "personId": PERSON_ID}
+        assert task_id in result
+        assert "Verknüpft" in result
+
+    def test_transport_error_handled(self, adapter):
+        """Test: httpx-Fehler wird in adelete_item abgefangen"""
+        adapter.http.arequest = AsyncMock(side_effect=httpx.ConnectError("refused"))
+
+        result = asyncio.run(adapter.adelete_item("note", TASK_ID))
+
+        assert result.startswith("❌ Fehler")
+
+
+class TestAsyncTools:
+    """Tests für coroutine= in der Tool Factory"""
+
+    def test_tools_get_coroutines_and_undo(self, adapter):
+        """Test: Async Tools für Twenty, Undo löscht über adelete_item"""
+        import tools.crm as crm
+
+        adapter.http.arequest = AsyncMock(side_effect=lambda m, p, **kw: _routes(m, p))
+        adapter.graphql_http.arequest = AsyncMock(side_effect=_graphql)
+        adapter.adelete_item = AsyncMock(return_value="✅ Aktion erfolgreich rückgängig gemacht.")
+
+        with patch.multiple(crm, adapter=adapter, search_func=adapter.search_contacts,
+                            create_task_func=adapter.create_task, create_note_func=adapter.create_note):
+            undo_stack = []
+            tools = {t.name: t for t in crm.get_crm_tools_for_user("telegram:1", undo_stack=undo_stack)}
+
+            assert tools["search_contacts"].coroutine is not None
+            assert tools["create_task"].coroutine is not None
+
+            async def scenario():
+                created = await tools["create_task"].ainvoke({"title": "Anrufen", "target_id": "Thomas Braun"})
+                undone = await tools["undo_last_action"].ainvoke({"steps": 1})
+                return created, undone
+
+            created, undone = asyncio.run(scenario())
+
+        task_id = adapter.graphql_http.arequest.call_args.kwargs["json"]["variables"]["record"]["id"]
+        assert task_id in created
+        assert "✅" in undone
+        adapter.adelete_item.assert_awaited_once_with("task", task_id)
+        assert undo_stack == []
+
+    def test_mock_mode_has_no_coroutine(self):
+        """Test: Mock-Funktionen bleiben reine Sync-Tools"""
+        import tools.crm as crm
+
+        with patch.multiple(crm, search_func=crm.mock_search, create_task_func=crm.mock_task):
+            tools = {t.name: t for t in crm.get_crm_tools_for_user("telegram:1")}
+
+        assert tools["search_contacts"].coroutine is None
+        assert tools["create_task"].coroutine is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
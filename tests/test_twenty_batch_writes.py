@@ -0,0 +1,145 @@
+"""
+Test: Batch-Writes für Tasks/Notes (Create + Verknüpfung in einem Round-Trip)
+Kritisch für: Schreib-Latenz von create_task / create_note
+
+Tests:
+- Task mit Person: genau ein GraphQL-Request, Relation zeigt auf die clientseitige ID
+- Task mit Person + Firma: beide Relationen im selben Dokument, Resolves parallel
+- Ohne Ziel: einfacher REST-Create (kein GraphQL)
+- Teilerfolg: Relation abgelehnt -> Task erstellt, Hinweis im Ergebnis
+- GraphQL nicht erreichbar -> REST-Fallback mit derselben ID
+- Fake Twenty (Benchmark-Stub) führt die Mutations aus
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+from unittest.mock import Mock, AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PERSON_ID = "10000000-0000-4000-8000-000000000001"
+COMPANY_ID = "20000000-0000-4000-8000-000000000001"
+
+
+@pytest.fixture
+def adapter():
+    with patch.dict(os.environ, {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'test_key'}):
+        with patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+            from tools.crm.twenty_adapter import TwentyCRM
+            yield TwentyCRM()
+
+
+def _all_ok(query, variables):
+    return {"data": {alias: {"id": values["id"] if alias == "record" else f"{alias}-id"}
+                     for alias, values in variables.items()}}
+
+
+class TestBatchWrites:
+    """Tests für _create_with_targets über create_task / create_note"""
+
+    def test_task_with_person_single_request(self, adapter):
+        """Test: Ein GraphQL-Request, kein REST-Call"""
+        with patch.object(adapter, '_graphql', side_effect=_all_ok) as graphql, \
+                patch.object(adapter, '_request') as rest:
+            result = adapter.create_task("Angebot nachfassen", target_id=PERSON_ID)
+
+        graphql.assert_called_once()
+        rest.assert_not_called()
+        query, variables = graphql.call_args.args
+        assert "createTask(data: $record)" in query and "createTaskTarget(data: $t0)" in query
+        assert variables["t0"] == {"taskId": variables["record"]["id"], "personId": PERSON_ID}
+        assert f"(ID: {variables['record']['id']})" in result
+        assert "Verknüpft mit Kontakt" in result
+
+    def test_person_and_company_at_once(self, adapter):
+        """Test: Person + Firma werden im selben Dokument verknüpft"""
+        with patch.object(adapter, '_graphql', side_effect=_all_ok) as graphql:
+            result = adapter.create_note("Call", "Rückruf vereinbart", PERSON_ID, company_target=COMPANY_ID)
+
+        variables = graphql.call_args.args[1]
+        assert variables["t0"]["personId"] == PERSON_ID
+        assert variables["t1"]["companyId"] == COMPANY_ID
+        assert variables["t1"]["noteId"] == variables["record"]["id"]
+        assert "(Verknüpft!)" in result
+
+    def test_async_resolves_in_parallel(self, adapter):
+        """Test: Async - Person und Firma werden gemeinsam aufgelöst, dann ein Request"""
+        adapter._aresolve_target_id = AsyncMock(side_effect=lambda target, entity_type: {
+            "Thomas Braun": PERSON_ID, "Voltage": COMPANY_ID}.get(target))
+        adapter._agraphql = AsyncMock(side_effect=_all_ok)
+
+        result = asyncio.run(adapter.acreate_task("Anrufen", target_id="Thomas Braun", company_target="Voltage"))
+
+        assert adapter._aresolve_target_id.await_count == 2
+        adapter._agraphql.assert_awaited_once()
+        assert "Verknüpft mit Kontakt + Firma" in result
+
+    def test_without_target_uses_rest(self, adapter):
+        """Test: Ohne Ziel reicht ein einfacher REST-Create"""
+        with patch.object(adapter, '_graphql') as graphql, \
+                patch.object(adapter, '_request', return_value={"createTask": {"id": "task-1"}}) as rest:
+            result = adapter.create_task("Allgemeine Aufgabe")
+
+        graphql.assert_not_called()
+        assert rest.call_args.args[:2] == ("POST", "tasks")
+        assert "(ID: task-1)" in result
+
+    def test_partial_failure_reported(self, adapter):
+        """Test: Relation abgelehnt -> Task existiert, Hinweis auf fehlende Verknüpfung"""
+        def link_rejected(query, variables):
+            return {"data": {"record": {"id": variables["record"]["id"]}, "t0": None},
+                    "errors": [{"message": "personId not found", "path": ["t0"]}]}
+
+        with patch.object(adapter, '_graphql', side_effect=link_rejected):
+            result = adapter.create_task("Anrufen", target_id=PERSON_ID)
+
+        assert result.startswith("✅")
+        assert "Verknüpfung fehlgeschlagen" in result
+        assert "Verknüpft mit" not in result
+
+    def test_rest_fallback_keeps_id(self, adapter):
+        """Test: GraphQL down -> REST Create + Link mit derselben clientseitigen ID"""
+        def rest(method, endpoint, params=None, data=None, envelope=False):
+            return {"createTask": data} if endpoint == "tasks" else {"createTaskTarget": {"id": "tt-1"}}
+
+        with patch.object(adapter, '_graphql', return_value=None), \
+                patch.object(adapter, '_request', side_effect=rest) as mock_request:
+            result = adapter.create_task("Anrufen", target_id=PERSON_ID)
+
+        (create, link) = mock_request.call_args_list
+        task_id = create.kwargs["data"]["id"]
+        assert link.args[:2] == ("POST", "taskTargets")
+        assert link.kwargs["data"] == {"taskId": task_id, "personId": PERSON_ID}
+        assert f"(ID: {task_id})" in result and "Verknüpft" in result
+
+
+class TestFakeTwenty:
+    """Tests für POST /graphql im Benchmark-Stub"""
+
+    def test_stub_executes_mutations(self, adapter):
+        """Test: Task + Target landen im Store, Antwort mit Aliasen"""
+        from fastapi.testclient import TestClient
+        from benchmarks.stubs.fake_twenty import TwentyStore, create_app
+
+        store = TwentyStore()
+        client = TestClient(create_app(store))
+        captured = {}
+
+        def graphql(query, variables):
+            captured.update(variables)
+            return client.post("/graphql", json={"query": query, "variables": variables}).json()
+
+        with patch.object(adapter, '_graphql', side_effect=graphql):
+            result = adapter.create_task("Anrufen", target_id=PERSON_ID, company_target=COMPANY_ID)
+
+        task_id = captured["record"]["id"]
+        assert task_id in store.records["tasks"]
+        assert {t["companyId"] for t in store.records["taskTargets"].values() if t.get("companyId")} == {COMPANY_ID}
+        assert store.requests["POST graphql"] == 1
+        assert "Verknüpft mit Kontakt + Firma" in result
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
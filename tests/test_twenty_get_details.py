@@ -12,9 +12,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 class TestTwentyGetPersonDetails:
     """Tests für TwentyCRM.get_person_details()"""
     
-    @patch('tools.crm.twenty_adapter.requests')
+    @patch('requests.Session.request')
     @patch('tools.crm.twenty_adapter.load_field_mapping')
-    def test_get_person_details_success(self, mock_load_mapping, mock_requests):
+    def test_get_person_details_success(self, mock_load_mapping, mock_request):
         """Test: Erfolgreicher Abruf mit allen Feldern"""
         mock_load_mapping.return_value = Mock()
         
@@ -47,6 +47,10 @@ class TestTwentyGetPersonDetails:
                     "city": "Wien",
                     "birthday": "1990-05-15",
                     "companyId": "20000000-0000-4000-8000-000000000099",
+                    "company": {
+                        "id": "20000000-0000-4000-8000-000000000099",
+                        "name": "Bodensee Wellness"
+                    },
                     "createdAt": "2024-01-15T10:30:00Z",
                     "updatedAt": "2024-12-20T15:45:00Z"
                 }
@@ -54,19 +58,8 @@ class TestTwentyGetPersonDetails:
         }
         person_response.raise_for_status = Mock()
         
-        # Mock Company Response
-        company_response = Mock()
-        company_response.json.return_value = {
-            "data": {
-                "company": {
-                    "id": "20000000-0000-4000-8000-000000000099",
-                    "name": "Bodensee Wellness"
-                }
-            }
-        }
-        company_response.raise_for_status = Mock()
-        
-        mock_requests.request.side_effect = [person_response, company_response]
+        # Company kommt über depth=1 mit (kein zweiter Request)
+        mock_request.side_effect = [person_response]
         
         with patch.dict(os.environ, {
             'TWENTY_API_URL': 'twenty.example.com',
@@ -89,14 +82,13 @@ class TestTwentyGetPersonDetails:
             assert "2024-01-15" in result  # Created date
             assert "10000000-0000-4000-8000-000000000048" in result
             
-            # Verify API Calls
-            assert mock_requests.request.call_count == 2
-            # First call: person
-            # Second call: company
+            # Verify API Calls: Person inkl. Company in einem Request
+            assert mock_request.call_count == 1
+            assert mock_request.call_args.kwargs["params"] == {"depth": 1}
     
-    @patch('tools.crm.twenty_adapter.requests')
+    @patch('requests.Session.request')
     @patch('tools.crm.twenty_adapter.load_field_mapping')
-    def test_get_person_details_not_found(self, mock_load_mapping, mock_requests):
+    def test_get_person_details_not_found(self, mock_load_mapping, mock_request):
         """Test: Person nicht gefunden"""
         mock_load_mapping.return_value = Mock()
         
@@ -105,7 +97,7 @@ class TestTwentyGetPersonDetails:
         person_response.json.return_value = {"data": None}
         person_response.raise_for_status = Mock()
         
-        mock_requests.request.return_value = person_response
+        mock_request.return_value = person_response
         
         with patch.dict(os.environ, {
             'TWENTY_API_URL': 'twenty.example.com',
@@ -119,9 +111,9 @@ class TestTwentyGetPersonDetails:
             assert "❌" in result
             assert "nicht gefunden" in result
     
-    @patch('tools.crm.twenty_adapter.requests')
+    @patch('requests.Session.request')
     @patch('tools.crm.twenty_adapter.load_field_mapping')
-    def test_get_person_details_minimal_fields(self, mock_load_mapping, mock_requests):
+    def test_get_person_details_minimal_fields(self, mock_load_mapping, mock_request):
         """Test: Person mit Minimal-Feldern (nur Name + Email)"""
         mock_load_mapping.return_value = Mock()
         
@@ -149,7 +141,7 @@ class TestTwentyGetPersonDetails:
         }
         person_response.raise_for_status = Mock()
         
-        mock_requests.request.return_value = person_response
+        mock_request.return_value = person_response
         
         with patch.dict(os.environ, {
             'TWENTY_API_URL': 'twenty.example.com',
@@ -166,9 +158,9 @@ class TestTwentyGetPersonDetails:
             assert "test-uuid" in result
             # Should not crash on missing/empty fields
     
-    @patch('tools.crm.twenty_adapter.requests')
+    @patch('requests.Session.request')
     @patch('tools.crm.twenty_adapter.load_field_mapping')
-    def test_get_person_details_with_company_error(self, mock_load_mapping, mock_requests):
+    def test_get_person_details_with_company_error(self, mock_load_mapping, mock_request):
         """Test: Person abrufen, aber Company-Abruf schlägt fehl"""
         mock_load_mapping.return_value = Mock()
         
@@ -192,7 +184,7 @@ class TestTwentyGetPersonDetails:
         company_response.json.return_value = {"data": None}
         company_response.raise_for_status = Mock()
         
-        mock_requests.request.side_effect = [person_response, company_response]
+        mock_request.side_effect = [person_response, company_response]
         
         with patch.dict(os.environ, {
             'TWENTY_API_URL': 'twenty.example.com',
@@ -209,6 +201,61 @@ class TestTwentyGetPersonDetails:
             # Company name should be empty/not shown
 
 
+
+class TestCompanyRelation:
+    """Tests für Firmennamen ohne N+1 Requests (depth / id[in] / Cache)"""
+
+    COMPANY_ID = "20000000-0000-4000-8000-000000000099"
+
+    @pytest.fixture
+    def adapter(self):
+        with patch.dict(os.environ, {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'test_key'}):
+            with patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+                from tools.crm.twenty_adapter import TwentyCRM
+                adapter = TwentyCRM()
+                adapter.index.config.enabled = False
+                yield adapter
+
+    def _person(self, person_id, first, last):
+        return {"id": person_id, "name": {"firstName": first, "lastName": last},
+                "emails": {"primaryEmail": f"{first.lower()}@example.com"}, "companyId": self.COMPANY_ID}
+
+    def test_details_without_depth_uses_cache(self, adapter):
+        """Test: API ohne eingebettete Company -> ein id[in]-Abruf, danach Cache"""
+        def request(method, endpoint, params=None, data=None, **kwargs):
+            if endpoint == "companies":
+                return {"companies": [{"id": self.COMPANY_ID, "name": "Bodensee Wellness"}]}
+            return {"person": self._person("p-1", "Eva", "Summer")}
+
+        adapter.entity_cache.config.enabled = False  # Nur den Firmennamen-Cache prüfen
+        with patch.object(adapter, '_request', side_effect=request) as mock_request:
+            first = adapter.get_person_details("p-1")
+            second = adapter.get_person_details("p-1")
+
+        endpoints = [c.args[1] for c in mock_request.call_args_list]
+        assert endpoints == ["people/p-1", "companies", "people/p-1"]
+        assert mock_request.call_args_list[1].kwargs["params"]["filter"] == f'id[in]:["{self.COMPANY_ID}"]'
+        assert "Bodensee Wellness" in first and "Bodensee Wellness" in second
+
+    def test_search_adds_company_in_one_request(self, adapter):
+        """Test: Personen-Treffer zeigen ihre Firma, geladen mit EINEM Batch-Request"""
+        adapter.prefilter_enabled = False
+        people = [self._person("p-1", "Eva", "Summer"), self._person("p-2", "Eva", "Winter")]
+
+        def request(method, endpoint, params=None, data=None, **kwargs):
+            if endpoint == "companies" and "filter" in (params or {}):
+                return {"companies": [{"id": self.COMPANY_ID, "name": "Bodensee Wellness"}]}
+            return {endpoint: people if endpoint == "people" else []}
+
+        with patch.object(adapter, '_request', side_effect=request) as mock_request:
+            result = adapter.search_contacts("Eva")
+
+        batch_calls = [c for c in mock_request.call_args_list if "filter" in (c.kwargs.get("params") or {})]
+        assert len(batch_calls) == 1
+        assert "Eva Summer <eva@example.com> @ Bodensee Wellness" in result
+        assert "Eva Winter <eva@example.com> @ Bodensee Wellness" in result
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
 
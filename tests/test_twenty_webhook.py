@@ -0,0 +1,158 @@
+"""
+Test: Twenty Webhooks (POST /crm-events/twenty, tools/crm/twenty_webhook.py)
+Kritisch für: Frische Suche/Resolve ohne Polling-Downloads
+
+Tests:
+- Signatur: gültig, falsches Secret, manipulierter Body, abgelaufener Timestamp
+- parse_event: Person/Company-Events, fremde Objekte ignoriert, kaputte Events -> ValueError
+- Adapter: created/updated -> Index + Cache-Invalidierung, deleted -> aus dem Index
+- Webhook-Events verschieben die High-Water-Mark nicht (verpasste Events findet der Delta-Sync)
+- Unbrauchbares Event -> Delta-Sync beim nächsten Zugriff
+- Endpoint: 401 ohne gültige Signatur, 200 + applied mit Signatur
+"""
+
+import pytest
+import json
+import time
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.twenty_webhook import sign, verify_signature, parse_event
+
+SECRET = "whsec-test"
+PERSON_ID = "10000000-0000-4000-8000-000000000001"
+COMPANY_ID = "20000000-0000-4000-8000-000000000001"
+
+
+def _event(name, record):
+    return {"eventName": name, "objectMetadata": {"nameSingular": name.split(".")[0]}, "record": record}
+
+
+def _person(first="Thomas", last="Braun", updated_at="2026-10-19T08:00:00Z"):
+    return {"id": PERSON_ID, "name": {"firstName": first, "lastName": last},
+            "emails": {"primaryEmail": "thomas@voltage.de"}, "companyId": None, "updatedAt": updated_at}
+
+
+@pytest.fixture
+def adapter():
+    env = {'TWENTY_API_URL': 'twenty.example.com', 'TWENTY_API_KEY': 'test_key', 'TWENTY_WEBHOOK_SECRET': SECRET}
+    with patch.dict(os.environ, env):
+        with patch('tools.crm.twenty_adapter.load_field_mapping', return_value=Mock()):
+            from tools.crm.twenty_adapter import TwentyCRM
+            adapter = TwentyCRM()
+    adapter.index.load_full("person", [])
+    adapter.index.load_full("company", [])
+    return adapter
+
+
+class TestVerification:
+    """Tests für Signatur + Replay-Schutz"""
+
+    def test_valid_signature(self):
+        """Test: Korrekte Signatur mit ms-Timestamp wird akzeptiert"""
+        body = b'{"eventName":"person.updated"}'
+        timestamp = str(int(time.time() * 1000))
+        assert verify_signature(SECRET, body, timestamp, sign(SECRET, timestamp, body))
+
+    @pytest.mark.parametrize("secret,body,age", [
+        ("wrong", b'{"a":1}', 0),      # Falsches Secret
+        (SECRET, b'{"a":2}', 0),       # Body nach dem Signieren verändert
+        (SECRET, b'{"a":1}', 3600),    # Replay: zu alt
+    ])
+    def test_rejected(self, secret, body, age):
+        """Test: Manipulierte oder alte Requests werden abgelehnt"""
+        timestamp = str(int((time.time() - age) * 1000))
+        signature = sign(secret, timestamp, b'{"a":1}')
+        assert not verify_signature(SECRET, body, timestamp, signature)
+        assert not verify_signature(SECRET, body, None, signature)
+
+
+class TestParseEvent:
+    """Tests für die Event-Normalisierung"""
+
+    def test_person_and_company(self):
+        """Test: Entity, Aktion und Record werden erkannt"""
+        event = parse_event(_event("company.deleted", {"id": COMPANY_ID}))
+        assert (event.entity, event.action, event.record_id) == ("company", "deleted", COMPANY_ID)
+        assert parse_event(_event("person.created", _person())).entity == "person"
+
+    def test_other_objects_ignored(self):
+        """Test: Tasks/Notes haben keinen Index -> None"""
+        assert parse_event(_event("task.created", {"id": "t-1"})) is None
+
+    def test_broken_event_raises(self):
+        """Test: Person-Event ohne Record-ID -> ValueError"""
+        with pytest.raises(ValueError):
+            parse_event(_event("person.updated", {"name": {}}))
+
+
+class TestAdapterEvents:
+    """Tests für apply_webhook_event im Twenty Adapter"""
+
+    def test_update_refreshes_index_and_cache(self, adapter):
+        """Test: Umbenennung ist sofort per Index auffindbar, Details-Cache invalidiert"""
+        adapter.index.upsert("person", {"id": PERSON_ID, "name": {"firstName": "Tom", "lastName": "B"},
+                                        "emails": {"primaryEmail": ""}, "updatedAt": "2026-10-18T00:00:00Z"})
+        adapter.entity_cache.set("person", PERSON_ID, {"person": _person("Tom", "B")})
+
+        result = adapter.apply_webhook_event(_event("person.updated", _person(updated_at="2026-10-19T09:00:00Z")))
+
+        assert result["applied"] is True
+        assert [r["id"] for r in adapter.index.lookup("person", "thomas braun")] == [PERSON_ID]
+        assert adapter.entity_cache.get("person", PERSON_ID) is None
+        assert adapter.index.high_water("person") == "2026-10-18T00:00:00Z"
+
+    def test_delete_removes_from_index(self, adapter):
+        """Test: company.deleted entfernt Firma + Firmennamen-Cache"""
+        adapter.index.upsert("company", {"id": COMPANY_ID, "name": "Voltage"})
+        adapter._remember_company(COMPANY_ID, "Voltage")
+
+        adapter.apply_webhook_event(_event("company.deleted", {"id": COMPANY_ID, "name": "Voltage"}))
+
+        assert adapter.index.get("company", COMPANY_ID) is None
+        assert COMPANY_ID not in adapter.company_names
+
+    def test_broken_event_triggers_resync(self, adapter):
+        """Test: Unbrauchbares Event -> Delta-Sync beim nächsten Zugriff"""
+        assert adapter.index.sync_mode("person") is None
+
+        result = adapter.apply_webhook_event(_event("person.updated", {}))
+
+        assert result == {"applied": False, "resync": True}
+        assert adapter.index.sync_mode("person") == "delta"
+
+    def test_webhooks_relax_polling(self, adapter):
+        """Test: Mit Webhook-Secret wird seltener gepollt (Sicherheitsnetz)"""
+        assert adapter.index.config.refresh_seconds == 900
+
+
+class TestEndpoint:
+    """Tests für POST /crm-events/twenty"""
+
+    def test_signature_required(self, adapter):
+        """Test: 401 ohne gültige Signatur, 200 + applied mit Signatur"""
+        from fastapi.testclient import TestClient
+        import server
+
+        body = json.dumps(_event("person.created", _person())).encode()
+        timestamp = str(int(time.time() * 1000))
+        client = TestClient(server.app)
+
+        with patch.dict(os.environ, {'TWENTY_WEBHOOK_SECRET': SECRET}), patch('tools.crm.adapter', adapter):
+            denied = client.post("/crm-events/twenty", content=body,
+                                 headers={"X-Twenty-Webhook-Timestamp": timestamp, "X-Twenty-Webhook-Signature": "00"})
+            accepted = client.post("/crm-events/twenty", content=body,
+                                   headers={"X-Twenty-Webhook-Timestamp": timestamp,
+                                            "X-Twenty-Webhook-Signature": sign(SECRET, timestamp, body)})
+
+        assert denied.status_code == 401
+        assert accepted.status_code == 200
+        assert accepted.json()["applied"] is True
+        assert adapter.index.get("person", PERSON_ID) is not None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
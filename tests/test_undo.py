@@ -1,264 +1,253 @@
 """
-Test: Undo-Funktionalität
-Kritisch für: Multi-User Safety, Redis-State, Business-Logic
+Test: Undo-Funktionalität (Undo-Stack im LangGraph State)
+Kritisch für: Multi-User Safety, Multi-Worker Betrieb, Business-Logic
 
 Tests:
-- save_undo_context() speichert korrekt
-- get_undo_context() liest korrekt
-- clear_undo_context() löscht korrekt
-- Multi-User Isolation (User A ≠ User B)
-- Overwrite bei neuer Aktion
-- TTL (1 Stunde) [Optional - dauert zu lange]
+- Tools legen Aktionen auf den übergebenen Undo-Stack
+- Multi-User Isolation (jeder Thread hat eigenen Stack)
+- Multi-Level Undo (steps=N) inkl. Batch-Delete
+- Undo von update_entity via gespeicherter previous_values
+- Fehlgeschlagene Undos bleiben auf dem Stack (nur die gescheiterten IDs)
+- Async-Undo großer Imports mit gedeckelter Parallelität
+- Reducer kappt den Stack auf UNDO_STACK_LIMIT, UndoDelta hängt an / entfernt
+- crm_node gibt nur ein Delta zurück: Import-Push während eines Turns bleibt erhalten
 """
 
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
 import sys
 import os
-from pathlib import Path
-from datetime import datetime
-import time
-
-# .env MUSS vor allen anderen Imports geladen werden!
-root_dir = Path(__file__).resolve().parent.parent
-env_path = root_dir / ".env"
-
-from dotenv import load_dotenv
-load_dotenv(dotenv_path=env_path)
-
-# Path Fix
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from utils.memory import save_undo_context, get_undo_context, clear_undo_context
-
-print("=" * 70)
-print("UNDO-FUNKTIONALITÄT TEST")
-print("=" * 70)
-print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-
-# Test Counter
-tests_passed = 0
-tests_total = 0
-
-# === TEST 1: Save & Retrieve ===
-tests_total += 1
-print(f"TEST 1: Save und Retrieve")
-print("-" * 70)
-
-try:
-    user_id = "test_undo_user_1"
-    
-    # Speichern
-    save_undo_context(user_id, "note", "abc-123-def-456")
-    print("✓ save_undo_context() ausgeführt")
-    
-    # Abrufen
-    typ, iid = get_undo_context(user_id)
-    print(f"✓ get_undo_context() -> type={typ}, id={iid}")
-    
-    # Assertions
-    assert typ == "note", f"Expected type='note', got '{typ}'"
-    assert iid == "abc-123-def-456", f"Expected id='abc-123...', got '{iid}'"
-    
-    print("✅ TEST 1 BESTANDEN: Save & Retrieve funktioniert\n")
-    tests_passed += 1
-    
-except AssertionError as e:
-    print(f"❌ TEST 1 FEHLGESCHLAGEN: {e}\n")
-except Exception as e:
-    print(f"❌ TEST 1 ERROR: {e}\n")
-
-
-# === TEST 2: Multi-User Isolation ===
-tests_total += 1
-print(f"TEST 2: Multi-User Isolation")
-print("-" * 70)
-
-try:
-    user_a = "test_user_alice"
-    user_b = "test_user_bob"
-    
-    # Alice erstellt Note
-    save_undo_context(user_a, "note", "alice-note-123")
-    print(f"✓ Alice saved: note → alice-note-123")
-    
-    # Bob erstellt Task
-    save_undo_context(user_b, "task", "bob-task-456")
-    print(f"✓ Bob saved: task → bob-task-456")
-    
-    # Alice holt ihre Undo (sollte ihre Note sein, nicht Bobs Task!)
-    typ_a, iid_a = get_undo_context(user_a)
-    print(f"✓ Alice retrieved: {typ_a} → {iid_a}")
-    
-    # Bob holt seinen Undo
-    typ_b, iid_b = get_undo_context(user_b)
-    print(f"✓ Bob retrieved: {typ_b} → {iid_b}")
-    
-    # Assertions
-    assert typ_a == "note", f"Alice: Expected 'note', got '{typ_a}'"
-    assert iid_a == "alice-note-123", f"Alice: Expected 'alice-note-123', got '{iid_a}'"
-    assert typ_b == "task", f"Bob: Expected 'task', got '{typ_b}'"
-    assert iid_b == "bob-task-456", f"Bob: Expected 'bob-task-456', got '{iid_b}'"
-    
-    print("✅ TEST 2 BESTANDEN: Multi-User Isolation funktioniert\n")
-    tests_passed += 1
-    
-except AssertionError as e:
-    print(f"❌ TEST 2 FEHLGESCHLAGEN: {e}\n")
-except Exception as e:
-    print(f"❌ TEST 2 ERROR: {e}\n")
-
-
-# === TEST 3: Clear Context ===
-tests_total += 1
-print(f"TEST 3: Clear Context")
-print("-" * 70)
-
-try:
-    user_id = "test_undo_user_clear"
-    
-    # Speichern
-    save_undo_context(user_id, "contact", "contact-789")
-    typ, iid = get_undo_context(user_id)
-    assert iid == "contact-789", "Speichern fehlgeschlagen"
-    print(f"✓ Saved: contact → contact-789")
-    
-    # Löschen
-    clear_undo_context(user_id)
-    print(f"✓ clear_undo_context() ausgeführt")
-    
-    # Prüfen (sollte jetzt None sein)
-    typ_after, iid_after = get_undo_context(user_id)
-    print(f"✓ Nach Clear: type={typ_after}, id={iid_after}")
-    
-    # Assertions
-    assert typ_after is None, f"Expected None, got '{typ_after}'"
-    assert iid_after is None, f"Expected None, got '{iid_after}'"
-    
-    print("✅ TEST 3 BESTANDEN: Clear funktioniert\n")
-    tests_passed += 1
-    
-except AssertionError as e:
-    print(f"❌ TEST 3 FEHLGESCHLAGEN: {e}\n")
-except Exception as e:
-    print(f"❌ TEST 3 ERROR: {e}\n")
-
-
-# === TEST 4: Overwrite bei neuer Aktion ===
-tests_total += 1
-print(f"TEST 4: Overwrite bei neuer Aktion")
-print("-" * 70)
-
-try:
-    user_id = "test_undo_user_overwrite"
-    
-    # Erste Aktion
-    save_undo_context(user_id, "note", "first-note-111")
-    typ1, iid1 = get_undo_context(user_id)
-    print(f"✓ Erste Aktion: {typ1} → {iid1}")
-    
-    # Zweite Aktion (sollte erste überschreiben)
-    save_undo_context(user_id, "task", "second-task-222")
-    typ2, iid2 = get_undo_context(user_id)
-    print(f"✓ Zweite Aktion: {typ2} → {iid2}")
-    
-    # Assertions
-    assert typ2 == "task", f"Expected 'task', got '{typ2}'"
-    assert iid2 == "second-task-222", f"Expected 'second-task-222', got '{iid2}'"
-    assert iid2 != iid1, "Zweite Aktion hat erste nicht überschrieben!"
-    
-    print("✅ TEST 4 BESTANDEN: Overwrite funktioniert\n")
-    tests_passed += 1
-    
-except AssertionError as e:
-    print(f"❌ TEST 4 FEHLGESCHLAGEN: {e}\n")
-except Exception as e:
-    print(f"❌ TEST 4 ERROR: {e}\n")
-
-
-# === TEST 5: Empty Context (kein Undo vorhanden) ===
-tests_total += 1
-print(f"TEST 5: Empty Context (kein Undo)")
-print("-" * 70)
-
-try:
-    user_id = "test_undo_never_used"
-    
-    # Abrufen ohne vorheriges Speichern
-    typ, iid = get_undo_context(user_id)
-    print(f"✓ get_undo_context() für neuen User: type={typ}, id={iid}")
-    
-    # Assertions
-    assert typ is None, f"Expected None, got '{typ}'"
-    assert iid is None, f"Expected None, got '{iid}'"
-    
-    print("✅ TEST 5 BESTANDEN: Empty Context gibt (None, None)\n")
-    tests_passed += 1
-    
-except AssertionError as e:
-    print(f"❌ TEST 5 FEHLGESCHLAGEN: {e}\n")
-except Exception as e:
-    print(f"❌ TEST 5 ERROR: {e}\n")
-
-
-# === TEST 6: Verschiedene Item-Types ===
-tests_total += 1
-print(f"TEST 6: Verschiedene Item-Types")
-print("-" * 70)
-
-try:
-    user_id = "test_undo_types"
-    
-    # Teste alle Item-Types
-    item_types = [
-        ("note", "note-id-123"),
-        ("task", "task-id-456"),
-        ("contact", "contact-id-789"),
-        ("person", "person-id-abc")
-    ]
-    
-    for item_type, item_id in item_types:
-        save_undo_context(user_id, item_type, item_id)
-        typ, iid = get_undo_context(user_id)
-        
-        assert typ == item_type, f"Type mismatch for {item_type}"
-        assert iid == item_id, f"ID mismatch for {item_id}"
-        
-        print(f"✓ {item_type} → {item_id} korrekt")
-    
-    print("✅ TEST 6 BESTANDEN: Alle Item-Types funktionieren\n")
-    tests_passed += 1
-    
-except AssertionError as e:
-    print(f"❌ TEST 6 FEHLGESCHLAGEN: {e}\n")
-except Exception as e:
-    print(f"❌ TEST 6 ERROR: {e}\n")
-
-
-# === OPTIONAL TEST 7: TTL (1 Stunde) - SKIP (zu lange) ===
-print(f"TEST 7: TTL (1 Stunde) - SKIPPED")
-print("-" * 70)
-print("⏭️  TTL-Test übersprungen (dauert 1 Stunde)")
-print("💡 Manueller Test empfohlen: Warte 1h und prüfe ob Context weg ist\n")
-
-
-# === FINAL SUMMARY ===
-print("=" * 70)
-print("TEST SUMMARY")
-print("=" * 70)
-print(f"📊 Ergebnis: {tests_passed}/{tests_total} Tests bestanden")
-
-if tests_passed == tests_total:
-    print("✅ Alle Tests erfolgreich!")
-    print("✅ Undo-System ist production-ready")
-    print("✅ Multi-User Safety validiert")
-else:
-    print(f"⚠️  {tests_total - tests_passed} Test(s) fehlgeschlagen")
-    print("🔍 Prüfe die Fehler oben")
-
-print("\n💡 Hinweise:")
-print("   - TTL-Test (1h) kann nur manuell validiert werden")
-print("   - Redis muss laufen (Railway oder lokal)")
-print("=" * 70)
-
-# Exit Code für CI/CD
-sys.exit(0 if tests_passed == tests_total else 1)
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools.crm as crm_tools
+from graph.state import bounded_undo_stack, undo_delta, UNDO_STACK_LIMIT
+
+
+def _get_tool(tools, name):
+    return next(t for t in tools if t.name == name)
+
+
+@pytest.fixture
+def live_adapter():
+    """Mock-Adapter im 'Live-Modus' (Twenty-ähnliche IDs)"""
+    adapter = Mock(spec=["delete_item", "delete_items", "restore_entity"])
+    adapter.delete_item = Mock(return_value="✅ Aktion erfolgreich rückgängig gemacht.")
+    adapter.delete_items = Mock(return_value="✅ 2 Einträge erfolgreich rückgängig gemacht.")
+    adapter.restore_entity = Mock(return_value="✅ Update erfolgreich rückgängig gemacht.")
+
+    task_ids = iter(["aaaa-0001", "aaaa-0002", "aaaa-0003"])
+
+    def fake_task(title, body="", due_date=None, target_id=None):
+        return f"✅ Aufgabe '{title}' erstellt (ID: {next(task_ids)})."
+
+    def fake_update(target, entity_type, fields, undo_snapshot=None):
+        if undo_snapshot is not None:
+            undo_snapshot.update({
+                "entity_type": entity_type,
+                "entity_id": "bbbb-0001",
+                "previous_values": {"jobTitle": "Sales"},
+            })
+        return f"✅ {entity_type.title()} aktualisiert: job: CEO"
+
+    with patch.object(crm_tools, "adapter", adapter), \
+         patch.object(crm_tools, "create_task_func", fake_task), \
+         patch.object(crm_tools, "update_entity_func", fake_update):
+        yield adapter
+
+
+class TestUndoStack:
+    """Tests für den Undo-Stack der CRM-Tools"""
+
+    def test_create_pushes_to_stack(self, live_adapter):
+        """Test: create_task legt Aktion auf den Stack"""
+        stack = []
+        tools = crm_tools.get_crm_tools_for_user("telegram:1", undo_stack=stack)
+
+        _get_tool(tools, "create_task").func("Anrufen")
+
+        assert stack == [{"entity_type": "task", "entity_id": "aaaa-0001", "action": "create"}]
+
+    def test_multi_user_isolation(self, live_adapter):
+        """Test: Zwei Threads haben getrennte Stacks"""
+        alice, bob = [], []
+        alice_tools = crm_tools.get_crm_tools_for_user("telegram:alice", undo_stack=alice)
+        crm_tools.get_crm_tools_for_user("telegram:bob", undo_stack=bob)
+
+        _get_tool(alice_tools, "create_task").func("Alice Task")
+
+        assert len(alice) == 1
+        assert bob == []
+
+    def test_undo_single_action(self, live_adapter):
+        """Test: Undo löscht die zuletzt erstellte Aktion"""
+        stack = [{"entity_type": "task", "entity_id": "aaaa-0009", "action": "create"}]
+        tools = crm_tools.get_crm_tools_for_user("telegram:1", undo_stack=stack)
+
+        result = _get_tool(tools, "undo_last_action").func()
+
+        assert "✅" in result
+        live_adapter.delete_item.assert_called_once_with("task", "aaaa-0009")
+        assert stack == []
+
+    def test_undo_multiple_steps_uses_batch_delete(self, live_adapter):
+        """Test: steps=2 löscht beide Tasks in einem Batch"""
+        stack = []
+        tools = crm_tools.get_crm_tools_for_user("telegram:1", undo_stack=stack)
+        _get_tool(tools, "create_task").func("Task 1")
+        _get_tool(tools, "create_task").func("Task 2")
+
+        result = _get_tool(tools, "undo_last_action").func(steps=2)
+
+        live_adapter.delete_items.assert_called_once_with("task", ["aaaa-0002", "aaaa-0001"], failed=[])
+        live_adapter.delete_item.assert_not_called()
+        assert "2/2" in result
+        assert stack == []
+
+    def test_undo_update_restores_previous_values(self, live_adapter):
+        """Test: Undo nach update_entity stellt alte Werte ohne Lookup wieder her"""
+        stack = []
+        tools = crm_tools.get_crm_tools_for_user("telegram:1", undo_stack=stack)
+
+        _get_tool(tools, "update_entity").func("Thomas Braun", "person", '{"job": "CEO"}')
+        assert stack[-1]["action"] == "update"
+
+        _get_tool(tools, "undo_last_action").func()
+
+        live_adapter.restore_entity.assert_called_once_with("person", "bbbb-0001", {"jobTitle": "Sales"})
+        assert stack == []
+
+    def test_failed_undo_stays_on_stack(self, live_adapter):
+        """Test: Bei Fehler bleibt die Aktion für einen neuen Versuch erhalten"""
+        live_adapter.delete_item.return_value = "❌ Fehler beim Löschen: 500"
+        action = {"entity_type": "note", "entity_id": "cccc-0001", "action": "create"}
+        stack = [action]
+        tools = crm_tools.get_crm_tools_for_user("telegram:1", undo_stack=stack)
+
+        result = _get_tool(tools, "undo_last_action").func()
+
+        assert "❌" in result
+        assert stack == [action]
+
+    def test_partial_failure_keeps_only_failed_ids(self, live_adapter):
+        """Test: 1 von 3 Deletes scheitert -> nur diese ID bleibt auf dem Stack"""
+        live_adapter.delete_items = Mock(side_effect=lambda t, ids, failed: failed.append("p-2") or "❌ Fehler")
+        stack = [{"entity_type": "person", "entity_id": "p-1", "entity_ids": ["p-1", "p-2", "p-3"], "action": "create"}]
+        tools = crm_tools.get_crm_tools_for_user("telegram:1", undo_stack=stack)
+
+        _get_tool(tools, "undo_last_action").func()
+
+        assert stack == [{"entity_type": "person", "entity_id": "p-2", "action": "create"}]
+
+    def test_async_undo_caps_concurrency(self):
+        """Test: Async-Undo eines großen Imports -> max. CRM_UNDO_CONCURRENCY Deletes gleichzeitig"""
+        running, peak = 0, 0
+
+        async def adelete_item(entity_type, entity_id):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return "✅ Aktion erfolgreich rückgängig gemacht."
+
+        adapter = Mock(spec=["delete_item", "adelete_item"])
+        adapter.adelete_item = adelete_item
+        ids = [f"p-{i}" for i in range(50)]
+        stack = [{"entity_type": "person", "entity_id": ids[0], "entity_ids": ids, "action": "create"}]
+
+        with patch.object(crm_tools, "adapter", adapter), patch.dict(os.environ, {"CRM_UNDO_CONCURRENCY": "3"}):
+            tools = crm_tools.get_crm_tools_for_user("telegram:1", undo_stack=stack)
+            result = asyncio.run(_get_tool(tools, "undo_last_action").coroutine())
+
+        assert peak == 3
+        assert "50 Einträge gelöscht" in result and stack == []
+
+    def test_undo_empty_stack(self, live_adapter):
+        """Test: Leerer Stack -> freundliche Meldung"""
+        tools = crm_tools.get_crm_tools_for_user("telegram:1", undo_stack=[])
+
+        result = _get_tool(tools, "undo_last_action").func()
+
+        assert "Nichts zum Rückgängigmachen" in result
+        live_adapter.delete_item.assert_not_called()
+
+
+class TestUndoStackReducer:
+    """Tests für den State-Reducer"""
+
+    def test_reducer_caps_to_limit(self):
+        """Test: Nur die neuesten UNDO_STACK_LIMIT Aktionen bleiben"""
+        actions = [{"entity_type": "task", "entity_id": str(i), "action": "create"} for i in range(UNDO_STACK_LIMIT + 5)]
+
+        result = bounded_undo_stack([], actions)
+
+        assert len(result) == UNDO_STACK_LIMIT
+        assert result[-1]["entity_id"] == str(UNDO_STACK_LIMIT + 4)
+
+    def test_reducer_keeps_current_without_update(self):
+        """Test: Ohne Update bleibt der bestehende Stack erhalten"""
+        current = [{"entity_type": "note", "entity_id": "1", "action": "create"}]
+
+        assert bounded_undo_stack(current, None) == current
+
+    def test_reducer_push_appends(self):
+        """Test: {"push": [...]} hängt an statt zu ersetzen (Import im Hintergrund)"""
+        current = [{"entity_type": "task", "entity_id": str(i), "action": "create"} for i in range(UNDO_STACK_LIMIT)]
+        imported = {"entity_type": "person", "entity_id": "p-1", "entity_ids": ["p-1", "p-2"], "action": "create"}
+
+        result = bounded_undo_stack(current, {"push": [imported]})
+
+        assert len(result) == UNDO_STACK_LIMIT
+        assert result[-1] == imported and result[0]["entity_id"] == "1"
+
+    def test_reducer_pop_keeps_parallel_push(self):
+        """Test: Delta entfernt nur die verbrauchte Aktion, parallel angehängter Import bleibt"""
+        task = {"entity_type": "task", "entity_id": "t-1", "action": "create"}
+        imported = {"entity_type": "person", "entity_id": "p-1", "action": "create"}
+
+        result = bounded_undo_stack([task, imported], undo_delta([task], []))
+
+        assert result == [imported]
+
+
+class TestCrmNodeDelta:
+    """Tests für das Undo-Delta des CRM-Nodes (Import committet während eines Turns)"""
+
+    TASK = {"entity_type": "task", "entity_id": "t-1", "action": "create"}
+    IMPORTED = {"entity_type": "person", "entity_id": "p-1", "entity_ids": ["p-1", "p-2"], "action": "create"}
+
+    def _run_turn(self, stored, tool_name, **tool_kwargs):
+        """crm_node mit Fake-Agent: ruft ein Tool auf, währenddessen committet ein Import"""
+        from graph import nodes
+
+        def fake_react_agent(model, tools, prompt):
+            async def ainvoke(state):
+                _get_tool(tools, tool_name).func(**tool_kwargs)
+                stored[:] = bounded_undo_stack(stored, {"push": [self.IMPORTED]})
+                return {"messages": []}
+            return Mock(ainvoke=ainvoke)
+
+        state = {"user": {"name": "Test"}, "user_id": "telegram:1", "messages": [], "undo_stack": list(stored)}
+        with patch.object(nodes, "get_llm_from_config"), patch.object(nodes, "load_agent_config"), \
+                patch("langgraph.prebuilt.create_react_agent", fake_react_agent):
+            update = asyncio.run(nodes.crm_node(state))
+        return bounded_undo_stack(stored, update["undo_stack"])
+
+    def test_import_push_survives_create(self, live_adapter):
+        """Test: Turn legt Task an, Import committet dazwischen -> beide auf dem Stack"""
+        result = self._run_turn([self.TASK], "create_task", title="Anrufen")
+
+        assert result == [self.TASK, self.IMPORTED, {"entity_type": "task", "entity_id": "aaaa-0001", "action": "create"}]
+
+    def test_import_push_survives_undo(self, live_adapter):
+        """Test: Turn macht Task rückgängig, Import committet dazwischen -> Import bleibt undo-bar"""
+        result = self._run_turn([self.TASK], "undo_last_action")
+
+        live_adapter.delete_item.assert_called_once_with("task", "t-1")
+        assert result == [self.IMPORTED]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
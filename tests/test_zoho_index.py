@@ -0,0 +1,219 @@
+"""
+Test: Zoho Lead-Index (tools/crm/zoho_index.py)
+Kritisch für: Interaktive Suche in großen Zoho-Orgs (Bulk Read + If-Modified-Since)
+
+Tests:
+- Bulk-Ergebnis (ZIP mit CSV) -> kompakte Leads
+- Bulk Read Job: anlegen, Status abfragen, Ergebnis laden, Index ersetzen
+- Delta-Sync: If-Modified-Since mit High-Water-Mark, Leads/deleted, 304
+- Snapshot (Datei / Postgres via SQLite): Restart ohne Bulk Read
+- ZohoCRM: Suche/Resolve aus dem Index ohne Request, Fallback während Bootstrap,
+  Write-Through bei Create/Delete
+"""
+
+import io
+import pytest
+import zipfile
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.contact_index import ContactIndex, IndexConfig
+from tools.crm.zoho_index import (
+    ZohoLeadSync, FileIndexStore, PostgresIndexStore, compact_lead, lead_keys, parse_bulk_result,
+)
+
+CSV = (
+    "Id,First_Name,Last_Name,Email,Company,Phone,Mobile,Designation,Modified_Time\n"
+    "3652397000000624001,Anna,Schmidt,anna@example.com,Sonnenstrom,,,,2026-10-01T10:00:00+02:00\n"
+    "3652397000000624002,Thomas,Braun,tb@voltage.de,Voltage,+49 30 1,,CEO,2026-10-02T10:00:00+02:00\n"
+)
+
+
+def _zip(content: str) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("111.csv", content)
+    return buffer.getvalue()
+
+
+def _index():
+    return ContactIndex({"lead": lead_keys}, config=IndexConfig(), name="Zoho")
+
+
+def _bulk_routes(states=("IN PROGRESS", "COMPLETED")):
+    states = list(states)
+
+    def request(method, endpoint, params=None, data=None, headers=None, api="crm/v8"):
+        if method == "POST" and endpoint == "read":
+            return {"data": [{"code": "SUCCESS", "details": {"id": "111"}}]}
+        if endpoint == "read/111":
+            state = states.pop(0)
+            return {"data": [{"state": state, "result": {"download_url": "/crm/bulk/v8/read/111/result",
+                                                         "more_records": False}}]}
+        return {}
+    return Mock(side_effect=request)
+
+
+def _sync(request, index=None, store=None, download=None):
+    return ZohoLeadSync(request, download or Mock(return_value=_zip(CSV)), index or _index(), key="zoho:test:lead",
+                        store=store, poll_seconds=0, timeout_seconds=5)
+
+
+class TestBulkRead:
+    """Tests für Bootstrap per Bulk Read"""
+
+    def test_parse_zip_csv(self):
+        """Test: Spalte Id + Modified_Time -> id + updatedAt, leere Felder -> None"""
+        leads = parse_bulk_result(_zip(CSV))
+
+        assert [lead["id"] for lead in leads] == ["3652397000000624001", "3652397000000624002"]
+        assert leads[0]["Phone"] is None
+        assert leads[1]["updatedAt"] == "2026-10-02T10:00:00+02:00"
+
+    def test_bulk_job_loads_index(self):
+        """Test: Job anlegen -> pollen bis COMPLETED -> ZIP laden -> Index bereit"""
+        request = _bulk_routes()
+        download = Mock(return_value=_zip(CSV))
+        sync = _sync(request, download=download)
+
+        assert sync.run_bulk() is True
+
+        assert sync.index.is_ready("lead")
+        assert sync.index.lookup("lead", "thomas braun")[0]["id"] == "3652397000000624002"
+        assert sync.index.high_water("lead") == "2026-10-02T10:00:00+02:00"
+        download.assert_called_once_with("/crm/bulk/v8/read/111/result")
+        assert request.call_args_list[0].kwargs["api"] == "crm/bulk/v8"
+
+    def test_failed_job_keeps_fallback(self):
+        """Test: Job FAILURE -> Index bleibt leer, Retry erst nach Backoff"""
+        sync = _sync(_bulk_routes(states=("FAILURE",)))
+
+        assert sync.run_bulk() is False
+        assert not sync.index.is_ready("lead")
+        assert sync.get_metrics()["bulk_failures"] == 1
+        assert sync._retry_at > 0
+
+
+class TestDelta:
+    """Tests für den If-Modified-Since Delta-Sync"""
+
+    def test_modified_and_deleted(self):
+        """Test: Geänderte Leads per If-Modified-Since, Löschungen per Leads/deleted"""
+        sync = _sync(_bulk_routes())
+        sync.run_bulk()
+
+        changed = {"id": "3652397000000624001", "First_Name": "Anna", "Last_Name": "Schmidt-Meyer",
+                   "Email": "anna@example.com", "Modified_Time": "2026-10-03T09:00:00+02:00"}
+
+        def delta(method, endpoint, params=None, data=None, headers=None, api="crm/v8"):
+            if endpoint == "Leads":
+                return {"data": [changed], "info": {"more_records": False}}
+            if endpoint == "Leads/deleted":
+                return {"data": [{"id": "3652397000000624002", "deleted_time": "2026-10-03T09:01:00+02:00"}]}
+
+        sync.request = Mock(side_effect=delta)
+        assert sync.sync_delta() is True
+
+        first, second = sync.request.call_args_list
+        assert first.kwargs["headers"] == {"If-Modified-Since": "2026-10-02T10:00:00+02:00"}
+        assert second.args[1] == "Leads/deleted" and "If-Modified-Since" in second.kwargs["headers"]
+        assert sync.index.lookup("lead", "anna schmidt-meyer")
+        assert sync.index.get("lead", "3652397000000624002") is None
+        assert sync.index.high_water("lead") == "2026-10-03T09:00:00+02:00"
+
+    def test_not_modified(self):
+        """Test: 304 (Adapter liefert {}) -> Index unverändert"""
+        sync = _sync(_bulk_routes())
+        sync.run_bulk()
+        sync.request = Mock(return_value={})
+
+        assert sync.sync_delta() is True
+        assert len(sync.index.records("lead")) == 2
+
+
+class TestSnapshot:
+    """Tests für die Persistenz (schneller Restart)"""
+
+    def test_file_restart_without_bulk(self, tmp_path):
+        """Test: Zweiter Prozess lädt den Snapshot und macht nur einen Delta-Sync"""
+        store = FileIndexStore(str(tmp_path / "index.json"))
+        _sync(_bulk_routes(), store=store).run_bulk()
+
+        request = Mock(return_value={})
+        restarted = _sync(request, store=store)
+
+        assert restarted.ensure_ready() is True
+        assert len(restarted.index.records("lead")) == 2
+        assert [c.args[1] for c in request.call_args_list] == ["Leads", "Leads/deleted"]
+
+    def test_postgres_store(self):
+        """Test: Snapshot-Roundtrip über die Tabelle crm_index_snapshots (SQLite statt Postgres)"""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from models.crm_index_snapshot import CrmIndexSnapshot
+
+        engine = create_engine("sqlite://")
+        CrmIndexSnapshot.__table__.create(engine)
+        store = PostgresIndexStore(session_factory=sessionmaker(bind=engine))
+
+        store.save("zoho:test:lead", {"records": [compact_lead({"id": "1", "Last_Name": "Braun"})]})
+
+        assert store.load("zoho:test:lead")["records"][0]["Last_Name"] == "Braun"
+        assert store.load("zoho:other:lead") is None
+
+
+class TestZohoAdapter:
+    """Tests für Suche/Resolve über den Index im Zoho Adapter"""
+
+    @pytest.fixture
+    def zoho(self):
+        env = {'ZOHO_CLIENT_ID': 'a', 'ZOHO_CLIENT_SECRET': 'b', 'ZOHO_REFRESH_TOKEN': 'c',
+               'ZOHO_INDEX_ENABLED': 'true', 'ZOHO_RESOLVE_MEMO_ENABLED': 'false', 'ZOHO_SEARCH_MODULES': 'lead'}
+        with patch.dict(os.environ, env), \
+                patch('tools.crm.zoho_adapter.load_field_mapping', return_value=Mock()), \
+                patch('tools.crm.zoho_adapter.ZohoCRM._refresh_access_token'):
+            from tools.crm.zoho_adapter import ZohoCRM
+            return ZohoCRM()
+
+    def test_search_and_resolve_from_index(self, zoho):
+        """Test: Index bereit -> search_leads / Resolve ohne einen Request"""
+        zoho.lead_index.load_full("lead", parse_bulk_result(_zip(CSV)))
+
+        with patch.object(zoho, '_request') as mock_request:
+            result = zoho.search_leads("Tomas Braun")
+            assert zoho._resolve_target_id("anna@example.com") == "3652397000000624001"
+            assert zoho._resolve_target_id("Thomas Brown") == "3652397000000624002"
+
+        assert "Thomas Braun (CEO) @ Voltage" in result
+        mock_request.assert_not_called()
+
+    def test_bootstrap_falls_back_to_prefilter(self, zoho):
+        """Test: Bulk Read läuft noch -> Suche wie bisher über COQL"""
+        with patch.object(zoho.lead_sync, '_start_bulk') as start_bulk, \
+                patch.object(zoho, '_request', return_value={"data": [{"id": "1", "First_Name": "Anna", "Last_Name": "Schmidt"}]}) as mock_request:
+            result = zoho.search_leads("Anna Schmidt")
+
+        start_bulk.assert_called_once()
+        assert mock_request.call_args.args[:2] == ("POST", "coql")
+        assert "(ID: 1)" in result
+
+    def test_write_through(self, zoho):
+        """Test: Eigene Creates/Deletes landen sofort im Index"""
+        zoho.lead_index.load_full("lead", [])
+        created = {"data": [{"code": "SUCCESS", "details": {"id": "3652397000000624009"}}]}
+
+        with patch.object(zoho, '_request', return_value=created):
+            zoho.create_contact("Lena", "Vogel", "Windkraft AG", "lena@windkraft.de")
+        assert zoho.lead_index.lookup("lead", "lena@windkraft.de")[0]["Company"] == "Windkraft AG"
+
+        with patch('tools.crm.zoho_adapter.requests.delete', return_value=Mock(status_code=200, text="{}")):
+            zoho.access_token, zoho.token_expires_at = "token", 9e9
+            zoho.delete_item("lead", "3652397000000624009")
+        assert zoho.lead_index.get("lead", "3652397000000624009") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,269 @@
+"""
+Test: Zoho Suche über Leads, Kontakte, Firmen und Deals (ZohoCRM.search_leads, Resolve, Verknüpfung)
+Kritisch für: Konvertierte Leads (leben als Kontakt weiter) -> keine Duplikate durch "nicht gefunden"
+
+Tests:
+- COQL pro Modul: eigene Felder/Spalten, Token-Limit pro Modul
+- search_leads: Ein COQL-Request pro Modul, parallel (~ ein Round Trip)
+- Merge: gemeinsames Ranking, konvertierter Lead (E-Mail eines Kontakts) nur als Kontakt
+- E-Mail-Suche nur in Leads/Kontakten, Fehler eines Moduls kostet nur dessen Treffer
+- Rate-Limit-User (ContextVar) gilt auch in den Such-Threads
+- Task/Notiz: Fallback auf Kontakt (Who_Id) bzw. Firma (What_Id + $se_module), IDs aus Suchergebnissen
+- update_entity / restore_entity für Kontakte (Field Mapping zoho.yaml), Undo-Delete pro Modul
+- Batch-Delete: nur gelöschte IDs verlassen Cache/Index
+- ZOHO_SEARCH_MODULES
+"""
+
+import pytest
+import threading
+import time
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.zoho_adapter import SEARCH_MODULES, _coql_query
+from tools.crm.rate_limit import set_rate_limit_user, reset_rate_limit_user
+
+LEAD = {"id": "3652397000000624001", "First_Name": "Anna", "Last_Name": "Schmidt",
+        "Email": "anna@example.com", "Company": "Sonnenstrom"}
+CONTACT = {"id": "3652397000000700001", "First_Name": "Thomas", "Last_Name": "Braun", "Email": "tb@voltage.de",
+           "Account_Name": {"name": "Voltage GmbH", "id": "3652397000000800001"}, "Title": "CEO"}
+CONVERTED = {"id": "3652397000000624002", "First_Name": "Thomas", "Last_Name": "Braun",
+             "Email": "tb@voltage.de", "Company": "Voltage GmbH"}
+ACCOUNT = {"id": "3652397000000800001", "Account_Name": "Voltage GmbH", "Website": "voltage.de", "Industry": "Solar"}
+DEAL = {"id": "3652397000000900001", "Deal_Name": "Voltage Dachanlage", "Stage": "Qualification",
+        "Amount": 25000, "Account_Name": {"name": "Voltage GmbH", "id": "3652397000000800001"}}
+
+
+def _zoho(**env):
+    env = {'ZOHO_CLIENT_ID': 'a', 'ZOHO_CLIENT_SECRET': 'b', 'ZOHO_REFRESH_TOKEN': 'c',
+           'ZOHO_RESOLVE_MEMO_ENABLED': 'false', **env}
+    with patch.dict(os.environ, env), \
+            patch('tools.crm.zoho_adapter.ZohoCRM._refresh_access_token'):
+        from tools.crm.zoho_adapter import ZohoCRM
+        return ZohoCRM()
+
+
+def _module(endpoint, data=None):
+    """Modul eines Requests (COQL: aus dem select_query)"""
+    if endpoint == "coql":
+        return data["select_query"].split(" from ")[1].split(" ")[0]
+    return endpoint.split("/")[0]
+
+
+def _routes(records, delay=0.0):
+    """Fake-API: pro Modul feste Datensätze, Task/Note-Creates liefern SUCCESS"""
+    def request(method, endpoint, params=None, data=None, headers=None, api="crm/v8"):
+        time.sleep(delay)
+        if method == "POST" and endpoint in ("Tasks", "Notes"):
+            return {"data": [{"code": "SUCCESS", "details": {"id": "3652397000000999001"}}]}
+        return {"data": records.get(_module(endpoint, data), [])}
+    return Mock(side_effect=request)
+
+
+class TestCoqlPerModule:
+    """Tests für den COQL-Vorfilter pro Modul"""
+
+    def test_module_fields(self):
+        """Test: Kontakte/Firmen/Deals mit eigenen Feldern und Suchspalten"""
+        contacts = _coql_query(SEARCH_MODULES["contact"], "Thomas", 200)
+        accounts = _coql_query(SEARCH_MODULES["account"], "Voltage", 200)
+        deals = _coql_query(SEARCH_MODULES["deal"], "Dachanlage", 200)
+
+        assert "Account_Name, Phone, Mobile, Title from Contacts where" in contacts
+        assert "Company" not in contacts
+        assert accounts.startswith("select id, Account_Name, Website") and "Website like '%Voltage%'" in accounts
+        assert "from Deals where Deal_Name like '%Dachanlage%' limit 200" in deals
+
+    def test_token_limit_per_module(self):
+        """Test: Max. 25 Bedingungen - Deals (eine Spalte) erlauben mehr Tokens als Leads"""
+        query = " ".join(f"wort{i}" for i in range(30))
+
+        assert _coql_query(SEARCH_MODULES["deal"], query, 200).count(" like ") == 25
+        assert _coql_query(SEARCH_MODULES["lead"], query, 200).count(" like ") == 24
+
+
+class TestFanOut:
+    """Tests für die parallele Suche in search_leads"""
+
+    def test_one_request_per_module_in_parallel(self):
+        """Test: Vier COQL-Requests gleichzeitig - Dauer ~ ein Request"""
+        zoho = _zoho()
+        records = {"Leads": [CONVERTED], "Contacts": [CONTACT], "Accounts": [ACCOUNT], "Deals": [DEAL]}
+
+        with patch.object(zoho, '_request', _routes(records, delay=0.2)) as mock_request:
+            start = time.perf_counter()
+            zoho.search_leads("Voltage")
+            elapsed = time.perf_counter() - start
+
+        modules = sorted(_module(c.args[1], c.kwargs.get("data")) for c in mock_request.call_args_list)
+        assert modules == ["Accounts", "Contacts", "Deals", "Leads"]
+        assert elapsed < 0.6
+
+    def test_merge_rank_and_dedupe(self):
+        """Test: Gemeinsames Ranking über Module (Gleichstand: Kontakt, Firma, Deal), konvertierter Lead nur als Kontakt"""
+        zoho = _zoho()
+        records = {"Leads": [CONVERTED, LEAD], "Contacts": [CONTACT], "Accounts": [ACCOUNT], "Deals": [DEAL]}
+
+        with patch.object(zoho, '_request', _routes(records)):
+            result = zoho.search_leads("Voltage GmbH")
+
+        lines = result.split("\n")
+        assert lines[0] == "✅ Gefundene Datensätze:"
+        assert lines[1].startswith("🧑 KONTAKT: Thomas Braun (CEO) @ Voltage GmbH <tb@voltage.de>")
+        assert lines[2].startswith("🏢 FIRMA: Voltage GmbH (Solar) 🌐 voltage.de")
+        assert lines[3].startswith("💰 DEAL: Voltage Dachanlage (Qualification) @ Voltage GmbH 💶 25000")
+        assert len(lines) == 4 and CONVERTED["id"] not in result
+
+    def test_email_only_in_person_modules(self):
+        """Test: E-Mail -> {Modul}/search?email= nur für Leads und Kontakte"""
+        zoho = _zoho()
+
+        with patch.object(zoho, '_request', _routes({"Contacts": [CONTACT]})) as mock_request:
+            result = zoho.search_leads("tb@voltage.de")
+
+        endpoints = sorted(c.args[1] for c in mock_request.call_args_list)
+        assert endpoints == ["Contacts/search", "Leads/search"]
+        assert CONTACT["id"] in result
+
+    def test_failing_module_keeps_other_hits(self):
+        """Test: Exception in einem Modul -> Treffer der anderen Module bleiben"""
+        zoho = _zoho()
+        routes = _routes({"Leads": [LEAD]})
+
+        def request(method, endpoint, params=None, data=None, **kwargs):
+            if _module(endpoint, data) == "Contacts":
+                raise RuntimeError("boom")
+            return routes(method, endpoint, params=params, data=data, **kwargs)
+
+        with patch.object(zoho, '_request', side_effect=request):
+            result = zoho.search_leads("Anna Schmidt")
+
+        assert LEAD["id"] in result
+
+    def test_rate_limit_user_in_threads(self):
+        """Test: Such-Threads laufen im Context des Aufrufers (faire Queue pro User)"""
+        from tools.crm.rate_limit import _current_user
+        zoho = _zoho()
+        users, threads = set(), set()
+
+        def request(method, endpoint, params=None, data=None, **kwargs):
+            users.add(_current_user.get())
+            threads.add(threading.current_thread().name)
+            return {"data": []}
+
+        token = set_rate_limit_user("user-42")
+        try:
+            with patch.object(zoho, '_request', side_effect=request):
+                zoho.search_leads("Nobody Special")
+        finally:
+            reset_rate_limit_user(token)
+
+        assert users == {"user-42"}
+        assert all(name.startswith("zoho-search") for name in threads)
+
+
+class TestLinking:
+    """Tests für Task/Notiz-Verknüpfung mit Kontakten, Firmen und Deals"""
+
+    def test_task_falls_back_to_contact(self):
+        """Test: Kein Lead -> Kontakt, Verknüpfung über Who_Id"""
+        zoho = _zoho(ZOHO_PREFILTER_ENABLED="true", ZOHO_SCAN_MAX_PAGES="1")
+
+        with patch.object(zoho, '_request', _routes({"Contacts": [CONTACT]})) as mock_request:
+            result = zoho.create_task("Rückruf", target_id="Thomas Braun")
+
+        payload = next(c.kwargs["data"] for c in mock_request.call_args_list if c.args[1] == "Tasks")["data"][0]
+        assert payload["Who_Id"] == CONTACT["id"] and "What_Id" not in payload
+        assert "Verknüpft mit Kontakt" in result
+
+    def test_task_links_account(self):
+        """Test: Firma -> What_Id + $se_module Accounts"""
+        zoho = _zoho(ZOHO_SCAN_MAX_PAGES="1")
+
+        with patch.object(zoho, '_request', _routes({"Accounts": [ACCOUNT]})) as mock_request:
+            zoho.create_task("Angebot", target_id="Voltage GmbH")
+
+        payload = next(c.kwargs["data"] for c in mock_request.call_args_list if c.args[1] == "Tasks")["data"][0]
+        assert (payload["What_Id"], payload["$se_module"]) == (ACCOUNT["id"], "Accounts")
+
+    def test_note_with_id_from_search(self):
+        """Test: ID aus dem Suchergebnis -> Notiz am richtigen Modul (kein Resolve)"""
+        zoho = _zoho()
+        with patch.object(zoho, '_request', _routes({"Deals": [DEAL]})):
+            zoho.search_leads("Dachanlage")
+
+        with patch.object(zoho, '_request', _routes({})) as mock_request:
+            zoho.create_note("Status", "Angebot raus", DEAL["id"])
+
+        assert mock_request.call_count == 1
+        parent = mock_request.call_args.kwargs["data"]["data"][0]["Parent_Id"]
+        assert parent == {"module": {"api_name": "Deals"}, "id": DEAL["id"]}
+
+
+class TestUpdateContact:
+    """Tests für update_entity / restore_entity mit entity_type contact"""
+
+    def test_update_and_restore_contact(self):
+        """Test: job -> Title im Modul Contacts, Undo stellt im selben Modul wieder her"""
+        zoho = _zoho()
+        success = {"data": [{"code": "SUCCESS", "details": {"id": CONTACT["id"]}}]}
+        snapshot = {}
+
+        with patch.object(zoho, '_request', side_effect=[{"data": [{"Title": "CTO"}]}, success]) as mock_request:
+            result = zoho.update_entity(CONTACT["id"], "contact", {"job": "CEO"}, undo_snapshot=snapshot)
+
+        assert result.startswith("✅ Kontakt aktualisiert")
+        assert mock_request.call_args.args[:2] == ("PUT", f"Contacts/{CONTACT['id']}")
+        assert mock_request.call_args.kwargs["data"] == {"data": [{"Title": "CEO"}]}
+        assert snapshot == {"entity_type": "contact", "entity_id": CONTACT["id"], "previous_values": {"Title": "CTO"}}
+
+        with patch.object(zoho, '_request', return_value=success) as mock_request:
+            zoho.restore_entity(snapshot["entity_type"], snapshot["entity_id"], snapshot["previous_values"])
+        assert mock_request.call_args.args[:2] == ("PUT", f"Contacts/{CONTACT['id']}")
+
+    def test_delete_per_module(self):
+        """Test: Undo-Delete trifft das richtige Modul (Kontakt/Firma/Deal), Batch per ids="""
+        zoho = _zoho()
+        zoho.access_token, zoho.token_expires_at = "token", 9e9
+
+        for entity, module, record in [("contact", "Contacts", CONTACT), ("account", "Accounts", ACCOUNT), ("deal", "Deals", DEAL)]:
+            with patch('tools.crm.zoho_adapter.requests.delete', return_value=Mock(status_code=200, text="{}")) as delete:
+                assert zoho.delete_item(entity, record["id"]).startswith("✅")
+            assert delete.call_args.args[0].endswith(f"/crm/v8/{module}/{record['id']}")
+
+        deleted = {"data": [{"code": "SUCCESS", "details": {"id": CONTACT["id"]}}]}
+        with patch.object(zoho, '_request', return_value=deleted) as mock_request:
+            assert zoho.delete_items("contact", [CONTACT["id"]]).startswith("✅ 1 Einträge")
+        assert mock_request.call_args.args[:2] == ("DELETE", "Contacts")
+
+    def test_partial_batch_delete_keeps_failed_cached(self):
+        """Test: Teilweise fehlgeschlagener Batch -> nur gelöschte IDs aus Cache/Index entfernt"""
+        zoho = _zoho()
+        response = {"data": [{"code": "SUCCESS", "details": {"id": "1"}},
+                             {"code": "INVALID_DATA", "details": {"id": "2"}},
+                             {"code": "RECORD_LOCKED", "details": {"id": "3"}}]}
+        failed = []
+
+        with patch.object(zoho, '_request', return_value=response), \
+                patch.object(zoho, '_forget_deleted') as forget:
+            result = zoho.delete_items("lead", ["1", "2", "3"], failed=failed)
+
+        assert [c.args for c in forget.call_args_list] == [("lead", "1"), ("lead", "2")]
+        assert failed == ["3"] and result.startswith("❌")
+
+        with patch.object(zoho, '_request', return_value=None), \
+                patch.object(zoho, '_forget_deleted') as forget:
+            zoho.delete_items("lead", ["4"])
+        forget.assert_not_called()
+
+    def test_search_modules_env(self):
+        """Test: ZOHO_SEARCH_MODULES - unbekannte Module ignoriert, leer -> nur Leads"""
+        assert [s.entity for s in _zoho(ZOHO_SEARCH_MODULES="deal, lead, foo").search_modules] == ["lead", "deal"]
+        assert [s.entity for s in _zoho(ZOHO_SEARCH_MODULES="foo").search_modules] == ["lead"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
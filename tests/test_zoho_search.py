@@ -0,0 +1,131 @@
+"""
+Test: Zoho Suche via Search API / COQL (ZohoCRM.search_leads, _resolve_target_id)
+Kritisch für: Vollständige Treffer unabhängig von der Lead-Anzahl (nicht nur die ersten 100/200)
+
+Tests:
+- COQL-Query: Tokens, Klammerung, Escaping, Limit
+- search_leads: COQL-Vorfilter + lokales Ranking, kein Lead-Download
+- Resolve per E-Mail über Leads/search?email=, ohne Scan bei 204
+- COQL nicht verfügbar -> Leads/search?word=
+- Vorfilter ohne Treffer (Tippfehler) -> Seiten-Scan, Abbruch bei exaktem Treffer
+- Vorfilter deaktiviert -> Seiten-Scan über alle Seiten
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.zoho_adapter import SEARCH_MODULES, _coql_query, _query_tokens
+
+ANNA = {"id": "3652397000000624001", "First_Name": "Anna", "Last_Name": "Schmidt",
+        "Email": "anna@example.com", "Company": "Sonnenstrom"}
+THOMAS = {"id": "3652397000000624002", "First_Name": "Thomas", "Last_Name": "Braun",
+          "Email": "tb@voltage.de", "Company": "Voltage"}
+
+
+def _zoho(**env):
+    env = {'ZOHO_CLIENT_ID': 'a', 'ZOHO_CLIENT_SECRET': 'b', 'ZOHO_REFRESH_TOKEN': 'c',
+           'ZOHO_RESOLVE_MEMO_ENABLED': 'false', 'ZOHO_SEARCH_MODULES': 'lead', **env}
+    with patch.dict(os.environ, env), \
+            patch('tools.crm.zoho_adapter.load_field_mapping', return_value=Mock()), \
+            patch('tools.crm.zoho_adapter.ZohoCRM._refresh_access_token'):
+        from tools.crm.zoho_adapter import ZohoCRM
+        return ZohoCRM()
+
+
+def _calls(mock_request):
+    return [(c.args[0], c.args[1]) for c in mock_request.call_args_list]
+
+
+class TestCoqlQuery:
+    """Tests für den COQL-Vorfilter"""
+
+    def test_nested_or_and_limit(self):
+        """Test: Jede weitere Bedingung wird geklammert, Limit am Ende"""
+        query = _coql_query(SEARCH_MODULES["lead"], "Thomas Braun", 200)
+
+        assert query.startswith("select id, First_Name, Last_Name, Email, Company")
+        assert "from Leads where ((((" in query
+        assert "First_Name like '%Thomas%'" in query and "Company like '%Braun%'" in query
+        assert query.endswith(") limit 200")
+
+    def test_escaping(self):
+        """Test: Quotes/Wildcards werden entfernt, zu kurze Tokens ignoriert"""
+        assert _query_tokens("O'Brien 100% a") == ["OBrien", "100"]
+        assert _coql_query(SEARCH_MODULES["lead"], "' %", 200) is None
+
+
+class TestSearchLeads:
+    """Tests für search_leads mit Vorfilter"""
+
+    def test_coql_prefilter(self):
+        """Test: Ein COQL-Request, Ranking lokal, kein Lead-Download"""
+        zoho = _zoho()
+        with patch.object(zoho, '_request', return_value={"data": [THOMAS, ANNA]}) as mock_request:
+            result = zoho.search_leads("Thomas Braun")
+
+        assert _calls(mock_request) == [("POST", "coql")]
+        assert "select_query" in mock_request.call_args.kwargs["data"]
+        assert "Thomas Braun" in result and "Anna" not in result
+
+    def test_word_search_without_coql(self):
+        """Test: COQL-Fehler (z.B. fehlender Scope) -> Leads/search?word="""
+        zoho = _zoho()
+
+        def routes(method, endpoint, params=None, data=None):
+            return None if endpoint == "coql" else {"data": [ANNA]}
+
+        with patch.object(zoho, '_request', side_effect=routes) as mock_request:
+            result = zoho.search_leads("Anna Schmidt")
+
+        assert _calls(mock_request) == [("POST", "coql"), ("GET", "Leads/search")]
+        assert mock_request.call_args.kwargs["params"]["word"] == "Anna Schmidt"
+        assert ANNA["id"] in result
+
+
+class TestResolve:
+    """Tests für _resolve_target_id mit Vorfilter"""
+
+    def test_email_exact_search(self):
+        """Test: E-Mail -> Leads/search?email=, bei 204 kein Scan"""
+        zoho = _zoho()
+        with patch.object(zoho, '_request', return_value={"data": [ANNA]}) as mock_request:
+            assert zoho._resolve_target_id("anna@example.com") == ANNA["id"]
+        assert mock_request.call_args.kwargs["params"]["email"] == "anna@example.com"
+
+        with patch.object(zoho, '_request', return_value={}) as mock_request:
+            assert zoho._resolve_target_id("nobody@example.com") is None
+        assert _calls(mock_request) == [("GET", "Leads/search")]
+
+    def test_typo_falls_back_to_scan(self):
+        """Test: Vorfilter leer (Tippfehler) -> Seiten-Scan bis zum Treffer"""
+        zoho = _zoho()
+        pages = {1: {"data": [ANNA], "info": {"more_records": True}},
+                 2: {"data": [THOMAS], "info": {"more_records": True}},
+                 3: {"data": [ANNA], "info": {"more_records": False}}}
+
+        def routes(method, endpoint, params=None, data=None):
+            return {} if endpoint == "coql" else pages[params["page"]]
+
+        with patch.object(zoho, '_request', side_effect=routes) as mock_request:
+            assert zoho._resolve_target_id("Tomas Braun") == THOMAS["id"]
+
+        assert _calls(mock_request) == [("POST", "coql"), ("GET", "Leads"), ("GET", "Leads"), ("GET", "Leads")]
+
+    def test_prefilter_disabled_scans_all_pages(self):
+        """Test: ZOHO_PREFILTER_ENABLED=false -> Scan über alle Seiten (nicht nur 200 Leads)"""
+        zoho = _zoho(ZOHO_PREFILTER_ENABLED="false")
+        pages = [{"data": [ANNA], "info": {"more_records": True}},
+                 {"data": [THOMAS], "info": {"more_records": False}}]
+
+        with patch.object(zoho, '_request', side_effect=pages) as mock_request:
+            assert zoho._resolve_target_id("Thomas Braun") == THOMAS["id"]
+
+        assert [c.kwargs["params"]["page"] for c in mock_request.call_args_list] == [1, 2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
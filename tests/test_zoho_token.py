@@ -0,0 +1,193 @@
+"""
+Test: Zoho OAuth Token Manager (tools/crm/zoho_token.py)
+Kritisch für: Zoho-Refresh-Limit, keine Token-Refreshes im Request-Pfad
+
+Tests:
+- Single-Flight: Viele Threads mit abgelaufenem Token -> ein Refresh
+- 401 INVALID_TOKEN: Gleichzeitige Fehlschläge mit altem Token -> ein Refresh
+- Geteilter Store (SQLite statt Postgres): Zweiter Worker übernimmt den Token
+- Store-Fehler -> lokaler Refresh
+- Hintergrund-Refresh vor Ablauf
+- ZohoCRM: 401 INVALID_TOKEN wird genau einmal mit neuem Token wiederholt
+"""
+
+import pytest
+import threading
+import time
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.crm.zoho_token import ZohoTokenManager, TokenConfig, PostgresTokenStore
+
+
+def _counting_fetch(delay=0.0, expires_in=3600):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(delay)
+        return f"token-{len(calls)}", expires_in
+    return fetch, calls
+
+
+def _manager(fetch, **kwargs):
+    return ZohoTokenManager(fetch, key="zoho:test", config=TokenConfig(background_refresh=False), **kwargs)
+
+
+class TestSingleFlight:
+    """Tests für den Refresh innerhalb eines Prozesses"""
+
+    def test_concurrent_callers_share_refresh(self):
+        """Test: 10 Threads ohne Token -> ein Fetch, alle bekommen denselben Token"""
+        fetch, calls = _counting_fetch(delay=0.05)
+        manager = _manager(fetch)
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(manager.get_token())) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ["token-1"] * 10
+
+    def test_stale_token_refreshed_once(self):
+        """Test: Zwei 401 mit demselben alten Token -> nur ein neuer Token"""
+        fetch, calls = _counting_fetch()
+        manager = _manager(fetch)
+        stale = manager.get_token()
+
+        assert manager.refresh(stale_token=stale) == "token-2"
+        assert manager.refresh(stale_token=stale) == "token-2"
+        assert len(calls) == 2
+
+    def test_valid_token_without_fetch(self):
+        """Test: Gültiger Token -> kein Fetch im Request-Pfad"""
+        fetch, calls = _counting_fetch()
+        manager = _manager(fetch)
+        manager.get_token()
+        manager.get_token()
+
+        assert len(calls) == 1
+        assert manager.get_metrics()["refreshes"] == 1
+
+
+class TestSharedStore:
+    """Tests für den geteilten Token (Schema aus models.CrmOAuthToken, SQLite statt Postgres)"""
+
+    @pytest.fixture
+    def store(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from models.crm_oauth_token import CrmOAuthToken
+
+        engine = create_engine("sqlite://")
+        CrmOAuthToken.__table__.create(engine)
+        return PostgresTokenStore(session_factory=sessionmaker(bind=engine))
+
+    def test_second_worker_adopts_token(self, store):
+        """Test: Worker B (oder Restart) refresht nicht, sondern übernimmt den Token von Worker A"""
+        fetch, calls = _counting_fetch()
+        worker_a = _manager(fetch, store=store)
+        worker_b = _manager(fetch, store=store)
+
+        assert worker_a.get_token() == "token-1"
+        assert worker_b.get_token() == "token-1"
+        assert len(calls) == 1
+        assert worker_b.get_metrics()["adopted"] == 1
+
+    def test_rejected_shared_token_not_adopted(self, store):
+        """Test: Geteilter Token mit 401 -> neuer Token, auch für den anderen Worker"""
+        fetch, calls = _counting_fetch()
+        worker_a = _manager(fetch, store=store)
+        worker_b = _manager(fetch, store=store)
+        stale = worker_a.get_token()
+
+        assert worker_a.refresh(stale_token=stale) == "token-2"
+        assert worker_b.refresh(stale_token=stale) == "token-2"
+        assert len(calls) == 2
+
+    def test_store_errors_fall_back(self):
+        """Test: Kaputter Store -> lokaler Refresh statt Exception"""
+        fetch, calls = _counting_fetch()
+        broken = Mock(locked=Mock(side_effect=RuntimeError("db down")))
+        manager = _manager(fetch, store=broken)
+
+        assert manager.get_token() == "token-1"
+        assert len(calls) == 1
+
+
+class TestBackground:
+    """Tests für den proaktiven Refresh"""
+
+    def test_refreshes_before_expiry(self):
+        """Test: Token läuft in Kürze ab -> Hintergrund-Thread holt neuen"""
+        fetch, calls = _counting_fetch(expires_in=2)
+        manager = ZohoTokenManager(fetch, key="zoho:test", config=TokenConfig(refresh_margin_seconds=1.5))
+        try:
+            manager.get_token()
+            deadline = time.time() + 3
+            while len(calls) < 2 and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            manager.stop()
+
+        assert len(calls) >= 2
+
+    def test_from_env(self):
+        """Test: ENV-Konfiguration, unbekannter Store -> memory"""
+        env = {'ZOHO_TOKEN_REFRESH_MARGIN_SECONDS': '120', 'ZOHO_TOKEN_BACKGROUND_REFRESH': 'off',
+               'ZOHO_TOKEN_STORE': 'redis'}
+        with patch.dict(os.environ, env):
+            config = TokenConfig.from_env("ZOHO")
+
+        assert (config.refresh_margin_seconds, config.background_refresh, config.store) == (120.0, False, "memory")
+
+
+class TestZohoAdapter:
+    """Tests für den 401-Retry im Zoho Adapter"""
+
+    @pytest.fixture
+    def zoho(self):
+        env = {'ZOHO_CLIENT_ID': 'a', 'ZOHO_CLIENT_SECRET': 'b', 'ZOHO_REFRESH_TOKEN': 'c',
+               'ZOHO_TOKEN_BACKGROUND_REFRESH': 'false'}
+        with patch.dict(os.environ, env), \
+                patch('tools.crm.zoho_adapter.load_field_mapping', return_value=Mock()), \
+                patch('tools.crm.zoho_adapter.ZohoCRM._refresh_access_token'):
+            from tools.crm.zoho_adapter import ZohoCRM
+            zoho = ZohoCRM()
+        zoho.access_token, zoho.token_expires_at = "old", time.time() + 3600
+        return zoho
+
+    def test_invalid_token_retried_once(self, zoho):
+        """Test: 401 INVALID_TOKEN -> Refresh, Wiederholung mit neuem Token"""
+        rejected = Mock(status_code=401, json=Mock(return_value={"code": "INVALID_TOKEN"}))
+        ok = Mock(status_code=200, json=Mock(return_value={"data": [{"id": "1"}]}))
+
+        with patch('tools.crm.zoho_adapter.requests.request', side_effect=[rejected, ok]) as mock_request, \
+                patch.object(zoho, '_fetch_access_token', return_value=("new", 3600)) as mock_fetch:
+            assert zoho._request("GET", "Leads") == {"data": [{"id": "1"}]}
+
+        headers = [c.kwargs["headers"]["Authorization"] for c in mock_request.call_args_list]
+        assert headers == ["Zoho-oauthtoken old", "Zoho-oauthtoken new"]
+        mock_fetch.assert_called_once()
+
+    def test_other_401_not_retried(self, zoho):
+        """Test: 401 ohne INVALID_TOKEN (z.B. fehlender Scope) -> kein Refresh"""
+        rejected = Mock(status_code=401, json=Mock(return_value={"code": "OAUTH_SCOPE_MISMATCH"}))
+        rejected.raise_for_status.side_effect = Exception("401")
+
+        with patch('tools.crm.zoho_adapter.requests.request', return_value=rejected) as mock_request, \
+                patch.object(zoho, '_fetch_access_token') as mock_fetch:
+            assert zoho._request("GET", "Leads") is None
+
+        assert mock_request.call_count == 1
+        mock_fetch.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -5,7 +5,7 @@ Stellt Chat-Adapter für verschiedene Plattformen bereit (Telegram, Slack, Teams
 
 import os
 from typing import Optional
-from .interface import ChatAdapter, StandardMessage
+from .interface import ChatAdapter, StandardMessage, Attachment
 from .telegram_adapter import TelegramAdapter
 from .slack_adapter import SlackAdapter
 
@@ -98,6 +98,7 @@ __all__ = [
     # Interface
     "ChatAdapter",
     "StandardMessage",
+    "Attachment",
     
     # Adapters
     "TelegramAdapter",
@@ -5,11 +5,25 @@ Abstract Base Class für alle Chat-Plattformen (Telegram, Slack, Teams, etc.)
 Fully async interface for non-blocking HTTP operations.
 """
 
+import os
+import uuid
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 
 
+@dataclass
+class Attachment:
+    """
+    Datei-Anhang einer Nachricht (Dokument, kein Audio).
+    Wird erst bei Bedarf über ChatAdapter.download_attachment geladen.
+    """
+    file_id: str          # Telegram file_id bzw. Slack url_private_download
+    file_name: str        # Original-Dateiname: "messe_kontakte.csv"
+    mime_type: str        # "text/csv", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ...
+    size: int = 0         # Bytes laut Plattform (0 = unbekannt)
+
+
 @dataclass
 class StandardMessage:
     """
@@ -22,6 +36,7 @@ class StandardMessage:
     platform: str         # Platform identifier: "telegram", "slack", "teams"
     chat_id: str          # Platform-specific chat/channel ID (for sending replies)
     raw_data: Dict[str, Any]  # Original webhook data (for debugging)
+    attachment: Optional[Attachment] = None  # Dokument-Anhang (z.B. CSV/XLSX für den Import)
     
     def __repr__(self):
         return f"StandardMessage(platform={self.platform}, user={self.user_name}, text='{self.text[:50]}...')"
@@ -101,6 +116,23 @@ class ChatAdapter(ABC):
         """
         return text
     
+    async def download_attachment(self, attachment: Attachment, max_bytes: int) -> str:
+        """
+        Optional: Lädt einen Datei-Anhang gestreamt in eine Temp-Datei (async).
+        Default: Plattform unterstützt keine Anhänge.
+        
+        Args:
+            attachment: Anhang aus StandardMessage.attachment
+            max_bytes: Abbruch, sobald die Datei größer wird
+            
+        Returns:
+            Pfad der Temp-Datei (Aufrufer löscht sie)
+            
+        Raises:
+            ChatAdapterError: Download fehlgeschlagen oder Datei zu groß
+        """
+        raise ChatAdapterError(f"{self.get_platform_name()} unterstützt keine Datei-Anhänge")
+    
     def validate_webhook(self, webhook_data: dict) -> bool:
         """
         Optional: Validiert Webhook-Signatur/Authenticity.
@@ -131,3 +163,40 @@ class WebhookParseError(ChatAdapterError):
 class MessageSendError(ChatAdapterError):
     """Nachricht konnte nicht gesendet werden"""
     pass
+
+
+async def stream_to_temp_file(client, url: str, prefix: str, suffix: str, max_bytes: int, headers: dict = None) -> str:
+    """
+    Streamt einen Download in eine Temp-Datei (konstanter Speicher, Abbruch bei max_bytes).
+    
+    Args:
+        client: httpx.AsyncClient
+        url: Download-URL
+        prefix: Dateiname-Präfix in /tmp (z.B. "telegram_doc")
+        suffix: Endung inkl. Punkt (z.B. ".csv")
+        max_bytes: Maximale Dateigröße
+        headers: Optionale Header (z.B. Slack Bearer Token)
+        
+    Returns:
+        Pfad der Temp-Datei
+        
+    Raises:
+        ChatAdapterError: HTTP-Fehler oder Datei zu groß (Temp-Datei wird entfernt)
+    """
+    temp_path = f"/tmp/{prefix}_{uuid.uuid4().hex[:8]}{suffix}"
+    written = 0
+    try:
+        async with client.stream("GET", url, headers=headers) as response:
+            if response.status_code != 200:
+                raise ChatAdapterError(f"Download failed: {response.status_code}")
+            with open(temp_path, "wb") as f:
+                async for chunk in response.aiter_bytes():
+                    written += len(chunk)
+                    if written > max_bytes:
+                        raise ChatAdapterError(f"Datei zu groß (max. {max_bytes // (1024 * 1024)} MB)")
+                    f.write(chunk)
+        return temp_path
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
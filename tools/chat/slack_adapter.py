@@ -6,10 +6,14 @@ Fully async implementation using httpx for non-blocking HTTP calls.
 """
 
 import os
+import asyncio
 import uuid
 import httpx
 from typing import Optional, Dict, Any
-from .interface import ChatAdapter, StandardMessage, WebhookParseError, MessageSendError
+from .interface import (
+    ChatAdapter, StandardMessage, Attachment, ChatAdapterError, WebhookParseError, MessageSendError,
+    stream_to_temp_file,
+)
 
 
 class SlackAdapter(ChatAdapter):
@@ -20,16 +24,18 @@ class SlackAdapter(ChatAdapter):
     - Parse Slack Event zu StandardMessage
     - Send Messages via Slack Web API
     - Audio File Transcription
+    - Dokument-Anhänge (StandardMessage.attachment, Download via download_attachment)
     - Challenge-Handling (Webhook Verification)
     - Error-Handling
     
     Env Variables:
     - SLACK_BOT_TOKEN: Bot Token (xoxb-...)
     - SLACK_SIGNING_SECRET: Signing Secret (für Webhook-Validation)
+    - SLACK_API_URL: Optional, Default https://slack.com/api
     
     Setup:
     1. Erstelle Slack App: https://api.slack.com/apps
-    2. Bot Token Scopes: chat:write, channels:history, im:history
+    2. Bot Token Scopes: chat:write, channels:history, im:history, files:read
     3. Event Subscriptions: message.im, message.channels
     4. Install to Workspace
     """
@@ -42,7 +48,8 @@ class SlackAdapter(ChatAdapter):
         self.signing_secret = os.getenv("SLACK_SIGNING_SECRET", "").strip()
         # Signing Secret ist optional für Basic Setup
         
-        self.api_base = "https://slack.com/api"
+        # SLACK_API_URL: Override für lokale Stand-ins / Lasttests
+        self.api_base = os.getenv("SLACK_API_URL", "https://slack.com/api").strip().rstrip("/")
         print(f"✅ Slack Adapter initialized")
     
     async def parse_incoming(self, webhook_data: dict) -> StandardMessage:
@@ -102,8 +109,9 @@ class SlackAdapter(ChatAdapter):
             # Extract Channel Info (for replies)
             channel = event.get("channel")
             
-            # === TEXT OR AUDIO? ===
+            # === TEXT, AUDIO OR DOCUMENT? ===
             text = None
+            attachment = None
             
             # Check for Audio Files
             files = event.get("files", [])
@@ -115,6 +123,16 @@ class SlackAdapter(ChatAdapter):
                 if mimetype.startswith("audio/"):
                     print("🎤 Audio file detected (Slack)")
                     text = await self._handle_audio_file(first_file)
+                
+                # Sonstige Datei -> Anhang (Download erst bei Bedarf, z.B. Kontakt-Import)
+                elif first_file.get("url_private_download") or first_file.get("url_private"):
+                    attachment = Attachment(
+                        file_id=first_file.get("url_private_download") or first_file.get("url_private"),
+                        file_name=first_file.get("name", ""),
+                        mime_type=mimetype,
+                        size=first_file.get("size", 0),
+                    )
+                    print(f"📎 File detected (Slack): {attachment.file_name}")
             
             # Fallback to Text Message
             if not text:
@@ -126,7 +144,7 @@ class SlackAdapter(ChatAdapter):
                 raise WebhookParseError(f"Missing 'event.user' in Slack webhook (event_type: {event.get('type')}, subtype: {event.get('subtype', 'none')})")
             if not channel:
                 raise WebhookParseError("Missing 'event.channel' in Slack webhook")
-            if not text:
+            if not text and not attachment:
                 raise WebhookParseError("Missing 'event.text' or audio file in Slack webhook")
             
             # Get User Name via Slack API (async)
@@ -139,7 +157,8 @@ class SlackAdapter(ChatAdapter):
                 text=text,
                 platform="slack",
                 chat_id=channel,
-                raw_data=webhook_data
+                raw_data=webhook_data,
+                attachment=attachment
             )
             
         except WebhookParseError:
@@ -292,7 +311,8 @@ class SlackAdapter(ChatAdapter):
                     "Bitte schreibe eine Textnachricht."
                 )
             
-            result = await transcriber.transcribe(audio_path)
+            # transcribe() ist synchron (requests) -> nicht den Event Loop blockieren
+            result = await asyncio.to_thread(transcriber.transcribe, audio_path)
             print(f"✅ Transcription: '{result.text[:50]}...'")
             
             return result.text
@@ -362,6 +382,28 @@ class SlackAdapter(ChatAdapter):
         return temp_path
 
 
+    # === DOCUMENT HANDLING ===
+    
+    async def download_attachment(self, attachment: Attachment, max_bytes: int) -> str:
+        """
+        Lädt eine Slack-Datei gestreamt nach /tmp (async).
+        
+        url_private_download braucht den Bot Token (Scope files:read).
+        
+        Returns:
+            Pfad der Temp-Datei (Aufrufer löscht sie)
+        """
+        if attachment.size and attachment.size > max_bytes:
+            raise ChatAdapterError(f"Datei zu groß (max. {max_bytes // (1024 * 1024)} MB)")
+        
+        ext = os.path.splitext(attachment.file_name)[1].lower()
+        async with httpx.AsyncClient(timeout=60.0, follow_redirects=True) as client:
+            return await stream_to_temp_file(
+                client, attachment.file_id, prefix="slack_doc", suffix=ext, max_bytes=max_bytes,
+                headers={"Authorization": f"Bearer {self.bot_token}"}
+            )
+
+
 # === HELPER FUNCTIONS ===
 
 async def send_slack_message(channel_id: str, text: str) -> bool:
@@ -6,10 +6,14 @@ Fully async implementation using httpx for non-blocking HTTP calls.
 """
 
 import os
+import asyncio
 import uuid
 import httpx
 from typing import Optional
-from .interface import ChatAdapter, StandardMessage, WebhookParseError, MessageSendError
+from .interface import (
+    ChatAdapter, StandardMessage, Attachment, ChatAdapterError, WebhookParseError, MessageSendError,
+    stream_to_temp_file,
+)
 
 
 class TelegramAdapter(ChatAdapter):
@@ -20,10 +24,12 @@ class TelegramAdapter(ChatAdapter):
     - Parse Telegram Webhook zu StandardMessage
     - Send Messages via Telegram Bot API
     - Voice Message Transcription
+    - Dokument-Anhänge (StandardMessage.attachment, Download via download_attachment)
     - Error-Handling
     
     Env Variables:
     - TELEGRAM_BOT_TOKEN: Bot Token von @BotFather
+    - TELEGRAM_API_URL: Optional, Default https://api.telegram.org
     """
     
     def __init__(self):
@@ -31,7 +37,9 @@ class TelegramAdapter(ChatAdapter):
         if not self.bot_token:
             raise ValueError("❌ TELEGRAM_BOT_TOKEN not set in .env")
         
-        self.api_base = f"https://api.telegram.org/bot{self.bot_token}"
+        # TELEGRAM_API_URL: Override für lokale Bot-API-Server / Lasttests
+        self.api_url = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").strip().rstrip("/")
+        self.api_base = f"{self.api_url}/bot{self.bot_token}"
         print(f"✅ Telegram Adapter initialized")
     
     async def parse_incoming(self, webhook_data: dict) -> StandardMessage:
@@ -59,6 +67,21 @@ class TelegramAdapter(ChatAdapter):
                 }
             }
         }
+        
+        Telegram Webhook Format (Dokument, z.B. CSV/XLSX):
+        {
+            "message": {
+                "chat": {"id": 123456},
+                "from": {...},
+                "document": {
+                    "file_id": "BQACAgIAAxkBAAI...",
+                    "file_name": "messe_kontakte.csv",
+                    "mime_type": "text/csv",
+                    "file_size": 2048
+                },
+                "caption": "Kontakte von der Messe"
+            }
+        }
         """
         try:
             # Extract Message Object
@@ -84,23 +107,38 @@ class TelegramAdapter(ChatAdapter):
             if not chat_id:
                 raise WebhookParseError("Missing 'chat.id' in Telegram webhook")
             
-            # === TEXT OR VOICE? ===
+            # === TEXT, VOICE OR DOCUMENT? ===
             text = None
+            attachment = None
             
             # Check for Voice Message
             if "voice" in message_data:
                 print("🎤 Voice message detected (Telegram)")
                 text = await self._handle_voice_message(message_data["voice"])
             
+            # Document (Download erst bei Bedarf, z.B. Kontakt-Import)
+            elif "document" in message_data:
+                document = message_data["document"]
+                if not document.get("file_id"):
+                    raise WebhookParseError("Missing 'file_id' in document")
+                attachment = Attachment(
+                    file_id=document["file_id"],
+                    file_name=document.get("file_name", ""),
+                    mime_type=document.get("mime_type", ""),
+                    size=document.get("file_size", 0),
+                )
+                print(f"📎 Document detected (Telegram): {attachment.file_name}")
+                text = message_data.get("caption", "")
+            
             # Fallback to Text Message
             elif "text" in message_data:
                 text = message_data.get("text", "")
             
             # Neither text nor voice
             else:
-                raise WebhookParseError("Message has neither 'text' nor 'voice'")
+                raise WebhookParseError("Message has neither 'text' nor 'voice' nor 'document'")
             
-            if not text:
+            if not text and not attachment:
                 raise WebhookParseError("Empty message text (after transcription)")
             
             # Create StandardMessage
@@ -110,7 +148,8 @@ class TelegramAdapter(ChatAdapter):
                 text=text,
                 platform="telegram",
                 chat_id=str(chat_id),
-                raw_data=webhook_data
+                raw_data=webhook_data,
+                attachment=attachment
             )
             
         except WebhookParseError:
@@ -215,7 +254,8 @@ class TelegramAdapter(ChatAdapter):
                     "Bitte schreibe eine Textnachricht."
                 )
             
-            result = await transcriber.transcribe(audio_path)
+            # transcribe() ist synchron (requests) -> nicht den Event Loop blockieren
+            result = await asyncio.to_thread(transcriber.transcribe, audio_path)
             print(f"✅ Transcription: '{result.text[:50]}...'")
             
             return result.text
@@ -268,7 +308,7 @@ class TelegramAdapter(ChatAdapter):
             file_path = file_data["result"]["file_path"]
             
             # Step 2: Download file
-            download_url = f"https://api.telegram.org/file/bot{self.bot_token}/{file_path}"
+            download_url = f"{self.api_url}/file/bot{self.bot_token}/{file_path}"
             audio_response = await client.get(download_url)
             
             if audio_response.status_code != 200:
@@ -286,6 +326,35 @@ class TelegramAdapter(ChatAdapter):
         return temp_path
 
 
+    # === DOCUMENT HANDLING ===
+    
+    async def download_attachment(self, attachment: Attachment, max_bytes: int) -> str:
+        """
+        Lädt ein Telegram-Dokument gestreamt nach /tmp (async).
+        
+        Telegram Bot API: getFile → file_path → /file/bot{token}/{file_path}
+        (Bot API liefert max. 20 MB)
+        
+        Returns:
+            Pfad der Temp-Datei (Aufrufer löscht sie)
+        """
+        if attachment.size and attachment.size > max_bytes:
+            raise ChatAdapterError(f"Datei zu groß (max. {max_bytes // (1024 * 1024)} MB)")
+        
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            response = await client.get(f"{self.api_base}/getFile", params={"file_id": attachment.file_id})
+            file_data = response.json() if response.status_code == 200 else {}
+            if not file_data.get("ok"):
+                raise ChatAdapterError(f"getFile failed: {response.status_code} {response.text}")
+            
+            file_path = file_data["result"]["file_path"]
+            ext = os.path.splitext(attachment.file_name or file_path)[1].lower()
+            return await stream_to_temp_file(
+                client, f"{self.api_url}/file/bot{self.bot_token}/{file_path}",
+                prefix="telegram_doc", suffix=ext, max_bytes=max_bytes
+            )
+
+
 # === HELPER FUNCTIONS ===
 
 async def send_telegram_message(chat_id: str, text: str) -> bool:
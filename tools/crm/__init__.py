@@ -3,15 +3,26 @@ CRM Tools Factory
 Stellt dem Agenten Tools bereit, die wissen, wer der User ist (für Attribution).
 
 Undo-Context wird über LangGraph State gehandelt (nicht mehr Redis).
+
+Bietet der Adapter Async-Methoden (a<name>, z.B. TwentyCRM.asearch_contacts),
+bekommen die Tools zusätzlich eine coroutine= - der ReAct Agent läuft dann
+auf dem Event Loop statt im Thread-Pool.
+
+Hat der Adapter einen Circuit Breaker, antworten die Tools bei CRM-Ausfall
+sofort mit "CRM nicht erreichbar" statt auf Timeouts zu warten.
 """
 import os
 import re
 import json
+import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain.tools import StructuredTool
 from typing import Optional, Callable
 
+from .circuit_breaker import CircuitBreaker, guard, aguard
+from .bulk_contacts import parse_contacts
+
 # User Model für Attribution
 try:
     from models.user import User
@@ -31,10 +42,10 @@ crm_system = os.getenv("CRM_SYSTEM", "MOCK").upper().strip()
 def mock_create(first_name, last_name, company, email, phone=None): 
     return f"⚠️ Mock: Kontakt {first_name} {last_name} (ID: mock-{hash(email) % 10000})"
 
-def mock_task(title, body="", due_date=None, target_id=None): 
+def mock_task(title, body="", due_date=None, target_id=None, company_target=None): 
     return f"⚠️ Mock: Task '{title}' (ID: mock-task-1)"
 
-def mock_note(title, content, target_id): 
+def mock_note(title, content, target_id, company_target=None): 
     return f"⚠️ Mock: Note '{title}' (ID: mock-note-1)"
 
 def mock_search(query): 
@@ -51,6 +62,7 @@ create_note_func = mock_note
 update_entity_func = None
 get_details_func = None
 get_company_details_func = None
+bulk_create_func = None
 
 
 # === ADAPTER SELECTION ===
@@ -66,6 +78,7 @@ if crm_system == "TWENTY":
         update_entity_func = adapter.update_entity
         get_details_func = adapter.get_person_details
         get_company_details_func = adapter.get_company_details
+        bulk_create_func = adapter.bulk_create_contacts
         print("✅ Twenty Adapter connected")
     except Exception as e:
         print(f"❌ Twenty Adapter Error: {e}")
@@ -80,6 +93,7 @@ elif crm_system == "ZOHO":
         create_note_func = adapter.create_note
         update_entity_func = adapter.update_entity
         get_details_func = adapter.get_lead_details
+        bulk_create_func = adapter.bulk_create_contacts
         print("✅ Zoho Adapter connected")
     except Exception as e:
         print(f"❌ Zoho Adapter Error: {e}")
@@ -88,44 +102,166 @@ else:
     print(f"⚠️ CRM_SYSTEM={crm_system} - Using Mock Mode (set to TWENTY or ZOHO for live mode)")
 
 
-# === IN-MEMORY UNDO CONTEXT ===
-# Temporärer Speicher für Undo-Context (pro User-ID)
-# Wird nach jedem Turn durch LangGraph State persistiert
-_undo_context: dict[str, tuple[str, str]] = {}
+def _async_variant(func: Optional[Callable]) -> Optional[Callable]:
+    """Async-Gegenstück einer Adapter-Methode (search_contacts -> asearch_contacts), falls vorhanden"""
+    owner = getattr(func, "__self__", None)
+    if owner is None:
+        return None
+    return getattr(owner, f"a{func.__name__}", None)
+
+
+# === UNDO STACK ===
+# Der Stack selbst liegt im LangGraph State (AdizonState.undo_stack) und wird
+# per Checkpointer pro Thread persistiert. Die Tools arbeiten auf der Liste,
+# die der CRM-Node übergibt (neueste Aktion zuletzt).
+
+def _push_undo_action(undo_stack: list, action: dict):
+    """Legt eine CRM-Aktion auf den Undo-Stack"""
+    undo_stack.append(action)
+    print(f"💾 Undo action saved: {action['action']} {action['entity_type']} -> {_action_label(action)}")
 
 
-def _save_undo_context(user_id: str, entity_type: str, entity_id: str):
-    """Speichert Undo-Context im Memory (für aktuellen Turn)"""
-    _undo_context[user_id] = (entity_type, entity_id)
-    print(f"💾 Undo context saved: {entity_type} -> {entity_id}")
+def _action_ids(action: dict) -> list[str]:
+    """IDs einer Aktion (Bulk-Import: entity_ids, sonst entity_id)"""
+    return action.get("entity_ids") or [action["entity_id"]]
 
 
-def _get_undo_context(user_id: str) -> tuple[Optional[str], Optional[str]]:
-    """Liest Undo-Context aus Memory"""
-    if user_id in _undo_context:
-        return _undo_context[user_id]
-    return None, None
+def _action_label(action: dict) -> str:
+    ids = _action_ids(action)
+    return ids[0] if len(ids) == 1 else f"{len(ids)} Einträge"
+
+
+def _join_results(results: list[str]) -> str:
+    """Ergebnisse mehrerer Deletes einer Aktion (Fehler bleiben sichtbar)"""
+    if len(results) == 1:
+        return results[0]
+    failed = [res for res in results if "❌" in res]
+    if failed:
+        return f"❌ {len(failed)}/{len(results)} Löschungen fehlgeschlagen: {failed[0]}"
+    return f"✅ {len(results)} Einträge gelöscht."
+
+
+def _undo_concurrency() -> int:
+    """Max. parallele Deletes beim Async-Undo (Bulk-Import = tausende IDs)"""
+    try:
+        return max(1, int(os.getenv("CRM_UNDO_CONCURRENCY", "5")))
+    except ValueError:
+        return 5
+
+
+def _delete_outcome(action: dict, results: list[str]) -> tuple[dict, str, list[str]]:
+    """(action, Text, fehlgeschlagene IDs) aus den Einzel-Deletes einer Aktion"""
+    failed = [entity_id for entity_id, res in zip(_action_ids(action), results) if "❌" in res]
+    return action, _join_results(results), failed
+
+
+def _update_outcome(action: dict, res: str) -> tuple[dict, str, list[str]]:
+    return action, res, [action["entity_id"]] if "❌" in res else []
+
+
+def _revert_actions(actions: list[dict]) -> list[tuple[dict, str, list[str]]]:
+    """
+    Macht CRM-Aktionen rückgängig (neueste zuerst).
+    
+    - update: Stellt die gespeicherten previous_values wieder her
+    - create: Löscht den Eintrag (Batch-Delete pro Typ, falls der Adapter es kann)
+    
+    Bereits gelöschte Einträge zählen als Erfolg (Adapter melden sie ohne ❌).
+    
+    Returns:
+        Liste von (action, result_text, fehlgeschlagene IDs)
+    """
+    outcomes = []
+    
+    # 1. Updates zuerst (sind neuer als die Creates derselben Entity)
+    for action in actions:
+        if action.get("action") != "update":
+            continue
+        if hasattr(adapter, "restore_entity"):
+            res = adapter.restore_entity(
+                action["entity_type"], action["entity_id"], action.get("previous_values") or {}
+            )
+        else:
+            res = "❌ Update-Undo wird von diesem CRM nicht unterstützt."
+        outcomes.append(_update_outcome(action, res))
+    
+    # 2. Creates -> Löschen (gruppiert nach Typ für Batch-Delete)
+    creates_by_type: dict[str, list[dict]] = {}
+    for action in actions:
+        if action.get("action") == "create":
+            creates_by_type.setdefault(action["entity_type"], []).append(action)
+    
+    for entity_type, group in creates_by_type.items():
+        ids = [entity_id for a in group for entity_id in _action_ids(a)]
+        if len(ids) > 1 and hasattr(adapter, "delete_items"):
+            failed = []
+            res = adapter.delete_items(entity_type, ids, failed=failed)
+            failed = set(failed)
+            outcomes.extend((a, res, [i for i in _action_ids(a) if i in failed]) for a in group)
+        else:
+            for action in group:
+                results = [adapter.delete_item(entity_type, entity_id) for entity_id in _action_ids(action)]
+                outcomes.append(_delete_outcome(action, results))
+    
+    return outcomes
 
 
-def _clear_undo_context(user_id: str):
-    """Löscht Undo-Context"""
-    if user_id in _undo_context:
-        del _undo_context[user_id]
+async def _arevert_actions(actions: list[dict]) -> list[tuple[dict, str, list[str]]]:
+    """Async-Variante von _revert_actions (Fallback: Sync-Adapter im Thread)"""
+    if not asyncio.iscoroutinefunction(getattr(adapter, "adelete_item", None)):
+        return await asyncio.to_thread(_revert_actions, actions)
+    
+    outcomes = []
+    for action in actions:
+        if action.get("action") != "update":
+            continue
+        args = (action["entity_type"], action["entity_id"], action.get("previous_values") or {})
+        if hasattr(adapter, "arestore_entity"):
+            res = await adapter.arestore_entity(*args)
+        elif hasattr(adapter, "restore_entity"):
+            res = await asyncio.to_thread(adapter.restore_entity, *args)
+        else:
+            res = "❌ Update-Undo wird von diesem CRM nicht unterstützt."
+        outcomes.append(_update_outcome(action, res))
+    
+    # Deletes gedeckelt parallel (sonst tausende Requests auf einmal nach einem Import)
+    semaphore = asyncio.Semaphore(_undo_concurrency())
+    
+    async def delete(entity_type: str, entity_id: str) -> str:
+        async with semaphore:
+            return await adapter.adelete_item(entity_type, entity_id)
+    
+    creates = [a for a in actions if a.get("action") == "create"]
+    results = await asyncio.gather(*(
+        asyncio.gather(*(delete(a["entity_type"], entity_id) for entity_id in _action_ids(a)))
+        for a in creates
+    ))
+    outcomes.extend(_delete_outcome(a, list(res)) for a, res in zip(creates, results))
+    
+    return outcomes
 
 
 # === FACTORY ===
 
-def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
+def get_crm_tools_for_user(
+    user_id: str,
+    user: Optional[dict] = None,
+    undo_stack: Optional[list] = None
+) -> list:
     """
     Erstellt ein Tool-Set speziell für diesen User.
     
     Args:
         user_id: Platform-spezifische User-ID
         user: Optional User-Dict (von user.to_dict()) für CRM-Attribution
+        undo_stack: Undo-Stack aus dem LangGraph State (wird in-place verändert).
+                    Ohne Stack gilt Undo nur innerhalb dieses Tool-Sets.
         
     Returns:
         Liste von StructuredTools für den CRM Agent
     """
+    if undo_stack is None:
+        undo_stack = []
     
     # Attribution Suffix (wird an Notes/Tasks angehängt)
     attribution = ""
@@ -146,6 +282,12 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
         
         return None
 
+    def _after_create(res: str, entity_type: str) -> str:
+        """Legt erstellte Einträge auf den Undo-Stack"""
+        if entity_id := _extract_id(res):
+            _push_undo_action(undo_stack, {"entity_type": entity_type, "entity_id": entity_id, "action": "create"})
+        return res
+
     # === TOOL WRAPPERS ===
     
     def create_contact_wrapper(
@@ -153,7 +295,8 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
         last_name: str, 
         company: str, 
         email: str, 
-        phone: Optional[str] = None
+        phone: Optional[str] = None,
+        force: bool = False
     ) -> str:
         """
         Erstellt neuen Kontakt/Lead im CRM.
@@ -166,22 +309,82 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
         
         OPTIONAL:
         - phone: Telefonnummer
+        - force: True NUR wenn der User bestätigt hat, dass ein gemeldetes
+                 mögliches Duplikat eine andere Person ist
         
         WICHTIG: Frage den User IMMER nach allen Pflichtfeldern!
+        Meldet das Tool mögliche Duplikate, wurde NICHTS angelegt - erst nachfragen.
         """
-        res = create_contact_func(first_name, last_name, company, email, phone)
-        entity_type = "lead" if crm_system == "ZOHO" else "person"
+        res = create_contact_func(first_name, last_name, company, email, phone, **_force_kwargs(force))
+        return _after_create(res, "lead" if crm_system == "ZOHO" else "person")
+
+    async def acreate_contact_wrapper(
+        first_name: str, 
+        last_name: str, 
+        company: str, 
+        email: str, 
+        phone: Optional[str] = None,
+        force: bool = False
+    ) -> str:
+        res = await _async_variant(create_contact_func)(first_name, last_name, company, email, phone, **_force_kwargs(force))
+        return _after_create(res, "lead" if crm_system == "ZOHO" else "person")
+
+    def _force_kwargs(force: bool) -> dict:
+        """force nur weiterreichen, wenn gesetzt (Mock kennt den Parameter nicht)"""
+        return {"force": True} if force else {}
+
+    def bulk_create_contacts_wrapper(contacts: str) -> str:
+        """
+        Legt VIELE Kontakte/Leads auf einmal an (Messe-Listen, Visitenkarten-Stapel, CSV).
         
-        if entity_id := _extract_id(res):
-            _save_undo_context(user_id, entity_type, entity_id)
+        Args:
+            contacts: JSON-Liste [{"first_name", "last_name", "company", "email", "phone"}, ...]
+                      ODER CSV-Text mit Kopfzeile (z.B. "Vorname;Nachname;Firma;E-Mail;Telefon")
         
+        Nutze dieses Tool ab 3 Kontakten statt create_contact einzeln aufzurufen.
+        Duplikate (E-Mail schon im CRM oder doppelt in der Liste) werden übersprungen.
+        Undo entfernt alle Kontakte des Imports in einem Schritt.
+        """
+        try:
+            parsed = parse_contacts(contacts)
+        except ValueError as e:
+            return f"❌ {e}"
+        
+        created = []
+        res = bulk_create_func(parsed, created=created)
+        return _after_bulk_create(res, created)
+
+    async def abulk_create_contacts_wrapper(contacts: str) -> str:
+        try:
+            parsed = parse_contacts(contacts)
+        except ValueError as e:
+            return f"❌ {e}"
+        
+        created = []
+        res = await _async_variant(bulk_create_func)(parsed, created=created)
+        return _after_bulk_create(res, created)
+
+    def _after_bulk_create(res: str, created: list) -> str:
+        """Ganzer Import = EINE Undo-Aktion"""
+        if created:
+            _push_undo_action(undo_stack, {
+                "entity_type": "lead" if crm_system == "ZOHO" else "person",
+                "entity_id": created[0],
+                "entity_ids": list(created),
+                "action": "create",
+            })
         return res
 
+    def _company_kwargs(company: Optional[str]) -> dict:
+        """company nur weiterreichen, wenn gesetzt (ältere Adapter kennen den Parameter nicht)"""
+        return {"company_target": company} if company else {}
+
     def create_task_wrapper(
         title: str, 
         body: str = "", 
         due_date: Optional[str] = None, 
-        target_id: Optional[str] = None
+        target_id: Optional[str] = None,
+        company: Optional[str] = None
     ) -> str:
         """
         Erstellt Task.
@@ -190,16 +393,23 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
             - Wenn du die UUID hast -> Sende UUID.
             - Wenn du KEINE UUID hast -> Sende den VOR- UND NACHNAMEN.
             - RATE KEINE E-MAILS!
-        """
-        body_with_attribution = (body or "") + attribution
-        res = create_task_func(title, body_with_attribution, due_date, target_id)
         
-        if entity_id := _extract_id(res):
-            _save_undo_context(user_id, "task", entity_id)
-        
-        return res
+        OPTIONAL company: Firmenname oder UUID - Task wird zusätzlich mit der Firma verknüpft.
+        """
+        res = create_task_func(title, (body or "") + attribution, due_date, target_id, **_company_kwargs(company))
+        return _after_create(res, "task")
 
-    def create_note_wrapper(title: str, content: str, target_id: str) -> str:
+    async def acreate_task_wrapper(
+        title: str, 
+        body: str = "", 
+        due_date: Optional[str] = None, 
+        target_id: Optional[str] = None,
+        company: Optional[str] = None
+    ) -> str:
+        res = await _async_variant(create_task_func)(title, (body or "") + attribution, due_date, target_id, **_company_kwargs(company))
+        return _after_create(res, "task")
+
+    def create_note_wrapper(title: str, content: str, target_id: str, company: Optional[str] = None) -> str:
         """
         Erstellt Notiz.
         
@@ -207,35 +417,77 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
             - Wenn du die UUID hast -> Sende UUID.
             - Wenn du KEINE UUID hast -> Sende den VOR- UND NACHNAMEN.
             - RATE KEINE E-MAILS!
-        """
-        content_with_attribution = content + attribution
-        res = create_note_func(title, content_with_attribution, target_id)
         
-        if entity_id := _extract_id(res):
-            _save_undo_context(user_id, "note", entity_id)
-        
-        return res
+        OPTIONAL company: Firmenname oder UUID - Notiz wird zusätzlich mit der Firma verknüpft.
+        """
+        res = create_note_func(title, content + attribution, target_id, **_company_kwargs(company))
+        return _after_create(res, "note")
+
+    async def acreate_note_wrapper(title: str, content: str, target_id: str, company: Optional[str] = None) -> str:
+        res = await _async_variant(create_note_func)(title, content + attribution, target_id, **_company_kwargs(company))
+        return _after_create(res, "note")
         
-    def undo_wrapper() -> str:
+    def undo_wrapper(steps: int = 1) -> str:
         """
-        Macht letzte Aktion rückgängig (Löscht den zuletzt erstellten Eintrag).
+        Macht die letzten Aktionen rückgängig (Löscht erstellte Einträge, stellt Updates wieder her).
+        
+        Args:
+            steps: Anzahl der Aktionen, die rückgängig gemacht werden sollen (Standard: 1)
         
         Nutze wenn User sagt: 'rückgängig', 'lösch das', 'undo', 'Das war ein Fehler'
+        Bei 'die letzten 3 rückgängig' -> steps=3
         """
-        entity_type, entity_id = _get_undo_context(user_id)
+        if error := _undo_precheck():
+            return error
         
-        if not entity_id:
-            return "⚠️ Nichts zum Rückgängigmachen gefunden."
+        actions = _pop_actions(steps)
+        return _finish_undo(actions, _revert_actions(actions))
+
+    async def aundo_wrapper(steps: int = 1) -> str:
+        if error := _undo_precheck():
+            return error
         
+        actions = _pop_actions(steps)
+        return _finish_undo(actions, await _arevert_actions(actions))
+
+    def _undo_precheck() -> Optional[str]:
+        if not undo_stack:
+            return "⚠️ Nichts zum Rückgängigmachen gefunden."
         if not adapter:
             return "⚠️ Undo geht nur im Live-Modus (CRM-Adapter benötigt)."
+        return None
+
+    def _pop_actions(steps: int) -> list[dict]:
+        steps = max(1, min(int(steps or 1), len(undo_stack)))
+        return [undo_stack.pop() for _ in range(steps)]  # neueste zuerst
+
+    def _finish_undo(actions: list[dict], outcomes: list[tuple[dict, str, list[str]]]) -> str:
+        # Nur fehlgeschlagene IDs bleiben auf dem Stack (Reihenfolge erhalten) -
+        # schon gelöschte IDs würden beim nächsten Versuch erneut scheitern
+        failed_ids = {id(action): failed for action, _, failed in outcomes}
+        retry = 0
+        for action in reversed(actions):
+            if failed := failed_ids.get(id(action)):
+                undo_stack.append(_remaining_action(action, failed))
+                retry += 1
         
-        res = adapter.delete_item(entity_type, entity_id)
-        
-        if "✅" in res:
-            _clear_undo_context(user_id)
+        if len(outcomes) == 1:
+            return outcomes[0][1]
         
-        return res
+        lines = [f"↩️ {len(actions) - retry}/{len(actions)} Aktionen rückgängig gemacht:"]
+        for action, res, _ in outcomes:
+            lines.append(f"  • {action['action']} {action['entity_type']} ({_action_label(action)}): {res}")
+        return "\n".join(lines)
+    
+    def _remaining_action(action: dict, failed: list[str]) -> dict:
+        """Aktion mit den noch nicht rückgängig gemachten IDs"""
+        if failed == _action_ids(action):
+            return action
+        remaining = {**action, "entity_id": failed[0]}
+        remaining.pop("entity_ids", None)
+        if len(failed) > 1:
+            remaining["entity_ids"] = list(failed)
+        return remaining
     
     def update_entity_wrapper(target: str, entity_type: str, fields: str) -> str:
         """
@@ -243,7 +495,7 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
         
         Args:
             target: Name, Email oder ID des Eintrags
-            entity_type: "person"/"company" (Twenty) oder "lead" (Zoho)
+            entity_type: "person"/"company" (Twenty) oder "lead"/"contact"/"account"/"deal" (Zoho)
             fields: JSON string mit Feldern
             
         Verfügbare Felder (Twenty):
@@ -253,6 +505,9 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
         Verfügbare Felder (Zoho):
             Lead: email, phone, mobile, job, linkedin, company, website, size, 
                   industry, revenue, street, city, state, zip, country
+            Contact: email, phone, mobile, job, linkedin, street, city, zip, country, notes
+            Account: website, phone, size, industry, revenue, street, city, zip, country, notes
+            Deal: stage, amount, closing_date, probability, next_step, notes
         """
         if not update_entity_func:
             return "❌ Update nicht verfügbar (nur im Live-Modus)."
@@ -262,7 +517,31 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
         except json.JSONDecodeError:
             return f"❌ Ungültiges JSON-Format: {fields}"
         
-        return update_entity_func(target, entity_type, fields_dict)
+        # Adapter füllt den Snapshot mit den Werten VOR dem Update (für Undo)
+        snapshot = {}
+        res = update_entity_func(target, entity_type, fields_dict, undo_snapshot=snapshot)
+        return _after_update(res, snapshot)
+
+    async def aupdate_entity_wrapper(target: str, entity_type: str, fields: str) -> str:
+        try:
+            fields_dict = json.loads(fields) if isinstance(fields, str) else fields
+        except json.JSONDecodeError:
+            return f"❌ Ungültiges JSON-Format: {fields}"
+        
+        snapshot = {}
+        res = await _async_variant(update_entity_func)(target, entity_type, fields_dict, undo_snapshot=snapshot)
+        return _after_update(res, snapshot)
+
+    def _after_update(res: str, snapshot: dict) -> str:
+        if "✅" in res and snapshot.get("entity_id"):
+            _push_undo_action(undo_stack, {
+                "entity_type": snapshot["entity_type"],
+                "entity_id": snapshot["entity_id"],
+                "action": "update",
+                "previous_values": snapshot.get("previous_values", {}),
+            })
+        
+        return res
     
     def get_contact_details_wrapper(contact_id: str) -> str:
         """
@@ -278,6 +557,9 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
 
         return get_details_func(contact_id)
 
+    async def aget_contact_details_wrapper(contact_id: str) -> str:
+        return await _async_variant(get_details_func)(contact_id)
+
     def get_company_details_wrapper(company_id: str) -> str:
         """
         Ruft alle Details einer FIRMA ab (Website, LinkedIn, Mitarbeiter, Adresse, etc.).
@@ -292,33 +574,45 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
 
         return get_company_details_func(company_id)
 
+    async def aget_company_details_wrapper(company_id: str) -> str:
+        return await _async_variant(get_company_details_func)(company_id)
+
+    def _coroutine(async_wrapper: Callable, adapter_func: Optional[Callable]) -> Optional[Callable]:
+        """Async-Wrapper nur, wenn der Adapter die Methode nativ async anbietet"""
+        return async_wrapper if _async_variant(adapter_func) else None
+
     # === TOOL LIST ===
     
     tools = [
         StructuredTool.from_function(
             search_func, 
+            coroutine=_async_variant(search_func),
             name="search_contacts", 
             description="Sucht Kontakte und Firmen im CRM"
         ),
         StructuredTool.from_function(
             create_contact_wrapper, 
+            coroutine=_coroutine(acreate_contact_wrapper, create_contact_func),
             name="create_contact", 
-            description="Erstellt neuen Kontakt/Lead. WICHTIG: Frage IMMER nach first_name, last_name, company und email!"
+            description="Erstellt neuen Kontakt/Lead (prüft vorher auf Duplikate). WICHTIG: Frage IMMER nach first_name, last_name, company und email!"
         ),
         StructuredTool.from_function(
             create_task_wrapper, 
+            coroutine=_coroutine(acreate_task_wrapper, create_task_func),
             name="create_task", 
             description="Erstellt Task (Datum im ISO-Format)"
         ),
         StructuredTool.from_function(
             create_note_wrapper, 
+            coroutine=_coroutine(acreate_note_wrapper, create_note_func),
             name="create_note", 
             description="Erstellt Notiz"
         ),
         StructuredTool.from_function(
             undo_wrapper, 
+            coroutine=aundo_wrapper,
             name="undo_last_action", 
-            description="Löscht den zuletzt erstellten Eintrag (Lead/Task/Note). Nutze bei: 'rückgängig', 'lösch das', 'undo'"
+            description="Macht die letzten N Aktionen rückgängig (Erstellen -> Löschen, Update -> alte Werte). Nutze bei: 'rückgängig', 'lösch das', 'undo'"
         )
     ]
     
@@ -327,6 +621,7 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
         tools.append(
             StructuredTool.from_function(
                 update_entity_wrapper, 
+                coroutine=_coroutine(aupdate_entity_wrapper, update_entity_func),
                 name="update_entity",
                 description="Aktualisiert Felder eines CRM-Eintrags"
             )
@@ -336,20 +631,39 @@ def get_crm_tools_for_user(user_id: str, user: Optional[dict] = None) -> list:
         tools.append(
             StructuredTool.from_function(
                 get_contact_details_wrapper,
+                coroutine=_coroutine(aget_contact_details_wrapper, get_details_func),
                 name="get_contact_details",
                 description="Ruft ALLE Details einer PERSON ab (Phone, Birthday, Custom Fields, etc.)"
             )
         )
 
+    if bulk_create_func:
+        tools.append(
+            StructuredTool.from_function(
+                bulk_create_contacts_wrapper,
+                coroutine=_coroutine(abulk_create_contacts_wrapper, bulk_create_func),
+                name="bulk_create_contacts",
+                description="Legt viele Kontakte/Leads auf einmal an (JSON-Liste oder CSV-Text). Nutze ab 3 Kontakten statt create_contact."
+            )
+        )
+
     if get_company_details_func:
         tools.append(
             StructuredTool.from_function(
                 get_company_details_wrapper,
+                coroutine=_coroutine(aget_company_details_wrapper, get_company_details_func),
                 name="get_company_details",
                 description="Ruft ALLE Details einer FIRMA ab (Website, LinkedIn, Adresse, Mitarbeiter, etc.)"
             )
         )
 
+    # Fast-Fail: Bei offenem Circuit liefern alle Tools sofort "CRM nicht erreichbar"
+    breaker = getattr(adapter, "circuit_breaker", None)
+    if isinstance(breaker, CircuitBreaker):
+        for tool in tools:
+            tool.func = guard(breaker, tool.func)
+            tool.coroutine = aguard(breaker, tool.coroutine)
+
     return tools
 
 
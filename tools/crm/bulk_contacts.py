@@ -0,0 +1,189 @@
+"""
+Bulk-Import von Kontakten (Tool bulk_create_contacts)
+
+Messe-Listen wurden bisher Person für Person über create_contact angelegt - ein
+LLM-Schritt und ein Request pro Kontakt. Das Tool nimmt die ganze Liste (JSON oder
+CSV-Text), die Adapter schreiben sie gebündelt (Zoho: 100 Leads pro Insert,
+Twenty: batch/people) und melden das Ergebnis pro Datensatz.
+
+Dieses Modul enthält den CRM-unabhängigen Teil:
+
+- parse_contacts: JSON-Liste oder CSV (Komma/Semikolon/Tab, deutsche oder englische
+  Spaltennamen) -> Kontakte mit generischen Feldern
+- prepare_contacts: Pflichtfelder/E-Mail prüfen, Duplikate innerhalb der Liste
+- format_bulk_result: Kompakte Zusammenfassung für den Agenten (Details begrenzt)
+
+Konfiguration via ENV:
+    CRM_BULK_MAX_RECORDS   Max. Datensätze pro Tool-Call (Default: 1000)
+"""
+
+import os
+import re
+import csv
+import io
+import json
+from typing import Optional
+
+# Generische Felder eines Kontakts (wie create_contact)
+CONTACT_FIELDS = ("first_name", "last_name", "company", "email", "phone")
+
+# Spaltennamen (lowercase, ohne Leer-/Sonderzeichen) -> generisches Feld
+COLUMN_ALIASES = {
+    "firstname": "first_name", "vorname": "first_name", "givenname": "first_name",
+    "lastname": "last_name", "nachname": "last_name", "surname": "last_name", "familyname": "last_name",
+    "name": "name", "fullname": "name", "kontakt": "name", "contact": "name",
+    "company": "company", "firma": "company", "unternehmen": "company", "organisation": "company",
+    "organization": "company", "account": "company", "accountname": "company",
+    "email": "email", "mail": "email", "emailadresse": "email", "emailaddress": "email",
+    "phone": "phone", "telefon": "phone", "tel": "phone", "telefonnummer": "phone",
+    "mobile": "phone", "mobil": "phone", "handy": "phone",
+}
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Max. Einträge pro Kategorie in der Tool-Antwort (Rest nur gezählt)
+DETAIL_LIMIT = 20
+
+
+def max_records() -> int:
+    try:
+        return max(1, int(os.getenv("CRM_BULK_MAX_RECORDS", "1000")))
+    except ValueError:
+        return 1000
+
+
+def email_key(email: Optional[str]) -> str:
+    """Vergleichsschlüssel für Duplikate (lowercase, ohne Leerzeichen)"""
+    return (email or "").strip().lower()
+
+
+def column_key(column: str) -> str:
+    """Spaltenname -> Vergleichsschlüssel ("E-Mail Adresse" -> "emailadresse")"""
+    return "".join(c for c in (column or "").lower() if c.isalnum())
+
+
+def split_name(full_name: str) -> tuple[str, str]:
+    """Voller Name -> (Vorname, Nachname): "Anna Maria Schmidt" -> ("Anna Maria", "Schmidt")"""
+    first, _, last = full_name.strip().rpartition(" ")
+    return first, last
+
+
+def normalize_contact(raw: dict) -> dict:
+    """Beliebige Spaltennamen -> generische Felder ("Name" wird in Vor-/Nachname geteilt)"""
+    contact = {field: "" for field in CONTACT_FIELDS}
+    full_name = ""
+    for column, value in raw.items():
+        field = COLUMN_ALIASES.get(column_key(column))
+        value = str(value).strip() if value is not None else ""
+        if not field or not value:
+            continue
+        if field == "name":
+            full_name = value
+        elif not contact[field]:
+            contact[field] = value
+    if full_name and not (contact["first_name"] or contact["last_name"]):
+        contact["first_name"], contact["last_name"] = split_name(full_name)
+    return contact
+
+
+def parse_contacts(data) -> list[dict]:
+    """
+    JSON-Liste (Dicts) oder CSV-Text mit Kopfzeile -> Kontakte.
+
+    Raises:
+        ValueError: Format nicht erkannt, keine Datensätze oder zu viele
+    """
+    if isinstance(data, str):
+        text = data.strip().lstrip("\ufeff")
+        if text.startswith("[") or text.startswith("{"):
+            try:
+                data = json.loads(text)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Ungültiges JSON: {e}")
+        else:
+            data = _parse_csv(text)
+    if isinstance(data, dict):
+        data = data.get("contacts") or [data]
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ValueError("Erwartet: JSON-Liste von Kontakten oder CSV mit Kopfzeile")
+    if not data:
+        raise ValueError("Keine Datensätze gefunden")
+    if len(data) > max_records():
+        raise ValueError(f"Zu viele Datensätze ({len(data)}), max. {max_records()} pro Import")
+    return [normalize_contact(row) for row in data]
+
+
+def _parse_csv(text: str) -> list[dict]:
+    try:
+        dialect = csv.Sniffer().sniff(text.split("\n", 1)[0], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+    if not any(column_key(c) in COLUMN_ALIASES for c in reader.fieldnames or []):
+        raise ValueError("CSV ohne erkennbare Kopfzeile (z.B. Vorname;Nachname;Firma;E-Mail)")
+    return [row for row in reader if any((v or "").strip() for v in row.values() if isinstance(v, str))]
+
+
+def _display_name(contact: dict) -> str:
+    return f"{contact.get('first_name') or ''} {contact.get('last_name') or ''}".strip() or contact.get("email") or "?"
+
+
+def outcome(contact: dict, status: str, record_id: Optional[str] = None, message: str = "") -> dict:
+    """Ergebnis eines Datensatzes: status = created | duplicate | failed"""
+    return {"row": contact["row"], "name": _display_name(contact), "email": contact.get("email") or "",
+            "status": status, "id": record_id, "message": message}
+
+
+def prepare_contacts(contacts: list[dict]) -> tuple[list[dict], list[dict]]:
+    """
+    Validiert die Kontakte und entfernt Duplikate innerhalb der Liste.
+
+    Zeilennummern: raw["row"] falls gesetzt (Datei-Import in Batches), sonst Position ab 1.
+    Zusatzfelder (raw["fields"], generische Namen, bereits validiert) werden durchgereicht.
+
+    Returns:
+        (gültige Kontakte mit "row" und "fields", Ergebnisse der aussortierten)
+    """
+    valid, outcomes, seen = [], [], {}
+    for position, raw in enumerate(contacts, start=1):
+        row = raw.get("row") or position
+        contact = {**{field: (raw.get(field) or "").strip() for field in CONTACT_FIELDS},
+                   "row": row, "fields": dict(raw.get("fields") or {})}
+        key = email_key(contact["email"])
+        if not contact["last_name"]:
+            outcomes.append(outcome(contact, "failed", message="Nachname fehlt"))
+        elif key and not EMAIL_PATTERN.match(key):
+            outcomes.append(outcome(contact, "failed", message=f"Ungültige E-Mail '{contact['email']}'"))
+        elif key and key in seen:
+            outcomes.append(outcome(contact, "duplicate", message=f"doppelt in der Liste (Zeile {seen[key]})"))
+        else:
+            if key:
+                seen[key] = row
+            valid.append(contact)
+    return valid, outcomes
+
+
+def format_bulk_result(outcomes: list[dict], label: str = "Kontakte") -> str:
+    """Zusammenfassung + begrenzte Details pro Kategorie (Zeilennummern für Rückfragen)"""
+    outcomes = sorted(outcomes, key=lambda o: o["row"])
+    groups = {status: [o for o in outcomes if o["status"] == status] for status in ("created", "duplicate", "failed")}
+    created, duplicates, failed = groups["created"], groups["duplicate"], groups["failed"]
+
+    icon = "❌" if failed and not created else ("⚠️" if failed or not created else "✅")
+    lines = [f"{icon} Import {label}: {len(created)} erstellt, {len(duplicates)} Duplikate übersprungen, "
+             f"{len(failed)} Fehler ({len(outcomes)} Zeilen)"]
+
+    def section(title, items, render):
+        if not items:
+            return
+        lines.append(title)
+        lines.extend(f"  • {render(o)}" for o in items[:DETAIL_LIMIT])
+        if len(items) > DETAIL_LIMIT:
+            lines.append(f"  … und {len(items) - DETAIL_LIMIT} weitere")
+
+    section("Erstellt:", created, lambda o: f"{o['name']} (ID: {o['id']})")
+    section("Duplikate:", duplicates,
+            lambda o: f"Zeile {o['row']}: {o['name']} <{o['email']}> - {o['message']}"
+                      + (f" (vorhanden: {o['id']})" if o["id"] else ""))
+    section("Fehler:", failed, lambda o: f"Zeile {o['row']}: {o['name']} - {o['message']}")
+    return "\n".join(lines)
@@ -0,0 +1,268 @@
+"""
+Circuit Breaker für CRM APIs (Fast-Fail bei Ausfällen)
+
+Ist Twenty/Zoho down, wartet sonst jeder Request auf den Timeout (10s + Retries),
+und ein ReAct-Turn mit mehreren Tool-Calls dauert über eine Minute bis zum Fehler.
+
+Zustände:
+- closed:    Normalbetrieb, aufeinanderfolgende Fehler (Verbindungsfehler, Timeouts, 5xx) werden gezählt
+- open:      Ab failure_threshold Fehlern -> jeder Request scheitert sofort (CrmUnavailable)
+- half_open: Nach recovery_seconds prüft ein Health-Probe (bzw. ein einzelner Test-Request),
+             ob das CRM wieder antwortet -> closed, sonst wieder open
+
+Die CRM-Tools fragen den Breaker vor dem Aufruf ab und liefern bei offenem Circuit
+direkt das "CRM nicht erreichbar"-Ergebnis (guard / aguard), das der Agent weitergeben kann.
+4xx und 429 zählen nicht als Ausfall (das CRM antwortet ja).
+
+Konfiguration via ENV (Prefix pro CRM, z.B. TWENTY_):
+    {PREFIX}_CIRCUIT_ENABLED              Breaker nutzen (Default: true)
+    {PREFIX}_CIRCUIT_FAILURE_THRESHOLD    Fehler in Folge bis open (Default: 5)
+    {PREFIX}_CIRCUIT_RECOVERY_SECONDS     Wartezeit bis zum Health-Probe (Default: 30)
+    {PREFIX}_CIRCUIT_HALF_OPEN_CALLS      Gleichzeitige Test-Requests in half_open ohne Probe (Default: 1)
+    {PREFIX}_CIRCUIT_PROBE_ENABLED        Health-Probe statt echtem Request als Test (Default: true)
+"""
+
+import os
+import time
+import asyncio
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Sammelt Ablehnungen während eines Tool-Calls (gleiches Objekt in Kind-Tasks/Threads)
+_rejections: ContextVar[Optional[list]] = ContextVar("crm_circuit_rejections", default=None)
+
+
+class CrmUnavailable(Exception):
+    """Circuit ist offen - Request wurde gar nicht erst gesendet"""
+
+
+@dataclass
+class BreakerConfig:
+    """Schwellwerte des Circuit Breakers"""
+    enabled: bool = True
+    failure_threshold: int = 5
+    recovery_seconds: float = 30.0
+    half_open_calls: int = 1
+    probe_enabled: bool = True
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "BreakerConfig":
+        defaults = cls()
+
+        def number(name, default, cast):
+            try:
+                return cast(os.getenv(f"{prefix}_{name}", default))
+            except ValueError:
+                print(f"⚠️ Ungültiger Wert für {prefix}_{name}, nutze Default {default}")
+                return default
+
+        def flag(name):
+            return os.getenv(f"{prefix}_{name}", "true").strip().lower() not in ("0", "false", "no", "off")
+
+        return cls(
+            enabled=flag("CIRCUIT_ENABLED"),
+            failure_threshold=max(1, number("CIRCUIT_FAILURE_THRESHOLD", defaults.failure_threshold, int)),
+            recovery_seconds=number("CIRCUIT_RECOVERY_SECONDS", defaults.recovery_seconds, float),
+            half_open_calls=max(1, number("CIRCUIT_HALF_OPEN_CALLS", defaults.half_open_calls, int)),
+            probe_enabled=flag("CIRCUIT_PROBE_ENABLED"),
+        )
+
+
+class CircuitBreaker:
+    """closed -> open -> half_open -> closed, thread-safe"""
+
+    def __init__(self, name: str, config: BreakerConfig = None, probe: Callable[[], bool] = None):
+        self.name = name
+        self.config = config or BreakerConfig()
+        self.probe = probe if self.config.probe_enabled else None
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        self._metrics = {"opened": 0, "rejected": 0, "probes": 0, "probe_failures": 0, "last_error": None}
+
+    # === ZUSTAND ===
+
+    def retry_in(self) -> float:
+        """Sekunden bis zum nächsten Health-Probe (0 wenn nicht open)"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.config.recovery_seconds - time.monotonic())
+
+    def rejecting(self) -> bool:
+        """True, solange Requests ohne Versuch abgelehnt werden (open, Wartezeit läuft)"""
+        return self.config.enabled and self.state == OPEN and self.retry_in() > 0
+
+    def _open(self, reason: str):
+        """(unter Lock)"""
+        if self.state != OPEN:
+            self._metrics["opened"] += 1
+            print(f"🔌 {self.name}: Circuit OPEN nach {self.failures} Fehlern ({reason}), "
+                  f"Health-Probe in {self.config.recovery_seconds:.0f}s")
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._trials = 0
+
+    def _reject(self):
+        self._metrics["rejected"] += 1
+        rejections = _rejections.get()
+        if rejections is not None:
+            rejections.append(self.name)
+        raise CrmUnavailable(f"CRM nicht erreichbar ({self.name}), nächster Versuch in {self.retry_in():.0f}s")
+
+    def _admit(self) -> bool:
+        """
+        Darf ein Request raus? Wirft CrmUnavailable, wenn nicht.
+
+        Returns:
+            True, wenn der Aufrufer vorher den Health-Probe ausführen muss
+        """
+        if not self.config.enabled:
+            return False
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            if self.state == OPEN:
+                if self.retry_in() > 0:
+                    self._reject()
+                self.state = HALF_OPEN
+                self._trials = 1
+                return self.probe is not None
+            if self.probe is None and self._trials < self.config.half_open_calls:
+                self._trials += 1
+                return False
+            self._reject()
+
+    def _finish_probe(self, healthy: bool):
+        self._metrics["probes"] += 1
+        if healthy:
+            print(f"🔌 {self.name}: Health-Probe ok, Circuit CLOSED")
+            self.record_success()
+            return
+        self._metrics["probe_failures"] += 1
+        self.record_failure("Health-Probe fehlgeschlagen")
+        with self._lock:
+            self._reject()
+
+    def _run_probe(self) -> bool:
+        try:
+            return bool(self.probe())
+        except Exception as e:
+            print(f"⚠️ {self.name}: Health-Probe Fehler: {e}")
+            return False
+
+    def before_call(self):
+        """Vor jedem Request (Threads). Wirft CrmUnavailable bei offenem Circuit."""
+        if self._admit():
+            self._finish_probe(self._run_probe())
+
+    async def abefore_call(self):
+        """Vor jedem Request (Event Loop) - der Probe läuft im Thread"""
+        if self._admit():
+            self._finish_probe(await asyncio.to_thread(self._run_probe))
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED or self.failures:
+                self.state = CLOSED
+                self.failures = 0
+                self._trials = 0
+
+    def record_failure(self, reason: str = "Fehler"):
+        if not self.config.enabled:
+            return
+        with self._lock:
+            self.failures += 1
+            self._metrics["last_error"] = reason
+            if self.state == HALF_OPEN or self.failures >= self.config.failure_threshold:
+                self._open(reason)
+
+    def record_status(self, status: Any):
+        """HTTP-Status auswerten: 5xx = Ausfall, alles andere = CRM antwortet"""
+        if isinstance(status, int) and status >= 500:
+            self.record_failure(f"HTTP {status}")
+        else:
+            self.record_success()
+
+    def call(self, send: Callable[[], Any]) -> Any:
+        """send() unter dem Breaker (jede Exception = Ausfall, Response über record_status)"""
+        self.before_call()
+        try:
+            response = send()
+        except Exception as e:
+            self.record_failure(type(e).__name__)
+            raise
+        self.record_status(getattr(response, "status_code", None))
+        return response
+
+    # === TOOL-EBENE ===
+
+    def unavailable_message(self, partial: str = None) -> str:
+        """Einheitliches Tool-Ergebnis bei Ausfall (Agent gibt es an den User weiter)"""
+        message = (f"⛔ CRM nicht erreichbar ({self.name}). Nächster Verbindungsversuch in ca. "
+                   f"{max(1, round(self.retry_in()))}s. ")
+        if partial is None:
+            return message + "Es wurde nichts geändert - bitte später erneut versuchen."
+        return message + f"Die Aktion wurde evtl. nur teilweise ausgeführt:\n{partial}"
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.config.enabled,
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "failure_threshold": self.config.failure_threshold,
+                "retry_in_seconds": round(self.retry_in(), 1),
+                **self._metrics,
+            }
+
+
+def _finish_tool(breaker: CircuitBreaker, result: Any, rejections: list) -> Any:
+    """Tool-Output ersetzen, wenn der Circuit während des Calls abgelehnt hat"""
+    if not rejections:
+        return result
+    partial = result if isinstance(result, str) and "(ID:" in result else None
+    return breaker.unavailable_message(partial)
+
+
+def guard(breaker: Optional[CircuitBreaker], func: Callable) -> Callable:
+    """Tool-Funktion mit Fast-Fail: offener Circuit -> sofort 'CRM nicht erreichbar'"""
+    if breaker is None:
+        return func
+
+    def guarded(*args, **kwargs):
+        if breaker.rejecting():
+            return breaker.unavailable_message()
+        token = _rejections.set([])
+        try:
+            result = func(*args, **kwargs)
+            return _finish_tool(breaker, result, _rejections.get())
+        finally:
+            _rejections.reset(token)
+
+    return guarded
+
+
+def aguard(breaker: Optional[CircuitBreaker], func: Optional[Callable[..., Awaitable]]) -> Optional[Callable]:
+    """Async-Variante von guard()"""
+    if breaker is None or func is None:
+        return func
+
+    async def guarded(*args, **kwargs):
+        if breaker.rejecting():
+            return breaker.unavailable_message()
+        token = _rejections.set([])
+        try:
+            result = await func(*args, **kwargs)
+            return _finish_tool(breaker, result, _rejections.get())
+        finally:
+            _rejections.reset(token)
+
+    return guarded
@@ -0,0 +1,231 @@
+"""
+Lokaler In-Process Index für CRM-Kontakte und Firmen
+
+Statt bei jeder Suche / jedem Resolve hunderte Datensätze über das Netz zu laden,
+hält der Adapter eine kompakte Kopie (ID, Name, Email, Firma, updatedAt) im Speicher:
+
+- Bootstrap: Paginierter Bulk-Load aller Datensätze
+- Delta-Sync: Nur Datensätze mit updatedAt >= High-Water-Mark (Polling, lazy bei Zugriff)
+- Full-Resync in größerem Abstand (erkennt extern gelöschte Datensätze)
+- Write-Through: Eigene Creates/Updates/Deletes landen sofort im Index
+- Push: Webhook-Events (z.B. Twenty) landen ohne Polling im Index; sie verschieben
+  die High-Water-Mark nicht, damit ein verpasstes Event beim nächsten Delta-Sync
+  noch gefunden wird
+- Exakte Lookups über normalisierte Keys (Email, "vorname nachname", Firmenname,
+  Blocking-Keys der Duplikat-Prüfung, siehe duplicate_check.py)
+- Gecachte Spalten für vektorisiertes Fuzzy-Scoring (neu gebaut nach Änderungen)
+
+Der Index ist CRM-agnostisch: Der Adapter liefert kompakte Records und pro
+Entity-Typ eine Funktion, die die Lookup-Keys eines Records erzeugt.
+
+Konfiguration via ENV (Prefix pro CRM, z.B. TWENTY_):
+    {PREFIX}_INDEX_ENABLED               Index nutzen (Default: true, Zoho: false)
+    {PREFIX}_INDEX_REFRESH_SECONDS       Delta-Sync Intervall (Default: 30)
+    {PREFIX}_INDEX_FULL_RESYNC_SECONDS   Full-Resync Intervall (Default: 3600)
+    {PREFIX}_INDEX_PAGE_SIZE             Datensätze pro Seite beim Laden (Default: 200)
+"""
+
+import os
+import time
+import unicodedata
+import threading
+from itertools import islice
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+
+def normalize_key(value: Optional[str]) -> str:
+    """Lowercase, ohne Akzente/Mehrfach-Leerzeichen ("  Jürgen  MÜLLER" -> "jurgen muller")"""
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKD", value)
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return " ".join(value.lower().split())
+
+
+@dataclass
+class IndexConfig:
+    """Sync-Einstellungen des Index"""
+    enabled: bool = True
+    refresh_seconds: float = 30.0
+    full_resync_seconds: float = 3600.0
+    page_size: int = 200
+
+    @classmethod
+    def from_env(cls, prefix: str, enabled_default: bool = True, **overrides) -> "IndexConfig":
+        """Liest {prefix}_INDEX_*; overrides ersetzen die Defaults (z.B. seltener Full-Resync)"""
+        defaults = cls(**overrides)
+
+        def number(name, default, cast):
+            try:
+                return cast(os.getenv(f"{prefix}_{name}", default))
+            except ValueError:
+                print(f"⚠️ Ungültiger Wert für {prefix}_{name}, nutze Default {default}")
+                return default
+
+        return cls(
+            enabled=os.getenv(f"{prefix}_INDEX_ENABLED", str(enabled_default)).strip().lower() not in ("0", "false", "no", "off"),
+            refresh_seconds=number("INDEX_REFRESH_SECONDS", defaults.refresh_seconds, float),
+            full_resync_seconds=number("INDEX_FULL_RESYNC_SECONDS", defaults.full_resync_seconds, float),
+            page_size=max(1, number("INDEX_PAGE_SIZE", defaults.page_size, int)),
+        )
+
+
+@dataclass
+class EntityIndex:
+    """Records + Lookup-Keys + Sync-Status für einen Entity-Typ"""
+    key_func: Callable[[dict], Iterable[str]]
+    records: dict[str, dict] = field(default_factory=dict)
+    keys: dict[str, set] = field(default_factory=dict)
+    high_water: Optional[str] = None
+    ready: bool = False
+    synced_at: float = 0.0
+    full_synced_at: float = 0.0
+    columns: Any = None
+
+    def _unlink(self, record_id: str):
+        old = self.records.pop(record_id, None)
+        if old is None:
+            return
+        self.columns = None
+        for key in self.key_func(old):
+            ids = self.keys.get(key)
+            if ids:
+                ids.discard(record_id)
+                if not ids:
+                    del self.keys[key]
+
+    def upsert(self, record: dict, track_high_water: bool = True):
+        record_id = record.get("id")
+        if not record_id:
+            return
+        self._unlink(record_id)
+        self.records[record_id] = record
+        self.columns = None
+        for key in self.key_func(record):
+            if key:
+                self.keys.setdefault(key, set()).add(record_id)
+        updated_at = record.get("updatedAt")
+        if track_high_water and updated_at and (self.high_water is None or updated_at > self.high_water):
+            self.high_water = updated_at
+
+
+class ContactIndex:
+    """Thread-safer In-Memory Index (ein EntityIndex pro Entity-Typ)"""
+
+    def __init__(self, key_funcs: dict[str, Callable[[dict], Iterable[str]]], config: IndexConfig = None, name: str = "crm"):
+        self.config = config or IndexConfig()
+        self.name = name
+        self._lock = threading.RLock()
+        self._entities = {entity: EntityIndex(key_func=func) for entity, func in key_funcs.items()}
+
+    # === SYNC STATUS ===
+
+    def sync_mode(self, entity: str, now: float = None) -> Optional[str]:
+        """
+        Welcher Sync ist fällig?
+
+        Returns:
+            "full" (Bootstrap / Full-Resync), "delta" (updatedAt-Polling) oder None
+        """
+        now = time.monotonic() if now is None else now
+        state = self._entities[entity]
+        with self._lock:
+            if not state.ready or now - state.full_synced_at > self.config.full_resync_seconds:
+                return "full"
+            if now - state.synced_at > self.config.refresh_seconds:
+                return "delta"
+            return None
+
+    def mark_syncing(self, entity: str, mode: str, now: float = None):
+        """Verhindert, dass parallele Zugriffe denselben Sync erneut starten (bestehender Stand bleibt nutzbar)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._entities[entity]
+            state.synced_at = now
+            if mode == "full" and state.ready:
+                state.full_synced_at = now
+
+    def high_water(self, entity: str) -> Optional[str]:
+        with self._lock:
+            return self._entities[entity].high_water
+
+    # === WRITES ===
+
+    def load_full(self, entity: str, records: list[dict]):
+        """Ersetzt den kompletten Bestand (Bootstrap / Full-Resync)"""
+        fresh = EntityIndex(key_func=self._entities[entity].key_func)
+        for record in records:
+            fresh.upsert(record)
+        now = time.monotonic()
+        fresh.ready, fresh.synced_at, fresh.full_synced_at = True, now, now
+        with self._lock:
+            self._entities[entity] = fresh
+        print(f"📇 {self.name} Index: {len(records)} {entity} geladen")
+
+    def apply_delta(self, entity: str, records: list[dict]):
+        with self._lock:
+            state = self._entities[entity]
+            for record in records:
+                state.upsert(record)
+            state.synced_at = time.monotonic()
+        if records:
+            print(f"📇 {self.name} Index: {len(records)} {entity} aktualisiert")
+
+    def upsert(self, entity: str, record: dict, track_high_water: bool = True):
+        with self._lock:
+            self._entities[entity].upsert(record, track_high_water=track_high_water)
+
+    def remove(self, entity: str, record_id: str):
+        with self._lock:
+            self._entities[entity]._unlink(record_id)
+
+    def request_delta(self, entity: str = None):
+        """Erzwingt einen Delta-Sync beim nächsten Zugriff (z.B. nach einem unbrauchbaren Webhook)"""
+        with self._lock:
+            for name, state in self._entities.items():
+                if entity is None or name == entity:
+                    state.synced_at = float("-inf")
+
+    def invalidate(self, entity: str = None):
+        """Erzwingt einen Full-Resync beim nächsten Zugriff"""
+        with self._lock:
+            for name, state in self._entities.items():
+                if entity is None or name == entity:
+                    state.full_synced_at = float("-inf")
+
+    # === READS ===
+
+    def is_ready(self, entity: str) -> bool:
+        with self._lock:
+            return self._entities[entity].ready
+
+    def records(self, entity: str) -> list[dict]:
+        """Snapshot aller Records (sichere Iteration ohne Lock)"""
+        with self._lock:
+            return list(self._entities[entity].records.values())
+
+    def get(self, entity: str, record_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._entities[entity].records.get(record_id)
+
+    def columns(self, entity: str, build: Callable[[list[dict]], Any]) -> Any:
+        """Vorverarbeitete Spalten (z.B. CandidateColumns), gecacht bis zur nächsten Änderung"""
+        with self._lock:
+            state = self._entities[entity]
+            if state.columns is None:
+                state.columns = build(list(state.records.values()))
+            return state.columns
+
+    def lookup(self, entity: str, key: str, limit: Optional[int] = None) -> list[dict]:
+        """Exakter Lookup über einen normalisierten Key (limit: max. Records, z.B. für große Blöcke)"""
+        with self._lock:
+            state = self._entities[entity]
+            return [state.records[i] for i in islice(state.keys.get(normalize_key(key), ()), limit)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                entity: {"records": len(state.records), "ready": state.ready, "high_water": state.high_water}
+                for entity, state in self._entities.items()
+            }
@@ -0,0 +1,250 @@
+"""
+Duplikat-Erkennung vor create_contact (gegen den lokalen Index)
+
+create_contact hat bisher blind angelegt - Duplikate kosten später Suchen, Merges
+und Undo-Runden. Vor dem Create prüft der Adapter den Kontakt gegen seinen
+ContactIndex und gibt mögliche Treffer zurück, statt anzulegen. Der Agent fragt
+nach und ruft create_contact bei Bedarf mit force=true erneut auf.
+
+Blocking statt Vollscan (Sub-Millisekunde auch bei 100k Datensätzen):
+- Die Key-Funktion des Index legt pro Datensatz zusätzliche Keys an
+  (duplicate_keys): normalisierte E-Mail ("email:...") und ein phonetischer
+  Namensschlüssel ("phon:<Nachname>:<Anfang Vorname>", Kölner Phonetik -
+  Meier/Mayer/Maier, Schmidt/Schmitt landen im selben Block)
+- Ein Check = zwei bis drei Dict-Lookups, nur die Datensätze dieser Blöcke
+  werden gescored (max. max_block_size pro Block, Memo für Phonetik/Firmen-Tokens)
+
+Score pro Kandidat:
+- Gleiche normalisierte E-Mail -> 100
+- Sonst Namensähnlichkeit (Vorname fuzzy, Nachname phonetisch), kombiniert
+  mit dem Token-Overlap der Firmennamen (Rechtsformen wie GmbH/AG ignoriert);
+  fehlt eine Firma, zählt der Name allein mit Abschlag
+
+Konfiguration via ENV:
+    CRM_DUPLICATE_CHECK_ENABLED   Prüfung vor create_contact (Default: true)
+    CRM_DUPLICATE_MIN_SCORE       Ab diesem Score gilt ein Kandidat als Duplikat (Default: 80)
+    CRM_DUPLICATE_MAX_CANDIDATES  Max. Kandidaten in der Tool-Antwort (Default: 3)
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Optional
+
+from rapidfuzz import fuzz
+
+from .contact_index import ContactIndex, normalize_key
+
+# Rechtsformen / Füllwörter, die beim Firmenvergleich nicht zählen
+COMPANY_STOPWORDS = {
+    "gmbh", "mbh", "ag", "kg", "ohg", "gbr", "ug", "se", "eg", "ev", "co", "und", "and", "the",
+    "inc", "ltd", "llc", "corp", "plc", "sa", "sarl", "bv", "nv", "srl", "spa", "oy", "ab", "as",
+}
+
+# Domains, bei denen Punkte und +Tags im lokalen Teil ignoriert werden
+DOTLESS_EMAIL_DOMAINS = {"gmail.com", "googlemail.com"}
+
+# Memo für Normalisierung/Phonetik (Namen und Firmen wiederholen sich innerhalb eines Blocks)
+MEMO_SIZE = 65536
+
+# Gewichtung Name / Firma (beide Firmen bekannt) und Abschlag, wenn eine Firma fehlt
+NAME_WEIGHT = 0.7
+UNKNOWN_COMPANY_FACTOR = 0.9
+
+
+@dataclass
+class DuplicateConfig:
+    """Einstellungen der Duplikat-Prüfung"""
+    enabled: bool = True
+    min_score: float = 80.0
+    max_candidates: int = 3
+    max_block_size: int = 100
+
+    @classmethod
+    def from_env(cls, prefix: str = "CRM_DUPLICATE") -> "DuplicateConfig":
+        """Liest {prefix}_*"""
+        defaults = cls()
+
+        def number(name, default, cast):
+            try:
+                return cast(os.getenv(f"{prefix}_{name}", default))
+            except ValueError:
+                print(f"⚠️ Ungültiger Wert für {prefix}_{name}, nutze Default {default}")
+                return default
+
+        return cls(
+            enabled=os.getenv(f"{prefix}_CHECK_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off"),
+            min_score=number("MIN_SCORE", defaults.min_score, float),
+            max_candidates=max(1, number("MAX_CANDIDATES", defaults.max_candidates, int)),
+        )
+
+
+# === NORMALISIERUNG ===
+
+def normalize_email(email: Optional[str]) -> str:
+    """Lowercase, ohne +Tag; bei Gmail ohne Punkte ("Max.Muster+crm@GMail.com" -> "maxmuster@gmail.com")"""
+    email = (email or "").strip().lower()
+    local, at, domain = email.rpartition("@")
+    if not at or not local:
+        return email
+    local = local.split("+", 1)[0]
+    if domain in DOTLESS_EMAIL_DOMAINS:
+        local = local.replace(".", "")
+    return f"{local}@{domain}"
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _normalized(value: Optional[str]) -> str:
+    return normalize_key(value)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def company_tokens(company: Optional[str]) -> frozenset:
+    """Firmenname -> Tokens ohne Rechtsform ("Voltage Energy GmbH & Co. KG" -> {"voltage", "energy"})"""
+    words = "".join(c if c.isalnum() else " " for c in _normalized(company)).split()
+    return frozenset(w for w in words if w not in COMPANY_STOPWORDS)
+
+
+def company_overlap(a: frozenset, b: frozenset) -> float:
+    """Anteil gemeinsamer Tokens am kürzeren Namen (0-1)"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def _cologne_code(letter: str, before: str, after: str, first: bool) -> str:
+    if letter in "AEIJOUY":
+        return "0"
+    if letter in "BP":
+        return "3" if letter == "P" and after == "H" else "1"
+    if letter in "DT":
+        return "8" if after in ("C", "S", "Z") else "2"
+    if letter in "FVW":
+        return "3"
+    if letter in "GKQ":
+        return "4"
+    if letter == "C":
+        if first:
+            return "4" if after in ("A", "H", "K", "L", "O", "Q", "R", "U", "X") else "8"
+        return "4" if after in ("A", "H", "K", "O", "Q", "U", "X") and before not in ("S", "Z") else "8"
+    if letter == "X":
+        return "8" if before in ("C", "K", "Q") else "48"
+    if letter == "L":
+        return "5"
+    if letter in "MN":
+        return "6"
+    if letter == "R":
+        return "7"
+    if letter in "SZ":
+        return "8"
+    return ""  # H und alles andere
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def cologne_phonetic(word: Optional[str]) -> str:
+    """
+    Kölner Phonetik: gleich klingende (deutsche) Namen -> gleicher Code.
+
+    "Müller" -> "657", "Meier"/"Mayer" -> "67", "Schmidt"/"Schmitt" -> "862"
+    """
+    letters = [c for c in _normalized(word).upper().replace("ß", "SS") if "A" <= c <= "Z"]
+    codes = []
+    for i, letter in enumerate(letters):
+        before = letters[i - 1] if i > 0 else ""
+        after = letters[i + 1] if i + 1 < len(letters) else ""
+        codes.append(_cologne_code(letter, before, after, first=(i == 0)))
+
+    collapsed = []
+    for code in "".join(codes):
+        if not collapsed or collapsed[-1] != code:
+            collapsed.append(code)
+    return "".join(c for i, c in enumerate(collapsed) if c != "0" or i == 0)
+
+
+def _name_key(first_name: Optional[str], last_name: Optional[str]) -> str:
+    last = cologne_phonetic(last_name)
+    return f"phon:{last}:{cologne_phonetic(first_name)[:1]}" if last else ""
+
+
+def duplicate_keys(first_name: Optional[str], last_name: Optional[str], email: Optional[str]) -> list[str]:
+    """Blocking-Keys eines Datensatzes (für die Key-Funktion des ContactIndex)"""
+    email = normalize_email(email)
+    return [f"email:{email}" if email else "", _name_key(first_name, last_name)]
+
+
+# === PRÜFUNG ===
+
+def _name_score(first: str, last: str, last_code: str, other: dict) -> float:
+    """Vorname fuzzy, Nachname gilt bei gleichem phonetischen Code als gleich (Meier/Mayer)"""
+    other_last = other.get("last_name")
+    first_score = fuzz.ratio(first, _normalized(other.get("first_name")))
+    last_score = 100.0 if cologne_phonetic(other_last) == last_code else fuzz.ratio(last, _normalized(other_last))
+    return (first_score + last_score) / 2
+
+
+def find_duplicates(index: ContactIndex, entity: str, contact: dict, view: Callable[[dict], dict],
+                    config: DuplicateConfig = None) -> list[dict]:
+    """
+    Mögliche Duplikate eines neuen Kontakts aus dem Index.
+
+    Args:
+        contact: {"first_name", "last_name", "email", "company"}
+        view: Index-Record -> {"first_name", "last_name", "email", "company"} (CRM-spezifisch)
+
+    Returns:
+        Kandidaten {"id", "name", "email", "company", "score", "reasons"}, bester zuerst
+    """
+    config = config or DuplicateConfig()
+    email = normalize_email(contact.get("email"))
+    first, last = normalize_key(contact.get("first_name")), normalize_key(contact.get("last_name"))
+    last_code = cologne_phonetic(last)
+    tokens = company_tokens(contact.get("company"))
+
+    blocks = {}
+    if email:
+        for record in index.lookup(entity, f"email:{email}", limit=config.max_block_size):
+            blocks[record["id"]] = record
+    name_key = _name_key(contact.get("first_name"), contact.get("last_name"))
+    if name_key:
+        # Eigener Block + Datensätze ohne Vorname ("phon:657:")
+        for key in {name_key, name_key.rsplit(":", 1)[0] + ":"}:
+            for record in index.lookup(entity, key, limit=config.max_block_size):
+                blocks.setdefault(record["id"], record)
+
+    candidates = []
+    for record_id, record in blocks.items():
+        other = view(record)
+        reasons = []
+        if email and normalize_email(other.get("email")) == email:
+            score = 100.0
+            reasons.append("gleiche E-Mail")
+        else:
+            name_score = _name_score(first, last, last_code, other)
+            reasons.append(f"Name ähnlich ({name_score:.0f}%)")
+            other_tokens = company_tokens(other.get("company"))
+            if tokens and other_tokens:
+                overlap = company_overlap(tokens, other_tokens)
+                score = NAME_WEIGHT * name_score + (1 - NAME_WEIGHT) * 100 * overlap
+                reasons.append("gleiche Firma" if overlap >= 1 else ("ähnliche Firma" if overlap else "andere Firma"))
+            else:
+                score = UNKNOWN_COMPANY_FACTOR * name_score
+        if score >= config.min_score:
+            full_name = f"{other.get('first_name') or ''} {other.get('last_name') or ''}".strip()
+            candidates.append({"id": record_id, "name": full_name, "email": other.get("email") or "",
+                               "company": other.get("company") or "", "score": round(score), "reasons": reasons})
+
+    candidates.sort(key=lambda c: -c["score"])
+    return candidates[:config.max_candidates]
+
+
+def format_duplicates(first_name: str, last_name: str, candidates: list[dict], label: str = "Kontakt") -> str:
+    """
+    Tool-Antwort statt Create. IDs bewusst NICHT als "(ID: ...)" - das Muster
+    würde sonst als neu erstellter Eintrag auf den Undo-Stack wandern.
+    """
+    lines = [f"⚠️ Mögliche Duplikate für {first_name} {last_name} - {label} wurde NICHT angelegt:"]
+    for c in candidates:
+        details = "".join(part for part in (f" <{c['email']}>" if c["email"] else "", f" @ {c['company']}" if c["company"] else ""))
+        lines.append(f"  • {c['name']}{details} - ID {c['id']}, Score {c['score']} ({', '.join(c['reasons'])})")
+    lines.append("Frage den User, ob es dieselbe Person ist. Falls NEU: create_contact erneut mit force=true aufrufen.")
+    return "\n".join(lines)
@@ -0,0 +1,238 @@
+"""
+Read-Through Cache für CRM-Entity-Details
+
+Der Agent ruft Details derselben Person/Firma innerhalb einer Session oft mehrfach
+ab. Der Cache hält die rohen Entity-Daten pro (crm, entity_type, id):
+
+- L1: In-Process LRU mit TTL (pro Adapter, thread-safe)
+- L2 (optional): Geteilte Postgres-Tabelle crm_entity_cache, damit mehrere
+  Worker dieselben Einträge sehen (Backend "postgres")
+- Invalidierung: Updates, Deletes und Creates des Adapters entfernen den Eintrag
+  in beiden Tiers (der nächste Abruf lädt frisch aus dem CRM)
+- Metriken: Hits, Misses, Hit-Rate (für /metrics/crm)
+
+Der Postgres-Tier ist Best-Effort: Fehler werden geloggt und wie ein Miss behandelt,
+ein nicht erreichbarer Cache darf nie einen CRM-Abruf blockieren.
+
+Konfiguration via ENV (Prefix pro CRM, z.B. TWENTY_):
+    {PREFIX}_CACHE_ENABLED        Cache nutzen (Default: true)
+    {PREFIX}_CACHE_TTL_SECONDS    Gültigkeit eines Eintrags (Default: 60)
+    {PREFIX}_CACHE_MAX_ENTRIES    Max. Einträge im Prozess-Cache (Default: 500)
+    {PREFIX}_CACHE_BACKEND        "memory" oder "postgres" (Default: memory)
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+
+
+@dataclass
+class CacheConfig:
+    """Einstellungen des Entity-Caches"""
+    enabled: bool = True
+    ttl_seconds: float = 60.0
+    max_entries: int = 500
+    backend: str = "memory"
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "CacheConfig":
+        defaults = cls()
+
+        def number(name, default, cast):
+            try:
+                return cast(os.getenv(f"{prefix}_{name}", default))
+            except ValueError:
+                print(f"⚠️ Ungültiger Wert für {prefix}_{name}, nutze Default {default}")
+                return default
+
+        backend = os.getenv(f"{prefix}_CACHE_BACKEND", defaults.backend).strip().lower()
+        if backend not in ("memory", "postgres"):
+            print(f"⚠️ Unbekanntes {prefix}_CACHE_BACKEND '{backend}', nutze memory")
+            backend = "memory"
+
+        return cls(
+            enabled=os.getenv(f"{prefix}_CACHE_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off"),
+            ttl_seconds=number("CACHE_TTL_SECONDS", defaults.ttl_seconds, float),
+            max_entries=max(1, number("CACHE_MAX_ENTRIES", defaults.max_entries, int)),
+            backend=backend,
+        )
+
+
+class PostgresEntityStore:
+    """Geteilter Cache-Tier (Tabelle crm_entity_cache, siehe Alembic-Migration)"""
+
+    def __init__(self, session_factory: Callable = None):
+        if session_factory is None:
+            from utils.database import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+
+    def get(self, crm: str, entity_type: str, entity_id: str) -> Optional[Any]:
+        from models.crm_entity_cache import CrmEntityCache
+
+        with self.session_factory() as db:
+            row = db.get(CrmEntityCache, (crm, entity_type, entity_id))
+            if row is None or row.expires_at <= datetime.utcnow():
+                return None
+            return json.loads(row.payload)
+
+    def set(self, crm: str, entity_type: str, entity_id: str, value: Any, ttl_seconds: float):
+        from models.crm_entity_cache import CrmEntityCache
+
+        with self.session_factory() as db:
+            db.merge(CrmEntityCache(
+                crm=crm, entity_type=entity_type, entity_id=entity_id,
+                payload=json.dumps(value, default=str),
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds),
+            ))
+            db.commit()
+
+    def delete(self, crm: str, entity_type: str, entity_id: str):
+        from models.crm_entity_cache import CrmEntityCache
+
+        with self.session_factory() as db:
+            db.query(CrmEntityCache).filter(
+                CrmEntityCache.crm == crm,
+                CrmEntityCache.entity_type == entity_type,
+                CrmEntityCache.entity_id == entity_id,
+            ).delete()
+            db.commit()
+
+
+class EntityCache:
+    """LRU + TTL Cache für Entity-Details, optional mit geteiltem Store dahinter"""
+
+    def __init__(self, crm: str, config: CacheConfig = None, shared: PostgresEntityStore = None):
+        self.crm = crm
+        self.config = config or CacheConfig()
+        if shared is None and self.config.enabled and self.config.backend == "postgres":
+            shared = PostgresEntityStore()
+        self.shared = shared
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # === IN-PROCESS (L1) ===
+
+    def _local_get(self, key: tuple) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def _local_set(self, key: tuple, value: Any):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.config.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.config.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _local_delete(self, key: tuple):
+        with self._lock:
+            self._entries.pop(key, None)
+            self.invalidations += 1
+
+    def _shared_call(self, method: str, *args):
+        try:
+            return getattr(self.shared, method)(self.crm, *args)
+        except Exception as e:
+            print(f"⚠️ Entity-Cache ({self.crm}): Shared Store {method} fehlgeschlagen: {e}")
+            return None
+
+    def _key(self, entity_type: str, entity_id: str) -> tuple:
+        return (self.crm, entity_type, str(entity_id))
+
+    # === SYNC API ===
+
+    def get(self, entity_type: str, entity_id: str) -> Optional[Any]:
+        """Gecachte Daten oder None (Miss / abgelaufen / Cache aus)"""
+        if not self.config.enabled or not entity_id:
+            return None
+        key = self._key(entity_type, entity_id)
+        found, value = self._local_get(key)
+        if found:
+            self.hits += 1
+            return value
+        if self.shared is not None:
+            value = self._shared_call("get", entity_type, key[2])
+            if value is not None:
+                self.shared_hits += 1
+                self._local_set(key, value)
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, entity_type: str, entity_id: str, value: Any):
+        if not self.config.enabled or not entity_id or value is None:
+            return
+        key = self._key(entity_type, entity_id)
+        self._local_set(key, value)
+        if self.shared is not None:
+            self._shared_call("set", entity_type, key[2], value, self.config.ttl_seconds)
+
+    def invalidate(self, entity_type: str, entity_id: str):
+        """Entfernt einen Eintrag (nach Update/Delete/Create) in allen Tiers"""
+        if not self.config.enabled or not entity_id:
+            return
+        key = self._key(entity_type, entity_id)
+        self._local_delete(key)
+        if self.shared is not None:
+            self._shared_call("delete", entity_type, key[2])
+
+    # === ASYNC API (Shared Store im Thread, L1 direkt) ===
+
+    async def aget(self, entity_type: str, entity_id: str) -> Optional[Any]:
+        if self.shared is None:
+            return self.get(entity_type, entity_id)
+        return await asyncio.to_thread(self.get, entity_type, entity_id)
+
+    async def aset(self, entity_type: str, entity_id: str, value: Any):
+        if self.shared is None:
+            return self.set(entity_type, entity_id, value)
+        await asyncio.to_thread(self.set, entity_type, entity_id, value)
+
+    async def ainvalidate(self, entity_type: str, entity_id: str):
+        if self.shared is None:
+            return self.invalidate(entity_type, entity_id)
+        await asyncio.to_thread(self.invalidate, entity_type, entity_id)
+
+    # === METRIKEN ===
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_metrics(self) -> dict:
+        """Hit-Rate & Größe (für /metrics/crm)"""
+        hits = self.hits + self.shared_hits
+        lookups = hits + self.misses
+        return {
+            "enabled": self.config.enabled,
+            "backend": self.config.backend if self.shared is not None else "memory",
+            "size": len(self._entries),
+            "max_entries": self.config.max_entries,
+            "ttl_seconds": self.config.ttl_seconds,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
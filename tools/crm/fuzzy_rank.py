@@ -0,0 +1,98 @@
+"""
+Vektorisiertes Fuzzy-Ranking für CRM-Suche / Resolve
+
+Statt pro Datensatz drei rapidfuzz-Scorer in einer Python-Schleife aufzurufen
+(und beide Strings jedes Mal zu lowercasen), werden die Kandidaten einmal als
+vorverarbeitete Spalten gehalten und mit rapidfuzz.process.cdist in einem
+C++-Aufruf pro Scorer bewertet:
+
+    columns = CandidateColumns(records, {"name": full_name, "email": primary_email})
+    scores = columns.scores("thomas braun", "name")      # numpy-Array, ein Score pro Record
+    columns.top_k("thomas", "name", k=5, score_cutoff=70)
+
+Score-Semantik wie _fuzzy_match der Adapter: max(token_sort_ratio, partial_ratio, ratio)
+auf lowercase/strip (ein Substring-Treffer ergibt über partial_ratio 100).
+token_sort_ratio wird als ratio auf vorab token-sortierten Spalten gerechnet
+(identischer Score, spart das Sortieren pro Suche).
+
+Konfiguration via ENV:
+    FUZZY_WORKERS          Threads für cdist bei großen Kandidatenmengen (Default: -1 = alle Kerne)
+    FUZZY_PARALLEL_MIN     Ab dieser Kandidatenzahl parallel scoren (Default: 5000)
+"""
+
+import os
+from typing import Callable, Optional
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+
+def preprocess(value: Optional[str]) -> str:
+    """Gleiche Normalisierung wie _fuzzy_match (lowercase + strip)"""
+    return value.lower().strip() if value else ""
+
+
+def sort_tokens(value: str) -> str:
+    """token_sort_ratio(a, b) == ratio(sort_tokens(a), sort_tokens(b))"""
+    return " ".join(sorted(value.split()))
+
+
+def _workers(size: int) -> int:
+    try:
+        parallel_min = int(os.getenv("FUZZY_PARALLEL_MIN", "5000"))
+        workers = int(os.getenv("FUZZY_WORKERS", "-1"))
+    except ValueError:
+        parallel_min, workers = 5000, -1
+    return workers if size >= parallel_min else 1
+
+
+def score_column(query: str, choices: list[str], score_cutoff: float = 0, sorted_choices: list[str] = None) -> np.ndarray:
+    """
+    Scores eines Queries gegen eine vorverarbeitete Spalte.
+
+    Args:
+        query: Suchbegriff (wird normalisiert)
+        choices: Bereits via preprocess() normalisierte Strings
+        score_cutoff: Scores darunter werden zu 0 (rapidfuzz kann früher abbrechen)
+        sorted_choices: Optional sort_tokens(choice) pro Choice (sonst token_sort_ratio)
+
+    Returns:
+        float-Array (ein Score 0-100 pro Choice, leere Choices = 0)
+    """
+    q = preprocess(query)
+    if not q or not choices:
+        return np.zeros(len(choices))
+
+    def cdist(query_value, column, scorer):
+        return process.cdist([query_value], column, scorer=scorer, score_cutoff=score_cutoff,
+                             dtype=np.float64, workers=_workers(len(column)))[0]
+
+    if sorted_choices is not None:
+        token_scores = cdist(sort_tokens(q), sorted_choices, fuzz.ratio)
+    else:
+        token_scores = cdist(q, choices, fuzz.token_sort_ratio)
+    return np.maximum(token_scores, np.maximum(cdist(q, choices, fuzz.partial_ratio), cdist(q, choices, fuzz.ratio)))
+
+
+class CandidateColumns:
+    """Records + vorverarbeitete Text-Spalten (einmal berechnet, beliebig oft gescored)"""
+
+    def __init__(self, records: list[dict], extractors: dict[str, Callable[[dict], str]]):
+        self.records = records
+        self.columns = {name: [preprocess(extract(r)) for r in records] for name, extract in extractors.items()}
+        self.sorted_columns = {name: [sort_tokens(v) for v in values] for name, values in self.columns.items()}
+
+    def __len__(self):
+        return len(self.records)
+
+    def scores(self, query: str, column: str, score_cutoff: float = 0) -> np.ndarray:
+        return score_column(query, self.columns[column], score_cutoff, self.sorted_columns[column])
+
+    def top_k(self, query: str, column: str, k: int = 10, score_cutoff: float = 0) -> list[tuple[dict, float]]:
+        """Beste k Records (absteigend, bei Gleichstand in Original-Reihenfolge)"""
+        if not self.records:
+            return []
+        scores = self.scores(query, column, score_cutoff)
+        # Stabile Sortierung -> gleiche Reihenfolge wie eine Schleife mit sort(reverse=True)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(self.records[i], float(scores[i])) for i in order if scores[i] > 0 and scores[i] >= score_cutoff]
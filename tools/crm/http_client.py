@@ -0,0 +1,339 @@
+"""
+Pooled HTTP Client für CRM Adapter
+
+Ein langlebiger requests.Session pro Adapter statt requests.request() pro Call:
+- Connection Pool (Keep-Alive) -> kein TCP/TLS Handshake pro Tool-Call
+- Idle-Recycling: Nach längerer Inaktivität wird der Pool neu aufgebaut
+  (Server schließen idle Connections, sonst gibt's "Connection reset")
+- Retries mit Jitter-Backoff bei 5xx / Verbindungsfehlern
+  (POST nur bei Connect-Fehlern - sonst Gefahr von Duplikaten)
+- Timing-Metriken pro Endpoint (z.B. "GET people/{id}")
+- Async-Variante (arequest) auf einem geteilten httpx.AsyncClient pro Event Loop,
+  gleiche Retry-Policy, gleiche Metriken; close()/aclose() schließen alle Clients
+- Optionaler RateGovernor (rate_limit.py): Token Bucket pro Workspace,
+  Retry-After / X-RateLimit-* Auswertung, 429 wird nach der Pause wiederholt
+- Optionaler CircuitBreaker (circuit_breaker.py): Verbindungsfehler/5xx öffnen den
+  Circuit, danach scheitert jeder Versuch sofort mit CrmUnavailable
+
+Konfiguration via ENV (Prefix pro CRM, z.B. TWENTY_):
+    {PREFIX}_HTTP_POOL_SIZE               Max. Connections im Pool (Default: 10)
+    {PREFIX}_HTTP_KEEPALIVE_IDLE_SECONDS  Pool-Recycling nach Inaktivität (Default: 60)
+    {PREFIX}_HTTP_TIMEOUT                 Timeout pro Request in Sekunden (Default: 10)
+    {PREFIX}_HTTP_RETRIES                 Zusätzliche Versuche (Default: 2)
+    {PREFIX}_HTTP_BACKOFF_SECONDS         Basis-Backoff, exponentiell + Jitter (Default: 0.3)
+"""
+
+import os
+import re
+import time
+import random
+import asyncio
+import threading
+import weakref
+from dataclasses import dataclass
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from .rate_limit import RateGovernor, governed, agoverned
+from .circuit_breaker import CircuitBreaker
+
+RETRYABLE_STATUS = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "PATCH", "DELETE"}
+
+_ID_SEGMENT = re.compile(r"^(?:[0-9a-fA-F-]{20,}|\d{6,})$")
+
+
+def _env_number(name: str, default, cast):
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return cast(value)
+    except ValueError:
+        print(f"⚠️ Ungültiger Wert für {name}='{value}', nutze Default {default}")
+        return default
+
+
+@dataclass
+class HttpClientConfig:
+    """Pool-, Timeout- und Retry-Einstellungen"""
+    pool_size: int = 10
+    keepalive_idle_seconds: float = 60.0
+    timeout: float = 10.0
+    retries: int = 2
+    backoff_seconds: float = 0.3
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "HttpClientConfig":
+        defaults = cls()
+        return cls(
+            pool_size=max(1, _env_number(f"{prefix}_HTTP_POOL_SIZE", defaults.pool_size, int)),
+            keepalive_idle_seconds=_env_number(f"{prefix}_HTTP_KEEPALIVE_IDLE_SECONDS", defaults.keepalive_idle_seconds, float),
+            timeout=_env_number(f"{prefix}_HTTP_TIMEOUT", defaults.timeout, float),
+            retries=max(0, _env_number(f"{prefix}_HTTP_RETRIES", defaults.retries, int)),
+            backoff_seconds=_env_number(f"{prefix}_HTTP_BACKOFF_SECONDS", defaults.backoff_seconds, float),
+        )
+
+
+def endpoint_key(method: str, path: str) -> str:
+    """
+    Normalisiert einen Pfad für Metriken: IDs werden zu {id}.
+
+    Example:
+        endpoint_key("GET", "people/1f0e...") -> "GET people/{id}"
+    """
+    path = path.split("?", 1)[0].strip("/")
+    segments = ["{id}" if _ID_SEGMENT.match(s) else s for s in path.split("/") if s]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+class CrmHttpClient:
+    """Thread-safer Session-Wrapper mit Pool, Retries und Metriken"""
+
+    def __init__(self, base_url: str, headers: dict = None, config: HttpClientConfig = None, name: str = "crm",
+                 governor: RateGovernor = None, breaker: CircuitBreaker = None):
+        self.base_url = base_url.rstrip("/")
+        self.headers = dict(headers or {})
+        self.config = config or HttpClientConfig()
+        self.name = name
+        self.governor = governor
+        self.breaker = breaker
+
+        self._lock = threading.Lock()
+        self._session = None
+        self._last_used = 0.0
+        self._metrics: dict[str, dict] = {}
+        self.sessions_created = 0
+        # Event Loop -> AsyncClient (weak: Client fällt mit seinem Loop weg)
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    # === SESSION ===
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.config.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.headers)
+        self.sessions_created += 1
+        return session
+
+    def _get_session(self) -> requests.Session:
+        """Liefert die Session, recycelt den Pool nach zu langer Inaktivität"""
+        with self._lock:
+            now = time.monotonic()
+            idle = now - self._last_used
+            if self._session is not None and self.config.keepalive_idle_seconds > 0 \
+                    and idle > self.config.keepalive_idle_seconds:
+                print(f"🔄 {self.name}: HTTP Pool nach {idle:.0f}s Inaktivität neu aufgebaut")
+                self._session.close()
+                self._session = None
+            if self._session is None:
+                self._session = self._new_session()
+            self._last_used = now
+            return self._session
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """
+        Geteilter AsyncClient für den laufenden Event Loop.
+        httpx-Connections sind an ihren Loop gebunden -> ein Client pro Loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    headers=self.headers,
+                    timeout=self.config.timeout,
+                    limits=httpx.Limits(
+                        max_connections=self.config.pool_size,
+                        max_keepalive_connections=self.config.pool_size,
+                        keepalive_expiry=self.config.keepalive_idle_seconds or None,
+                    ),
+                )
+                self._async_clients[loop] = client
+                self.sessions_created += 1
+            return client
+
+    def _pop_async_clients(self) -> list:
+        with self._lock:
+            clients = list(self._async_clients.items())
+            self._async_clients.clear()
+            return clients
+
+    @staticmethod
+    def _close_on_loop(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient):
+        """Schließt einen Client auf seinem eigenen Loop (Connections gehören zu diesem Loop)"""
+        if loop.is_closed():
+            return  # Sockets sind mit dem Loop bereits verwaist, nichts mehr zu awaiten
+        try:
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            else:
+                loop.run_until_complete(client.aclose())
+        except RuntimeError as e:
+            print(f"⚠️ AsyncClient konnte nicht geschlossen werden: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+        for loop, client in self._pop_async_clients():
+            self._close_on_loop(loop, client)
+
+    async def aclose(self):
+        current = asyncio.get_running_loop()
+        for loop, client in self._pop_async_clients():
+            if loop is current:
+                await client.aclose()
+            else:
+                self._close_on_loop(loop, client)
+
+    # === REQUESTS ===
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponentieller Backoff mit Full-Jitter"""
+        return random.uniform(0, self.config.backoff_seconds * (2 ** attempt))
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Führt einen Request gegen base_url/path aus.
+
+        Retries bei 5xx (idempotente Methoden) und Verbindungsfehlern.
+        Nach dem letzten Versuch wird die Response (auch 5xx) zurückgegeben
+        bzw. die Exception weitergereicht.
+        """
+        method = method.upper()
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        kwargs.setdefault("timeout", self.config.timeout)
+        key = endpoint_key(method, path)
+        idempotent = method in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            if self.breaker is not None:
+                self.breaker.before_call()
+            started = time.perf_counter()
+            try:
+                response = governed(self.governor, lambda: self._get_session().request(method, url, **kwargs))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record(key, time.perf_counter() - started, error=True)
+                self._record_outcome(error=type(e).__name__)
+                # POST nur wiederholen, wenn die Verbindung gar nicht zustande kam
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                if not retryable or attempt >= self.config.retries:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"⚠️ {self.name}: {key} fehlgeschlagen ({type(e).__name__}), Retry in {delay:.2f}s")
+            else:
+                status = response.status_code
+                failed = isinstance(status, int) and status >= 400
+                self._record(key, time.perf_counter() - started, error=failed)
+                self._record_outcome(status=status)
+                if status not in RETRYABLE_STATUS or not idempotent or attempt >= self.config.retries:
+                    return response
+                delay = self._backoff(attempt)
+                print(f"⚠️ {self.name}: {key} -> HTTP {status}, Retry in {delay:.2f}s")
+
+            attempt += 1
+            self._count_retry(key)
+            time.sleep(delay)
+
+    async def arequest(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Async-Variante von request() (httpx), gleiche Retry-Policy"""
+        method = method.upper()
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        key = endpoint_key(method, path)
+        idempotent = method in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            if self.breaker is not None:
+                await self.breaker.abefore_call()
+            started = time.perf_counter()
+            try:
+                response = await agoverned(self.governor, lambda: self._get_async_client().request(method, url, **kwargs))
+            except httpx.TransportError as e:
+                self._record(key, time.perf_counter() - started, error=True)
+                self._record_outcome(error=type(e).__name__)
+                # POST nur wiederholen, wenn die Verbindung gar nicht zustande kam
+                retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if not retryable or attempt >= self.config.retries:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"⚠️ {self.name}: {key} fehlgeschlagen ({type(e).__name__}), Retry in {delay:.2f}s")
+            else:
+                status = response.status_code
+                self._record(key, time.perf_counter() - started, error=status >= 400)
+                self._record_outcome(status=status)
+                if status not in RETRYABLE_STATUS or not idempotent or attempt >= self.config.retries:
+                    return response
+                delay = self._backoff(attempt)
+                print(f"⚠️ {self.name}: {key} -> HTTP {status}, Retry in {delay:.2f}s")
+
+            attempt += 1
+            self._count_retry(key)
+            await asyncio.sleep(delay)
+
+    def _record_outcome(self, status=None, error: str = None):
+        """Ergebnis eines Versuchs an den Circuit Breaker melden"""
+        if self.breaker is None:
+            return
+        if error:
+            self.breaker.record_failure(error)
+        else:
+            self.breaker.record_status(status)
+
+    def probe(self, path: str, **kwargs) -> bool:
+        """
+        Health-Probe für den Circuit Breaker: ein einzelner Versuch ohne Retries/Breaker.
+        Jede Antwort unter 500 zählt als erreichbar.
+        """
+        kwargs.setdefault("timeout", min(self.config.timeout, 5.0))
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        response = governed(self.governor, lambda: self._get_session().request("GET", url, **kwargs))
+        return response.status_code < 500
+
+    # === METRICS ===
+
+    def _stats(self, key: str) -> dict:
+        stats = self._metrics.get(key)
+        if stats is None:
+            stats = {"count": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0}
+            self._metrics[key] = stats
+        return stats
+
+    def _record(self, key: str, seconds: float, error: bool):
+        ms = seconds * 1000
+        with self._lock:
+            stats = self._stats(key)
+            stats["count"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            if error:
+                stats["errors"] += 1
+
+    def _count_retry(self, key: str):
+        with self._lock:
+            self._stats(key)["retries"] += 1
+
+    def get_metrics(self) -> dict:
+        """Timing-Metriken pro Endpoint (count, errors, retries, avg_ms, max_ms)"""
+        with self._lock:
+            return {
+                key: {
+                    "count": s["count"],
+                    "errors": s["errors"],
+                    "retries": s["retries"],
+                    "avg_ms": round(s["total_ms"] / s["count"], 1) if s["count"] else 0.0,
+                    "max_ms": round(s["max_ms"], 1),
+                }
+                for key, s in sorted(self._metrics.items())
+            }
+
+    def reset_metrics(self):
+        with self._lock:
+            self._metrics.clear()
@@ -0,0 +1,348 @@
+"""
+Rate Governor für CRM APIs (pro Workspace geteilt)
+
+Twenty und Zoho begrenzen Requests pro Zeitfenster. Statt in 429-Fehler zu laufen
+und dem User "❌ Fehler" zu zeigen, geht jeder Request durch einen Governor:
+
+- Token Bucket passend zur API-Quote (rate/s, burst)
+- Faire Warteschlange: Wartende Requests werden reihum pro User bedient
+  (ein User mit 50 Requests blockiert nicht die anderen)
+- Server-Feedback: Retry-After bzw. X-RateLimit-Remaining/-Reset pausieren den
+  Bucket, bis das CRM wieder Budget hat
+- 429 wird (auch für POST - der Request wurde nicht verarbeitet) nach der
+  Pause wiederholt, bis rate_limit_retries erreicht ist
+- Metriken: Wartezeiten, 429-Antworten, zuletzt gemeldetes Restbudget
+
+Der User kommt aus einem ContextVar (set_rate_limit_user, z.B. im CRM-Node).
+Ein Governor gilt pro Prozess; bei mehreren Workern die Quote entsprechend aufteilen.
+
+Konfiguration via ENV (Prefix pro CRM, z.B. TWENTY_):
+    {PREFIX}_RATE_LIMIT_ENABLED         Governor nutzen (Default: true)
+    {PREFIX}_RATE_LIMIT_PER_MINUTE      Quote (Default: Twenty 100, Zoho 100)
+    {PREFIX}_RATE_LIMIT_BURST           Max. Requests am Stück (Default: 10)
+    {PREFIX}_RATE_LIMIT_MAX_WAIT        Max. Wartezeit in der Queue in Sekunden (Default: 30)
+    {PREFIX}_RATE_LIMIT_RETRIES         Wiederholungen nach 429 (Default: 3)
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Mapping, Optional
+
+DEFAULT_USER = "default"
+
+_current_user: ContextVar[str] = ContextVar("crm_rate_limit_user", default=DEFAULT_USER)
+
+
+def set_rate_limit_user(user_id: Optional[str]):
+    """Setzt den User für die faire Queue (gilt für den aktuellen Kontext / Task)"""
+    return _current_user.set(user_id or DEFAULT_USER)
+
+
+def reset_rate_limit_user(token):
+    _current_user.reset(token)
+
+
+class RateLimitExceeded(Exception):
+    """Request hat länger als max_wait_seconds auf Budget gewartet"""
+
+
+@dataclass
+class RateLimitConfig:
+    """Quote + Queue-Verhalten"""
+    enabled: bool = True
+    per_minute: float = 100.0
+    burst: int = 10
+    max_wait_seconds: float = 30.0
+    retries: int = 3
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+    @classmethod
+    def from_env(cls, prefix: str, per_minute: float = None) -> "RateLimitConfig":
+        defaults = cls(per_minute=per_minute or cls.per_minute)
+
+        def number(name, default, cast):
+            try:
+                return cast(os.getenv(f"{prefix}_{name}", default))
+            except ValueError:
+                print(f"⚠️ Ungültiger Wert für {prefix}_{name}, nutze Default {default}")
+                return default
+
+        return cls(
+            enabled=os.getenv(f"{prefix}_RATE_LIMIT_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off"),
+            per_minute=max(1.0, number("RATE_LIMIT_PER_MINUTE", defaults.per_minute, float)),
+            burst=max(1, number("RATE_LIMIT_BURST", defaults.burst, int)),
+            max_wait_seconds=number("RATE_LIMIT_MAX_WAIT", defaults.max_wait_seconds, float),
+            retries=max(0, number("RATE_LIMIT_RETRIES", defaults.retries, int)),
+        )
+
+
+def _header(headers: Mapping, *names: str) -> Optional[str]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return str(value)
+    return None
+
+
+def _seconds_until(value: Optional[str], now: float) -> Optional[float]:
+    """
+    Retry-After / X-RateLimit-Reset -> Sekunden ab jetzt.
+    Akzeptiert Sekunden, Unix-Zeit (s oder ms) und HTTP-Datum.
+    """
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - now)
+        except (TypeError, ValueError):
+            return None
+    if number > 1e12:      # Unix-Zeit in ms (Zoho)
+        return max(0.0, number / 1000 - now)
+    if number > 1e9:       # Unix-Zeit in s
+        return max(0.0, number - now)
+    return max(0.0, number)
+
+
+class _Waiter:
+    """Ein wartender Request (Thread oder Coroutine)"""
+    __slots__ = ("user", "granted", "event", "loop", "async_event")
+
+    def __init__(self, user: str, loop: asyncio.AbstractEventLoop = None):
+        self.user = user
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.async_event = asyncio.Event() if loop else None
+
+    def notify(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.async_event.set)
+
+
+class RateGovernor:
+    """Token Bucket + faire Queue pro User + Pausen aus Server-Headern"""
+
+    _registry: dict = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str, config: RateLimitConfig = None):
+        self.name = name
+        self.config = config or RateLimitConfig()
+        self._lock = threading.Lock()
+        self._tokens = float(self.config.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queues: OrderedDict = OrderedDict()
+        self._metrics = {
+            "granted": 0, "queued": 0, "timeouts": 0, "throttled": 0,
+            "wait_total_ms": 0.0, "wait_max_ms": 0.0,
+            "remaining": None, "limit": None,
+        }
+
+    @classmethod
+    def for_workspace(cls, key: str, config: RateLimitConfig = None, name: str = None) -> "RateGovernor":
+        """Ein Governor pro CRM-Workspace (z.B. Base-URL), geteilt von allen Clients des Prozesses"""
+        with cls._registry_lock:
+            governor = cls._registry.get(key)
+            if governor is None:
+                governor = cls(name or key, config)
+                cls._registry[key] = governor
+            return governor
+
+    # === BUCKET ===
+
+    def _refill(self, now: float):
+        self._tokens = min(float(self.config.burst), self._tokens + (now - self._updated) * self.config.rate)
+        self._updated = now
+
+    def _dispatch(self, now: float) -> float:
+        """Vergibt Tokens reihum an die Queues (unter Lock). Returns: Sekunden bis zum nächsten Versuch."""
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        while self._queues and self._tokens >= 1:
+            user, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            del self._queues[user]
+            if queue:
+                self._queues[user] = queue  # Ans Ende -> Round Robin über User
+            self._tokens -= 1
+            waiter.granted = True
+            waiter.notify()
+        return max((1 - self._tokens) / self.config.rate, 0.001)
+
+    def _enqueue(self, waiter: _Waiter, now: float) -> float:
+        with self._lock:
+            self._refill(now)
+            if not self._queues and self._tokens >= 1 and now >= self._paused_until:
+                self._tokens -= 1
+                waiter.granted = True
+                return 0.0
+            self._queues.setdefault(waiter.user, deque()).append(waiter)
+            self._metrics["queued"] += 1
+            return min(self._dispatch(now), self.config.max_wait_seconds)
+
+    def _poll(self, waiter: _Waiter, started: float) -> float:
+        """Nächster Dispatch; wirft RateLimitExceeded nach max_wait_seconds"""
+        now = time.monotonic()
+        with self._lock:
+            delay = self._dispatch(now)
+            if waiter.granted:
+                return 0.0
+            if now - started >= self.config.max_wait_seconds:
+                queue = self._queues.get(waiter.user)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._queues[waiter.user]
+                self._metrics["timeouts"] += 1
+                raise RateLimitExceeded(f"{self.name}: CRM-Limit erreicht, kein Budget nach {self.config.max_wait_seconds:.0f}s")
+            return min(delay, self.config.max_wait_seconds - (now - started))
+
+    def _record_wait(self, started: float):
+        waited = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._metrics["granted"] += 1
+            self._metrics["wait_total_ms"] += waited
+            self._metrics["wait_max_ms"] = max(self._metrics["wait_max_ms"], waited)
+
+    def acquire(self, user: str = None):
+        """Blockiert, bis ein Token frei ist (Threads)"""
+        if not self.config.enabled:
+            return
+        started = time.monotonic()
+        waiter = _Waiter(user or _current_user.get())
+        delay = self._enqueue(waiter, started)
+        while not waiter.granted:
+            waiter.event.wait(delay)
+            waiter.event.clear()
+            delay = self._poll(waiter, started)
+        self._record_wait(started)
+
+    async def aacquire(self, user: str = None):
+        """Wartet auf dem Event Loop, bis ein Token frei ist"""
+        if not self.config.enabled:
+            return
+        started = time.monotonic()
+        waiter = _Waiter(user or _current_user.get(), loop=asyncio.get_running_loop())
+        delay = self._enqueue(waiter, started)
+        while not waiter.granted:
+            try:
+                await asyncio.wait_for(waiter.async_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            waiter.async_event.clear()
+            delay = self._poll(waiter, started)
+        self._record_wait(started)
+
+    # === SERVER-FEEDBACK ===
+
+    def pause(self, seconds: float):
+        """Kein Budget bis now + seconds (Retry-After / Reset)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+    def observe(self, status: Any, headers: Any) -> Optional[float]:
+        """
+        Wertet Rate-Limit-Header einer Response aus.
+
+        Returns:
+            Wartezeit in Sekunden, wenn der Request wiederholt werden soll (429), sonst None
+        """
+        if not self.config.enabled or not isinstance(headers, Mapping):
+            return None
+        now = time.time()
+        remaining = _header(headers, "X-RateLimit-Remaining", "X-RATELIMIT-REMAINING", "x-ratelimit-remaining")
+        limit = _header(headers, "X-RateLimit-Limit", "X-RATELIMIT-LIMIT", "x-ratelimit-limit")
+        reset = _seconds_until(_header(headers, "X-RateLimit-Reset", "X-RATELIMIT-RESET", "x-ratelimit-reset"), now)
+
+        with self._lock:
+            if limit is not None:
+                self._metrics["limit"] = limit
+            if remaining is not None:
+                self._metrics["remaining"] = remaining
+                try:
+                    # Budget laut Server kleiner als unser Bucket -> angleichen
+                    self._tokens = min(self._tokens, float(remaining))
+                except ValueError:
+                    pass
+
+        if status == 429:
+            delay = _seconds_until(_header(headers, "Retry-After", "retry-after"), now)
+            delay = delay if delay is not None else (reset if reset is not None else 1.0 / self.config.rate)
+            with self._lock:
+                self._metrics["throttled"] += 1
+            print(f"⏳ {self.name}: HTTP 429, pausiere {delay:.1f}s")
+            self.pause(delay)
+            return delay
+        if remaining is not None and remaining.strip() in ("0", "0.0") and reset:
+            self.pause(reset)
+        return None
+
+    # === METRIKEN ===
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            granted = self._metrics["granted"]
+            return {
+                "per_minute": self.config.per_minute,
+                "burst": self.config.burst,
+                "tokens": round(self._tokens, 2),
+                "paused_seconds": round(max(0.0, self._paused_until - time.monotonic()), 2),
+                "waiting": sum(len(q) for q in self._queues.values()),
+                "waiting_users": len(self._queues),
+                "granted": granted,
+                "queued": self._metrics["queued"],
+                "timeouts": self._metrics["timeouts"],
+                "throttled": self._metrics["throttled"],
+                "avg_wait_ms": round(self._metrics["wait_total_ms"] / granted, 1) if granted else 0.0,
+                "max_wait_ms": round(self._metrics["wait_max_ms"], 1),
+                "server_remaining": self._metrics["remaining"],
+                "server_limit": self._metrics["limit"],
+            }
+
+
+def governed(governor: Optional[RateGovernor], send: Callable[[], Any]) -> Any:
+    """
+    Führt send() unter dem Governor aus (Token holen, Header auswerten, 429 wiederholen).
+    Nach dem letzten Versuch wird die 429-Response zurückgegeben.
+    """
+    if governor is None or not governor.config.enabled:
+        return send()
+    attempt = 0
+    while True:
+        governor.acquire()
+        response = send()
+        delay = governor.observe(getattr(response, "status_code", None), getattr(response, "headers", None))
+        if delay is None or attempt >= governor.config.retries:
+            return response
+        attempt += 1
+
+
+async def agoverned(governor: Optional[RateGovernor], send: Callable[[], Awaitable[Any]]) -> Any:
+    """Async-Variante von governed()"""
+    if governor is None or not governor.config.enabled:
+        return await send()
+    attempt = 0
+    while True:
+        await governor.aacquire()
+        response = await send()
+        delay = governor.observe(getattr(response, "status_code", None), getattr(response, "headers", None))
+        if delay is None or attempt >= governor.config.retries:
+            return response
+        attempt += 1
@@ -0,0 +1,170 @@
+"""
+Memo für Name -> ID Auflösungen (_resolve_target_id)
+
+"Notiz an Thomas, dann Task an Thomas" hat bisher zweimal denselben Namen
+aufgelöst (Index-Sync bzw. Voll-Scan). Aufgelöste Paare werden jetzt gemerkt:
+
+- Session-Memo: Pro Thread im Graph-State (AdizonState.resolved_targets),
+  der CRM-Node stellt es über use_session_memo() für die Tool-Calls bereit
+- Adapter-Memo: Prozessweit mit kurzer TTL (gleicher Name aus anderen Threads)
+- Suchtreffer (search_contacts) werden ebenfalls gemerkt, mehrdeutige Namen nicht
+- Deletes entfernen die ID aus beiden Memos (Session-Memos anderer Threads
+  ignorieren kürzlich gelöschte IDs)
+
+Konfiguration via ENV (Prefix pro CRM, z.B. TWENTY_):
+    {PREFIX}_RESOLVE_MEMO_ENABLED         Memo nutzen (Default: true)
+    {PREFIX}_RESOLVE_MEMO_TTL_SECONDS     Gültigkeit im Adapter-Memo (Default: 300)
+    {PREFIX}_RESOLVE_SESSION_TTL_SECONDS  Gültigkeit im Session-Memo (Default: 3600)
+    {PREFIX}_RESOLVE_MEMO_MAX_ENTRIES     Max. Einträge im Adapter-Memo (Default: 1000)
+"""
+
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+_session_memo: ContextVar[Optional[dict]] = ContextVar("crm_resolve_memo", default=None)
+
+# Wie viele gelöschte IDs gemerkt werden (für Session-Memos anderer Threads)
+DELETED_IDS_LIMIT = 1000
+
+
+def use_session_memo(memo: Optional[dict]):
+    """Session-Memo (dict aus dem Graph-State) für den aktuellen Kontext setzen - wird in-place ergänzt"""
+    return _session_memo.set(memo)
+
+
+def reset_session_memo(token):
+    _session_memo.reset(token)
+
+
+def memo_key(entity_type: str, query: str) -> str:
+    """ "person", " Thomas  BRAUN " -> "person:thomas braun" """
+    normalized = re.sub(r"\s+", " ", (query or "").strip()).casefold()
+    return f"{entity_type}:{normalized}"
+
+
+@dataclass
+class ResolveConfig:
+    """TTLs und Größe des Memos"""
+    enabled: bool = True
+    ttl_seconds: float = 300.0
+    session_ttl_seconds: float = 3600.0
+    max_entries: int = 1000
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "ResolveConfig":
+        defaults = cls()
+
+        def number(name, default, cast):
+            try:
+                return cast(os.getenv(f"{prefix}_{name}", default))
+            except ValueError:
+                print(f"⚠️ Ungültiger Wert für {prefix}_{name}, nutze Default {default}")
+                return default
+
+        return cls(
+            enabled=os.getenv(f"{prefix}_RESOLVE_MEMO_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off"),
+            ttl_seconds=number("RESOLVE_MEMO_TTL_SECONDS", defaults.ttl_seconds, float),
+            session_ttl_seconds=number("RESOLVE_SESSION_TTL_SECONDS", defaults.session_ttl_seconds, float),
+            max_entries=max(1, number("RESOLVE_MEMO_MAX_ENTRIES", defaults.max_entries, int)),
+        )
+
+
+class ResolveCache:
+    """Session-Memo (Graph-State) + Adapter-Memo (TTL, LRU), thread-safe"""
+
+    def __init__(self, crm: str, config: ResolveConfig = None):
+        self.crm = crm
+        self.config = config or ResolveConfig()
+        self._entries: OrderedDict = OrderedDict()   # key -> (entity_id, score, expires_at)
+        self._deleted: OrderedDict = OrderedDict()   # entity_id -> None
+        self._lock = threading.Lock()
+        self.session_hits = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, entity_type: str, query: str) -> Optional[str]:
+        """Gemerkte ID oder None (Session-Memo zuerst)"""
+        if not self.config.enabled or not query:
+            return None
+        key = memo_key(entity_type, query)
+        memo = _session_memo.get()
+        entry = memo.get(key) if memo is not None else None
+        with self._lock:
+            if entry and entry.get("entity_id") not in self._deleted \
+                    and time.time() - entry.get("at", 0) <= self.config.session_ttl_seconds:
+                self.session_hits += 1
+                print(f"🧠 Resolve aus Session-Memo: '{query}' -> {entry['entity_id']}")
+                return entry["entity_id"]
+            cached = self._entries.get(key)
+            if cached and cached[2] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._remember_session(key, entity_type, cached[0], cached[1])
+                print(f"🧠 Resolve aus Adapter-Memo: '{query}' -> {cached[0]}")
+                return cached[0]
+            self.misses += 1
+            return None
+
+    def _remember_session(self, key: str, entity_type: str, entity_id: str, score: float):
+        memo = _session_memo.get()
+        if memo is not None:
+            memo.pop(key, None)  # Neueste zuletzt (Reducer kappt von vorne)
+            memo[key] = {"entity_type": entity_type, "entity_id": entity_id, "score": score, "at": time.time()}
+
+    def remember(self, entity_type: str, query: str, entity_id: Optional[str], score: float = 100.0):
+        """Aufgelöstes Paar in beiden Memos ablegen"""
+        if not self.config.enabled or not query or not entity_id:
+            return
+        key = memo_key(entity_type, query)
+        with self._lock:
+            self._deleted.pop(entity_id, None)
+            self._entries[key] = (entity_id, score, time.monotonic() + self.config.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.config.max_entries:
+                self._entries.popitem(last=False)
+            self._remember_session(key, entity_type, entity_id, score)
+
+    def remember_hits(self, entity_type: str, hits: Iterable[tuple[str, str]]):
+        """
+        Suchtreffer (Name bzw. E-Mail, ID) merken. Namen, die auf mehrere IDs
+        zeigen (zwei "Thomas Braun"), werden übersprungen.
+        """
+        by_key: dict = {}
+        for label, entity_id in hits:
+            if label and entity_id:
+                by_key.setdefault(memo_key(entity_type, label), (label, set()))[1].add(entity_id)
+        for label, ids in by_key.values():
+            if len(ids) == 1:
+                self.remember(entity_type, label, next(iter(ids)))
+
+    def forget_id(self, entity_id: str):
+        """Nach Delete: ID aus allen Memos entfernen"""
+        if not entity_id:
+            return
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if v[0] == entity_id]:
+                del self._entries[key]
+            self._deleted[entity_id] = None
+            while len(self._deleted) > DELETED_IDS_LIMIT:
+                self._deleted.popitem(last=False)
+        memo = _session_memo.get()
+        if memo is not None:
+            for key in [k for k, v in memo.items() if v.get("entity_id") == entity_id]:
+                memo.pop(key, None)
+
+    def get_metrics(self) -> dict:
+        lookups = self.session_hits + self.hits + self.misses
+        return {
+            "enabled": self.config.enabled,
+            "size": len(self._entries),
+            "session_hits": self.session_hits,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round((self.session_hits + self.hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -1,14 +1,175 @@
 """
 Twenty CRM Adapter - PRODUCTION GRADE
 Strict Filtering, Real Relations, Scalable, Fuzzy-Search, Dynamic Field Enrichment.
+
+Sync + Async:
+Jede Operation ist einmal implementiert (a*-Methode). Die Sync-Methode ist ein
+dünner Shim darüber (_run_sync), der die I/O statt über httpx.AsyncClient über den
+requests-Pool (_request) führt - eine Implementierung, zwei Transporte:
+
+    adapter.search_contacts("Braun")           # Sync (Thread)
+    await adapter.asearch_contacts("Braun")    # Async (Event Loop)
 """
 import os
+import time
+import asyncio
 import requests
 import json
+import uuid
 import traceback
-from typing import Optional, Dict, List, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
+from contextvars import ContextVar
+from typing import Optional, Dict, List, Tuple, Awaitable, Callable
+import numpy as np
 from rapidfuzz import fuzz
 from .field_mapping_loader import load_field_mapping
+from .fuzzy_rank import CandidateColumns
+from .http_client import CrmHttpClient, HttpClientConfig
+from .rate_limit import RateGovernor, RateLimitConfig
+from .circuit_breaker import CircuitBreaker, BreakerConfig
+from .resolve_cache import ResolveCache, ResolveConfig
+from .contact_index import ContactIndex, IndexConfig, normalize_key
+from .entity_cache import EntityCache, CacheConfig
+from .twenty_webhook import parse_event, DELETE_ACTIONS
+from .bulk_contacts import prepare_contacts, format_bulk_result, outcome, email_key
+from .duplicate_check import DuplicateConfig, duplicate_keys, find_duplicates, format_duplicates
+
+
+@dataclass
+class PageScan:
+    """Cursor-Scan über einen Endpoint. on_page(items) -> True bricht den Scan ab."""
+    endpoint: str
+    on_page: Callable[[list], bool]
+    params: Optional[dict] = None
+    cursor: Optional[str] = None
+    done: bool = False
+    failed: bool = False
+
+
+# Gesetzt im Sync-Shim: I/O über requests statt httpx (siehe _run_sync)
+_sync_transport: ContextVar[bool] = ContextVar("twenty_sync_transport", default=False)
+
+
+def _run_sync(coro: Awaitable):
+    """
+    Sync-Shim: Führt eine a*-Methode im aufrufenden Thread aus.
+    
+    Mit gesetztem _sync_transport laufen alle I/O-Aufrufe (_send, _cache, _gather, ...)
+    blockierend über den requests-Pool - die Coroutine wartet nie auf den Event Loop
+    und ist nach einem send() fertig. Funktioniert daher auch im Thread-Pool von
+    LangGraph und innerhalb eines laufenden Event Loops.
+    """
+    token = _sync_transport.set(True)
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    finally:
+        _sync_transport.reset(token)
+    coro.close()
+    raise RuntimeError("Sync-Shim: Coroutine hat auf den Event Loop gewartet")
+
+
+# Index-Entity -> REST-Endpoint
+INDEX_ENDPOINTS = {"person": "people", "company": "companies"}
+
+# Target-Relation (taskTargets/noteTargets) -> Entity / Anzeige
+TARGET_ENTITIES = {"personId": "person", "companyId": "company"}
+TARGET_LABELS = {"personId": "Kontakt", "companyId": "Firma"}
+
+# Werte pro [in]-Filter beim Duplikat-Check (Länge der Query-URL)
+EMAIL_FILTER_CHUNK = 50
+
+
+def _primary_email(item: dict) -> str:
+    emails = item.get('emails') or {}
+    if isinstance(emails, list):
+        return emails[0].get('primaryEmail', '') if emails else ""
+    return emails.get('primaryEmail', '') if isinstance(emails, dict) else ""
+
+
+def _compact_record(entity: str, item: dict) -> dict:
+    """Reduziert einen Twenty-Datensatz auf die Felder für Suche/Resolve"""
+    if entity == "company":
+        return {"id": item.get("id"), "name": item.get("name") or "", "updatedAt": item.get("updatedAt")}
+    name = item.get("name") or {}
+    return {
+        "id": item.get("id"),
+        "name": {"firstName": name.get("firstName") or "", "lastName": name.get("lastName") or ""},
+        "emails": {"primaryEmail": _primary_email(item)},
+        "companyId": item.get("companyId"),
+        "updatedAt": item.get("updatedAt"),
+    }
+
+
+def _person_keys(record: dict) -> list[str]:
+    name = record.get("name") or {}
+    full_name = f"{name.get('firstName', '')} {name.get('lastName', '')}"
+    return [normalize_key(full_name), normalize_key(_primary_email(record)),
+            *duplicate_keys(name.get('firstName'), name.get('lastName'), _primary_email(record))]
+
+
+def _company_keys(record: dict) -> list[str]:
+    return [normalize_key(record.get("name"))]
+
+
+def _full_name(item: dict) -> str:
+    name_obj = item.get('name') or {}
+    return f"{name_obj.get('firstName', '')} {name_obj.get('lastName', '')}".strip()
+
+
+def _candidate_columns(entity: str, items: list[dict]) -> CandidateColumns:
+    """Spalten für das Fuzzy-Ranking (person: name + email, company: name)"""
+    if entity == "company":
+        return CandidateColumns(items, {"name": lambda c: c.get('name') or ''})
+    return CandidateColumns(items, {"name": _full_name, "email": _primary_email})
+
+
+def _filter_value(value: str) -> str:
+    """Entfernt Zeichen, die die Twenty Filter-Syntax brechen würden"""
+    return "".join(c for c in value if c not in '"%,()[]\\').strip()
+
+
+def _query_tokens(query: str) -> list[str]:
+    """Suchbegriffe für ilike-Filter (min. 2 Zeichen, ohne Duplikate)"""
+    tokens = []
+    for token in _filter_value(query).split():
+        if len(token) >= 2 and token.lower() not in (t.lower() for t in tokens):
+            tokens.append(token)
+    return tokens
+
+
+def _prefilter(entity: str, query: str, email_contains: bool = False, company_ids: list = None) -> Optional[str]:
+    """
+    Serverseitiger Vorfilter (Twenty REST filter) aus den Query-Tokens.
+
+    person:  Email -> emails.primaryEmail[eq], sonst name.firstName/lastName[ilike] pro Token
+             (optional zusätzlich Email-Substring und companyId[in] für Kollegen)
+    company: name[ilike] pro Token
+
+    Returns:
+        Filter-String oder None, wenn die Query keine brauchbaren Tokens hat
+    """
+    if entity == "person" and "@" in query and " " not in query.strip():
+        email = _filter_value(query)
+        return f'emails.primaryEmail[eq]:"{email}"' if email else None
+
+    clauses = []
+    for token in _query_tokens(query):
+        if entity == "company":
+            clauses.append(f'name[ilike]:"%{token}%"')
+        else:
+            clauses.append(f'name.firstName[ilike]:"%{token}%"')
+            clauses.append(f'name.lastName[ilike]:"%{token}%"')
+            if email_contains:
+                clauses.append(f'emails.primaryEmail[ilike]:"%{token}%"')
+    if company_ids:
+        clauses.append("companyId[in]:[" + ",".join(f'"{i}"' for i in company_ids) + "]")
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else f"or({','.join(clauses)})"
+
 
 class TwentyCRM:
     def __init__(self):
@@ -30,6 +191,64 @@ class TwentyCRM:
             "Accept": "application/json"
         }
         
+        # Ein Rate-Budget pro Workspace, geteilt von REST und GraphQL
+        self.rate_governor = RateGovernor.for_workspace(
+            f"twenty:{self.base_url}", RateLimitConfig.from_env("TWENTY"), name="Twenty"
+        )
+        
+        # Fast-Fail bei Ausfall (Health-Probe: kleinste People-Seite)
+        self.circuit_breaker = CircuitBreaker(
+            "Twenty", BreakerConfig.from_env("TWENTY"),
+            probe=lambda: self.http.probe("people", params={"limit": 1})
+        )
+        
+        # Persistenter Connection-Pool (Keep-Alive, Retries, Metriken)
+        self.http = CrmHttpClient(
+            f"{self.base_url}/rest", headers=self.headers,
+            config=HttpClientConfig.from_env("TWENTY"), name="Twenty",
+            governor=self.rate_governor, breaker=self.circuit_breaker
+        )
+        
+        # GraphQL für Batch-Writes (Task/Note + Relationen in einem Request)
+        self.graphql_http = CrmHttpClient(
+            self.base_url, headers=self.headers,
+            config=HttpClientConfig.from_env("TWENTY"), name="Twenty GraphQL",
+            governor=self.rate_governor, breaker=self.circuit_breaker
+        )
+        self.batch_writes_enabled = os.getenv("TWENTY_BATCH_WRITES_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+        self.bulk_batch_size = max(1, int(os.getenv("TWENTY_BULK_BATCH_SIZE", "60")))
+        
+        # Lokaler Index für Suche/Resolve (Bootstrap + Delta-Sync lazy beim ersten Zugriff)
+        self.index = ContactIndex(
+            {"person": _person_keys, "company": _company_keys},
+            config=IndexConfig.from_env("TWENTY"), name="Twenty"
+        )
+        self.search_max_results = int(os.getenv("TWENTY_SEARCH_MAX_RESULTS", "25"))
+        
+        # Duplikat-Prüfung vor create_contact (gegen den Index, kein zusätzlicher Request)
+        self.duplicate_config = DuplicateConfig.from_env()
+        
+        # Streaming-Scan ohne Index (Seitengröße, parallele Seiten-Requests über Endpoints)
+        self.scan_page_size = max(1, int(os.getenv("TWENTY_SCAN_PAGE_SIZE", "200")))
+        self.scan_concurrency = max(1, int(os.getenv("TWENTY_SCAN_CONCURRENCY", "2")))
+        self.prefilter_enabled = os.getenv("TWENTY_PREFILTER_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+        
+        # Name -> ID Memo (Session im Graph-State + Adapter mit TTL)
+        self.resolve_cache = ResolveCache("twenty", ResolveConfig.from_env("TWENTY"))
+        
+        # Firmennamen-Cache (ID -> (Name, Ablauf)) für Details/Suchergebnisse ohne N+1 Requests
+        self.company_names: OrderedDict = OrderedDict()
+        self.company_cache_size = max(1, int(os.getenv("TWENTY_COMPANY_CACHE_SIZE", "1000")))
+        self.company_cache_ttl = float(os.getenv("TWENTY_COMPANY_CACHE_TTL_SECONDS", "300"))
+        
+        # Read-Through Cache für Details (invalidiert durch Updates/Deletes/Creates)
+        self.entity_cache = EntityCache("twenty", config=CacheConfig.from_env("TWENTY"))
+        
+        # Webhooks aktiv (POST /crm-events/twenty) -> Delta-Polling nur noch als Sicherheitsnetz
+        if os.getenv("TWENTY_WEBHOOK_SECRET", "").strip():
+            resync_seconds = float(os.getenv("TWENTY_WEBHOOK_RESYNC_SECONDS", "900"))
+            self.index.config.refresh_seconds = max(self.index.config.refresh_seconds, resync_seconds)
+        
         # Field Mapping Loader
         try:
             self.field_mapper = load_field_mapping("twenty")
@@ -82,18 +301,15 @@ class TwentyCRM:
         
         return (best_score >= threshold, float(best_score))
 
-    def _request(self, method: str, endpoint: str, params: dict = None, data: dict = None):
-        """Zentraler Request-Handler mit Error-Management"""
-        url = f"{self.base_url}/rest/{endpoint}"
+    def _request(self, method: str, endpoint: str, params: dict = None, data: dict = None, envelope: bool = False):
+        """Zentraler Request-Handler mit Error-Management (über den gepoolten HTTP-Client)"""
         try:
-            response = requests.request(
-                method, url, headers=self.headers, params=params, json=data, timeout=10
-            )
+            response = self.http.request(method, endpoint, params=params, json=data)
             response.raise_for_status() # Wirft Fehler bei 4xx/5xx
             
             # Twenty kapselt Daten oft in {'data': ...}
             json_resp = response.json()
-            return json_resp.get('data', json_resp)
+            return json_resp if envelope else json_resp.get('data', json_resp)
         except requests.exceptions.HTTPError as e:
             # Detaillierte Fehleranalyse für Logging
             print(f"❌ API Error {e.response.status_code} at {endpoint}: {e.response.text}")
@@ -102,7 +318,234 @@ class TwentyCRM:
             print(f"❌ Network Error at {endpoint}: {e}")
             return None
 
-    def _resolve_target_id(self, target: str, entity_type: str = "person") -> Optional[str]:
+    async def _arequest(self, method: str, endpoint: str, params: dict = None, data: dict = None, envelope: bool = False):
+        """Async Request-Handler (httpx), gleiches Error-Management wie _request"""
+        try:
+            response = await self.http.arequest(method, endpoint, params=params, json=data)
+            if response.status_code >= 400:
+                print(f"❌ API Error {response.status_code} at {endpoint}: {response.text}")
+                return None
+            json_resp = response.json()
+            return json_resp if envelope else json_resp.get('data', json_resp)
+        except Exception as e:
+            print(f"❌ Network Error at {endpoint}: {e}")
+            return None
+
+    def _graphql(self, query: str, variables: dict = None) -> Optional[dict]:
+        """GraphQL-Request (POST /graphql). Fehler einzelner Mutations stehen in 'errors'."""
+        try:
+            response = self.graphql_http.request("POST", "graphql", json={"query": query, "variables": variables or {}})
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.HTTPError as e:
+            print(f"❌ GraphQL Error {e.response.status_code}: {e.response.text}")
+            return None
+        except Exception as e:
+            print(f"❌ Network Error at graphql: {e}")
+            return None
+
+    async def _agraphql(self, query: str, variables: dict = None) -> Optional[dict]:
+        """Async GraphQL-Request, gleiches Error-Management wie _graphql"""
+        try:
+            response = await self.graphql_http.arequest("POST", "graphql", json={"query": query, "variables": variables or {}})
+            if response.status_code >= 400:
+                print(f"❌ GraphQL Error {response.status_code}: {response.text}")
+                return None
+            return response.json()
+        except Exception as e:
+            print(f"❌ Network Error at graphql: {e}")
+            return None
+
+    # === TRANSPORT (Sync-Shim: requests, sonst httpx) ===
+
+    async def _send(self, method: str, endpoint: str, params: dict = None, data: dict = None, envelope: bool = False):
+        if _sync_transport.get():
+            return self._request(method, endpoint, params=params, data=data, envelope=envelope)
+        return await self._arequest(method, endpoint, params=params, data=data, envelope=envelope)
+
+    async def _send_graphql(self, query: str, variables: dict = None) -> Optional[dict]:
+        if _sync_transport.get():
+            return self._graphql(query, variables)
+        return await self._agraphql(query, variables)
+
+    async def _send_raw(self, method: str, endpoint: str):
+        """Rohe Response (Statuscode), z.B. für DELETE"""
+        if _sync_transport.get():
+            return self.http.request(method, endpoint)
+        return await self.http.arequest(method, endpoint)
+
+    async def _cache(self, op: str, *args):
+        """Entity-Cache: op = "get" | "set" | "invalidate" (async: Shared Tier im Thread)"""
+        if _sync_transport.get():
+            return getattr(self.entity_cache, op)(*args)
+        return await getattr(self.entity_cache, f"a{op}")(*args)
+
+    async def _gather(self, *aws) -> list:
+        """Parallel auf dem Event Loop, im Sync-Shim der Reihe nach"""
+        if _sync_transport.get():
+            return [await aw for aw in aws]
+        return list(await asyncio.gather(*aws))
+
+    async def _resolve(self, target: str, entity_type: str = "person") -> Optional[str]:
+        if _sync_transport.get():
+            return self._resolve_target_id(target, entity_type=entity_type)
+        return await self._aresolve_target_id(target, entity_type=entity_type)
+
+    # === LOKALER INDEX ===
+
+    async def _ascan(self, scans: List[PageScan], page_size: int = None):
+        """
+        Streaming-Scan über Twenty Cursor-Pagination (pageInfo.endCursor -> starting_after).
+        
+        Jede Seite geht direkt an scan.on_page und wird nicht gesammelt (konstanter Speicher).
+        Gibt on_page True zurück (z.B. exakter Treffer), endet der Scan vorzeitig.
+        Cursor sind pro Endpoint sequentiell - mehrere Endpoints laufen aber rundenweise
+        parallel (max. scan_concurrency Seiten-Requests gleichzeitig).
+        API-Fehler: scan.failed = True.
+        """
+        page_size = page_size or self.scan_page_size
+        pending = list(scans)
+        while pending:
+            batch = pending[:self.scan_concurrency]
+            steps = []
+            for scan in batch:
+                params = dict(scan.params or {}, limit=page_size)
+                if scan.cursor:
+                    params["starting_after"] = scan.cursor
+                steps.append(self._send("GET", scan.endpoint, params=params, envelope=True))
+            responses = await self._gather(*steps)
+            
+            for scan, response in zip(batch, responses):
+                if response is None:
+                    scan.done = scan.failed = True
+                    continue
+                payload = response.get("data", response) or {}
+                page = payload.get(scan.endpoint, []) if isinstance(payload, dict) else []
+                page_info = response.get("pageInfo") or {}
+                next_cursor = page_info.get("endCursor")
+                stop = bool(page) and scan.on_page(page)
+                if stop or not page or not page_info.get("hasNextPage") or not next_cursor or next_cursor == scan.cursor:
+                    scan.done = True
+                scan.cursor = next_cursor
+            pending = [scan for scan in pending if not scan.done]
+
+    async def _arefresh_index(self, *entities: str):
+        """Bootstrap / Full-Resync bzw. Delta-Sync über updatedAt, falls fällig (Entities parallel)"""
+        jobs = []
+        for entity in entities:
+            mode = self.index.sync_mode(entity)
+            if mode is None:
+                continue
+            self.index.mark_syncing(entity, mode)
+            high_water = self.index.high_water(entity)
+            params = {"filter": f'updatedAt[gte]:"{high_water}"'} if mode == "delta" and high_water else None
+            records = []
+            
+            def collect(page, entity=entity, records=records):
+                records.extend(_compact_record(entity, item) for item in page)
+                return False
+            
+            jobs.append((entity, mode, PageScan(INDEX_ENDPOINTS[entity], on_page=collect, params=params), records))
+        if not jobs:
+            return
+        
+        await self._ascan([scan for _, _, scan, _ in jobs], page_size=self.index.config.page_size)
+        
+        for entity, mode, scan, records in jobs:
+            if scan.failed:
+                continue
+            if mode == "full":
+                self.index.load_full(entity, records)
+            else:
+                self.index.apply_delta(entity, records)
+
+    async def _aindex_records(self, entity: str):
+        """Kandidaten-Spalten aus dem Index (vorher Sync falls fällig). None = Index nicht verfügbar."""
+        if not self.index.config.enabled:
+            return None
+        await self._arefresh_index(entity)
+        if not self.index.is_ready(entity):
+            return None
+        return self.index.columns(entity, lambda records: _candidate_columns(entity, records))
+
+    def _best_resolve_candidate(self, target: str, entity_type: str, columns: CandidateColumns, best: Optional[dict] = None) -> Optional[dict]:
+        """Bester Fuzzy-Kandidat für Resolve (bei Gleichstand gewinnt der erste)"""
+        if entity_type == "company":
+            # Company: Nur nach Name suchen
+            column, threshold, match_type = "name", 70, 'company_name'
+        elif "@" in target:
+            # A) E-Mail Match
+            column, threshold, match_type = "email", 80, 'email'
+        else:
+            # B) Name Match (Fuzzy)
+            column, threshold, match_type = "name", 70, 'person_name'
+        
+        if not len(columns):
+            return best
+        scores = columns.scores(target, column, score_cutoff=threshold)
+        i = int(np.argmax(scores))
+        score = float(scores[i])
+        if score >= threshold and (best is None or score > best['score']):
+            record = columns.records[i]
+            if entity_type == "company":
+                matched = (record.get('name') or '').strip()
+            else:
+                matched = _primary_email(record) if column == "email" else _full_name(record)
+            best = {'id': record.get('id'), 'score': score, 'matched': matched, 'type': match_type}
+        return best
+
+    def _index_upsert(self, entity: str, item: Optional[dict]):
+        """Write-Through nach eigenen Creates/Updates"""
+        if entity in INDEX_ENDPOINTS and isinstance(item, dict) and item.get("id"):
+            self.index.upsert(entity, _compact_record(entity, item))
+            if entity == "company" and "name" in item:
+                self._remember_company(item["id"], item.get("name") or "")
+
+    # === FIRMENNAMEN (Relation person.company) ===
+
+    def _remember_company(self, company_id: str, name: str):
+        self.company_names[company_id] = (name, time.monotonic() + self.company_cache_ttl)
+        self.company_names.move_to_end(company_id)
+        while len(self.company_names) > self.company_cache_size:
+            self.company_names.popitem(last=False)
+
+    def _cached_company_name(self, company_id: str) -> Optional[str]:
+        """Name aus Index oder LRU-Cache, None wenn unbekannt/abgelaufen"""
+        if self.index.config.enabled and self.index.is_ready("company"):
+            record = self.index.get("company", company_id)
+            if record:
+                return record.get("name") or ""
+        entry = self.company_names.get(company_id)
+        if entry and entry[1] > time.monotonic():
+            self.company_names.move_to_end(company_id)
+            return entry[0]
+        return None
+
+    async def _acompany_names(self, company_ids: list):
+        """
+        Firmennamen für mehrere IDs: Cache zuerst, Rest in EINEM Request (id[in]).
+        
+        Returns:
+            Dict company_id -> Name (unbekannte IDs fehlen)
+        """
+        names, missing = {}, []
+        for company_id in dict.fromkeys(i for i in company_ids if i):
+            name = self._cached_company_name(company_id)
+            if name is None:
+                missing.append(company_id)
+            else:
+                names[company_id] = name
+        
+        if missing:
+            id_filter = "id[in]:[" + ",".join(f'"{i}"' for i in missing) + "]"
+            data = (await self._send("GET", "companies", params={"filter": id_filter, "limit": len(missing)})) or {}
+            for company in data.get('companies', []) if isinstance(data, dict) else []:
+                if company.get('id'):
+                    names[company['id']] = company.get('name') or ""
+                    self._remember_company(company['id'], names[company['id']])
+        return names
+
+    async def _aresolve_target_id(self, target: str, entity_type: str = "person"):
         """
         Sucht intelligent nach UUIDs mit Fuzzy-Matching.
         Unterstützt: People und Companies
@@ -123,79 +566,49 @@ class TwentyCRM:
         if len(target) > 20 and " " not in target and "@" not in target:
             return target  # Wir vertrauen, dass es eine ID ist
 
+        # 2. Schon in dieser Session (oder kürzlich) aufgelöst?
+        index_entity = "company" if entity_type == "company" else "person"
+        memoized = self.resolve_cache.lookup(index_entity, target)
+        if memoized:
+            return memoized
+
         print(f"🔍 Fuzzy-Resolve UUID für {entity_type}: '{target}'...")
         
         try:
-            # Endpoint basierend auf entity_type
-            if entity_type == "company":
-                endpoint = "companies"
-                data = self._request("GET", endpoint, params={"limit": 200}) or {}
-                items = data.get('companies', [])
-            else:  # person
-                endpoint = "people"
-                data = self._request("GET", endpoint, params={"limit": 500}) or {}
-                items = data.get('people', [])
-            
-            # Kandidaten mit Scores sammeln
-            candidates = []
-            
-            # 2. Suche mit Fuzzy-Matching
-            for item in items:
-                item_id = item.get('id')
+            columns = await self._aindex_records(index_entity)
+            
+            if columns is not None:
+                # Schnellweg: Exakter Treffer (Email / voller Name / Firmenname)
+                exact = self.index.lookup(index_entity, target)
+                if exact:
+                    print(f"✅ UUID gefunden (exakt im Index): {exact[0]['id']}")
+                    self.resolve_cache.remember(index_entity, target, exact[0]['id'])
+                    return exact[0]['id']
+                best = self._best_resolve_candidate(target, entity_type, columns)
+            else:
+                # Fallback ohne Index: Streaming-Scan, Abbruch bei exaktem Treffer
+                best = None
                 
-                if entity_type == "company":
-                    # Company: Nur nach Name suchen
-                    company_name = item.get('name', '').strip()
-                    
-                    if company_name:
-                        is_match, score = self._fuzzy_match(target, company_name, threshold=70)
-                        if is_match:
-                            candidates.append({
-                                'id': item_id, 
-                                'score': score, 
-                                'matched': company_name, 
-                                'type': 'company_name'
-                            })
+                def on_page(page):
+                    nonlocal best
+                    best = self._best_resolve_candidate(target, entity_type, _candidate_columns(index_entity, page), best)
+                    return best is not None and best['score'] >= 100
                 
-                else:  # person
-                    # A) E-Mail Match
-                    if "@" in target:
-                        emails = item.get('emails') or []
-                        p_mail = ""
-                        if isinstance(emails, list) and emails: 
-                            p_mail = emails[0].get('primaryEmail', '')
-                        elif isinstance(emails, dict): 
-                            p_mail = emails.get('primaryEmail', '')
-                        
-                        if p_mail:
-                            is_match, score = self._fuzzy_match(target, p_mail, threshold=80)
-                            if is_match:
-                                candidates.append({
-                                    'id': item_id, 
-                                    'score': score, 
-                                    'matched': p_mail, 
-                                    'type': 'email'
-                                })
-
-                    # B) Name Match (Fuzzy)
-                    else:
-                        name_obj = item.get('name') or {}
-                        full_name = f"{name_obj.get('firstName', '')} {name_obj.get('lastName', '')}".strip()
-                        
-                        if full_name:
-                            is_match, score = self._fuzzy_match(target, full_name, threshold=70)
-                            if is_match:
-                                candidates.append({
-                                    'id': item_id, 
-                                    'score': score, 
-                                    'matched': full_name, 
-                                    'type': 'person_name'
-                                })
-            
-            # 3. Besten Kandidaten wählen (höchster Score)
-            if candidates:
-                best = max(candidates, key=lambda x: x['score'])
+                # 1. Serverseitig vorgefiltert (kleine Kandidatenmenge)
+                prefilter = _prefilter(index_entity, target) if self.prefilter_enabled else None
+                if prefilter:
+                    await self._ascan([PageScan(INDEX_ENDPOINTS[index_entity], on_page=on_page, params={"filter": prefilter})])
+                
+                # 2. Nichts gefunden (z.B. Tippfehler) -> breiter Scan über den ganzen Workspace
+                if best is None:
+                    if prefilter:
+                        print(f"🔎 Vorfilter ohne Treffer für '{target}', breiter Scan...")
+                    await self._ascan([PageScan(INDEX_ENDPOINTS[index_entity], on_page=on_page)])
+            
+            # Besten Kandidaten wählen (höchster Score)
+            if best:
                 print(f"✅ UUID gefunden (via {best['type']} '{best['matched']}', Score: {best['score']:.0f}%): {best['id']}")
+                self.resolve_cache.remember(index_entity, target, best['id'], best['score'])
                 return best['id']
             
             print(f"⚠️ Nichts gefunden für '{target}' im {entity_type}-Index.")
@@ -205,7 +618,7 @@ class TwentyCRM:
             print(f"❌ Resolve Fehler: {e}")
             return None
 
-    def get_person_details(self, person_id: str) -> str:
+    async def aget_person_details(self, person_id: str):
         """
         Ruft alle Details einer Person ab (inkl. Phone, Job, Birthday, etc.).
         
@@ -218,8 +631,13 @@ class TwentyCRM:
         print(f"📋 Getting details for Person ID: {person_id}")
         
         try:
-            # Hole Person mit allen Feldern
-            response = self._request("GET", f"people/{person_id}")
+            # Hole Person mit allen Feldern + Company-Relation (depth=1 -> kein zweiter Request)
+            # Read-Through: Wiederholte Abrufe derselben ID kommen aus dem Entity-Cache
+            response = await self._cache("get", "person", person_id)
+            if response is None:
+                response = await self._send("GET", f"people/{person_id}", params={"depth": 1})
+                if response:
+                    await self._cache("set", "person", person_id, response)
             
             if not response:
                 return f"❌ Person mit ID {person_id} nicht gefunden."
@@ -269,12 +687,14 @@ class TwentyCRM:
             # Company (Relation)
             company_id = person.get("companyId")
             company_name = ""
-            if company_id:
-                company_data = self._request("GET", f"companies/{company_id}")
-                if company_data:
-                    # Company könnte auch nested sein
-                    comp = company_data.get("company", company_data) if isinstance(company_data, dict) else company_data
-                    company_name = comp.get("name", "") if isinstance(comp, dict) else ""
+            company_obj = person.get("company")
+            if isinstance(company_obj, dict) and company_obj.get("name"):
+                company_name = company_obj["name"]
+                self._remember_company(company_obj.get("id") or company_id, company_name)
+            elif company_id:
+                # Ältere API ohne depth: Cache, sonst ein gezielter Abruf
+                names = await self._acompany_names([company_id])
+                company_name = names.get(company_id, "")
             
             # Created/Updated
             created_at = person.get("createdAt", "")
@@ -321,7 +741,7 @@ class TwentyCRM:
             print(f"❌ Get Person Details Error: {e}")
             return f"❌ Fehler beim Abrufen von Person {person_id}: {str(e)}"
 
-    def get_company_details(self, company_id: str) -> str:
+    async def aget_company_details(self, company_id: str):
         """
         Ruft alle Details einer Firma ab (inkl. Website, Mitarbeiter, etc.).
 
@@ -334,8 +754,12 @@ class TwentyCRM:
         print(f"📋 Getting details for Company ID: {company_id}")
 
         try:
-            # Hole Company mit allen Feldern
-            response = self._request("GET", f"companies/{company_id}")
+            # Hole Company mit allen Feldern (Read-Through über den Entity-Cache)
+            response = await self._cache("get", "company", company_id)
+            if response is None:
+                response = await self._send("GET", f"companies/{company_id}")
+                if response:
+                    await self._cache("set", "company", company_id, response)
 
             if not response:
                 return f"❌ Firma mit ID {company_id} nicht gefunden."
@@ -418,7 +842,7 @@ class TwentyCRM:
             print(f"❌ Get Company Details Error: {e}")
             return f"❌ Fehler beim Abrufen von Firma {company_id}: {str(e)}"
 
-    def search_contacts(self, query: str) -> str:
+    async def asearch_contacts(self, query: str):
         """
         Smart-Fuzzy-Search mit Scoring & Sortierung:
         1. Findet Firmen via Fuzzy-Match.
@@ -430,84 +854,107 @@ class TwentyCRM:
         results = []
         
         # --- STRATEGIE 1: FIRMEN FINDEN (FUZZY) ---
-        companies_found = []
-        
-        raw_companies = self._request("GET", "companies", params={"limit": 50}) or {}
-        company_list = raw_companies.get('companies', [])
+        company_map = {}  # ID -> Name der gefundenen Firmen
         
-        for c in company_list:
-            c_name = c.get('name', '')
-            if not c_name:
-                continue
-            
-            # Fuzzy-Match für Firmennamen
-            is_match, score = self._fuzzy_match(query, c_name, threshold=70)
-            
-            if is_match:
-                companies_found.append(c)
+        def match_companies(columns: CandidateColumns):
+            # Fuzzy-Match für Firmennamen (alle Kandidaten in einem Aufruf)
+            scores = columns.scores(query, "name", score_cutoff=70)
+            for i in np.flatnonzero(scores >= 70):
+                c = columns.records[i]
+                c_name = c.get('name', '')
+                company_map[c.get('id')] = c_name
                 results.append({
                     'type': 'company',
                     'name': c_name,
                     'id': c.get('id'),
-                    'score': score,
+                    'score': float(scores[i]),
                     'display': f"🏢 FIRMA: {c_name}"
                 })
+            return False
 
         # --- STRATEGIE 2: PERSONEN FINDEN (FUZZY) ---
-        raw_people = self._request("GET", "people", params={"limit": 100}) or {}
-        people_list = raw_people.get('people', [])
-        
-        company_map = {c.get('id'): c.get('name') for c in companies_found}
         matched_person_ids = set()  # Verhindert Duplikate
 
-        for p in people_list:
-            # Parsing
-            name_obj = p.get('name') or {}
-            full_name = f"{name_obj.get('firstName', '')} {name_obj.get('lastName', '')}".strip()
+        def match_people(columns: CandidateColumns):
+            # Fuzzy-Match auf Name & Email (Cutoff 70: darunter zählt der Score nirgends)
+            name_scores = columns.scores(query, "name", score_cutoff=70)
+            email_scores = columns.scores(query, "email", score_cutoff=70)
+            candidates = (name_scores >= 70) | (email_scores >= 75)
             
-            emails = p.get('emails') or []
-            email = emails[0].get('primaryEmail', '') if isinstance(emails, list) and emails else ""
-            if isinstance(emails, dict): email = emails.get('primaryEmail', '')
+            # Match Check 2: Gehört zu gefundener Firma (Bonus-Score)
+            if company_map:
+                candidates |= np.fromiter((p.get('companyId') in company_map for p in columns.records),
+                                          dtype=bool, count=len(columns))
             
-            pid = p.get('id')
-            person_cid = p.get('companyId')
+            for i in np.flatnonzero(candidates):
+                p = columns.records[i]
+                full_name = _full_name(p)
+                email = _primary_email(p)
+                pid = p.get('id')
+                person_cid = p.get('companyId')
+                
+                # Bester Score gewinnt
+                best_score = float(max(name_scores[i], email_scores[i]))
+                is_match = name_scores[i] >= 70 or email_scores[i] >= 75
 
-            # Fuzzy-Match auf Name & Email
-            name_match, name_score = self._fuzzy_match(query, full_name, threshold=70)
-            email_match, email_score = self._fuzzy_match(query, email, threshold=75) if email else (False, 0)
-            
-            # Bester Score gewinnt
-            best_score = max(name_score, email_score)
-            is_match = name_match or email_match
+                if person_cid in company_map and pid not in matched_person_ids:
+                    company_name = company_map[person_cid]
+                    # Kollegen bekommen Bonus-Score (damit sie oben stehen)
+                    colleague_score = max(best_score, 85.0)
+                    results.append({
+                        'type': 'colleague',
+                        'name': full_name,
+                        'email': email,
+                        'id': pid,
+                        'score': colleague_score,
+                        'company': company_name,
+                        'display': f"👉 MITARBEITER bei {company_name}: {full_name} <{email}>"
+                    })
+                    matched_person_ids.add(pid)
+                
+                elif is_match and pid not in matched_person_ids:
+                    results.append({
+                        'type': 'person',
+                        'name': full_name,
+                        'email': email,
+                        'id': pid,
+                        'score': best_score,
+                        'company_id': person_cid,
+                        'display': f"👤 PERSON: {full_name} <{email}>"
+                    })
+                    matched_person_ids.add(pid)
+            return False
 
-            # Match Check 2: Gehört zu gefundener Firma (Bonus-Score)
-            is_colleague_match = person_cid in company_map
-            
-            if is_colleague_match and pid not in matched_person_ids:
-                company_name = company_map[person_cid]
-                # Kollegen bekommen Bonus-Score (damit sie oben stehen)
-                colleague_score = max(best_score, 85.0)
-                results.append({
-                    'type': 'colleague',
-                    'name': full_name,
-                    'email': email,
-                    'id': pid,
-                    'score': colleague_score,
-                    'company': company_name,
-                    'display': f"👉 MITARBEITER bei {company_name}: {full_name} <{email}>"
-                })
-                matched_person_ids.add(pid)
+        if self.index.config.enabled:
+            # Beide Entities in einer Runde synchronisieren (parallel)
+            await self._arefresh_index("company", "person")
+        
+        def scan_companies(page):
+            return match_companies(_candidate_columns("company", page))
+
+        def scan_people(page):
+            return match_people(_candidate_columns("person", page))
+
+        company_columns = await self._aindex_records("company")
+        people_columns = await self._aindex_records("person")
+        
+        if company_columns is not None and people_columns is not None:
+            match_companies(company_columns)
+            match_people(people_columns)
+        else:
+            # Ohne Index: Erst serverseitig vorfiltern (Firmen zuerst, für Kollegen-Match)
+            company_filter = _prefilter("company", query) if self.prefilter_enabled else None
+            if company_filter:
+                await self._ascan([PageScan("companies", on_page=scan_companies, params={"filter": company_filter})])
+                people_filter = _prefilter("person", query, email_contains=True, company_ids=list(company_map)[:100])
+                await self._ascan([PageScan("people", on_page=scan_people, params={"filter": people_filter})])
             
-            elif is_match and pid not in matched_person_ids:
-                results.append({
-                    'type': 'person',
-                    'name': full_name,
-                    'email': email,
-                    'id': pid,
-                    'score': best_score,
-                    'display': f"👤 PERSON: {full_name} <{email}>"
-                })
-                matched_person_ids.add(pid)
+            # Vorfilter ohne Treffer (z.B. Tippfehler) -> breiter Scan über den ganzen Workspace
+            if not results:
+                if company_filter:
+                    print(f"🔎 Vorfilter ohne Treffer für '{query}', breiter Scan...")
+                await self._ascan([PageScan("companies", on_page=scan_companies)])
+                await self._ascan([PageScan("people", on_page=scan_people)])
 
         # --- SORTIERUNG nach Score (beste Matches zuerst) ---
         results.sort(key=lambda x: x['score'], reverse=True)
@@ -515,6 +962,24 @@ class TwentyCRM:
         if not results:
             return f"❌ Keine Einträge für '{query}' gefunden."
 
+        # Bei großen Workspaces nur die besten Treffer an den Agenten
+        hidden = max(0, len(results) - self.search_max_results)
+        results = results[:self.search_max_results]
+
+        # Treffer merken: Folge-Tools mit "Thomas Braun" / E-Mail brauchen keinen Resolve mehr
+        people = [r for r in results if r['type'] != 'company']
+        self.resolve_cache.remember_hits("person", [(r['name'], r['id']) for r in people] +
+                                         [(r.get('email'), r['id']) for r in people])
+        self.resolve_cache.remember_hits("company", [(r['name'], r['id']) for r in results if r['type'] == 'company'])
+
+        # Firma zu Personen-Treffern: Cache bzw. ein einziger id[in]-Request statt N Einzelabrufe
+        company_ids = [r['company_id'] for r in results if r['type'] == 'person' and r.get('company_id')]
+        if company_ids:
+            company_names = await self._acompany_names(company_ids)
+            for r in results:
+                if r['type'] == 'person' and company_names.get(r.get('company_id')):
+                    r['display'] += f" @ {company_names[r['company_id']]}"
+
         # Formatierung mit Score (optional für Debug)
         formatted_results = []
         for r in results:
@@ -522,9 +987,12 @@ class TwentyCRM:
             score_display = f" [Match: {r['score']:.0f}%]" if r['score'] < 100 else ""
             formatted_results.append(f"{r['display']}{score_display} (ID: {r['id']})")
 
+        if hidden:
+            formatted_results.append(f"… und {hidden} weitere Treffer (Suche präzisieren)")
+
         return "✅ Gefundene Datensätze:\n" + "\n".join(formatted_results)
 
-    def create_contact(self, first_name: str, last_name: str, company: str, email: str, phone: Optional[str] = None) -> str:
+    async def acreate_contact(self, first_name: str, last_name: str, company: str, email: str, phone: Optional[str] = None, force: bool = False):
         """
         Erstellt neuen Kontakt in Twenty CRM.
         
@@ -534,37 +1002,234 @@ class TwentyCRM:
             company: Firmenname (REQUIRED für Zoho, bei Twenty optional)
             email: E-Mail Adresse (REQUIRED)
             phone: Telefonnummer (OPTIONAL)
+            force: Duplikat-Prüfung überspringen (User hat bestätigt, dass die Person neu ist)
         """
-        payload = {
-            "name": {"firstName": first_name, "lastName": last_name},
-            "emails": {"primaryEmail": email, "additionalEmails": []}
-        }
+        if not force:
+            candidates = await self._aduplicate_people(first_name, last_name, company, email)
+            if candidates:
+                return format_duplicates(first_name, last_name, candidates)
         
-        if phone:
-            payload["phones"] = {"primaryPhone": phone, "additionalPhones": []}
+        payload = self._person_payload(first_name, last_name, email, phone)
 
         # Company wird bei Twenty separat verknüpft (nicht hier)
         # Zoho hat Company im Lead selbst, Twenty hat separate Company-Entity
         
         print(f"📝 Creating Person: {first_name} {last_name} <{email}>")
         
-        data = self._request("POST", "people", data=payload)
+        data = await self._send("POST", "people", data=payload)
         if data:
             # Robustes ID Parsing
             new_id = data.get('createPerson', {}).get('id') or data.get('id')
+            self._index_upsert("person", data.get('createPerson') or data)
+            await self._cache("invalidate", "person", new_id)
             full_name = f"{first_name} {last_name}"
             return f"✅ Kontakt erstellt: {full_name} (ID: {new_id})"
         return "❌ Fehler beim Erstellen des Kontakts."
 
-    def create_task(self, title: str, body: str = "", due_date: str = None, target_id: str = None) -> str:
+    async def _aduplicate_people(self, first_name: str, last_name: str, company: str, email: str):
+        """Mögliche Duplikate aus dem Index (Sync falls fällig; leer, wenn Index aus / nicht geladen)"""
+        if not self.duplicate_config.enabled or not self.index.config.enabled:
+            return []
+        await self._arefresh_index("person", "company")
+        if not self.index.is_ready("person"):
+            return []
+        contact = {"first_name": first_name, "last_name": last_name, "company": company, "email": email}
+        candidates = find_duplicates(self.index, "person", contact, self._person_view, self.duplicate_config)
+        if candidates:
+            print(f"👯 {len(candidates)} mögliche Duplikate für {first_name} {last_name}")
+        return candidates
+
+    def _person_view(self, record: dict) -> dict:
+        """Index-Person -> generische Felder (Firmenname über den Company-Index)"""
+        name = record.get("name") or {}
+        company = self.index.get("company", record["companyId"]) if record.get("companyId") else None
+        return {"first_name": name.get("firstName"), "last_name": name.get("lastName"),
+                "email": _primary_email(record), "company": (company or {}).get("name")}
+
+    def _person_payload(self, first_name: str, last_name: str, email: str, phone: Optional[str] = None) -> dict:
+        """Person-Payload für Insert (create_contact / bulk_create_contacts)"""
+        payload = {
+            "name": {"firstName": first_name, "lastName": last_name},
+            "emails": {"primaryEmail": email, "additionalEmails": []}
+        }
+        if phone:
+            payload["phones"] = {"primaryPhone": phone, "additionalPhones": []}
+        return payload
+
+    def _mapped_fields(self, entity_type: str, fields: dict) -> dict:
+        """Validierte Zusatzfelder (generische Namen, z.B. aus dem Datei-Import) -> CRM-Feldnamen"""
+        if not fields or not self.field_mapper:
+            return {}
+        return self.field_mapper.map_fields(entity_type, fields)
+
+    async def _aexisting_emails(self, emails: List[str]):
+        """
+        Vorhandene Personen zu E-Mails: aus dem Index, sonst per emails.primaryEmail[in]
+        (50 Werte pro Filter, alle Chunks parallel).
+        
+        Returns:
+            email_key -> Person-ID
+        """
+        keys = sorted({email_key(e) for e in emails if e and _filter_value(e) == e.strip()})
+        if not keys:
+            return {}
+        if self.index.config.enabled:
+            await self._arefresh_index("person")
+            if self.index.is_ready("person"):
+                return {key: hits[0].get("id") for key in keys if (hits := self.index.lookup("person", key))}
+        
+        steps = []
+        for start in range(0, len(keys), EMAIL_FILTER_CHUNK):
+            chunk = keys[start:start + EMAIL_FILTER_CHUNK]
+            values = ",".join(f'"{key}"' for key in chunk)
+            steps.append(self._send("GET", "people", params={"filter": f"emails.primaryEmail[in]:[{values}]", "limit": len(chunk) * 2}))
+        responses = await self._gather(*steps)
+        
+        existing = {}
+        for data in responses:
+            for person in (data or {}).get("people", []) if isinstance(data, dict) else []:
+                existing.setdefault(email_key(_primary_email(person)), person.get("id"))
+        return existing
+
+    async def abulk_create_contacts(self, contacts: List[dict], created: Optional[list] = None,
+                                   outcomes: Optional[list] = None):
+        """
+        Legt viele Personen an (Messe-Listen, CSV): batch/people mit bis zu
+        TWENTY_BULK_BATCH_SIZE Datensätzen pro Request.
+        
+        Schlägt ein Batch fehl (Twenty bricht ihn komplett ab), werden seine Datensätze
+        einzeln (parallel) angelegt, damit der Fehler pro Zeile gemeldet werden kann.
+        
+        Args:
+            contacts: Dicts mit first_name, last_name, company, email, phone
+            created: Optionale Liste, wird mit den IDs der neuen Personen befüllt (Undo)
+            outcomes: Optionale Liste, wird mit dem Ergebnis pro Datensatz befüllt (Datei-Import)
+        """
+        records, results = prepare_contacts(contacts)
+        print(f"📥 Bulk-Import: {len(contacts)} Zeilen, {len(records)} gültig")
+        
+        existing = await self._aexisting_emails([r["email"] for r in records if r["email"]])
+        pending = []
+        for record in records:
+            person_id = existing.get(email_key(record["email"])) if record["email"] else None
+            if person_id:
+                results.append(outcome(record, "duplicate", person_id, "existiert bereits"))
+            else:
+                pending.append(record)
+        
+        async def done(record, person):
+            person_id = person.get("id")
+            self._index_upsert("person", person)
+            results.append(outcome(record, "created", person_id))
+            if created is not None:
+                created.append(person_id)
+            await self._cache("invalidate", "person", person_id)
+        
+        for start in range(0, len(pending), self.bulk_batch_size):
+            chunk = pending[start:start + self.bulk_batch_size]
+            payloads = [{**self._person_payload(r["first_name"], r["last_name"], r["email"], r["phone"]),
+                         **self._mapped_fields("person", r["fields"])} for r in chunk]
+            
+            data = await self._send("POST", "batch/people", data=payloads)
+            people = data.get("createPeople") if isinstance(data, dict) else None
+            if isinstance(people, list) and len(people) == len(chunk):
+                for record, person in zip(chunk, people):
+                    await done(record, person)
+                continue
+            
+            # Fallback: einzeln anlegen -> Fehler pro Datensatz
+            responses = await self._gather(*(self._send("POST", "people", data=payload) for payload in payloads))
+            for record, result in zip(chunk, responses):
+                person = (result.get("createPerson") or result) if isinstance(result, dict) else None
+                if person and person.get("id"):
+                    await done(record, person)
+                else:
+                    results.append(outcome(record, "failed", message="API Error"))
+        
+        if outcomes is not None:
+            outcomes.extend(results)
+        return format_bulk_result(results, label="Kontakte")
+
+    async def _acreate_with_targets(self, object_name: str, record: dict, targets: dict):
+        """
+        Legt Task/Note und ihre Target-Relationen in EINEM Round-Trip an.
+        
+        Die ID wird clientseitig vergeben, damit die Relationen im selben GraphQL-Dokument
+        auf den neuen Datensatz zeigen können (Mutations laufen dort der Reihe nach).
+        Schlägt der GraphQL-Request komplett fehl, greift der REST-Weg mit derselben ID
+        (ein doch angelegter Datensatz wird so nicht dupliziert).
+        
+        Args:
+            object_name: "task" oder "note"
+            record: Payload für createTask/createNote (ohne id)
+            targets: Relation -> UUID, z.B. {"personId": "...", "companyId": "..."}
+            
+        Returns:
+            (neue ID oder None, Liste der verknüpften Relationen)
+        """
+        type_name = object_name.title()
+        record_id = str(uuid.uuid4())
+        variables = {"record": {"id": record_id, **record}}
+        definitions = [f"$record: {type_name}CreateInput!"]
+        selections = [f"record: create{type_name}(data: $record) {{ id }}"]
+        for i, (relation, target_id) in enumerate(targets.items()):
+            variables[f"t{i}"] = {f"{object_name}Id": record_id, relation: target_id}
+            definitions.append(f"$t{i}: {type_name}TargetCreateInput!")
+            selections.append(f"t{i}: create{type_name}Target(data: $t{i}) {{ id }}")
+        query = f"mutation Create{type_name}WithTargets({', '.join(definitions)}) {{ {' '.join(selections)} }}"
+        
+        response = (await self._send_graphql(query, variables)) if self.batch_writes_enabled else None
+        if response is not None:
+            data = response.get("data") or {}
+            for error in response.get("errors") or []:
+                print(f"❌ GraphQL Error ({object_name}): {error.get('message', error)}")
+            if not (data.get("record") or {}).get("id"):
+                return None, []
+            linked = [relation for i, relation in enumerate(targets) if (data.get(f"t{i}") or {}).get("id")]
+            return record_id, linked
+        
+        # Fallback: REST (Create, danach alle Relationen parallel)
+        print(f"⚠️ GraphQL nicht verfügbar - {object_name} über REST")
+        endpoint = "tasks" if object_name == "task" else "notes"
+        created = await self._send("POST", endpoint, data=variables["record"])
+        if not created:
+            return None, []
+        new_id = (created.get(f"create{type_name}") or {}).get("id") or created.get("id") or record_id
+        relations = list(targets)
+        results = await self._gather(*(self._send("POST", f"{endpoint[:-1]}Targets", data={f"{object_name}Id": new_id, relation: targets[relation]})
+                                       for relation in relations))
+        return new_id, [relation for relation, result in zip(relations, results) if result]
+
+    async def _alink_targets(self, target_id: Optional[str], company_target: Optional[str]):
+        """Person + Firma parallel auflösen -> (targets, Hinweise zu übersprungenen Zielen)"""
+        person_id, company_id = await self._gather(
+            self._resolve(target_id, entity_type="person"),
+            self._resolve(company_target, entity_type="company"),
+        )
+        targets, skipped = {}, []
+        for relation, resolved in (("personId", person_id), ("companyId", company_id)):
+            if not resolved:
+                continue
+            # Sicherheitscheck: Ist es jetzt eine UUID? (UUIDs haben keine @)
+            if "@" in resolved:
+                skipped.append(relation)
+            else:
+                targets[relation] = resolved
+        return targets, skipped
+
+    async def _ainvalidate_targets(self, targets: dict, linked: list):
+        """Details der verknüpften Ziele neu laden lassen"""
+        await self._gather(*(self._cache("invalidate", TARGET_ENTITIES[relation], targets[relation]) for relation in linked))
+
+    async def acreate_task(self, title: str, body: str = "", due_date: str = None, target_id: str = None, company_target: str = None):
         """Erstellt Task. Löst E-Mail-Adressen automatisch in IDs auf (Self-Healing)."""
-        print(f"📝 Twenty: Task '{title}' (Datum: {due_date}, Target Raw: {target_id})")
+        print(f"📝 Twenty: Task '{title}' (Datum: {due_date}, Target Raw: {target_id}, Firma: {company_target})")
         
         # --- PHASE 0: ID REPARATUR (Self-Healing) ---
         # Wenn der Agent eine Email statt einer UUID sendet, fixen wir das hier.
-        real_target_id = self._resolve_target_id(target_id, entity_type="person")
+        targets, skipped = await self._alink_targets(target_id, company_target)
 
-        # --- PHASE 1: TASK ERSTELLEN ---
+        # --- PHASE 1: TASK + VERKNÜPFUNG (ein Request) ---
         payload = {
             "title": title,
             "status": "TODO",
@@ -577,48 +1242,38 @@ class TwentyCRM:
         if due_date:
             payload["dueAt"] = due_date
 
-        data = self._request("POST", "tasks", data=payload)
+        if targets:
+            new_task_id, linked = await self._acreate_with_targets("task", payload, targets)
+        else:
+            data = await self._send("POST", "tasks", data=payload)
+            new_task_id = (data.get('createTask', {}).get('id') or data.get('id')) if data else None
+            linked = []
         
-        if not data:
+        if not new_task_id:
             return "❌ Fehler: Task konnte nicht erstellt werden."
 
-        new_task_id = data.get('createTask', {}).get('id') or data.get('id')
         output = f"✅ Aufgabe '{title}' erstellt (ID: {new_task_id})."
 
-        # --- PHASE 2: VERKNÜPFUNG (Link) ---
-        if real_target_id and new_task_id:
-            # Sicherheitscheck: Ist es jetzt eine UUID? (UUIDs haben keine @)
-            if "@" in real_target_id:
-                output += "\n⚠️ Verknüpfung übersprungen (Keine gültige UUID gefunden)."
-            else:
-                try:
-                    rel_payload = {
-                        "taskId": new_task_id,
-                        "personId": real_target_id 
-                    }
-                    rel_data = self._request("POST", "taskTargets", data=rel_payload)
-                    
-                    if rel_data:
-                        output += f"\n🔗 Verknüpft mit Kontakt!"
-                    else:
-                        # Fallback: Manche Twenty Versionen nutzen workspaceMemberId oder ähnliches, 
-                        # aber taskTargets ist der Standard für Relationen.
-                        output += "\n⚠️ Verknüpfung fehlgeschlagen (API Error)."
-                except Exception as e:
-                    print(f"Relational Error: {e}")
-                    output += " (Keine Verknüpfung möglich)"
+        # --- PHASE 2: ERGEBNIS DER VERKNÜPFUNG ---
+        if linked:
+            await self._ainvalidate_targets(targets, linked)
+            output += f"\n🔗 Verknüpft mit {' + '.join(TARGET_LABELS[relation] for relation in linked)}!"
+        if len(linked) < len(targets):
+            output += "\n⚠️ Verknüpfung fehlgeschlagen (API Error)."
+        if skipped:
+            output += "\n⚠️ Verknüpfung übersprungen (Keine gültige UUID gefunden)."
 
         return output
 
     # --- NOTES (Production) ---
-    def create_note(self, title: str, content: str, target_id: str) -> str:
+    async def acreate_note(self, title: str, content: str, target_id: str, company_target: str = None):
         """Erstellt Notiz mit explizitem Titel."""
-        print(f"📝 Twenty: Erstelle Notiz '{title}' für Target '{target_id}'...")
+        print(f"📝 Twenty: Erstelle Notiz '{title}' für Target '{target_id}' (Firma: {company_target})...")
 
         # --- PHASE 0: ID REPARATUR ---
-        real_target_id = self._resolve_target_id(target_id, entity_type="person")
+        targets, skipped = await self._alink_targets(target_id, company_target)
 
-        # --- PHASE 1: NOTIZ ERSTELLEN ---
+        # --- PHASE 1: NOTIZ + VERKNÜPFUNG (ein Request) ---
         # Hier ist die Änderung: Wir nutzen den Titel vom LLM!
         # Fallback nur, wenn title leer ist.
         final_title = title if title else (content[:50] + "..." if len(content) > 50 else content)
@@ -631,31 +1286,31 @@ class TwentyCRM:
             }
         }
         
-        data = self._request("POST", "notes", data=payload)
+        if targets:
+            new_note_id, linked = await self._acreate_with_targets("note", payload, targets)
+        else:
+            data = await self._send("POST", "notes", data=payload)
+            new_note_id = (data.get('createNote', {}).get('id') or data.get('id')) if data else None
+            linked = []
         
-        if not data:
+        if not new_note_id:
             return "❌ Fehler: Notiz konnte nicht erstellt werden."
 
-        new_note_id = data.get('createNote', {}).get('id') or data.get('id')
         output = f"✅ Notiz '{final_title}' erstellt (ID: {new_note_id})."
 
-        # --- PHASE 2: VERKNÜPFUNG ---
-        if real_target_id and new_note_id:
-            if "@" in real_target_id:
-                output += " (Verknüpfung mangels ID übersprungen)"
-            else:
-                try:
-                    rel_payload = {"noteId": new_note_id, "personId": real_target_id}
-                    if self._request("POST", "noteTargets", data=rel_payload):
-                        output += " (Verknüpft!)"
-                    else:
-                        output += " (Link fehlgeschlagen)"
-                except: pass
+        # --- PHASE 2: ERGEBNIS DER VERKNÜPFUNG ---
+        if linked:
+            await self._ainvalidate_targets(targets, linked)
+            output += " (Verknüpft!)"
+        if len(linked) < len(targets):
+            output += " (Link fehlgeschlagen)"
+        if skipped:
+            output += " (Verknüpfung mangels ID übersprungen)"
 
         return output
 
     # --- DYNAMIC FIELD ENRICHMENT ---
-    def update_entity(self, target: str, entity_type: str, fields: dict) -> str:
+    async def aupdate_entity(self, target: str, entity_type: str, fields: dict, undo_snapshot: Optional[dict] = None):
         """
         Aktualisiert beliebige Felder eines CRM-Eintrags (Dynamic Field Enrichment).
         
@@ -664,11 +1319,14 @@ class TwentyCRM:
         - Field Mapping: Generic Names → CRM-spezifische Namen
         - Validation: Type-Checking + Auto-Fix
         - Self-Healing: Name/Email → UUID Resolution
+        - Undo: Optionaler Snapshot der vorherigen Werte
         
         Args:
             target: Name, Email oder UUID des Eintrags
             entity_type: "person" oder "company"
             fields: Dict mit generic field names, z.B. {"website": "expoya.com", "size": 50}
+            undo_snapshot: Optionales Dict, wird bei Erfolg mit entity_type, entity_id
+                und previous_values (CRM-Feldnamen) befüllt
             
         Returns:
             Bestätigung mit aktualisierten Feldern
@@ -684,7 +1342,7 @@ class TwentyCRM:
             return "❌ Field Mapping nicht verfügbar. Feature deaktiviert."
         
         # 1. Target-ID auflösen (Self-Healing)
-        entity_id = self._resolve_target_id(target, entity_type=entity_type)
+        entity_id = await self._resolve(target, entity_type=entity_type)
         
         if not entity_id:
             return f"❌ {entity_type.title()} '{target}' nicht gefunden im CRM."
@@ -724,16 +1382,36 @@ class TwentyCRM:
         
         print(f"🔄 Mapped & Validated: {validated_fields}")
         
-        # 4. API Call (PATCH)
         endpoint = self.field_mapper.get_endpoint(entity_type)
-        data = self._request("PATCH", f"{endpoint}/{entity_id}", data=validated_fields)
+        
+        # 4. Vorherige Werte sichern (nur wenn Undo-Snapshot gewünscht)
+        previous_values = None
+        if undo_snapshot is not None:
+            current = await self._send("GET", f"{endpoint}/{entity_id}")
+            if isinstance(current, dict):
+                # Twenty: {"person": {...}} bzw. {"company": {...}} oder direkt {...}
+                record = current.get(entity_type, current)
+                previous_values = {crm_field: record.get(crm_field) for crm_field in validated_fields}
+        
+        # 5. API Call (PATCH)
+        data = await self._send("PATCH", f"{endpoint}/{entity_id}", data=validated_fields)
         
         if not data:
             # Verbesserte Fehlermeldung: Zeige welche Felder versucht wurden
             failed_fields = ", ".join([f"{list(fields.keys())[i]}={list(fields.values())[i]}" for i in range(len(fields))])
             return f"❌ CRM hat Update abgelehnt ({entity_type}). Versuchte Felder: {failed_fields}. Hinweis: Bei 'website' muss Domain existieren (z.B. 'google.com' statt Fake-Domain)."
         
-        # 5. Response formatieren
+        self._index_upsert(entity_type, data.get(f"update{entity_type.title()}") if isinstance(data, dict) else None)
+        await self._cache("invalidate", entity_type, entity_id)
+        
+        if previous_values is not None:
+            undo_snapshot.update({
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "previous_values": previous_values,
+            })
+        
+        # 6. Response formatieren
         updated_list = []
         for field_name, value in fields.items():
             if field_name not in skipped_fields:
@@ -746,8 +1424,30 @@ class TwentyCRM:
         
         return response
 
+    async def arestore_entity(self, entity_type: str, entity_id: str, previous_values: dict):
+        """
+        Stellt Feldwerte nach einem Update wieder her (Undo für update_entity).
+        
+        Args:
+            entity_type: "person" oder "company"
+            entity_id: Twenty UUID
+            previous_values: Dict mit CRM-Feldnamen (aus dem Undo-Snapshot)
+        """
+        if not previous_values:
+            return "⚠️ Keine vorherigen Werte gespeichert."
+        
+        endpoint = self.field_mapper.get_endpoint(entity_type) if self.field_mapper else entity_type
+        print(f"↩️ Restoring {entity_type} {entity_id}: {list(previous_values.keys())}")
+        
+        data = await self._send("PATCH", f"{endpoint}/{entity_id}", data=previous_values)
+        if data:
+            self._index_upsert(entity_type, data.get(f"update{entity_type.title()}") if isinstance(data, dict) else None)
+            await self._cache("invalidate", entity_type, entity_id)
+            return "✅ Update erfolgreich rückgängig gemacht."
+        return f"❌ Wiederherstellen von {entity_type} {entity_id} fehlgeschlagen."
+
     # Generische Lösch-Funktion
-    def delete_item(self, item_type: str, item_id: str) -> str:
+    async def adelete_item(self, item_type: str, item_id: str):
         """Löscht ein Objekt (Person, Task, Note) anhand der ID."""
         endpoint_map = {
             "person": "people",
@@ -760,14 +1460,124 @@ class TwentyCRM:
 
         print(f"🗑️ Deleting {item_type} {item_id}...")
         try:
-            url = f"{self.base_url}/rest/{endpoint}/{item_id}"
-            resp = requests.delete(url, headers=self.headers)
+            resp = await self._send_raw("DELETE", f"{endpoint}/{item_id}")
             
             if resp.status_code in [200, 204]:
+                if endpoint == "people":
+                    self.index.remove("person", item_id)
+                    self.resolve_cache.forget_id(item_id)
+                    await self._cache("invalidate", "person", item_id)
                 return "✅ Aktion erfolgreich rückgängig gemacht."
             elif resp.status_code == 404:
                 return "⚠️ Element war bereits gelöscht."
             else:
                 return f"❌ Fehler beim Löschen: {resp.text}"
         except Exception as e:
-            return f"❌ Fehler: {e}"
\ No newline at end of file
+            return f"❌ Fehler: {e}"
+
+    # --- WEBHOOKS (POST /crm-events/twenty) ---
+    async def aapply_webhook_event(self, payload: dict):
+        """
+        Übernimmt ein (verifiziertes) Twenty Webhook-Event in Index und Entity-Cache.
+        
+        Unbrauchbare Person/Company-Events lösen einen Delta-Sync beim nächsten
+        Zugriff aus, damit keine Änderung verloren geht.
+        
+        Returns:
+            Dict mit applied / resync (+ entity, action, id)
+        """
+        try:
+            event = parse_event(payload)
+        except ValueError as e:
+            print(f"⚠️ Twenty Webhook: {e} -> Resync")
+            self.index.request_delta()
+            return {"applied": False, "resync": True}
+        
+        if event is None:
+            return {"applied": False, "resync": False}
+        
+        if event.action in DELETE_ACTIONS:
+            self.index.remove(event.entity, event.record_id)
+            self.resolve_cache.forget_id(event.record_id)
+            if event.entity == "company":
+                self.company_names.pop(event.record_id, None)
+        else:
+            # Keine High-Water-Mark: Verpasste ältere Events findet der nächste Delta-Sync noch
+            self.index.upsert(event.entity, _compact_record(event.entity, event.record), track_high_water=False)
+            if event.entity == "company" and "name" in event.record:
+                self._remember_company(event.record_id, event.record.get("name") or "")
+        
+        # Details werden beim nächsten Abruf frisch geladen (inkl. Relationen)
+        await self._cache("invalidate", event.entity, event.record_id)
+        print(f"📬 Twenty Webhook: {event.entity}.{event.action} {event.record_id}")
+        return {"applied": True, "resync": False, "entity": event.entity, "action": event.action, "id": event.record_id}
+
+    def get_http_metrics(self) -> dict:
+        """Timing-Metriken pro Endpoint (für /metrics/crm)"""
+        return {**self.http.get_metrics(), **self.graphql_http.get_metrics()}
+
+    def get_cache_metrics(self) -> dict:
+        """Hit-Rate des Entity-Caches (für /metrics/crm)"""
+        return self.entity_cache.get_metrics()
+
+    def get_rate_limit_metrics(self) -> dict:
+        """Wartezeiten, 429er und Restbudget des Workspaces (für /metrics/crm)"""
+        return self.rate_governor.get_metrics()
+
+    def get_circuit_metrics(self) -> dict:
+        """Zustand des Circuit Breakers (für /metrics/crm)"""
+        return self.circuit_breaker.get_metrics()
+
+    def get_resolve_metrics(self) -> dict:
+        """Hit-Rate des Name -> ID Memos (für /metrics/crm)"""
+        return self.resolve_cache.get_metrics()
+
+    # === PUBLIC API (Sync-Shims über die a*-Methoden) ===
+
+    def _resolve_target_id(self, target: str, entity_type: str = "person") -> Optional[str]:
+        return _run_sync(self._aresolve_target_id(target, entity_type))
+
+    def get_person_details(self, person_id: str) -> str:
+        """Ruft alle Details einer Person ab (inkl. Phone, Job, Birthday, etc.)."""
+        return _run_sync(self.aget_person_details(person_id))
+
+    def get_company_details(self, company_id: str) -> str:
+        """Ruft alle Details einer Firma ab (inkl. Website, Mitarbeiter, etc.)."""
+        return _run_sync(self.aget_company_details(company_id))
+
+    def search_contacts(self, query: str) -> str:
+        """Smart-Fuzzy-Search über Firmen, Mitarbeiter und Personen (sortiert nach Score)."""
+        return _run_sync(self.asearch_contacts(query))
+
+    def create_contact(self, first_name: str, last_name: str, company: str, email: str, phone: Optional[str] = None, force: bool = False) -> str:
+        """Erstellt neuen Kontakt in Twenty CRM (vorher Duplikat-Prüfung gegen den Index, außer force)."""
+        return _run_sync(self.acreate_contact(first_name, last_name, company, email, phone, force))
+
+    def bulk_create_contacts(self, contacts: List[dict], created: Optional[list] = None, outcomes: Optional[list] = None) -> str:
+        """Legt viele Kontakte gebündelt an (batch/people), Ergebnis pro Datensatz."""
+        return _run_sync(self.abulk_create_contacts(contacts, created, outcomes))
+
+    def create_task(self, title: str, body: str = "", due_date: str = None, target_id: str = None, company_target: str = None) -> str:
+        """Erstellt Task (+ Verknüpfung mit Person/Firma im selben Request)."""
+        return _run_sync(self.acreate_task(title, body, due_date, target_id, company_target))
+
+    def create_note(self, title: str, content: str, target_id: str, company_target: str = None) -> str:
+        """Erstellt Notiz mit explizitem Titel (+ Verknüpfung mit Person/Firma im selben Request)."""
+        return _run_sync(self.acreate_note(title, content, target_id, company_target))
+
+    def update_entity(self, target: str, entity_type: str, fields: dict, undo_snapshot: Optional[dict] = None) -> str:
+        """Aktualisiert beliebige Felder eines CRM-Eintrags (Dynamic Field Enrichment)."""
+        return _run_sync(self.aupdate_entity(target, entity_type, fields, undo_snapshot))
+
+    def restore_entity(self, entity_type: str, entity_id: str, previous_values: dict) -> str:
+        """Stellt Feldwerte nach einem Update wieder her (Undo für update_entity)."""
+        return _run_sync(self.arestore_entity(entity_type, entity_id, previous_values))
+
+    def delete_item(self, item_type: str, item_id: str) -> str:
+        """Löscht ein Objekt (Person, Task, Note) anhand der ID."""
+        return _run_sync(self.adelete_item(item_type, item_id))
+
+    def apply_webhook_event(self, payload: dict) -> dict:
+        """Übernimmt ein Twenty Webhook-Event in Index und Entity-Cache."""
+        return _run_sync(self.aapply_webhook_event(payload))
+
@@ -0,0 +1,106 @@
+"""
+Twenty CRM Webhooks (POST /crm-events/twenty)
+
+Twenty schickt bei Änderungen Events wie "person.updated" mit dem kompletten Record.
+Statt Änderungen per Polling zu suchen, übernimmt der Adapter sie direkt in
+Index und Entity-Cache (TwentyCRM.apply_webhook_event).
+
+Verifikation (Twenty Webhook-Secret):
+    X-Twenty-Webhook-Timestamp: Unix-Zeit in ms
+    X-Twenty-Webhook-Signature: hex(HMAC-SHA256(secret, f"{timestamp}:{body}"))
+
+Events ohne gültige Signatur oder außerhalb des Zeitfensters werden abgelehnt
+(Replay-Schutz).
+
+Konfiguration via ENV:
+    TWENTY_WEBHOOK_SECRET               Secret aus den Twenty Webhook-Settings (ohne -> Endpoint aus)
+    TWENTY_WEBHOOK_TOLERANCE_SECONDS    Max. Alter eines Events (Default: 300)
+    TWENTY_WEBHOOK_RESYNC_SECONDS       Delta-Sync Intervall, solange Webhooks aktiv sind (Default: 900)
+"""
+
+import hmac
+import time
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+SIGNATURE_HEADER = "X-Twenty-Webhook-Signature"
+TIMESTAMP_HEADER = "X-Twenty-Webhook-Timestamp"
+
+# Twenty Objekt (nameSingular) -> Index-Entity
+WEBHOOK_ENTITIES = {"person": "person", "company": "company"}
+
+UPSERT_ACTIONS = {"created", "updated", "restored", "upserted"}
+DELETE_ACTIONS = {"deleted", "destroyed"}
+
+
+@dataclass(frozen=True)
+class WebhookEvent:
+    """Normalisiertes Twenty Event"""
+    entity: str
+    action: str
+    record: dict
+
+    @property
+    def record_id(self) -> Optional[str]:
+        return self.record.get("id")
+
+
+def sign(secret: str, timestamp: str, body: bytes) -> str:
+    """Signatur wie Twenty sie berechnet (für Tests / lokale Webhook-Simulation)"""
+    message = f"{timestamp}:".encode() + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, timestamp: Optional[str], signature: Optional[str],
+                     tolerance_seconds: float = 300, now: float = None) -> bool:
+    """
+    Prüft Signatur + Zeitfenster eines Webhook-Requests.
+
+    Args:
+        secret: TWENTY_WEBHOOK_SECRET
+        body: Roher Request-Body (Bytes, wie empfangen)
+        timestamp: X-Twenty-Webhook-Timestamp (ms oder s)
+        signature: X-Twenty-Webhook-Signature (hex)
+        tolerance_seconds: Max. Abweichung zur aktuellen Zeit
+    """
+    if not secret or not timestamp or not signature:
+        return False
+    try:
+        sent_at = float(timestamp)
+    except ValueError:
+        return False
+    if sent_at > 1e12:  # Millisekunden
+        sent_at /= 1000
+    now = time.time() if now is None else now
+    if abs(now - sent_at) > tolerance_seconds:
+        return False
+    return hmac.compare_digest(sign(secret, timestamp, body), signature.strip().lower())
+
+
+def parse_event(payload: dict) -> Optional[WebhookEvent]:
+    """
+    Twenty Payload -> WebhookEvent.
+
+    Payload (Auszug):
+        {"eventName": "person.updated", "objectMetadata": {"nameSingular": "person"},
+         "record": {"id": "...", "name": {...}, ...}, "updatedFields": [...]}
+
+    Returns:
+        WebhookEvent oder None (Objekt ohne lokalen Index, z.B. Tasks/Notes)
+
+    Raises:
+        ValueError: Person/Company-Event ohne verwertbaren Record (-> Resync)
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Payload ist kein JSON-Objekt")
+    event_name = str(payload.get("eventName") or "")
+    object_name, _, action = event_name.partition(".")
+    metadata = payload.get("objectMetadata") or {}
+    entity = WEBHOOK_ENTITIES.get(metadata.get("nameSingular") or object_name)
+    if not entity:
+        return None
+    record = payload.get("record")
+    if action not in UPSERT_ACTIONS | DELETE_ACTIONS or not isinstance(record, dict) or not record.get("id"):
+        raise ValueError(f"Unvollständiges Event '{event_name}'")
+    return WebhookEvent(entity=entity, action=action, record=record)
@@ -6,9 +6,247 @@ import os
 import requests
 import json
 import time
-from typing import Optional, Dict, List, Tuple
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional, Dict, List, Tuple
+import numpy as np
 from rapidfuzz import fuzz
 from .field_mapping_loader import load_field_mapping
+from .fuzzy_rank import CandidateColumns
+from .entity_cache import EntityCache, CacheConfig
+from .rate_limit import RateGovernor, RateLimitConfig, governed
+from .circuit_breaker import CircuitBreaker, BreakerConfig
+from .resolve_cache import ResolveCache, ResolveConfig
+from .zoho_token import ZohoTokenManager, TokenConfig
+from .contact_index import ContactIndex, IndexConfig
+from .zoho_index import ZohoLeadSync, index_store_from_env, compact_lead, lead_keys, LEAD_INDEX_FIELDS
+from .bulk_contacts import prepare_contacts, format_bulk_result, outcome, email_key
+from .duplicate_check import DuplicateConfig, find_duplicates, format_duplicates
+
+
+def _lead_name(lead: dict) -> str:
+    return f"{lead.get('First_Name') or ''} {lead.get('Last_Name') or ''}".strip()
+
+
+def _lookup_name(value) -> str:
+    """Lookup-Feld (z.B. Account_Name in Contacts/Deals): {"name": ..., "id": ...}"""
+    if isinstance(value, dict):
+        return value.get("name") or ""
+    return value or ""
+
+
+# Spalten für das Fuzzy-Ranking
+LEAD_FIELDS = {
+    "name": _lead_name,
+    "email": lambda lead: lead.get("Email") or "",
+    "company": lambda lead: lead.get("Company") or "",
+}
+
+
+def _lead_columns(leads: list) -> CandidateColumns:
+    return CandidateColumns(leads, LEAD_FIELDS)
+
+
+def _lead_view(lead: dict) -> dict:
+    """Index-Lead -> generische Felder für die Duplikat-Prüfung"""
+    return {"first_name": lead.get("First_Name"), "last_name": lead.get("Last_Name"),
+            "email": lead.get("Email"), "company": lead.get("Company")}
+
+
+# Felder für Suche/Resolve - Zoho braucht explizite Fields!
+LEAD_QUERY_FIELDS = ("id", "First_Name", "Last_Name", "Email", "Company", "Phone", "Mobile", "Designation")
+
+# Spalten, die der COQL-Vorfilter pro Token durchsucht
+COQL_SEARCH_FIELDS = ("First_Name", "Last_Name", "Email", "Company")
+
+# COQL erlaubt max. 25 Bedingungen pro WHERE
+COQL_MAX_CONDITIONS = 25
+COQL_MAX_TOKENS = COQL_MAX_CONDITIONS // len(COQL_SEARCH_FIELDS)
+
+
+def _display(*parts) -> str:
+    return " ".join(part for part in parts if part)
+
+
+def _display_lead(lead: dict) -> str:
+    designation, company, email, phone = (lead.get(k) for k in ("Designation", "Company", "Email", "Phone"))
+    return _display(f"👤 {_lead_name(lead)}", designation and f"({designation})", company and f"@ {company}",
+                    email and f"<{email}>", phone and f"📞 {phone}")
+
+
+def _display_contact(contact: dict) -> str:
+    title, email, phone = (contact.get(k) for k in ("Title", "Email", "Phone"))
+    account = _lookup_name(contact.get("Account_Name"))
+    return _display(f"🧑 KONTAKT: {_lead_name(contact)}", title and f"({title})", account and f"@ {account}",
+                    email and f"<{email}>", phone and f"📞 {phone}")
+
+
+def _display_account(account: dict) -> str:
+    industry, website, phone = (account.get(k) for k in ("Industry", "Website", "Phone"))
+    return _display(f"🏢 FIRMA: {account.get('Account_Name') or ''}", industry and f"({industry})",
+                    website and f"🌐 {website}", phone and f"📞 {phone}")
+
+
+def _display_deal(deal: dict) -> str:
+    stage, amount = deal.get("Stage"), deal.get("Amount")
+    account = _lookup_name(deal.get("Account_Name"))
+    return _display(f"💰 DEAL: {deal.get('Deal_Name') or ''}", stage and f"({stage})", account and f"@ {account}",
+                    amount is not None and f"💶 {amount}")
+
+
+@dataclass(frozen=True)
+class SearchModule:
+    """Durchsuchbares Zoho-Modul: Felder für Vorfilter, Ranking-Spalten, Anzeige"""
+    entity: str                     # entity_type (Field Mapping, Resolve-Memo, Entity-Cache)
+    module: str                     # Zoho API-Name
+    label: str                      # Für Meldungen ("Lead", "Kontakt", ...)
+    query_fields: tuple             # fields= bzw. COQL select
+    coql_fields: tuple              # Spalten für LIKE pro Token
+    columns: dict                   # Ranking-Spalten -> Extractor
+    resolve_columns: tuple          # Spalten für Name -> ID (E-Mail-Targets: "email")
+    display: Callable[[dict], str]
+    email_search: bool = True       # {module}/search?email= möglich
+
+    @property
+    def max_tokens(self) -> int:
+        return COQL_MAX_CONDITIONS // len(self.coql_fields)
+
+
+# Reihenfolge = Vorrang bei gleichem Score (konvertierter Lead -> Kontakt zuerst)
+SEARCH_MODULES = {
+    "contact": SearchModule(
+        "contact", "Contacts", "Kontakt",
+        query_fields=("id", "First_Name", "Last_Name", "Email", "Account_Name", "Phone", "Mobile", "Title"),
+        coql_fields=("First_Name", "Last_Name", "Email"),
+        columns={"name": _lead_name, "email": lambda c: c.get("Email") or "",
+                 "company": lambda c: _lookup_name(c.get("Account_Name"))},
+        resolve_columns=("name",), display=_display_contact,
+    ),
+    "lead": SearchModule(
+        "lead", "Leads", "Lead",
+        query_fields=LEAD_QUERY_FIELDS, coql_fields=COQL_SEARCH_FIELDS, columns=LEAD_FIELDS,
+        resolve_columns=("name", "company"), display=_display_lead,
+    ),
+    "account": SearchModule(
+        "account", "Accounts", "Firma",
+        query_fields=("id", "Account_Name", "Website", "Phone", "Industry"),
+        coql_fields=("Account_Name", "Website"),
+        columns={"name": lambda a: a.get("Account_Name") or "", "website": lambda a: a.get("Website") or ""},
+        resolve_columns=("name",), display=_display_account, email_search=False,
+    ),
+    "deal": SearchModule(
+        "deal", "Deals", "Deal",
+        query_fields=("id", "Deal_Name", "Stage", "Amount", "Account_Name", "Contact_Name"),
+        coql_fields=("Deal_Name",),
+        columns={"name": lambda d: d.get("Deal_Name") or "", "company": lambda d: _lookup_name(d.get("Account_Name"))},
+        resolve_columns=("name",), display=_display_deal, email_search=False,
+    ),
+}
+
+# entity_type -> Zoho-Modul für Deletes (Undo)
+DELETE_MODULES = {**{entity: spec.module for entity, spec in SEARCH_MODULES.items()}, "task": "Tasks", "note": "Notes"}
+
+# Score-Schwelle pro Ranking-Spalte bei der Suche (Default 70)
+SEARCH_THRESHOLDS = {"email": 75}
+
+# Gemerkte ID -> Modul (für Verknüpfungen mit IDs aus Suchergebnissen)
+RECORD_MODULES_LIMIT = 5000
+
+# Zoho: max. 100 Datensätze pro Insert, COQL: max. 50 Werte pro "in (...)"
+BULK_INSERT_SIZE = 100
+COQL_IN_LIMIT = 50
+
+
+def _query_tokens(query: str, max_tokens: int = COQL_MAX_TOKENS) -> list[str]:
+    """Suchbegriffe für LIKE-Filter (min. 2 Zeichen, ohne Zeichen mit Sonderbedeutung in COQL)"""
+    tokens = []
+    for token in "".join(c for c in (query or "") if c not in "'\"%()\\,").split():
+        if len(token) >= 2 and token.lower() not in (t.lower() for t in tokens):
+            tokens.append(token)
+    return tokens[:max_tokens]
+
+
+def _records(response) -> Optional[list]:
+    """Datensätze einer Antwort (204 -> leer), None bei Fehler"""
+    if response is None:
+        return None
+    data = response.get("data") if isinstance(response, dict) else None
+    return data if isinstance(data, list) else []
+
+
+def _is_email(query: str) -> bool:
+    return "@" in query and " " not in query.strip()
+
+
+def _coql_query(spec: SearchModule, query: str, limit: int) -> Optional[str]:
+    """
+    COQL-Vorfilter: "Thomas Braun" ->
+        select ... from Leads where ((First_Name like '%Thomas%' or ...) or Company like '%Braun%') limit 200
+
+    Returns:
+        select_query oder None, wenn die Query keine brauchbaren Tokens hat
+    """
+    clauses = [f"{field} like '%{token}%'"
+               for token in _query_tokens(query, spec.max_tokens) for field in spec.coql_fields]
+    if not clauses:
+        return None
+    # COQL verlangt Klammern um jedes Paar bei mehr als zwei Bedingungen
+    where = clauses[0]
+    for clause in clauses[1:]:
+        where = f"({where} or {clause})"
+    return f"select {', '.join(spec.query_fields)} from {spec.module} where {where} limit {limit}"
+
+
+def _search_hits(spec: SearchModule, query: str, columns: CandidateColumns) -> list:
+    """Fuzzy-Treffer eines Moduls (Cutoff 70: darunter zählt der Score nirgends)"""
+    records = columns.records
+    scores = {name: columns.scores(query, name, score_cutoff=70) for name in spec.columns}
+    hits = np.zeros(len(records), dtype=bool)
+    for name, column_scores in scores.items():
+        hits |= column_scores >= SEARCH_THRESHOLDS.get(name, 70)
+
+    matched = []
+    for i in np.flatnonzero(hits):
+        record = records[i]
+        matched.append({
+            'entity': spec.entity,
+            'name': spec.columns["name"](record),
+            'email': spec.columns["email"](record) if "email" in spec.columns else "",
+            'id': record.get("id"),
+            # Bester Score gewinnt
+            'score': float(max(column_scores[i] for column_scores in scores.values())),
+            'display': spec.display(record),
+        })
+    return matched
+
+
+def _resolve_hits(spec: SearchModule, target: str, columns: CandidateColumns) -> list:
+    """Resolve-Kandidaten: E-Mail (Cutoff 80) bzw. Name/Firma (Cutoff 70)"""
+    records = columns.records
+    if "@" in target:
+        matches = [("email", columns.scores(target, "email", score_cutoff=80), 80)] if "email" in spec.columns else []
+    else:
+        matches = [(name, columns.scores(target, name, score_cutoff=70), 70) for name in spec.resolve_columns]
+
+    hits = np.zeros(len(records), dtype=bool)
+    for _, scores, threshold in matches:
+        hits |= scores >= threshold
+
+    # Reihenfolge wie bisher: pro Datensatz erst Name, dann Company
+    candidates = []
+    for i in np.flatnonzero(hits):
+        for match_type, scores, threshold in matches:
+            if scores[i] >= threshold:
+                candidates.append({
+                    'id': records[i].get("id"),
+                    'score': float(scores[i]),
+                    'matched': spec.columns[match_type](records[i]),
+                    'type': match_type
+                })
+    return candidates
 
 
 class ZohoCRM:
@@ -26,8 +264,25 @@ class ZohoCRM:
         self.accounts_url = os.getenv("ZOHO_ACCOUNTS_URL", "https://accounts.zoho.eu").strip().rstrip("/")
         
         # --- TOKEN STATE ---
-        self.access_token = None
-        self.token_expires_at = 0  # Unix timestamp
+        # Single-Flight Refresh, proaktiv im Hintergrund, optional geteilt über Postgres
+        self.token_manager = ZohoTokenManager(
+            lambda: self._fetch_access_token(), key=f"zoho:{self.accounts_url}:{self.client_id}",
+            config=TokenConfig.from_env("ZOHO"),
+        )
+        
+        # Read-Through Cache für Lead-Details (invalidiert durch Updates/Deletes/Creates)
+        self.entity_cache = EntityCache("zoho", config=CacheConfig.from_env("ZOHO"))
+        
+        # Ein Rate-Budget pro Zoho-Org (Token Bucket, Retry-After, faire Queue pro User)
+        self.rate_governor = RateGovernor.for_workspace(
+            f"zoho:{self.api_url}", RateLimitConfig.from_env("ZOHO"), name="Zoho"
+        )
+        
+        # Fast-Fail bei Ausfall (Health-Probe: Org-Endpoint)
+        self.circuit_breaker = CircuitBreaker("Zoho", BreakerConfig.from_env("ZOHO"), probe=self._probe)
+        
+        # Name -> Lead-ID Memo (Session im Graph-State + Adapter mit TTL)
+        self.resolve_cache = ResolveCache("zoho", ResolveConfig.from_env("ZOHO"))
         
         # Field Mapping Loader
         try:
@@ -38,15 +293,43 @@ class ZohoCRM:
             print(f"⚠️ Field Mapping konnte nicht geladen werden: {e}")
             self.field_mapper = None
         
+        # Serverseitige Vorauswahl (Search API / COQL) statt Lead-Liste, Fallback: Seiten-Scan
+        self.prefilter_enabled = os.getenv("ZOHO_PREFILTER_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+        self.prefilter_limit = min(2000, max(1, int(os.getenv("ZOHO_PREFILTER_LIMIT", "200"))))
+        # Ohne page_token liefert Zoho max. 2000 Datensätze (10 Seiten à 200)
+        self.scan_max_pages = min(10, max(1, int(os.getenv("ZOHO_SCAN_MAX_PAGES", "10"))))
+        
+        # Suche über mehrere Module (parallel, ein Round Trip): konvertierte Leads sind Kontakte
+        self.search_modules = self._search_modules_from_env()
+        self._search_pool = ThreadPoolExecutor(max_workers=len(SEARCH_MODULES), thread_name_prefix="zoho-search")
+        self._record_modules: OrderedDict = OrderedDict()
+        self._record_modules_lock = threading.Lock()
+        
+        # Lokaler Lead-Index (opt-in, Scope ZohoCRM.bulk.read): Bulk Read + If-Modified-Since
+        self.lead_index = ContactIndex(
+            {"lead": lead_keys},
+            config=IndexConfig.from_env("ZOHO", enabled_default=False, full_resync_seconds=86400.0), name="Zoho"
+        )
+        self.lead_sync = ZohoLeadSync(
+            lambda *args, **kwargs: self._request(*args, **kwargs), lambda path: self._download(path),
+            self.lead_index, key=f"zoho:{self.api_url}:lead",
+            store=index_store_from_env("ZOHO") if self.lead_index.config.enabled else None,
+        )
+        # Duplikat-Prüfung vor create_contact (nur mit Lead-Index, kein Request)
+        self.duplicate_config = DuplicateConfig.from_env()
+        
         # Initial Token Refresh
         self._refresh_access_token()
         
         print(f"🔗 Zoho Production-Adapter connected to: {self.api_url}")
     
-    def _refresh_access_token(self):
+    def _fetch_access_token(self) -> Tuple[str, float]:
         """
-        Erneuert Access Token mit Refresh Token.
-        Access Token ist 1 Stunde gültig, wird automatisch erneuert.
+        Holt einen neuen Access Token mit dem Refresh Token.
+        Nur über den Token Manager aufrufen (Zoho limitiert Refreshes).
+        
+        Returns:
+            (access_token, expires_in Sekunden)
         """
         print("🔄 Refreshing Zoho Access Token...")
         
@@ -64,36 +347,78 @@ class ZohoCRM:
             response.raise_for_status()
             
             token_data = response.json()
-            
-            self.access_token = token_data.get("access_token")
             expires_in = token_data.get("expires_in", 3600)  # Default: 1 Stunde
             
-            # Token läuft ab in X Sekunden - wir erneuern 5 Min früher
-            self.token_expires_at = time.time() + expires_in - 300
-            
             print(f"✅ Access Token refreshed (expires in {expires_in}s)")
+            return token_data.get("access_token"), expires_in
             
         except Exception as e:
             print(f"❌ Token Refresh Error: {e}")
             raise ValueError("Failed to refresh Zoho Access Token. Check credentials!")
     
+    def _refresh_access_token(self):
+        """
+        Erneuert den Access Token (Single-Flight).
+        Laufen mehrere Refreshes gleichzeitig, holt nur der erste einen Token.
+        """
+        self.token_manager.refresh(stale_token=self.token_manager.access_token)
+    
+    @property
+    def access_token(self) -> Optional[str]:
+        return self.token_manager.access_token
+    
+    @access_token.setter
+    def access_token(self, value: Optional[str]):
+        self.token_manager.access_token = value
+    
+    @property
+    def token_expires_at(self) -> float:
+        """Ablauf des Access Tokens (Unix timestamp)"""
+        return self.token_manager.expires_at
+    
+    @token_expires_at.setter
+    def token_expires_at(self, value: float):
+        self.token_manager.expires_at = value
+    
     def _is_token_expired(self) -> bool:
         """Prüft, ob Access Token abgelaufen ist"""
-        return time.time() >= self.token_expires_at
+        return not self.token_manager.is_valid()
     
-    def _get_headers(self) -> Dict[str, str]:
+    def _get_headers(self, token: str = None) -> Dict[str, str]:
         """
         Gibt Headers mit aktuellem Access Token zurück.
-        Erneuert Token automatisch wenn nötig.
+        Erneuert Token nur, wenn der Hintergrund-Refresh ihn nicht rechtzeitig geholt hat.
         """
-        if self._is_token_expired():
-            self._refresh_access_token()
-        
         return {
-            "Authorization": f"Zoho-oauthtoken {self.access_token}",
+            "Authorization": f"Zoho-oauthtoken {token or self.token_manager.get_token()}",
             "Content-Type": "application/json"
         }
     
+    @staticmethod
+    def _is_invalid_token(response) -> bool:
+        """401 mit Code INVALID_TOKEN (Token widerrufen oder vorzeitig abgelaufen)"""
+        if getattr(response, "status_code", None) != 401:
+            return False
+        try:
+            return response.json().get("code") == "INVALID_TOKEN"
+        except Exception:
+            return "INVALID_TOKEN" in (getattr(response, "text", "") or "")
+    
+    def _authorized(self, send):
+        """
+        Sendet mit aktuellem Token und wiederholt genau einmal bei 401 INVALID_TOKEN.
+        
+        Args:
+            send: Funktion headers -> Response
+        """
+        token = self.token_manager.get_token()
+        response = send(self._get_headers(token))
+        if self._is_invalid_token(response):
+            print("🔑 Zoho meldet INVALID_TOKEN - Token erneuern und Request wiederholen")
+            token = self.token_manager.refresh(stale_token=token)
+            response = send(self._get_headers(token))
+        return response
+    
     def _fuzzy_match(self, query: str, target: str, threshold: int = 70) -> Tuple[bool, float]:
         """
         Fuzzy-Matching mit rapidfuzz.
@@ -135,128 +460,311 @@ class ZohoCRM:
         
         return (best_score >= threshold, float(best_score))
     
-    def _request(self, method: str, endpoint: str, params: dict = None, data: dict = None):
-        """Zentraler Request-Handler mit Error-Management"""
-        url = f"{self.api_url}/crm/v8/{endpoint}"
+    def _request(self, method: str, endpoint: str, params: dict = None, data: dict = None,
+                 headers: dict = None, api: str = "crm/v8", multi_status: bool = False):
+        """
+        Zentraler Request-Handler mit Error-Management.
+        
+        Args:
+            headers: Zusätzliche Header (z.B. If-Modified-Since)
+            api: API-Pfad (crm/v8, crm/bulk/v8)
+            multi_status: Bei 4xx mit Ergebnis pro Datensatz (Insert mehrerer Records,
+                          alle fehlgeschlagen) die Antwort statt None liefern
+        """
+        url = f"{self.api_url}/{api}/{endpoint}"
         
         try:
-            response = requests.request(
-                method, 
-                url, 
-                headers=self._get_headers(), 
-                params=params, 
-                json=data, 
-                timeout=10
-            )
+            response = self.circuit_breaker.call(lambda: self._authorized(
+                lambda auth_headers: governed(self.rate_governor, lambda: requests.request(
+                    method, 
+                    url, 
+                    headers={**auth_headers, **(headers or {})}, 
+                    params=params, 
+                    json=data, 
+                    timeout=10
+                ))
+            ))
             response.raise_for_status()
             
+            # Zoho antwortet ohne Datensätze (leere Suche/Seite) mit 204 No Content,
+            # bei If-Modified-Since ohne Änderungen mit 304 Not Modified
+            if response.status_code in (204, 304):
+                return {}
+            
             # Zoho kapselt Daten in {'data': [...]}
             json_resp = response.json()
             return json_resp
             
         except requests.exceptions.HTTPError as e:
             print(f"❌ API Error {e.response.status_code} at {endpoint}: {e.response.text}")
+            if multi_status and e.response.status_code < 500:
+                try:
+                    body = e.response.json()
+                except ValueError:
+                    return None
+                if isinstance(body, dict) and isinstance(body.get("data"), list):
+                    return body
             return None
         except Exception as e:
             print(f"❌ Network Error at {endpoint}: {e}")
             return None
     
-    def _resolve_target_id(self, target: str) -> Optional[str]:
+    def _download(self, path: str) -> Optional[bytes]:
+        """Lädt eine Datei (z.B. Bulk Read Ergebnis) - path relativ zur API-Domain"""
+        url = path if path.startswith("http") else f"{self.api_url}{path}"
+        try:
+            response = self.circuit_breaker.call(lambda: self._authorized(
+                lambda headers: governed(self.rate_governor, lambda: requests.get(url, headers=headers, timeout=120))
+            ))
+            response.raise_for_status()
+            return response.content
+        except Exception as e:
+            print(f"❌ Download Error at {path}: {e}")
+            return None
+    
+    def _probe(self) -> bool:
+        """Health-Probe für den Circuit Breaker (jede Antwort unter 500 = erreichbar)"""
+        response = requests.get(f"{self.api_url}/crm/v8/org", headers=self._get_headers(), timeout=5)
+        return response.status_code < 500
+    
+    @staticmethod
+    def _search_modules_from_env() -> List[SearchModule]:
+        """ZOHO_SEARCH_MODULES=lead,contact,account,deal (Default: alle)"""
+        names = [n.strip().lower() for n in os.getenv("ZOHO_SEARCH_MODULES", ",".join(SEARCH_MODULES)).split(",") if n.strip()]
+        for name in names:
+            if name not in SEARCH_MODULES:
+                print(f"⚠️ Unbekanntes Modul in ZOHO_SEARCH_MODULES: '{name}' (ignoriert)")
+        modules = [spec for entity, spec in SEARCH_MODULES.items() if entity in names]
+        return modules or [SEARCH_MODULES["lead"]]
+    
+    def _fan_out(self, specs: List[SearchModule], work: Callable[[SearchModule], list]) -> Dict[str, list]:
+        """
+        work(spec) pro Modul parallel ausführen - Latenz ~ ein Round Trip statt einer pro Modul.
+        Jeder Thread läuft im Context des Aufrufers (Rate-Limit-User, Session-Memo, Circuit-Tracking).
+        Fehler eines Moduls kosten nur dessen Treffer.
         """
-        Sucht intelligent nach Lead IDs mit Fuzzy-Matching.
+        if len(specs) == 1:
+            return {specs[0].entity: work(specs[0])}
+        futures = {spec.entity: self._search_pool.submit(contextvars.copy_context().run, work, spec) for spec in specs}
+        results = {}
+        for entity, future in futures.items():
+            try:
+                results[entity] = future.result()
+            except Exception as e:
+                print(f"⚠️ Zoho Suche in {SEARCH_MODULES[entity].module} fehlgeschlagen: {e}")
+                results[entity] = []
+        return results
+    
+    def _remember_modules(self, hits: list):
+        """ID -> Modul merken (Tasks/Notizen mit einer ID aus den Suchergebnissen)"""
+        with self._record_modules_lock:
+            for hit in hits:
+                self._record_modules[hit['id']] = hit['entity']
+                self._record_modules.move_to_end(hit['id'])
+            while len(self._record_modules) > RECORD_MODULES_LIMIT:
+                self._record_modules.popitem(last=False)
+    
+    def _module_of(self, record_id: str) -> SearchModule:
+        """Modul einer bekannten ID (unbekannt -> Leads wie bisher)"""
+        with self._record_modules_lock:
+            return SEARCH_MODULES[self._record_modules.get(record_id, "lead")]
+    
+    def _prefiltered(self, spec: SearchModule, query: str) -> Optional[list]:
+        """
+        Kleine Kandidatenmenge serverseitig holen (unabhängig von der Anzahl Datensätze).
         
-        Strategie:
-        1. Ist es schon eine ID? -> Return.
-        2. Ist es eine E-Mail (@)? -> Fuzzy-Suche nach E-Mail.
-        3. Ist es ein Name? -> Fuzzy-Suche nach Namen (sortiert nach Score).
+        1. E-Mail -> {Modul}/search?email= (exakt)
+        2. Sonst COQL LIKE pro Token auf die Suchspalten des Moduls
+        3. COQL nicht verfügbar (z.B. Scope ZohoCRM.coql.READ fehlt) -> {Modul}/search?word=
         
-        Args:
-            target: Name, Email oder ID
-            
         Returns:
-            Lead ID oder None
+            Datensätze (evtl. leer) oder None, wenn kein Vorfilter möglich war
         """
-        if not target:
+        fields = ",".join(spec.query_fields)
+        if _is_email(query):
+            if not spec.email_search:
+                return []
+            return _records(self._request("GET", f"{spec.module}/search", params={"email": query.strip(), "fields": fields}))
+        
+        select_query = _coql_query(spec, query, self.prefilter_limit)
+        if not select_query:
             return None
+        records = _records(self._request("POST", "coql", data={"select_query": select_query}))
+        if records is not None:
+            return records
         
-        target = target.strip()
+        word = " ".join(_query_tokens(query, spec.max_tokens))
+        return _records(self._request("GET", f"{spec.module}/search", params={"word": word, "fields": fields, "per_page": self.prefilter_limit}))
+    
+    def _lead_pages(self):
+        """Seiten-Scan über alle Leads (Fallback, max. scan_max_pages Seiten à 200)"""
+        params = {"per_page": 200, "fields": ",".join(LEAD_QUERY_FIELDS)}
+        for page in range(1, self.scan_max_pages + 1):
+            response = self._request("GET", "Leads", params={**params, "page": page})
+            if not response or not response.get("data"):
+                return
+            yield response["data"]
+            if not (response.get("info") or {}).get("more_records"):
+                return
+        print(f"⚠️ Scan nach {self.scan_max_pages} Seiten abgebrochen (ZOHO_SCAN_MAX_PAGES)")
+    
+    def _lead_index_ready(self) -> bool:
+        """Lead-Index abfragbar? (stößt fällige Syncs an, Bootstrap läuft im Hintergrund)"""
+        try:
+            return self.lead_sync.ensure_ready()
+        except Exception as e:
+            print(f"⚠️ Zoho Index Sync Fehler: {e}")
+            return self.lead_index.is_ready("lead")
+    
+    def _index_lead(self, lead_id: str, fields: dict):
+        """Write-Through nach eigenen Creates/Updates (verschiebt die High-Water-Mark nicht)"""
+        if not self.lead_index.config.enabled or not lead_id:
+            return
+        record = dict(self.lead_index.get("lead", lead_id) or compact_lead({"id": lead_id}))
+        record.update({k: v for k, v in fields.items() if k in LEAD_INDEX_FIELDS})
+        self.lead_index.upsert("lead", record, track_high_water=False)
+    
+    def _match_leads(self, query: str, match, done=None) -> list:
+        """
+        Index bzw. Vorfilter + lokales Fuzzy-Ranking, Seiten-Scan nur wenn nötig.
         
-        # 1. ID Check (Zoho IDs sind numerisch, 16-19 Stellen)
-        if target.isdigit() and len(target) >= 16:
-            return target
+        Args:
+            match: CandidateColumns -> Treffer (Fuzzy-Scorer)
+            done: Treffer -> True, wenn der Scan abbrechen darf (z.B. exakter Treffer)
+        """
+        # Lokaler Index (vollständig, im Speicher)
+        if self.lead_index.config.enabled and self._lead_index_ready():
+            return match(self.lead_index.columns("lead", _lead_columns))
+        
+        if self.prefilter_enabled:
+            leads = self._prefiltered(SEARCH_MODULES["lead"], query)
+            if leads is not None:
+                hits = match(_lead_columns(leads)) if leads else []
+                # E-Mail-Suche ist exakt und vollständig - ein Scan findet nichts Neues
+                if hits or _is_email(query):
+                    return hits
+                # Name nicht gefunden (z.B. Tippfehler) -> breiter Scan
+                print(f"🔎 Vorfilter ohne Treffer für '{query}', Seiten-Scan...")
+        
+        hits = []
+        for leads in self._lead_pages():
+            hits.extend(match(_lead_columns(leads)))
+            if done and done(hits):
+                break
+        return hits
+    
+    def _match_module(self, spec: SearchModule, query: str, match, done=None) -> list:
+        """
+        Kandidaten eines Moduls ranken. Leads: Index / Vorfilter / Seiten-Scan.
+        Andere Module nur über den Vorfilter (ohne Vorfilter keine Treffer).
+        """
+        if spec.entity == "lead":
+            return self._match_leads(query, match, done)
+        if not self.prefilter_enabled:
+            return []
+        records = self._prefiltered(spec, query)
+        return match(CandidateColumns(records, spec.columns)) if records else []
+    
+    def _resolve_best(self, spec: SearchModule, target: str) -> Optional[dict]:
+        """
+        Bester Kandidat für Name/E-Mail in einem Modul (Memo, Index, Vorfilter + Fuzzy).
         
-        print(f"🔍 Fuzzy-Resolve Lead ID für: '{target}'...")
+        Returns:
+            {'id', 'score', ...} oder None
+        """
+        # Schon in dieser Session (oder kürzlich) aufgelöst?
+        memoized = self.resolve_cache.lookup(spec.entity, target)
+        if memoized:
+            return {'id': memoized, 'score': 100.0}
+        
+        # Schnellweg: Exakter Treffer im Lead-Index (E-Mail / voller Name)
+        if spec.entity == "lead" and self.lead_index.config.enabled and self._lead_index_ready():
+            exact = self.lead_index.lookup("lead", target)
+            if exact:
+                print(f"✅ Lead ID gefunden (exakt im Index): {exact[0]['id']}")
+                self.resolve_cache.remember("lead", target, exact[0]['id'])
+                return {'id': exact[0]['id'], 'score': 100.0}
+        
+        print(f"🔍 Fuzzy-Resolve {spec.label} ID für: '{target}'...")
         
         try:
-            # Hole Leads (max 200) - Zoho braucht explizite Fields!
-            fields = "id,First_Name,Last_Name,Email,Company,Phone,Mobile,Designation"
-            response = self._request("GET", "Leads", params={"per_page": 200, "fields": fields})
-            
-            if not response or "data" not in response:
-                print("⚠️ Keine Leads gefunden")
-                return None
-            
-            leads = response.get("data", [])
-            candidates = []
+            # Kandidaten aus dem Index bzw. serverseitig vorgefiltert, lokal ranken
+            candidates = self._match_module(
+                spec, target, lambda columns: _resolve_hits(spec, target, columns),
+                done=lambda hits: any(c['score'] >= 100 for c in hits)
+            )
             
-            # 2. Suche mit Fuzzy-Matching
-            for lead in leads:
-                lead_id = lead.get("id")
-                
-                # A) E-Mail Match
-                if "@" in target:
-                    email = lead.get("Email", "")
-                    if email:
-                        is_match, score = self._fuzzy_match(target, email, threshold=80)
-                        if is_match:
-                            candidates.append({
-                                'id': lead_id,
-                                'score': score,
-                                'matched': email,
-                                'type': 'email'
-                            })
-                
-                # B) Name Match (Fuzzy)
-                else:
-                    first_name = lead.get("First_Name", "")
-                    last_name = lead.get("Last_Name", "")
-                    full_name = f"{first_name} {last_name}".strip()
-                    
-                    if full_name:
-                        is_match, score = self._fuzzy_match(target, full_name, threshold=70)
-                        if is_match:
-                            candidates.append({
-                                'id': lead_id,
-                                'score': score,
-                                'matched': full_name,
-                                'type': 'name'
-                            })
-                    
-                    # Auch Company-Name checken
-                    company = lead.get("Company", "")
-                    if company:
-                        is_match, score = self._fuzzy_match(target, company, threshold=70)
-                        if is_match:
-                            candidates.append({
-                                'id': lead_id,
-                                'score': score,
-                                'matched': company,
-                                'type': 'company'
-                            })
-            
-            # 3. Besten Kandidaten wählen (höchster Score)
+            # Besten Kandidaten wählen (höchster Score)
             if candidates:
                 best = max(candidates, key=lambda x: x['score'])
-                print(f"✅ Lead ID gefunden (via {best['type']} '{best['matched']}', Score: {best['score']:.0f}%): {best['id']}")
-                return best['id']
+                print(f"✅ {spec.label} ID gefunden (via {best['type']} '{best['matched']}', Score: {best['score']:.0f}%): {best['id']}")
+                self.resolve_cache.remember(spec.entity, target, best['id'], best['score'])
+                return best
             
-            print(f"⚠️ Nichts gefunden für '{target}'")
+            print(f"⚠️ Nichts gefunden für '{target}' ({spec.module})")
             return None
             
         except Exception as e:
             print(f"❌ Resolve Fehler: {e}")
             return None
     
+    def _resolve_target_id(self, target: str, entity_type: str = "lead") -> Optional[str]:
+        """
+        Sucht intelligent nach IDs mit Fuzzy-Matching.
+        
+        Strategie:
+        1. Ist es schon eine ID? -> Return.
+        2. Schon aufgelöst (Session-Memo / Adapter-Memo)?
+        3. Leads: Exakter Treffer im Lead-Index.
+        4. Kandidaten aus dem Lead-Index bzw. serverseitig (Search API / COQL, Fallback: Seiten-Scan).
+        5. E-Mail (@) -> Fuzzy-Suche nach E-Mail, sonst nach Namen (bester Score gewinnt).
+        
+        Args:
+            target: Name, Email oder ID
+            entity_type: "lead", "contact", "account" oder "deal"
+            
+        Returns:
+            ID oder None
+        """
+        if not target:
+            return None
+        
+        target = target.strip()
+        
+        # 1. ID Check (Zoho IDs sind numerisch, 16-19 Stellen)
+        if target.isdigit() and len(target) >= 16:
+            return target
+        
+        best = self._resolve_best(SEARCH_MODULES[entity_type], target)
+        return best['id'] if best else None
+    
+    def _resolve_link_target(self, target: str) -> Tuple[Optional[str], SearchModule]:
+        """
+        Verknüpfungsziel für Tasks/Notizen: zuerst Leads (wie bisher), sonst parallel
+        Kontakte/Firmen/Deals - konvertierte Leads existieren nur noch als Kontakt.
+        
+        Returns:
+            (ID oder None, Modul)
+        """
+        lead = SEARCH_MODULES["lead"]
+        target = (target or "").strip()
+        if target.isdigit() and len(target) >= 16:
+            return target, self._module_of(target)
+        
+        lead_id = self._resolve_target_id(target)
+        if lead_id or not target:
+            return lead_id, lead
+        
+        others = [spec for spec in self.search_modules
+                  if spec.entity != "lead" and (spec.email_search or "@" not in target)]
+        found = self._fan_out(others, lambda spec: [self._resolve_best(spec, target)])
+        candidates = [(found[spec.entity][0], spec) for spec in others if found[spec.entity] and found[spec.entity][0]]
+        if not candidates:
+            return None, lead
+        # Bester Score, bei Gleichstand Vorrang laut SEARCH_MODULES (Kontakt vor Firma vor Deal)
+        best, spec = max(candidates, key=lambda c: c[0]['score'])
+        return best['id'], spec
+    
     def get_lead_details(self, lead_id: str) -> str:
         """
         Ruft alle Details eines Leads ab (inkl. Phone, Mobile, Custom Fields, etc.).
@@ -270,8 +778,12 @@ class ZohoCRM:
         print(f"📋 Getting details for Lead ID: {lead_id}")
         
         try:
-            # Hole ALLE Felder des Leads
-            response = self._request("GET", f"Leads/{lead_id}")
+            # Hole ALLE Felder des Leads (Read-Through über den Entity-Cache)
+            response = self.entity_cache.get("lead", lead_id)
+            if response is None:
+                response = self._request("GET", f"Leads/{lead_id}")
+                if response and "data" in response:
+                    self.entity_cache.set("lead", lead_id, response)
             
             if not response or "data" not in response:
                 return f"❌ Lead mit ID {lead_id} nicht gefunden."
@@ -374,86 +886,66 @@ class ZohoCRM:
     
     def search_leads(self, query: str) -> str:
         """
-        Smart-Fuzzy-Search für Leads:
-        1. Findet Leads via Fuzzy-Match (Name, Email, Company).
-        2. Sortiert nach Relevanz-Score (beste Matches zuerst).
+        Smart-Fuzzy-Search über Leads, Kontakte, Firmen und Deals:
+        1. Holt Kandidaten pro Modul parallel serverseitig (Search API / COQL),
+           Leads auch aus dem Index bzw. per Seiten-Scan.
+        2. Findet Datensätze via Fuzzy-Match (Name, Email, Company).
+        3. Dedupliziert (ID, konvertierter Lead = Kontakt mit gleicher E-Mail)
+           und sortiert gemeinsam nach Relevanz-Score (beste Matches zuerst).
         """
         print(f"🕵️ Smart-Fuzzy-Search für: '{query}'")
-        results = []
         
         try:
-            # Hole Leads - Zoho braucht explizite Fields!
-            fields = "id,First_Name,Last_Name,Email,Company,Phone,Mobile,Designation"
-            response = self._request("GET", "Leads", params={"per_page": 100, "fields": fields})
-            
-            if not response or "data" not in response:
-                return f"❌ Keine Leads gefunden."
-            
-            leads = response.get("data", [])
-            
-            for lead in leads:
-                # Parsing
-                first_name = lead.get("First_Name", "")
-                last_name = lead.get("Last_Name", "")
-                full_name = f"{first_name} {last_name}".strip()
-                
-                email = lead.get("Email", "")
-                company = lead.get("Company", "")
-                phone = lead.get("Phone", "")
-                designation = lead.get("Designation", "")
-                
-                lead_id = lead.get("id")
-                
-                # Fuzzy-Match auf Name, Email, Company
-                name_match, name_score = self._fuzzy_match(query, full_name, threshold=70)
-                email_match, email_score = self._fuzzy_match(query, email, threshold=75) if email else (False, 0)
-                company_match, company_score = self._fuzzy_match(query, company, threshold=70) if company else (False, 0)
-                
-                # Bester Score gewinnt
-                best_score = max(name_score, email_score, company_score)
-                is_match = name_match or email_match or company_match
-                
-                if is_match:
-                    # Formatierung
-                    display_parts = [f"👤 {full_name}"]
-                    if designation:
-                        display_parts.append(f"({designation})")
-                    if company:
-                        display_parts.append(f"@ {company}")
-                    if email:
-                        display_parts.append(f"<{email}>")
-                    if phone:
-                        display_parts.append(f"📞 {phone}")
-                    
-                    results.append({
-                        'name': full_name,
-                        'email': email,
-                        'company': company,
-                        'phone': phone,
-                        'id': lead_id,
-                        'score': best_score,
-                        'display': " ".join(display_parts)
-                    })
-            
-            # Sortierung nach Score (beste Matches zuerst)
-            results.sort(key=lambda x: x['score'], reverse=True)
+            # E-Mail-Suche nur in Modulen mit E-Mail-Feld
+            specs = [spec for spec in self.search_modules if spec.email_search or not _is_email(query)]
+            found = self._fan_out(
+                specs, lambda spec: self._match_module(spec, query, lambda columns: _search_hits(spec, query, columns))
+            )
+            results = self._merge_hits([hit for spec in specs for hit in found[spec.entity]])
             
             if not results:
                 return f"❌ Keine Einträge für '{query}' gefunden."
             
+            # Treffer merken: Folge-Tools mit Name / E-Mail / ID brauchen keinen Resolve mehr
+            for spec in specs:
+                hits = [r for r in results if r['entity'] == spec.entity]
+                self.resolve_cache.remember_hits(spec.entity, [(r['name'], r['id']) for r in hits] +
+                                                 [(r['email'], r['id']) for r in hits])
+            self._remember_modules(results)
+            
             # Formatierung mit Score (optional für Debug)
             formatted_results = []
             for r in results:
                 score_display = f" [Match: {r['score']:.0f}%]" if r['score'] < 100 else ""
                 formatted_results.append(f"{r['display']}{score_display} (ID: {r['id']})")
             
-            return "✅ Gefundene Leads:\n" + "\n".join(formatted_results)
+            return "✅ Gefundene Datensätze:\n" + "\n".join(formatted_results)
             
         except Exception as e:
             print(f"❌ Search Error: {e}")
             return f"❌ Fehler bei der Suche: {str(e)}"
     
-    def create_contact(self, first_name: str, last_name: str, company: str, email: str, phone: Optional[str] = None) -> str:
+    @staticmethod
+    def _merge_hits(hits: list) -> list:
+        """
+        Treffer aller Module gemeinsam ranken und deduplizieren.
+        Gleiche ID nur einmal; Lead mit der E-Mail eines Kontakts ist konvertiert -> nur der Kontakt.
+        """
+        priority = {entity: i for i, entity in enumerate(SEARCH_MODULES)}
+        contact_emails = {h['email'].lower() for h in hits if h['entity'] == "contact" and h['email']}
+        
+        # Sortierung nach Score (beste Matches zuerst), bei Gleichstand nach Modul-Vorrang
+        merged, seen = [], set()
+        for hit in sorted(hits, key=lambda h: (-h['score'], priority[h['entity']])):
+            if hit['id'] in seen:
+                continue
+            if hit['entity'] == "lead" and hit['email'] and hit['email'].lower() in contact_emails:
+                continue
+            seen.add(hit['id'])
+            merged.append(hit)
+        return merged
+    
+    def create_contact(self, first_name: str, last_name: str, company: str, email: str, phone: Optional[str] = None, force: bool = False) -> str:
         """
         Erstellt neuen Lead in Zoho CRM.
         
@@ -465,22 +957,17 @@ class ZohoCRM:
             company: Firmenname (REQUIRED - auch wenn unbekannt, dann "-" oder "Unbekannt")
             email: E-Mail Adresse (REQUIRED)
             phone: Telefonnummer (OPTIONAL)
+            force: Duplikat-Prüfung überspringen (User hat bestätigt, dass der Lead neu ist)
             
         Returns:
-            Erfolgsmeldung mit Lead ID
+            Erfolgsmeldung mit Lead ID bzw. mögliche Duplikate (dann wird nichts angelegt)
         """
-        payload = {
-            "data": [{
-                "First_Name": first_name,
-                "Last_Name": last_name,
-                "Company": company,
-                "Email": email,
-                "Lead_Source": "AI Assistant"
-            }]
-        }
+        if not force:
+            candidates = self._duplicate_leads(first_name, last_name, company, email)
+            if candidates:
+                return format_duplicates(first_name, last_name, candidates, label="Lead")
         
-        if phone:
-            payload["data"][0]["Phone"] = phone
+        payload = {"data": [self._lead_record(first_name, last_name, company, email, phone)]}
         
         print(f"📝 Creating Lead: {first_name} {last_name} @ {company} <{email}>")
         
@@ -497,6 +984,8 @@ class ZohoCRM:
             code = lead_data.get("code")
             if code == "SUCCESS":
                 lead_id = lead_data.get("details", {}).get("id")
+                self.entity_cache.invalidate("lead", lead_id)
+                self._index_lead(lead_id, payload["data"][0])
                 full_name = f"{first_name} {last_name}"
                 return f"✅ Lead erstellt: {full_name} @ {company} (ID: {lead_id})"
             else:
@@ -506,17 +995,156 @@ class ZohoCRM:
         
         return "❌ Fehler beim Erstellen des Leads (Unerwartete Response)."
     
-    def create_task(self, title: str, body: str = "", due_date: str = None, target_id: str = None) -> str:
+    def _duplicate_leads(self, first_name: str, last_name: str, company: str, email: str) -> list:
+        """
+        Mögliche Duplikate: Lead-Index (Name + E-Mail) und gleiche E-Mail als Lead/Kontakt.
+        
+        Die E-Mail läuft immer über _existing_emails (Kontakte sind nicht im Index,
+        Leads per COQL, solange der Index aus / noch nicht geladen ist).
+        """
+        if not self.duplicate_config.enabled:
+            return []
+        candidates = []
+        if self.lead_index.config.enabled and self._lead_index_ready():
+            contact = {"first_name": first_name, "last_name": last_name, "company": company, "email": email}
+            candidates = find_duplicates(self.lead_index, "lead", contact, _lead_view, self.duplicate_config)
+        
+        if email:
+            record_id, spec = self._existing_emails([email]).get(email_key(email), (None, None))
+            if record_id and record_id not in {c["id"] for c in candidates}:
+                candidates.insert(0, {"id": record_id, "name": spec.label, "email": email, "company": "",
+                                      "score": 100, "reasons": ["gleiche E-Mail"]})
+            candidates = candidates[:self.duplicate_config.max_candidates]
+        
+        if candidates:
+            print(f"👯 {len(candidates)} mögliche Duplikate für {first_name} {last_name}")
+        return candidates
+    
+    @staticmethod
+    def _lead_record(first_name: str, last_name: str, company: str, email: str, phone: Optional[str] = None) -> dict:
+        """Lead-Payload für Insert (create_contact / bulk_create_contacts)"""
+        record = {
+            "First_Name": first_name,
+            "Last_Name": last_name,
+            "Company": company,
+            "Email": email,
+            "Lead_Source": "AI Assistant"
+        }
+        if phone:
+            record["Phone"] = phone
+        return record
+    
+    def _mapped_fields(self, entity_type: str, fields: dict) -> dict:
+        """Validierte Zusatzfelder (generische Namen, z.B. aus dem Datei-Import) -> CRM-Feldnamen"""
+        if not fields or not self.field_mapper:
+            return {}
+        return self.field_mapper.map_fields(entity_type, fields)
+    
+    def _existing_emails(self, emails: List[str]) -> Dict[str, Tuple[str, SearchModule]]:
+        """
+        Vorhandene Datensätze zu E-Mails (Leads + Kontakte, parallel, 50 Werte pro COQL).
+        Leads kommen bei bereitem Index ohne Request aus dem Index.
+        
+        Returns:
+            email_key -> (ID, Modul)
+        """
+        keys = sorted({email_key(e) for e in emails if e and "'" not in e})
+        
+        def lookup(spec: SearchModule) -> list:
+            if spec.entity == "lead" and self.lead_index.config.enabled and self._lead_index_ready():
+                return [record for key in keys for record in self.lead_index.lookup("lead", key)]
+            found = []
+            for start in range(0, len(keys), COQL_IN_LIMIT):
+                values = ", ".join(f"'{key}'" for key in keys[start:start + COQL_IN_LIMIT])
+                select_query = f"select id, Email from {spec.module} where Email in ({values}) limit {COQL_IN_LIMIT * 2}"
+                found.extend(_records(self._request("POST", "coql", data={"select_query": select_query})) or [])
+            return found
+        
+        specs = [SEARCH_MODULES["contact"], SEARCH_MODULES["lead"]] if keys else []
+        existing = {}
+        found = self._fan_out(specs, lookup) if specs else {}
+        for spec in specs:
+            for record in found[spec.entity]:
+                existing.setdefault(email_key(record.get("Email")), (record.get("id"), spec))
+        return existing
+    
+    def bulk_create_contacts(self, contacts: List[dict], created: Optional[list] = None,
+                             outcomes: Optional[list] = None) -> str:
+        """
+        Legt viele Leads an (Messe-Listen, CSV): 100 pro Insert statt ein Request pro Lead.
+        
+        Duplikate (E-Mail schon als Lead/Kontakt vorhanden oder doppelt in der Liste)
+        werden übersprungen, das Ergebnis wird pro Datensatz gemeldet.
+        
+        Args:
+            contacts: Dicts mit first_name, last_name, company, email, phone
+            created: Optionale Liste, wird mit den IDs der neuen Leads befüllt (Undo)
+            outcomes: Optionale Liste, wird mit dem Ergebnis pro Datensatz befüllt (Datei-Import)
+            
+        Returns:
+            Zusammenfassung (erstellt / Duplikate / Fehler mit Zeilennummer)
+        """
+        records, results = prepare_contacts(contacts)
+        print(f"📥 Bulk-Import: {len(contacts)} Zeilen, {len(records)} gültig")
+        
+        # Duplikat-Check gegen das CRM (ein Round Trip für Leads + Kontakte)
+        existing = self._existing_emails([r["email"] for r in records if r["email"]])
+        pending = []
+        for record in records:
+            match = existing.get(email_key(record["email"])) if record["email"] else None
+            if match:
+                results.append(outcome(record, "duplicate", match[0], f"existiert bereits ({match[1].label})"))
+            else:
+                pending.append(record)
+        
+        for start in range(0, len(pending), BULK_INSERT_SIZE):
+            chunk = pending[start:start + BULK_INSERT_SIZE]
+            payload = {"data": [
+                {**{k: v for k, v in self._lead_record(r["first_name"], r["last_name"], r["company"] or "-",
+                                                       r["email"], r["phone"]).items() if v},
+                 **self._mapped_fields("lead", r["fields"])}
+                for r in chunk
+            ]}
+            entries = _records(self._request("POST", "Leads", data=payload, multi_status=True))
+            if not entries:
+                results.extend(outcome(r, "failed", message="API Error") for r in chunk)
+                continue
+            
+            # Zoho antwortet pro Datensatz in Request-Reihenfolge
+            for record, lead, entry in zip(chunk, payload["data"], entries):
+                details = entry.get("details") or {}
+                if entry.get("code") == "SUCCESS":
+                    lead_id = details.get("id")
+                    self.entity_cache.invalidate("lead", lead_id)
+                    self._index_lead(lead_id, lead)
+                    results.append(outcome(record, "created", lead_id))
+                    if created is not None:
+                        created.append(lead_id)
+                elif entry.get("code") == "DUPLICATE_DATA":
+                    duplicate_id = (details.get("duplicate_record") or {}).get("id") or details.get("id")
+                    results.append(outcome(record, "duplicate", duplicate_id, "existiert bereits (Zoho Duplikat-Check)"))
+                else:
+                    results.append(outcome(record, "failed", message=entry.get("message") or entry.get("code") or "Unknown error"))
+        
+        if outcomes is not None:
+            outcomes.extend(results)
+        return format_bulk_result(results, label="Leads")
+    
+    def create_task(self, title: str, body: str = "", due_date: str = None, target_id: str = None, company_target: str = None) -> str:
         """
         Erstellt Task in Zoho CRM.
         Löst Names/Emails automatisch in IDs auf (Self-Healing).
+        
+        Die Verknüpfung (What_Id bzw. Who_Id) steckt bereits im Create-Request. Ziel ist
+        ein Lead, ohne Lead-Treffer ein Kontakt, eine Firma oder ein Deal. company_target
+        wird ignoriert: Bei Leads ist die Firma Teil des Leads.
         """
         print(f"📝 Zoho: Task '{title}' (Datum: {due_date}, Target: {target_id})")
         
         # --- PHASE 0: ID REPARATUR (Self-Healing) ---
-        real_target_id = None
+        real_target_id, target_module = None, SEARCH_MODULES["lead"]
         if target_id:
-            real_target_id = self._resolve_target_id(target_id)
+            real_target_id, target_module = self._resolve_link_target(target_id)
         
         # --- PHASE 1: TASK ERSTELLEN ---
         # Subject ist PFLICHTFELD!
@@ -535,12 +1163,15 @@ class ZohoCRM:
             # Zoho erwartet Format: YYYY-MM-DD
             payload["data"][0]["Due_Date"] = due_date
         
-        # Verknüpfung mit Lead (What_Id + $se_module sind REQUIRED für Verknüpfung!)
-        if real_target_id:
+        # Verknüpfung (What_Id + $se_module sind REQUIRED für Verknüpfung!)
+        # Kontakte hängen als "Who" am Task, alle anderen Module als "What"
+        if real_target_id and target_module.entity == "contact":
+            payload["data"][0]["Who_Id"] = real_target_id
+        elif real_target_id:
             payload["data"][0]["What_Id"] = real_target_id
-            payload["data"][0]["$se_module"] = "Leads"  # Gibt an, mit welchem Modul verknüpft
+            payload["data"][0]["$se_module"] = target_module.module  # Gibt an, mit welchem Modul verknüpft
         
-        print(f"📝 Task Payload: Subject='{title}', What_Id={real_target_id}, Module=Leads")
+        print(f"📝 Task Payload: Subject='{title}', Target={real_target_id}, Module={target_module.module}")
         
         response = self._request("POST", "Tasks", data=payload)
         
@@ -558,7 +1189,8 @@ class ZohoCRM:
                 output = f"✅ Aufgabe '{title}' erstellt (ID: {task_id})"
                 
                 if real_target_id:
-                    output += " 🔗 Verknüpft mit Lead!"
+                    self.entity_cache.invalidate(target_module.entity, real_target_id)
+                    output += f" 🔗 Verknüpft mit {target_module.label}!"
                 elif target_id:
                     output += " ⚠️ Verknüpfung fehlgeschlagen (Lead nicht gefunden)."
                 
@@ -570,15 +1202,16 @@ class ZohoCRM:
         
         return "❌ Fehler: Task konnte nicht erstellt werden (Unerwartete Response)."
     
-    def create_note(self, title: str, content: str, target_id: str) -> str:
+    def create_note(self, title: str, content: str, target_id: str, company_target: str = None) -> str:
         """
         Erstellt Notiz in Zoho CRM.
         Löst Names/Emails automatisch in IDs auf (Self-Healing).
+        Ziel wie bei create_task (Lead, sonst Kontakt/Firma/Deal), company_target wird ignoriert.
         """
         print(f"📝 Zoho: Erstelle Notiz '{title}' für Target '{target_id}'...")
         
         # --- PHASE 0: ID REPARATUR ---
-        real_target_id = self._resolve_target_id(target_id)
+        real_target_id, target_module = self._resolve_link_target(target_id)
         
         if not real_target_id:
             return f"❌ Lead '{target_id}' nicht gefunden. Notiz konnte nicht erstellt werden."
@@ -589,7 +1222,7 @@ class ZohoCRM:
             "data": [{
                 "Parent_Id": {
                     "module": {
-                        "api_name": "Leads"
+                        "api_name": target_module.module
                     },
                     "id": real_target_id
                 },
@@ -598,7 +1231,7 @@ class ZohoCRM:
             }]
         }
         
-        print(f"📝 Note Payload: Parent_Id={real_target_id}, Title={title}")
+        print(f"📝 Note Payload: Parent_Id={real_target_id} ({target_module.module}), Title={title}")
         
         response = self._request("POST", "Notes", data=payload)
         
@@ -613,6 +1246,7 @@ class ZohoCRM:
             code = note_data.get("code")
             if code == "SUCCESS":
                 note_id = note_data.get("details", {}).get("id")
+                self.entity_cache.invalidate(target_module.entity, real_target_id)
                 return f"✅ Notiz '{title}' erstellt (ID: {note_id})"
             else:
                 # API hat Error zurückgegeben
@@ -621,21 +1255,26 @@ class ZohoCRM:
         
         return "❌ Fehler: Notiz konnte nicht erstellt werden (Unerwartete Response)."
     
-    def update_entity(self, target: str, entity_type: str, fields: dict) -> str:
+    def update_entity(self, target: str, entity_type: str, fields: dict, undo_snapshot: Optional[dict] = None) -> str:
         """
-        Aktualisiert beliebige Felder eines Leads (Dynamic Field Enrichment).
+        Aktualisiert beliebige Felder eines Leads, Kontakts, einer Firma oder eines Deals
+        (Dynamic Field Enrichment).
         
         Features:
         - Whitelist-basiert: Nur erlaubte Felder werden akzeptiert
         - Field Mapping: Generic Names → Zoho Field Names
         - Validation: Type-Checking + Auto-Fix
         - Self-Healing: Name/Email → ID Resolution
-        - Auto-Mapping: "person"/"company" → "lead" (Zoho hat nur Leads)
+        - Auto-Mapping: "person"/"company" → "lead" (Person + Firma stecken im Lead)
+        - Undo: Optionaler Snapshot der vorherigen Werte
         
         Args:
-            target: Name, Email oder Lead ID
-            entity_type: "lead", "person" oder "company" (wird automatisch auf "lead" gemappt)
+            target: Name, Email oder ID
+            entity_type: "lead", "contact", "account", "deal" oder
+                "person"/"company" (wird automatisch auf "lead" gemappt)
             fields: Dict mit generic field names
+            undo_snapshot: Optionales Dict, wird bei Erfolg mit entity_type, entity_id
+                und previous_values (Zoho-Feldnamen) befüllt
             
         Returns:
             Bestätigung mit aktualisierten Feldern
@@ -644,22 +1283,23 @@ class ZohoCRM:
             update_entity("Max Mustermann", "person", {"job": "CEO"})
             → Wird automatisch auf entity_type="lead" gemappt
         """
-        # 0. Auto-Mapping: Bei Zoho gibt es nur "lead" (kombiniert Person + Company)
-        if entity_type in ["person", "company"]:
+        # 0. Auto-Mapping: "person"/"company" sind bei Zoho ein "lead" (kombiniert Person + Company)
+        if entity_type not in SEARCH_MODULES:
             print(f"🔄 Auto-Mapping: entity_type '{entity_type}' → 'lead' (Zoho Struktur)")
             entity_type = "lead"
+        spec = SEARCH_MODULES[entity_type]
         
-        print(f"📝 Update Lead: '{target}' with {fields}")
+        print(f"📝 Update {spec.label}: '{target}' with {fields}")
         
         # 1. Field Mapper Check
         if not self.field_mapper:
             return "❌ Field Mapping nicht verfügbar. Feature deaktiviert."
         
         # 2. Target-ID auflösen (Self-Healing)
-        lead_id = self._resolve_target_id(target)
+        lead_id = self._resolve_target_id(target, entity_type)
         
         if not lead_id:
-            return f"❌ Lead '{target}' nicht gefunden im CRM."
+            return f"❌ {spec.label} '{target}' nicht gefunden im CRM."
         
         # 3. Felder validieren und mappen (nur Whitelist + Auto-Fix)
         validated_fields = {}
@@ -667,14 +1307,14 @@ class ZohoCRM:
         
         for field_name, value in fields.items():
             # Prüfe ob Feld in Whitelist
-            if not self.field_mapper.is_field_allowed("lead", field_name):
+            if not self.field_mapper.is_field_allowed(entity_type, field_name):
                 print(f"⚠️ Feld '{field_name}' nicht in Whitelist (übersprungen)")
                 skipped_fields.append(field_name)
                 continue
             
             # Validiere & Auto-Fix
             is_valid, corrected_value, error = self.field_mapper.validate_field(
-                "lead", field_name, value
+                entity_type, field_name, value
             )
             
             if not is_valid:
@@ -683,7 +1323,7 @@ class ZohoCRM:
                 continue
             
             # Mappe zu Zoho-Feldnamen
-            crm_field = self.field_mapper.get_crm_field_name("lead", field_name)
+            crm_field = self.field_mapper.get_crm_field_name(entity_type, field_name)
             if crm_field:
                 validated_fields[crm_field] = corrected_value
         
@@ -696,41 +1336,77 @@ class ZohoCRM:
         
         print(f"🔄 Mapped & Validated: {validated_fields}")
         
-        # 5. API Call (PUT)
+        # 5. Vorherige Werte sichern (nur wenn Undo-Snapshot gewünscht)
+        previous_values = None
+        if undo_snapshot is not None:
+            current = self._request("GET", f"{spec.module}/{lead_id}", params={"fields": ",".join(validated_fields)})
+            if current and current.get("data"):
+                record = current["data"][0]
+                previous_values = {zoho_field: record.get(zoho_field) for zoho_field in validated_fields}
+        
+        # 6. API Call (PUT)
         payload = {"data": [validated_fields]}
         
-        response = self._request("PUT", f"Leads/{lead_id}", data=payload)
+        response = self._request("PUT", f"{spec.module}/{lead_id}", data=payload)
         
         if not response or "data" not in response:
             failed_fields = ", ".join([f"{k}={v}" for k, v in fields.items()])
             return f"❌ CRM hat Update abgelehnt. Versuchte Felder: {failed_fields}"
         
-        # 6. Response formatieren
+        self.entity_cache.invalidate(entity_type, lead_id)
+        if entity_type == "lead":
+            self._index_lead(lead_id, validated_fields)
+        
+        if previous_values is not None:
+            undo_snapshot.update({
+                "entity_type": entity_type,
+                "entity_id": lead_id,
+                "previous_values": previous_values,
+            })
+        
+        # 7. Response formatieren
         updated_list = []
         for field_name, value in fields.items():
             if field_name not in skipped_fields:
                 updated_list.append(f"{field_name}: {value}")
         
-        response_text = f"✅ Lead aktualisiert: {', '.join(updated_list)}"
+        response_text = f"✅ {spec.label} aktualisiert: {', '.join(updated_list)}"
         
         if skipped_fields:
             response_text += f"\n⚠️ Übersprungen: {', '.join(skipped_fields)}"
         
         return response_text
     
+    def restore_entity(self, entity_type: str, entity_id: str, previous_values: dict) -> str:
+        """
+        Stellt Feldwerte nach einem Update wieder her (Undo für update_entity).
+        
+        Args:
+            entity_type: "lead", "contact", "account" oder "deal" (andere wie bei update_entity gemappt)
+            entity_id: Zoho ID
+            previous_values: Dict mit Zoho-Feldnamen (aus dem Undo-Snapshot)
+        """
+        if not previous_values:
+            return "⚠️ Keine vorherigen Werte gespeichert."
+        
+        spec = SEARCH_MODULES.get(entity_type, SEARCH_MODULES["lead"])
+        print(f"↩️ Restoring {spec.label} {entity_id}: {list(previous_values.keys())}")
+        
+        response = self._request("PUT", f"{spec.module}/{entity_id}", data={"data": [previous_values]})
+        
+        if response and response.get("data") and response["data"][0].get("code") == "SUCCESS":
+            self.entity_cache.invalidate(spec.entity, entity_id)
+            if spec.entity == "lead":
+                self._index_lead(entity_id, previous_values)
+            return "✅ Update erfolgreich rückgängig gemacht."
+        return f"❌ Wiederherstellen von {spec.label} {entity_id} fehlgeschlagen."
+    
     def delete_item(self, item_type: str, item_id: str) -> str:
         """
         Löscht ein Objekt (Lead, Task, Note) anhand der ID.
         Für Undo-Funktion.
         """
-        endpoint_map = {
-            "lead": "Leads",
-            "contact": "Leads",
-            "task": "Tasks",
-            "note": "Notes"
-        }
-        
-        endpoint = endpoint_map.get(item_type)
+        endpoint = DELETE_MODULES.get(item_type)
         if not endpoint:
             return "❌ Fehler: Unbekannter Typ."
         
@@ -740,12 +1416,15 @@ class ZohoCRM:
             url = f"{self.api_url}/crm/v8/{endpoint}/{item_id}"
             print(f"🗑️ DELETE URL: {url}")
             
-            response = requests.delete(url, headers=self._get_headers(), timeout=10)
+            response = self.circuit_breaker.call(lambda: self._authorized(
+                lambda headers: governed(self.rate_governor, lambda: requests.delete(url, headers=headers, timeout=10))
+            ))
             
             print(f"🗑️ Response Status: {response.status_code}")
             print(f"🗑️ Response Body: {response.text}")
             
             if response.status_code in [200, 204]:
+                self._forget_deleted(item_type, item_id)
                 return "✅ Aktion erfolgreich rückgängig gemacht."
             elif response.status_code == 404:
                 return "⚠️ Element war bereits gelöscht."
@@ -753,7 +1432,11 @@ class ZohoCRM:
                 # Detaillierter Error
                 try:
                     error_data = response.json()
-                    message = error_data.get("message", response.text)
+                    entry = (error_data.get("data") or [error_data])[0]
+                    if entry.get("code") == "INVALID_DATA":
+                        # ID existiert nicht (mehr) - für Undo ein Erfolg
+                        return "⚠️ Element war bereits gelöscht."
+                    message = entry.get("message") or error_data.get("message", response.text)
                     return f"❌ Fehler beim Löschen: {message}"
                 except:
                     return f"❌ Fehler beim Löschen (Status {response.status_code}): {response.text}"
@@ -761,4 +1444,85 @@ class ZohoCRM:
         except Exception as e:
             print(f"❌ Exception beim Löschen: {e}")
             return f"❌ Fehler: {e}"
-
+    
+    def get_cache_metrics(self) -> dict:
+        """Hit-Rate des Entity-Caches (für /metrics/crm)"""
+        return self.entity_cache.get_metrics()
+    
+    def get_rate_limit_metrics(self) -> dict:
+        """Wartezeiten, 429er und Restbudget der Org (für /metrics/crm)"""
+        return self.rate_governor.get_metrics()
+    
+    def get_circuit_metrics(self) -> dict:
+        """Zustand des Circuit Breakers (für /metrics/crm)"""
+        return self.circuit_breaker.get_metrics()
+    
+    def get_resolve_metrics(self) -> dict:
+        """Hit-Rate des Name -> ID Memos (für /metrics/crm)"""
+        return self.resolve_cache.get_metrics()
+    
+    def get_index_metrics(self) -> dict:
+        """Größe und Sync-Stand des Lead-Index (für /metrics/crm)"""
+        return self.lead_sync.get_metrics()
+    
+    def get_token_metrics(self) -> dict:
+        """Refreshes und Restlaufzeit des Access Tokens (für /metrics/crm)"""
+        return self.token_manager.get_metrics()
+    
+    def _forget_deleted(self, item_type: str, item_id: str):
+        """Gelöschten Datensatz aus Entity-Cache, Resolve-Memo und Lead-Index entfernen"""
+        if item_type not in SEARCH_MODULES:
+            return
+        self.entity_cache.invalidate(item_type, item_id)
+        self.resolve_cache.forget_id(item_id)
+        if item_type == "lead":
+            self.lead_index.remove("lead", item_id)
+    
+    def delete_items(self, item_type: str, item_ids: List[str], failed: Optional[list] = None) -> str:
+        """
+        Löscht mehrere Objekte eines Typs in einem Request (Batch-Undo).
+        Zoho erlaubt bis zu 100 IDs pro DELETE.
+        
+        Args:
+            failed: Optionale Liste, in die die nicht gelöschten IDs geschrieben werden
+                    (bereits gelöschte IDs zählen als Erfolg)
+        """
+        endpoint = DELETE_MODULES.get(item_type)
+        if not endpoint:
+            return "❌ Fehler: Unbekannter Typ."
+        
+        print(f"🗑️ Batch-Deleting {len(item_ids)} {item_type}(s) from {endpoint}...")
+        
+        deleted, missing, errors = 0, 0, []
+        for start in range(0, len(item_ids), 100):
+            chunk = item_ids[start:start + 100]
+            response = self._request("DELETE", endpoint, params={"ids": ",".join(chunk)})
+            
+            if not response or "data" not in response:
+                errors.extend(chunk)
+                continue
+            
+            for entry in response["data"]:
+                code = entry.get("code")
+                entry_id = entry.get("details", {}).get("id")
+                if code in ("SUCCESS", "INVALID_DATA"):
+                    # Nur wirklich gelöschte IDs vergessen (fehlgeschlagene bleiben in Cache/Index)
+                    if entry_id:
+                        self._forget_deleted(item_type, entry_id)
+                    if code == "SUCCESS":
+                        deleted += 1
+                    else:
+                        # ID existiert nicht (mehr)
+                        missing += 1
+                else:
+                    errors.append(entry_id or "?")
+        
+        if failed is not None:
+            failed.extend(errors)
+        if errors:
+            return f"❌ Fehler beim Löschen von {len(errors)} Einträgen ({deleted} gelöscht)."
+        
+        output = f"✅ {deleted} Einträge erfolgreich rückgängig gemacht."
+        if missing:
+            output += f" ({missing} waren bereits gelöscht)"
+        return output
@@ -0,0 +1,333 @@
+"""
+Zoho Lead-Index: Bulk Read Bootstrap + If-Modified-Since Delta-Sync
+
+Für große Zoho-Orgs sind auch vorgefilterte Suchen/Seiten-Scans zu langsam bzw.
+unvollständig (max. 2000 Datensätze ohne page_token). Der Sync hält die Leads
+kompakt (ID, Name, E-Mail, Firma, Telefon) im ContactIndex:
+
+- Bootstrap: Bulk Read Job (CSV im ZIP, bis 200.000 Datensätze pro Seite) im
+  Hintergrund-Thread - bis er fertig ist, sucht der Adapter wie bisher
+  (Search API / COQL)
+- Delta-Sync: GET Leads mit If-Modified-Since (High-Water-Mark Modified_Time)
+  und Leads/deleted für Löschungen, lazy beim Zugriff (304 = nichts geändert)
+- Full-Resync per Bulk Read in großem Abstand (Default: täglich)
+- Persistenz (optional): Snapshot als Datei oder in Postgres (crm_index_snapshots),
+  ein Restart lädt den Snapshot und holt nur das Delta
+
+Konfiguration via ENV (zusätzlich zu ZOHO_INDEX_* aus contact_index.py):
+    ZOHO_INDEX_STORE              none | file | postgres (Default: none)
+    ZOHO_INDEX_FILE               Pfad für "file" (Default: data/zoho_lead_index.json)
+    ZOHO_BULK_POLL_SECONDS        Abfrage-Intervall des Bulk Jobs (Default: 5)
+    ZOHO_BULK_TIMEOUT_SECONDS     Max. Laufzeit eines Bulk Jobs (Default: 900)
+"""
+
+import io
+import os
+import csv
+import json
+import time
+import zipfile
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from .contact_index import ContactIndex, normalize_key
+from .duplicate_check import duplicate_keys
+
+# Felder im Index (Bulk Read liefert die ID immer als Spalte "Id")
+LEAD_INDEX_FIELDS = ("First_Name", "Last_Name", "Email", "Company", "Phone", "Mobile", "Designation", "Modified_Time")
+
+# Bulk-Job Zustände laut Zoho
+BULK_DONE = "COMPLETED"
+BULK_FAILED = ("FAILURE", "FAILED")
+
+# Max. Seiten pro Delta-Sync (ohne page_token liefert Zoho max. 10 Seiten à 200)
+DELTA_MAX_PAGES = 10
+
+
+def compact_lead(row: dict) -> dict:
+    """Reduziert einen Lead (REST-JSON oder Bulk-CSV-Zeile) auf die Felder für Suche/Resolve"""
+    record = {"id": str(row.get("id") or row.get("Id") or "")}
+    for field in LEAD_INDEX_FIELDS:
+        value = row.get(field)
+        record[field] = value if value not in ("", None) else None
+    record["updatedAt"] = record.pop("Modified_Time")
+    return record
+
+
+def lead_keys(record: dict) -> list[str]:
+    name = f"{record.get('First_Name') or ''} {record.get('Last_Name') or ''}"
+    return [normalize_key(name), normalize_key(record.get("Email")),
+            *duplicate_keys(record.get("First_Name"), record.get("Last_Name"), record.get("Email"))]
+
+
+def parse_bulk_result(content: bytes) -> list[dict]:
+    """Bulk Read Ergebnis (ZIP mit einer CSV, notfalls reine CSV) -> kompakte Leads"""
+    if content[:2] == b"PK":
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            name = next(n for n in archive.namelist() if n.lower().endswith(".csv"))
+            content = archive.read(name)
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    return [compact_lead(row) for row in reader if row.get("Id") or row.get("id")]
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class FileIndexStore:
+    """Snapshot als JSON-Datei (ein Worker / Volume)"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        return snapshot if snapshot.get("key") == key else None
+
+    def save(self, key: str, snapshot: dict):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({**snapshot, "key": key}, f)
+        os.replace(tmp_path, self.path)  # Atomar: Nie halbe Snapshots lesen
+
+
+class PostgresIndexStore:
+    """Snapshot in Postgres (Tabelle crm_index_snapshots, geteilt über Worker)"""
+
+    def __init__(self, session_factory: Callable = None):
+        if session_factory is None:
+            from utils.database import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+
+    def load(self, key: str) -> Optional[dict]:
+        from models.crm_index_snapshot import CrmIndexSnapshot
+
+        with self.session_factory() as db:
+            row = db.get(CrmIndexSnapshot, key)
+            return json.loads(row.payload) if row else None
+
+    def save(self, key: str, snapshot: dict):
+        from models.crm_index_snapshot import CrmIndexSnapshot
+
+        with self.session_factory() as db:
+            db.merge(CrmIndexSnapshot(key=key, payload=json.dumps(snapshot, default=str),
+                                      record_count=len(snapshot.get("records", []))))
+            db.commit()
+
+
+def index_store_from_env(prefix: str = "ZOHO"):
+    """Snapshot-Store laut {prefix}_INDEX_STORE (None = nicht persistieren)"""
+    backend = os.getenv(f"{prefix}_INDEX_STORE", "none").strip().lower()
+    if backend == "file":
+        return FileIndexStore(os.getenv(f"{prefix}_INDEX_FILE", "data/zoho_lead_index.json"))
+    if backend == "postgres":
+        return PostgresIndexStore()
+    if backend not in ("", "none"):
+        print(f"⚠️ Unbekannter {prefix}_INDEX_STORE '{backend}', Index wird nicht persistiert")
+    return None
+
+
+class ZohoLeadSync:
+    """Hält den "lead"-Eintrag eines ContactIndex aktuell (Bulk Read + Delta)"""
+
+    def __init__(self, request: Callable, download: Callable, index: ContactIndex, key: str,
+                 store=None, poll_seconds: float = None, timeout_seconds: float = None):
+        """
+        Args:
+            request: ZohoCRM._request (method, endpoint, params, data, headers, api) -> JSON | {} | None
+            download: Pfad der Bulk-Ergebnisdatei -> Bytes | None
+            key: Schlüssel im Snapshot-Store (pro Org)
+        """
+        self.request = request
+        self.download = download
+        self.index = index
+        self.key = key
+        self.store = store
+        self.poll_seconds = float(os.getenv("ZOHO_BULK_POLL_SECONDS", "5")) if poll_seconds is None else poll_seconds
+        self.timeout_seconds = float(os.getenv("ZOHO_BULK_TIMEOUT_SECONDS", "900")) if timeout_seconds is None else timeout_seconds
+        self.deleted_since: Optional[str] = None
+        self.full_synced_at = 0.0  # Wanduhr des letzten Bulk Reads (überlebt Restarts im Snapshot)
+        self._bulk_thread: Optional[threading.Thread] = None
+        self._retry_at = 0.0
+        self._restored = False
+        self._delta_lock = threading.Lock()
+        self.bulk_jobs = 0
+        self.bulk_failures = 0
+        self.deltas = 0
+        self.last_bulk_seconds: Optional[float] = None
+
+    # === ZUGRIFF ===
+
+    def ensure_ready(self) -> bool:
+        """Fälligen Sync anstoßen; True, wenn der Index abgefragt werden kann"""
+        if not self.index.config.enabled:
+            return False
+        if not self.index.is_ready("lead") and not self._restored:
+            self._restored = True
+            self._restore()
+
+        mode = self.index.sync_mode("lead")
+        if mode == "full":
+            self._start_bulk()
+        elif mode == "delta":
+            self.index.mark_syncing("lead", mode)
+            self.sync_delta()
+        return self.index.is_ready("lead")
+
+    def _restore(self):
+        """Snapshot laden (Restart ohne Bulk Read), danach holt der Delta-Sync den Rest"""
+        if self.store is None:
+            return
+        try:
+            snapshot = self.store.load(self.key)
+        except Exception as e:
+            print(f"⚠️ Zoho Index Snapshot nicht lesbar: {e}")
+            return
+        if not snapshot or not snapshot.get("records"):
+            return
+        self.index.load_full("lead", snapshot["records"])
+        self.deleted_since = snapshot.get("deleted_since")
+        self.full_synced_at = snapshot.get("full_synced_at", 0.0)
+        self.index.request_delta("lead")
+        if self.full_synced_at < time.time() - self.index.config.full_resync_seconds:
+            self.index.invalidate("lead")
+        print(f"💾 Zoho Index aus Snapshot: {len(snapshot['records'])} Leads")
+
+    def _persist(self):
+        if self.store is None:
+            return
+        try:
+            self.store.save(self.key, {
+                "records": self.index.records("lead"),
+                "deleted_since": self.deleted_since,
+                "full_synced_at": self.full_synced_at,
+            })
+        except Exception as e:
+            print(f"⚠️ Zoho Index Snapshot nicht gespeichert: {e}")
+
+    # === BULK READ ===
+
+    def _start_bulk(self):
+        if (self._bulk_thread and self._bulk_thread.is_alive()) or time.time() < self._retry_at:
+            return
+        self.index.mark_syncing("lead", "full")
+        self._bulk_thread = threading.Thread(target=self.run_bulk, name="zoho-bulk-read", daemon=True)
+        self._bulk_thread.start()
+
+    def run_bulk(self) -> bool:
+        """Kompletter Bulk Read (alle Seiten) -> Index ersetzen"""
+        started, started_iso = time.time(), _utc_now_iso()
+        records, page = [], 1
+        try:
+            while True:
+                result = self._bulk_page(page)
+                records.extend(parse_bulk_result(result["content"]))
+                if not result.get("more_records"):
+                    break
+                page += 1
+        except Exception as e:
+            self.bulk_failures += 1
+            self._retry_at = time.time() + max(60.0, self.index.config.refresh_seconds)
+            print(f"❌ Zoho Bulk Read fehlgeschlagen: {e}")
+            return False
+
+        self.index.load_full("lead", records)
+        self.deleted_since = started_iso
+        self.full_synced_at = started
+        self.bulk_jobs += 1
+        self.last_bulk_seconds = round(time.time() - started, 1)
+        self._persist()
+        return True
+
+    def _bulk_page(self, page: int) -> dict:
+        """Ein Bulk Read Job: anlegen, bis COMPLETED abfragen, ZIP laden"""
+        query = {"module": {"api_name": "Leads"}, "fields": list(LEAD_INDEX_FIELDS), "page": page}
+        response = self.request("POST", "read", data={"query": query}, api="crm/bulk/v8")
+        job_id = (((response or {}).get("data") or [{}])[0].get("details") or {}).get("id")
+        if not job_id:
+            raise RuntimeError(f"Bulk Job nicht angelegt: {response}")
+        print(f"📦 Zoho Bulk Read Job {job_id} (Seite {page})")
+
+        deadline = time.time() + self.timeout_seconds
+        while True:
+            status = self.request("GET", f"read/{job_id}", api="crm/bulk/v8")
+            job = ((status or {}).get("data") or [{}])[0]
+            state = job.get("state")
+            if state == BULK_DONE:
+                break
+            if state in BULK_FAILED:
+                raise RuntimeError(f"Bulk Job {job_id}: {state}")
+            if time.time() > deadline:
+                raise TimeoutError(f"Bulk Job {job_id} nach {self.timeout_seconds:.0f}s nicht fertig")
+            time.sleep(self.poll_seconds)
+
+        result = job.get("result") or {}
+        content = self.download(result.get("download_url") or f"/crm/bulk/v8/read/{job_id}/result")
+        if content is None:
+            raise RuntimeError(f"Bulk Ergebnis {job_id} nicht ladbar")
+        return {"content": content, "more_records": result.get("more_records", False)}
+
+    # === DELTA ===
+
+    def sync_delta(self) -> bool:
+        """Geänderte (If-Modified-Since) und gelöschte Leads seit dem letzten Sync übernehmen"""
+        if not self._delta_lock.acquire(blocking=False):
+            return False  # Läuft schon in einem anderen Thread, bestehender Stand bleibt nutzbar
+        try:
+            started_iso = _utc_now_iso()
+            high_water = self.index.high_water("lead")
+            modified = []
+            params = {"fields": ",".join(("id",) + LEAD_INDEX_FIELDS), "per_page": 200,
+                      "sort_by": "Modified_Time", "sort_order": "asc"}
+            headers = {"If-Modified-Since": high_water} if high_water else None
+            for page in range(1, DELTA_MAX_PAGES + 1):
+                response = self.request("GET", "Leads", params={**params, "page": page}, headers=headers)
+                if response is None:
+                    return False
+                modified.extend(compact_lead(row) for row in response.get("data") or [])
+                if not (response.get("info") or {}).get("more_records"):
+                    break
+
+            deleted = []
+            if self.deleted_since:
+                response = self.request("GET", "Leads/deleted", params={"type": "all", "per_page": 200},
+                                        headers={"If-Modified-Since": self.deleted_since})
+                if response is None:
+                    return False
+                deleted = [row.get("id") for row in response.get("data") or [] if row.get("id")]
+            self.deleted_since = started_iso
+
+            self.index.apply_delta("lead", modified)
+            for lead_id in deleted:
+                self.index.remove("lead", str(lead_id))
+            self.deltas += 1
+            if deleted:
+                print(f"📇 Zoho Index: {len(deleted)} Leads gelöscht")
+            if modified or deleted:
+                self._persist()
+            return True
+        finally:
+            self._delta_lock.release()
+
+    def get_metrics(self) -> dict:
+        stats = self.index.stats()["lead"]
+        return {
+            "enabled": self.index.config.enabled,
+            "ready": stats["ready"],
+            "records": stats["records"],
+            "high_water": stats["high_water"],
+            "store": type(self.store).__name__ if self.store is not None else None,
+            "bulk_jobs": self.bulk_jobs,
+            "bulk_failures": self.bulk_failures,
+            "last_bulk_seconds": self.last_bulk_seconds,
+            "deltas": self.deltas,
+        }
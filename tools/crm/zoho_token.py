@@ -0,0 +1,235 @@
+"""
+Zoho OAuth Token Manager
+
+Zoho limitiert Token-Refreshes pro Refresh Token hart. Bisher hat jeder Tool-Call
+mit abgelaufenem Token selbst refresht (parallele Calls parallel, jeder Worker und
+jeder Restart separat). Der Manager sorgt dafür, dass:
+
+- Single-Flight: Pro Prozess läuft höchstens ein Refresh, alle anderen warten
+  und bekommen dessen Token
+- Proaktiv: Ein Hintergrund-Thread erneuert den Token refresh_margin_seconds vor
+  Ablauf - der Request-Pfad refresht nur noch, wenn das fehlgeschlagen ist
+- Geteilt (optional): Backend "postgres" speichert den Access Token in
+  crm_oauth_tokens. Worker/Restarts übernehmen einen gültigen Token, statt neu zu
+  refreshen; ein Advisory Lock sorgt für einen Refresh über alle Worker
+- 401 INVALID_TOKEN: refresh(stale_token=...) erneuert genau einmal, auch wenn
+  mehrere Requests gleichzeitig mit demselben alten Token scheitern
+
+Konfiguration via ENV:
+    ZOHO_TOKEN_REFRESH_MARGIN_SECONDS   Proaktiver Refresh vor Ablauf (Default: 300)
+    ZOHO_TOKEN_BACKGROUND_REFRESH       Hintergrund-Thread nutzen (Default: true)
+    ZOHO_TOKEN_STORE                    "memory" oder "postgres" (Default: memory)
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+
+# Token gilt im Request-Pfad bis kurz vor Ablauf (Uhrenabweichung, Laufzeit des Requests)
+EXPIRY_SKEW_SECONDS = 30
+
+# Wartezeit nach fehlgeschlagenem Hintergrund-Refresh
+BACKGROUND_RETRY_SECONDS = 30
+
+
+@dataclass
+class TokenConfig:
+    """Refresh-Verhalten des Token Managers"""
+    refresh_margin_seconds: float = 300.0
+    background_refresh: bool = True
+    store: str = "memory"
+
+    @classmethod
+    def from_env(cls, prefix: str = "ZOHO") -> "TokenConfig":
+        defaults = cls()
+
+        def number(name, default, cast):
+            try:
+                return cast(os.getenv(f"{prefix}_{name}", default))
+            except ValueError:
+                print(f"⚠️ Ungültiger Wert für {prefix}_{name}, nutze Default {default}")
+                return default
+
+        store = os.getenv(f"{prefix}_TOKEN_STORE", defaults.store).strip().lower()
+        if store not in ("memory", "postgres"):
+            print(f"⚠️ Unbekannter {prefix}_TOKEN_STORE '{store}', nutze memory")
+            store = "memory"
+        return cls(
+            refresh_margin_seconds=number("TOKEN_REFRESH_MARGIN_SECONDS", defaults.refresh_margin_seconds, float),
+            background_refresh=os.getenv(f"{prefix}_TOKEN_BACKGROUND_REFRESH", "true").strip().lower() not in ("0", "false", "no", "off"),
+            store=store,
+        )
+
+
+class PostgresTokenStore:
+    """Geteilter Access Token (Tabelle crm_oauth_tokens, siehe Alembic-Migration)"""
+
+    def __init__(self, session_factory: Callable = None):
+        if session_factory is None:
+            from utils.database import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+
+    @contextmanager
+    def locked(self, key: str):
+        """Session mit Advisory Lock (nur PostgreSQL) - ein Refresh über alle Worker"""
+        from sqlalchemy import text
+
+        with self.session_factory() as db:
+            if db.get_bind().dialect.name == "postgresql":
+                db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": key})
+            yield db
+            db.commit()  # Gibt den Lock frei
+
+    def load(self, key: str, db=None) -> Optional[Tuple[str, float]]:
+        """(access_token, expires_at als Unix-Zeit) oder None"""
+        from models.crm_oauth_token import CrmOAuthToken
+
+        if db is None:
+            with self.session_factory() as db:
+                return self.load(key, db)
+        row = db.get(CrmOAuthToken, key)
+        if row is None:
+            return None
+        return row.access_token, (row.expires_at - datetime(1970, 1, 1)).total_seconds()
+
+    def save(self, key: str, access_token: str, expires_at: float, db=None):
+        from models.crm_oauth_token import CrmOAuthToken
+
+        if db is None:
+            with self.session_factory() as db:
+                self.save(key, access_token, expires_at, db)
+                db.commit()
+            return
+        db.merge(CrmOAuthToken(
+            key=key, access_token=access_token,
+            expires_at=datetime(1970, 1, 1) + timedelta(seconds=expires_at),
+        ))
+
+
+class ZohoTokenManager:
+    """Single-Flight Refresh + Hintergrund-Refresh + optionaler geteilter Store"""
+
+    def __init__(self, fetch: Callable[[], Tuple[str, float]], key: str, config: TokenConfig = None,
+                 store: PostgresTokenStore = None):
+        """
+        Args:
+            fetch: Holt einen neuen Token beim CRM -> (access_token, expires_in Sekunden)
+            key: Schlüssel im Store (pro Client)
+        """
+        self.fetch = fetch
+        self.key = key
+        self.config = config or TokenConfig()
+        if store is None and self.config.store == "postgres":
+            store = PostgresTokenStore()
+        self.store = store
+        self.access_token: Optional[str] = None
+        self.expires_at: float = 0.0
+        self._lock = threading.Lock()
+        self._background: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self.refreshes = 0
+        self.adopted = 0
+
+    def is_valid(self, now: float = None) -> bool:
+        now = time.time() if now is None else now
+        return bool(self.access_token) and now < self.expires_at - EXPIRY_SKEW_SECONDS
+
+    def get_token(self) -> str:
+        """Gültiger Access Token - refresht nur, wenn keiner da ist (ohne Lock im Normalfall)"""
+        if self.is_valid():
+            return self.access_token
+        return self.refresh()
+
+    def refresh(self, stale_token: str = None, proactive: bool = False) -> str:
+        """
+        Single-Flight Refresh.
+
+        Args:
+            stale_token: Token, der vom CRM abgelehnt wurde (401). Hat ein anderer
+                         Thread inzwischen einen neuen geholt, wird der zurückgegeben.
+            proactive: Hintergrund-Refresh vor Ablauf (auch bei noch gültigem Token)
+        """
+        with self._lock:
+            if stale_token is not None:
+                if self.access_token and self.access_token != stale_token and self.is_valid():
+                    return self.access_token
+            elif not proactive and self.is_valid():
+                return self.access_token  # Anderer Thread hat gerade refresht
+
+            if self.store is None:
+                self._fetch()
+            else:
+                self._refresh_shared(stale_token, proactive)
+            self._ensure_background()
+            return self.access_token
+
+    def _fetch(self):
+        access_token, expires_in = self.fetch()
+        self.access_token = access_token
+        self.expires_at = time.time() + float(expires_in)
+        self.refreshes += 1
+
+    def _refresh_shared(self, stale_token: Optional[str], proactive: bool):
+        """Refresh über alle Worker: Lock, gültigen Token übernehmen oder selbst holen und speichern"""
+        try:
+            with self.store.locked(self.key) as db:
+                shared = self.store.load(self.key, db)
+                if shared:
+                    token, expires_at = shared
+                    fresh = token != stale_token and time.time() < expires_at - EXPIRY_SKEW_SECONDS
+                    if proactive:
+                        fresh = fresh and token != self.access_token
+                    if fresh:
+                        self.access_token, self.expires_at = token, expires_at
+                        self.adopted += 1
+                        print("🔑 Zoho Token aus geteiltem Store übernommen")
+                        return
+                self._fetch()
+                self.store.save(self.key, self.access_token, self.expires_at, db)
+        except ValueError:
+            raise
+        except Exception as e:
+            # Store nicht erreichbar -> lokal refreshen (Token-Fluss darf nicht am Cache hängen)
+            print(f"⚠️ Zoho Token Store Fehler: {e}")
+            self._fetch()
+
+    # === HINTERGRUND-REFRESH ===
+
+    def _ensure_background(self):
+        if not self.config.background_refresh or (self._background and self._background.is_alive()):
+            return
+        self._background = threading.Thread(target=self._background_loop, name="zoho-token-refresh", daemon=True)
+        self._background.start()
+
+    def _background_loop(self):
+        delay = None
+        while True:
+            if delay is None:
+                delay = self.expires_at - self.config.refresh_margin_seconds - time.time()
+            if self._wakeup.wait(max(1.0, delay)):
+                return
+            try:
+                self.refresh(proactive=True)
+                print("🔄 Zoho Token proaktiv erneuert")
+                delay = None
+            except Exception as e:
+                print(f"⚠️ Proaktiver Zoho Token Refresh fehlgeschlagen: {e}")
+                delay = BACKGROUND_RETRY_SECONDS
+
+    def stop(self):
+        """Beendet den Hintergrund-Thread (Tests / Shutdown)"""
+        self._wakeup.set()
+
+    def get_metrics(self) -> dict:
+        return {
+            "store": "postgres" if self.store is not None else "memory",
+            "valid": self.is_valid(),
+            "expires_in_seconds": max(0, round(self.expires_at - time.time())),
+            "refreshes": self.refreshes,
+            "adopted": self.adopted,
+        }
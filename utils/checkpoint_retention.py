@@ -0,0 +1,306 @@
+"""
+Adizon - Checkpoint Retention
+Hält die LangGraph Checkpoint-Tabellen klein:
+
+- Max Age:      Threads, deren neuester Checkpoint älter als N Tage ist,
+                werden komplett gelöscht (User kommt nicht wieder)
+- Max Versions: Pro Thread bleiben nur die neuesten N Checkpoints erhalten
+
+Gelöscht wird in kleinen Batches (je eine Transaktion) mit Pause dazwischen,
+damit Autovacuum mithalten kann und keine langen Locks entstehen.
+
+Läuft als Background-Task im Server (CHECKPOINT_RETENTION_INTERVAL_HOURS)
+oder manuell als CLI:
+
+    python -m utils.checkpoint_retention --max-age-days 30 --max-versions 5
+    python -m utils.checkpoint_retention --dry-run
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from utils.checkpointing import PRUNE_WRITES_SQL, PRUNE_BLOBS_SQL
+
+
+# === CONFIG ===
+
+@dataclass
+class RetentionPolicy:
+    """Retention-Konfiguration (0 = deaktiviert)"""
+    max_age_days: int = 30
+    max_versions: int = 5
+    batch_size: int = 500
+    pause_seconds: float = 0.5
+    interval_hours: float = 6.0
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        """Liest die Policy aus CHECKPOINT_* Environment Variablen"""
+        return cls(
+            max_age_days=int(os.getenv("CHECKPOINT_MAX_AGE_DAYS", "30")),
+            max_versions=int(os.getenv("CHECKPOINT_MAX_VERSIONS", "5")),
+            batch_size=int(os.getenv("CHECKPOINT_RETENTION_BATCH_SIZE", "500")),
+            pause_seconds=float(os.getenv("CHECKPOINT_RETENTION_PAUSE_SECONDS", "0.5")),
+            interval_hours=float(os.getenv("CHECKPOINT_RETENTION_INTERVAL_HOURS", "6")),
+        )
+
+
+@dataclass
+class RetentionReport:
+    """Ergebnis eines Retention-Laufs"""
+    threads_deleted: int = 0
+    checkpoints_deleted: int = 0
+    batches: int = 0
+    duration_seconds: float = 0.0
+    dry_run: bool = False
+    errors: list[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        prefix = "🔍 Dry-Run" if self.dry_run else "🧹 Retention"
+        return (
+            f"{prefix}: {self.threads_deleted} Threads, "
+            f"{self.checkpoints_deleted} Checkpoints in {self.batches} Batches "
+            f"({self.duration_seconds:.1f}s)"
+        )
+
+
+# === SQL ===
+
+# Threads, deren NEUESTER Checkpoint älter als der Cutoff ist
+SELECT_STALE_THREADS_SQL = """
+    SELECT thread_id
+    FROM checkpoints
+    GROUP BY thread_id
+    HAVING max((checkpoint ->> 'ts')::timestamptz) < %s
+    LIMIT %s
+"""
+
+COUNT_STALE_THREADS_SQL = """
+    SELECT count(*) FROM (
+        SELECT thread_id
+        FROM checkpoints
+        GROUP BY thread_id
+        HAVING max((checkpoint ->> 'ts')::timestamptz) < %s
+    ) stale
+"""
+
+# Checkpoints jenseits der neuesten N pro Thread/Namespace
+# checkpoint_id ist eine UUIDv6 -> lexikografisch = zeitlich sortiert
+EXCESS_VERSIONS_CTE = """
+    SELECT thread_id, checkpoint_ns, checkpoint_id
+    FROM (
+        SELECT thread_id, checkpoint_ns, checkpoint_id,
+               row_number() OVER (
+                   PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+               ) AS rn
+        FROM checkpoints
+    ) ranked
+    WHERE rn > %s
+"""
+
+DELETE_EXCESS_VERSIONS_SQL = f"""
+    WITH doomed AS ({EXCESS_VERSIONS_CTE} LIMIT %s)
+    DELETE FROM checkpoints c
+    USING doomed d
+    WHERE c.thread_id = d.thread_id
+      AND c.checkpoint_ns = d.checkpoint_ns
+      AND c.checkpoint_id = d.checkpoint_id
+    RETURNING c.thread_id
+"""
+
+COUNT_EXCESS_VERSIONS_SQL = f"SELECT count(*) FROM ({EXCESS_VERSIONS_CTE}) excess"
+
+# Reihenfolge wie clear_user_session(): writes -> blobs -> checkpoints
+DELETE_THREADS_SQL = (
+    "DELETE FROM checkpoint_writes WHERE thread_id = ANY(%s)",
+    "DELETE FROM checkpoint_blobs WHERE thread_id = ANY(%s)",
+    "DELETE FROM checkpoints WHERE thread_id = ANY(%s)",
+)
+
+CHECKPOINT_TABLES = ("checkpoints", "checkpoint_blobs", "checkpoint_writes")
+
+
+# === RETENTION ===
+
+async def _delete_stale_threads(
+    pool: Any,
+    policy: RetentionPolicy,
+    report: RetentionReport,
+    on_progress: Optional[Callable[[RetentionReport], None]],
+) -> None:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=policy.max_age_days)
+
+    while True:
+        async with pool.connection() as conn:
+            cur = await conn.execute(SELECT_STALE_THREADS_SQL, (cutoff, policy.batch_size))
+            thread_ids = [row[0] for row in await cur.fetchall()]
+            if not thread_ids:
+                return
+
+            await conn.execute(DELETE_THREADS_SQL[0], (thread_ids,))
+            await conn.execute(DELETE_THREADS_SQL[1], (thread_ids,))
+            cur = await conn.execute(DELETE_THREADS_SQL[2], (thread_ids,))
+
+        report.threads_deleted += len(thread_ids)
+        report.checkpoints_deleted += cur.rowcount or 0
+        report.batches += 1
+        print(f"   🗑️ Batch {report.batches}: {len(thread_ids)} abgelaufene Threads gelöscht "
+              f"({report.threads_deleted} gesamt)")
+        if on_progress:
+            on_progress(report)
+
+        if len(thread_ids) < policy.batch_size:
+            return
+        await asyncio.sleep(policy.pause_seconds)
+
+
+async def _delete_excess_versions(
+    pool: Any,
+    policy: RetentionPolicy,
+    report: RetentionReport,
+    on_progress: Optional[Callable[[RetentionReport], None]],
+) -> None:
+    while True:
+        async with pool.connection() as conn:
+            cur = await conn.execute(DELETE_EXCESS_VERSIONS_SQL, (policy.max_versions, policy.batch_size))
+            thread_ids = list({row[0] for row in await cur.fetchall()})
+            deleted = cur.rowcount or 0
+            if not deleted:
+                return
+
+            # Writes und Blobs aufräumen, die nur an gelöschten Checkpoints hingen
+            await conn.execute(PRUNE_WRITES_SQL, (thread_ids,))
+            await conn.execute(PRUNE_BLOBS_SQL, (thread_ids,))
+
+        report.checkpoints_deleted += deleted
+        report.batches += 1
+        print(f"   🗑️ Batch {report.batches}: {deleted} alte Checkpoint-Versionen gelöscht "
+              f"({report.checkpoints_deleted} gesamt)")
+        if on_progress:
+            on_progress(report)
+
+        if deleted < policy.batch_size:
+            return
+        await asyncio.sleep(policy.pause_seconds)
+
+
+async def run_retention(
+    pool: Any,
+    policy: Optional[RetentionPolicy] = None,
+    dry_run: bool = False,
+    on_progress: Optional[Callable[[RetentionReport], None]] = None,
+) -> RetentionReport:
+    """
+    Führt einen Retention-Lauf aus (Max Age, dann Max Versions).
+
+    Args:
+        pool: psycopg AsyncConnectionPool
+        policy: RetentionPolicy (Default: aus Environment)
+        dry_run: Nur zählen, nichts löschen
+        on_progress: Optionaler Callback nach jedem Batch
+
+    Returns:
+        RetentionReport mit Anzahl gelöschter Threads/Checkpoints
+    """
+    policy = policy or RetentionPolicy.from_env()
+    report = RetentionReport(dry_run=dry_run)
+    started = time.monotonic()
+
+    print(f"🧹 Checkpoint Retention: max_age={policy.max_age_days}d, "
+          f"max_versions={policy.max_versions}, batch={policy.batch_size}")
+
+    try:
+        if dry_run:
+            async with pool.connection() as conn:
+                if policy.max_age_days > 0:
+                    cutoff = datetime.now(timezone.utc) - timedelta(days=policy.max_age_days)
+                    cur = await conn.execute(COUNT_STALE_THREADS_SQL, (cutoff,))
+                    report.threads_deleted = (await cur.fetchone())[0]
+                if policy.max_versions > 0:
+                    cur = await conn.execute(COUNT_EXCESS_VERSIONS_SQL, (policy.max_versions,))
+                    report.checkpoints_deleted = (await cur.fetchone())[0]
+        else:
+            if policy.max_age_days > 0:
+                await _delete_stale_threads(pool, policy, report, on_progress)
+            if policy.max_versions > 0:
+                await _delete_excess_versions(pool, policy, report, on_progress)
+    except Exception as e:
+        print(f"⚠️ Checkpoint retention failed: {e}")
+        report.errors.append(str(e))
+
+    report.duration_seconds = time.monotonic() - started
+    print(report.summary())
+    return report
+
+
+async def run_retention_loop(pool: Any, policy: Optional[RetentionPolicy] = None) -> None:
+    """
+    Background-Task: Führt die Retention alle `interval_hours` aus.
+    Wird im Server-Lifespan gestartet und beim Shutdown gecancelt.
+    """
+    policy = policy or RetentionPolicy.from_env()
+    if policy.interval_hours <= 0:
+        print("ℹ️ Checkpoint retention job disabled")
+        return
+
+    print(f"⏰ Checkpoint retention job every {policy.interval_hours}h")
+    while True:
+        await run_retention(pool, policy)
+        await asyncio.sleep(policy.interval_hours * 3600)
+
+
+async def vacuum_checkpoint_tables(conninfo: str) -> None:
+    """
+    VACUUM (ANALYZE) auf den Checkpoint-Tabellen.
+    Benötigt eine autocommit Connection (VACUUM läuft nicht in Transaktionen).
+    """
+    import psycopg
+
+    async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+        for table in CHECKPOINT_TABLES:
+            print(f"   🧽 VACUUM (ANALYZE) {table}")
+            await conn.execute(f"VACUUM (ANALYZE) {table}")
+
+
+# === CLI ===
+
+async def _main(args: argparse.Namespace) -> int:
+    from psycopg_pool import AsyncConnectionPool
+    from utils.checkpointing import get_pg_conninfo
+    from utils.database import DATABASE_URL
+
+    policy = RetentionPolicy.from_env()
+    if args.max_age_days is not None:
+        policy.max_age_days = args.max_age_days
+    if args.max_versions is not None:
+        policy.max_versions = args.max_versions
+    if args.batch_size is not None:
+        policy.batch_size = args.batch_size
+    if args.pause is not None:
+        policy.pause_seconds = args.pause
+
+    conninfo = get_pg_conninfo(DATABASE_URL)
+    async with AsyncConnectionPool(conninfo=conninfo, min_size=1, max_size=2, open=False) as pool:
+        report = await run_retention(pool, policy, dry_run=args.dry_run)
+
+    if args.vacuum and not args.dry_run:
+        await vacuum_checkpoint_tables(conninfo)
+
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Adizon Checkpoint Retention")
+    parser.add_argument("--max-age-days", type=int, help="Threads ohne Aktivität seit N Tagen löschen (0 = aus)")
+    parser.add_argument("--max-versions", type=int, help="Max. Checkpoints pro Thread (0 = aus)")
+    parser.add_argument("--batch-size", type=int, help="Zeilen/Threads pro Batch")
+    parser.add_argument("--pause", type=float, help="Pause zwischen Batches in Sekunden")
+    parser.add_argument("--dry-run", action="store_true", help="Nur zählen, nichts löschen")
+    parser.add_argument("--vacuum", action="store_true", help="Danach VACUUM (ANALYZE) ausführen")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
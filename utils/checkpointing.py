@@ -0,0 +1,146 @@
+"""
+Adizon - Checkpoint Persistence Modes
+Steuert, wie oft LangGraph Checkpoints nach PostgreSQL schreibt.
+
+Modi (Env: CHECKPOINT_MODE):
+- full:   Checkpoint nach JEDEM Node (LangGraph Default, Time-Travel möglich)
+- exit:   Nur ein Checkpoint am Ende jedes Turns (keine Zwischen-Checkpoints)
+- latest: Wie "exit", zusätzlich werden ältere Checkpoints des Threads gelöscht
+          (pro Thread bleibt nur der neueste Stand)
+
+Wir nutzen kein Time-Travel - "latest" spart Schreib-I/O und Speicher.
+"""
+
+import os
+import inspect
+from typing import Any
+
+PERSISTENCE_MODES = ("full", "exit", "latest")
+DEFAULT_PERSISTENCE_MODE = "full"
+
+
+def get_pg_conninfo(database_url: str) -> str:
+    """
+    Konvertiert die SQLAlchemy DATABASE_URL in ein libpq/psycopg Format.
+
+    SQLAlchemy: postgresql+psycopg://... -> libpq: postgres://...
+    """
+    pg_url = database_url
+    if "+psycopg" in pg_url:
+        pg_url = pg_url.replace("+psycopg", "")
+    # Manche Tools erwarten postgres:// statt postgresql://
+    if pg_url.startswith("postgresql://"):
+        pg_url = pg_url.replace("postgresql://", "postgres://", 1)
+    return pg_url
+
+
+def get_persistence_mode() -> str:
+    """
+    Liest den Persistence-Modus aus der Environment Variable CHECKPOINT_MODE.
+
+    Returns:
+        "full", "exit" oder "latest" (Fallback: "full" bei ungültigem Wert)
+    """
+    mode = os.getenv("CHECKPOINT_MODE", DEFAULT_PERSISTENCE_MODE).strip().lower()
+    if mode not in PERSISTENCE_MODES:
+        print(f"⚠️ Unbekannter CHECKPOINT_MODE='{mode}' - nutze '{DEFAULT_PERSISTENCE_MODE}'")
+        return DEFAULT_PERSISTENCE_MODE
+    return mode
+
+
+def get_invoke_kwargs(graph: Any, persistence_mode: str) -> dict:
+    """
+    Liefert die Invoke-Parameter für den Persistence-Modus.
+
+    LangGraph >= 0.6 nutzt `durability="exit"`, ältere Versionen
+    `checkpoint_during=False`. Wir prüfen die Signatur von `astream`,
+    damit beide Versionen funktionieren.
+
+    Args:
+        graph: Kompilierter StateGraph
+        persistence_mode: "full", "exit" oder "latest"
+
+    Returns:
+        Dict mit zusätzlichen kwargs für graph.ainvoke()
+    """
+    if persistence_mode == "full":
+        return {}
+
+    params = inspect.signature(graph.astream).parameters
+    if "durability" in params:
+        return {"durability": "exit"}
+    if "checkpoint_during" in params:
+        return {"checkpoint_during": False}
+
+    print("⚠️ LangGraph-Version unterstützt kein Exit-Checkpointing - schreibe volle Checkpoints")
+    return {}
+
+
+# === PRUNING (latest-only) ===
+
+# Löscht alle Checkpoints eines Threads außer den neuesten N (pro Namespace).
+# checkpoint_id ist eine UUIDv6 -> lexikografisch = zeitlich sortiert.
+PRUNE_CHECKPOINTS_SQL = """
+    DELETE FROM checkpoints c
+    USING (
+        SELECT thread_id, checkpoint_ns, checkpoint_id,
+               row_number() OVER (
+                   PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+               ) AS rn
+        FROM checkpoints
+        WHERE thread_id = %s
+    ) ranked
+    WHERE c.thread_id = ranked.thread_id
+      AND c.checkpoint_ns = ranked.checkpoint_ns
+      AND c.checkpoint_id = ranked.checkpoint_id
+      AND ranked.rn > %s
+"""
+
+# Pending Writes gehören zu einem Checkpoint - ohne Checkpoint sind sie tot
+PRUNE_WRITES_SQL = """
+    DELETE FROM checkpoint_writes w
+    WHERE w.thread_id = ANY(%s)
+      AND NOT EXISTS (
+          SELECT 1 FROM checkpoints c
+          WHERE c.thread_id = w.thread_id
+            AND c.checkpoint_ns = w.checkpoint_ns
+            AND c.checkpoint_id = w.checkpoint_id
+      )
+"""
+
+# Blobs sind pro (channel, version) gespeichert - nur referenzierte behalten
+PRUNE_BLOBS_SQL = """
+    DELETE FROM checkpoint_blobs b
+    WHERE b.thread_id = ANY(%s)
+      AND NOT EXISTS (
+          SELECT 1 FROM checkpoints c
+          WHERE c.thread_id = b.thread_id
+            AND c.checkpoint_ns = b.checkpoint_ns
+            AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+      )
+"""
+
+
+async def prune_thread_checkpoints(pool: Any, thread_id: str, keep_latest: int = 1) -> int:
+    """
+    Löscht ältere Checkpoints eines Threads (inkl. Writes und verwaister Blobs).
+
+    Args:
+        pool: psycopg AsyncConnectionPool
+        thread_id: LangGraph Thread-ID (= user_id)
+        keep_latest: Anzahl der neuesten Checkpoints, die erhalten bleiben
+
+    Returns:
+        Anzahl gelöschter Checkpoints (0 bei Fehler)
+    """
+    try:
+        async with pool.connection() as conn:
+            cur = await conn.execute(PRUNE_CHECKPOINTS_SQL, (thread_id, keep_latest))
+            deleted = cur.rowcount or 0
+            if deleted:
+                await conn.execute(PRUNE_WRITES_SQL, ([thread_id],))
+                await conn.execute(PRUNE_BLOBS_SQL, ([thread_id],))
+            return deleted
+    except Exception as e:
+        print(f"⚠️ Checkpoint pruning failed for {thread_id}: {e}")
+        return 0